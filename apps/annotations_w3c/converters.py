@@ -2,8 +2,9 @@
 
 Derived view layer over the canonical models (no new storage): an image region
 is a `Graph`; a text↔region link is a `corresp`/`data-graph-id` reference from
-the TEI to a TEXT-typed Graph. These converters serve that data as standard
-W3C Web Annotations so external scholarly tools can consume it.
+the TEI to a TEXT-typed Graph, stored as a `TextLink` row. These converters
+serve that data as standard W3C Web Annotations so external scholarly tools
+can consume it.
 
 - `graph_to_w3c(graph)` — a region annotation (SVG + bbox selectors on the IIIF
   image), motivation by type.
@@ -16,8 +17,6 @@ from __future__ import annotations
 import json
 from typing import Any, cast
 
-from apps.manuscripts.services.tei import parse_graph_refs
-
 W3C_CONTEXT = "http://www.w3.org/ns/anno.jsonld"
 
 _MOTIVATION = {
@@ -136,7 +135,7 @@ def imagetext_to_w3c(
 ) -> dict[str, Any]:
     """Convert an ImageText to a W3C AnnotationPage.
 
-    Each in-text graph reference becomes an annotation whose target combines a
+    Each of the text's links becomes an annotation whose target combines a
     TextQuoteSelector (the element's text within this ImageText) with the image
     region of its linked Graph (when resolvable). `graph_lookup` maps graph id →
     Graph; if omitted, region geometry is omitted.
@@ -144,39 +143,38 @@ def imagetext_to_w3c(
     text_uri = f"{base_url}/api/v1/manuscripts/image-texts/{image_text.id}/"
     items: list[dict[str, Any]] = []
 
-    for ref in parse_graph_refs(image_text.content or ""):
-        for gid in ref.graph_ids:
-            targets: list[dict[str, Any]] = [
-                {
-                    "source": text_uri,
-                    "selector": {"type": "TextQuoteSelector", "exact": ref.text},
-                }
-            ]
-            graph = graph_lookup.get(gid) if graph_lookup else None
-            if graph is not None:
-                region: dict[str, Any] = {"type": "Image"}
-                source = _image_source(graph)
-                if source:
-                    region["source"] = source
-                selectors = _selectors(graph.annotation or {}, image_height)
-                if selectors:
-                    region["selector"] = selectors
-                targets.append(region)
-            items.append(
-                {
-                    "id": f"{base_url}/api/v1/annotations-w3c/image-texts/{image_text.id}/{gid}/",
-                    "type": "Annotation",
-                    "motivation": "identifying",
-                    "body": [
-                        {
-                            "type": "TextualBody",
-                            "value": ref.type or ref.element,
-                            "purpose": "tagging",
-                        }
-                    ],
-                    "target": targets,
-                }
-            )
+    for link in image_text.links.all():
+        targets: list[dict[str, Any]] = [
+            {
+                "source": text_uri,
+                "selector": {"type": "TextQuoteSelector", "exact": link.text},
+            }
+        ]
+        graph = graph_lookup.get(link.graph_id) if graph_lookup else None
+        if graph is not None:
+            region: dict[str, Any] = {"type": "Image"}
+            source = _image_source(graph)
+            if source:
+                region["source"] = source
+            selectors = _selectors(graph.annotation or {}, image_height)
+            if selectors:
+                region["selector"] = selectors
+            targets.append(region)
+        items.append(
+            {
+                "id": f"{base_url}/api/v1/annotations-w3c/image-texts/{image_text.id}/{link.graph_id}/",
+                "type": "Annotation",
+                "motivation": "identifying",
+                "body": [
+                    {
+                        "type": "TextualBody",
+                        "value": link.type or link.element,
+                        "purpose": "tagging",
+                    }
+                ],
+                "target": targets,
+            }
+        )
 
     return {
         "@context": W3C_CONTEXT,
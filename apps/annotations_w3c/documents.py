@@ -0,0 +1,29 @@
+"""W3C documents built from the models, shared by the views and static publishing."""
+
+from typing import Any
+
+from apps.annotations.models import Graph
+
+from .converters import graph_to_w3c, imagetext_to_w3c
+
+
+def image_height(image) -> int | None:
+    """A graph/image's stored pixel height for the Y-flip; None if unknown."""
+    return image.height or None
+
+
+def graph_annotation_document(graph, *, base_url: str) -> dict[str, Any]:
+    """A single image region as a W3C Web Annotation."""
+    return graph_to_w3c(graph, base_url=base_url, image_height=image_height(graph.item_image))
+
+
+def image_text_page_document(image_text, *, base_url: str) -> dict[str, Any]:
+    """An ImageText's linked elements as a W3C AnnotationPage."""
+    graphs = Graph.objects.filter(text_links__image_text=image_text).distinct().select_related("item_image")
+    graph_lookup = {g.id: g for g in graphs}
+    return imagetext_to_w3c(
+        image_text,
+        graph_lookup=graph_lookup,
+        base_url=base_url,
+        image_height=image_height(image_text.item_image),
+    )
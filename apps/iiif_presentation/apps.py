@@ -6,3 +6,6 @@ class IIIFPresentationConfig(AppConfig):
     name = "apps.iiif_presentation"
     label = "iiif_presentation"
     verbose_name = "IIIF Presentation"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401  (registers the manifest invalidation receivers)
@@ -0,0 +1,132 @@
+"""Generation-keyed cache of IIIF manifests, with HTTP validators.
+
+A manifest only changes when a row it is built from changes: the ItemPart
+(and the items its label comes from), its ItemImages, their ImageTexts and
+Graphs. Each ItemPart has a *generation* in the shared ``locks`` cache that
+saves and deletes of those rows replace (``bump_manifest_generation``, wired
+up in signals.py). The generation is a microsecond timestamp, so it is also
+the manifest's ``Last-Modified``; a bump always moves it into a later second,
+so that header increases with every change even at one-second resolution.
+A generation is created on first read only for an ItemPart that exists.
+
+The strong ``ETag`` is derived from the ItemPart, the visibility tier
+(staff see texts anonymous users don't), the generation and the host the
+manifest's ids point at. A request whose ``If-None-Match`` matches is
+answered 304 from the generation alone, before any database query. Built
+manifests are kept in the ``default`` cache under the same parts, so a
+changed generation makes old entries unreachable and they age out.
+
+Like the search result cache, everything is bypassed while the generation
+store is unreachable: without it stale entries can't be told apart.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import hashlib
+import logging
+import time
+from typing import Any
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Part of every key and ETag: bump when the manifest builder's output changes.
+MANIFEST_FORMAT = 1
+MANIFEST_CACHE_SECONDS = 24 * 60 * 60
+PUBLIC = "public"
+STAFF = "staff"
+
+
+def _generation_key(item_part_id: int) -> str:
+    return f"iiif:manifest-generation:{item_part_id}"
+
+
+def _fresh_generation() -> int:
+    return time.time_ns() // 1000
+
+
+def _next_generation(previous: int | None) -> int:
+    """A generation whose ``Last-Modified`` second is later than *previous*'s."""
+    fresh = _fresh_generation()
+    if previous is None:
+        return fresh
+    return max(fresh, (int(previous) // 1_000_000 + 1) * 1_000_000)
+
+
+def visibility_tier(user) -> str:
+    """Which copy of a manifest *user* sees; mirrors ``ImageTextQuerySet.visible_to``."""
+    if getattr(user, "is_authenticated", False) and getattr(user, "is_staff", False):
+        return STAFF
+    return PUBLIC
+
+
+def bump_manifest_generation(item_part_ids: list[int]) -> None:
+    """Make the cached manifests and ETags of *item_part_ids* stale."""
+    if not item_part_ids:
+        return
+    keys = [_generation_key(pk) for pk in set(item_part_ids)]
+    try:
+        store = caches["locks"]
+        current = store.get_many(keys)
+        store.set_many({key: _next_generation(current.get(key)) for key in keys}, timeout=None)
+    except Exception:
+        logger.warning("Failed to bump the IIIF manifest generation of %s.", item_part_ids, exc_info=True)
+
+
+def manifest_generation(item_part_id: int, *, exists: Callable[[], bool] | None = None) -> int | None:
+    """The current generation of *item_part_id*, or ``None`` when the store is unreachable.
+
+    A missing generation is created only once *exists* (when given) confirms
+    the ItemPart, so ids of absent rows don't leave permanent keys behind;
+    for those it returns ``None`` as well.
+    """
+    key = _generation_key(item_part_id)
+    try:
+        store = caches["locks"]
+        generation = store.get(key)
+        if generation is None:
+            if exists is not None and not exists():
+                return None
+            store.add(key, _fresh_generation(), timeout=None)
+            generation = store.get(key)
+    except Exception:
+        logger.warning("IIIF manifest generations unavailable; bypassing the manifest cache.", exc_info=True)
+        return None
+    return None if generation is None else int(generation)
+
+
+@dataclass(frozen=True)
+class ManifestVersion:
+    """One ItemPart's manifest as seen by one tier on one host, at one generation."""
+
+    item_part_id: int
+    tier: str
+    generation: int
+    base_url: str
+
+    @property
+    def _host(self) -> str:
+        return hashlib.sha256(self.base_url.encode()).hexdigest()[:12]
+
+    @property
+    def key(self) -> str:
+        return f"iiif:manifest:{MANIFEST_FORMAT}:{self.item_part_id}:{self.tier}:{self.generation}:{self._host}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.item_part_id}-{self.tier}-{self.generation}-{MANIFEST_FORMAT}-{self._host}"'
+
+    @property
+    def last_modified(self) -> int:
+        """Epoch seconds of the change that started this generation."""
+        return self.generation // 1_000_000
+
+    def get_or_build(self, build: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """The cached manifest for this version, building and storing it on a miss."""
+        store = caches["default"]
+        manifest = store.get(self.key)
+        if manifest is None:
+            manifest = build()
+            store.set(self.key, manifest, MANIFEST_CACHE_SECONDS)
+        return manifest
@@ -5,6 +5,13 @@ query, it returns an AnnotationPage whose items target the image regions whose
 linked transcription phrase matches — so a IIIF viewer can box the hit on the
 page image.
 
+Hits are looked up in the ContentSearchPhrase table (see phrases.py), which
+holds every linked phrase of the part with its region already computed, so
+a query is one indexed, paged SQL lookup rather than a parse of every TEI
+body. Matching is case-insensitive substring by default; ``match=prefix``
+restricts it to word prefixes and ``diacritics=ignore`` folds accents. The
+autocomplete service suggests the words of matching phrases.
+
 Coverage note (deliberate, not a bug): matches are limited to transcription
 phrases that an editor manually linked to an image region (a TEXT-typed Graph).
 There are NO word-level coordinates for unlinked prose, so an arbitrary word
@@ -14,92 +21,153 @@ would require HTR/ALTO word coordinates the project does not yet store.
 
 from __future__ import annotations
 
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, cast
-from urllib.parse import quote
+from collections import Counter
+import re
+from typing import Any
+from urllib.parse import urlencode
 
-from apps.manuscripts.iiif import (
-    FALLBACK_IMAGE_DIMS as _FALLBACK_DIMS,
-    get_iiif_region_from_geojson,
-    resolve_image_dimensions as resolve_dimensions,
-)
-from apps.manuscripts.services.tei import parse_graph_refs
+from django.db.models import Q, QuerySet
 
-SEARCH_CONTEXT = "http://iiif.io/api/search/2/context.json"
+from apps.manuscripts.models import ImageText
 
+from .models import ContentSearchPhrase
+from .phrases import fold_diacritics, normalize_phrase
 
-def _identifier(image) -> str | None:
-    try:
-        return cast("str | None", image.image.iiif.identifier)
-    except (AttributeError, TypeError, ValueError):  # fmt: skip
-        return None
+SEARCH_CONTEXT = "http://iiif.io/api/search/2/context.json"
+PAGE_SIZE = 100
+AUTOCOMPLETE_LIMIT = 10
+MIN_AUTOCOMPLETE_LENGTH = 2
+_WORD = re.compile(r"\w+")
 
 
 def search_service(item_part_id: int, *, base_url: str = "") -> dict[str, Any]:
     """The SearchService2 descriptor a manifest advertises so clients find search."""
+    service_url = f"{base_url}/api/v1/iiif/item-parts/{item_part_id}"
     return {
-        "id": f"{base_url}/api/v1/iiif/item-parts/{item_part_id}/search",
+        "id": f"{service_url}/search",
         "type": "SearchService2",
+        "service": [{"id": f"{service_url}/autocomplete", "type": "AutoCompleteService2"}],
     }
 
 
+def _matching(item_part, *, needle: str, user, prefix: bool, ignore_diacritics: bool) -> QuerySet[ContentSearchPhrase]:
+    column = "folded" if ignore_diacritics else "normalized"
+    if ignore_diacritics:
+        needle = fold_diacritics(needle)
+    if prefix:
+        condition = Q(**{f"{column}__startswith": needle}) | Q(**{f"{column}__contains": f" {needle}"})
+    else:
+        condition = Q(**{f"{column}__contains": needle})
+    return ContentSearchPhrase.objects.filter(
+        condition,
+        item_part=item_part,
+        image_text__in=ImageText.objects.visible_to(user),
+    )
+
+
+def _page_ref(url: str, params: dict[str, Any], page: int) -> dict[str, Any]:
+    query = {**params, "page": page} if page > 1 else params
+    return {"id": f"{url}?{urlencode(query)}", "type": "AnnotationPage"}
+
+
 def build_content_search(
     item_part,
     *,
-    images: list,
-    texts_by_image: dict,
-    graph_lookup: dict,
     query: str,
+    user,
     base_url: str = "",
-    dims: Callable[[str], tuple[int, int]] = resolve_dimensions,
+    page: int = 1,
+    prefix: bool = False,
+    ignore_diacritics: bool = False,
 ) -> dict[str, Any]:
-    normalized = (query or "").strip()
-    page_id = f"{base_url}/api/v1/iiif/item-parts/{item_part.id}/search?q={quote(normalized)}"
-    empty = {"@context": SEARCH_CONTEXT, "id": page_id, "type": "AnnotationPage", "items": []}
+    """Page *page* of the highlighting annotations for *query* within *item_part*.
+
+    Results past ``PAGE_SIZE`` are paged: every page then names its
+    AnnotationCollection (with the total) and links its neighbours.
+    """
+    normalized = normalize_phrase(query or "")
+    url = f"{base_url}/api/v1/iiif/item-parts/{item_part.id}/search"
+    params: dict[str, Any] = {"q": " ".join((query or "").split())}
+    if prefix:
+        params["match"] = "prefix"
+    if ignore_diacritics:
+        params["diacritics"] = "ignore"
+    current = _page_ref(url, params, page)
+    empty = {"@context": SEARCH_CONTEXT, "id": current["id"], "type": "AnnotationPage", "items": []}
     if not normalized:
         return empty
-    needle = normalized.lower()
-
-    # Resolve image dimensions concurrently (cached) — only `height` is needed,
-    # to flip the legacy Y-up geometry into IIIF's top-left origin.
-    identifiers = [_identifier(image) for image in images]
-    distinct = sorted({i for i in identifiers if i})
-    if distinct:
-        with ThreadPoolExecutor(max_workers=min(8, len(distinct))) as pool:
-            resolved = dict(zip(distinct, pool.map(dims, distinct), strict=True))
-    else:
-        resolved = {}
+
+    matches = _matching(item_part, needle=normalized, user=user, prefix=prefix, ignore_diacritics=ignore_diacritics)
+    total = matches.count()
+    start = (page - 1) * PAGE_SIZE
+    rows = matches.select_related("image_text").order_by(
+        "item_image__locus", "item_image_id", "image_text_id", "position"
+    )[start : start + PAGE_SIZE]
 
     items: list[dict[str, Any]] = []
-    for image, identifier in zip(images, identifiers, strict=True):
-        dims_tuple = resolved.get(identifier, _FALLBACK_DIMS) if identifier else _FALLBACK_DIMS
-        height = dims_tuple[1]
-        canvas_id = f"{base_url}/api/v1/iiif/canvas/{image.id}"
-        for text in texts_by_image.get(image.id, []):
-            for ref in parse_graph_refs(text.content or ""):
-                phrase = (ref.text or "").strip()
-                if not phrase or needle not in phrase.lower():
-                    continue
-                for gid in ref.graph_ids:
-                    graph = graph_lookup.get(gid)
-                    if graph is None:
-                        continue
-                    try:
-                        region = get_iiif_region_from_geojson(graph.annotation, image_height=height)
-                    except (ValueError, TypeError, KeyError):  # fmt: skip
-                        continue
-                    body: dict[str, Any] = {"type": "TextualBody", "value": phrase, "format": "text/plain"}
-                    if text.language:
-                        body["language"] = text.language
-                    items.append(
-                        {
-                            "id": f"{base_url}/api/v1/iiif/canvas/{image.id}/search/{text.id}/{gid}",
-                            "type": "Annotation",
-                            "motivation": "highlighting",
-                            "body": body,
-                            "target": f"{canvas_id}#xywh={region}",
-                        }
-                    )
-
-    return {"@context": SEARCH_CONTEXT, "id": page_id, "type": "AnnotationPage", "items": items}
+    for row in rows:
+        canvas_id = f"{base_url}/api/v1/iiif/canvas/{row.item_image_id}"
+        body: dict[str, Any] = {"type": "TextualBody", "value": row.phrase, "format": "text/plain"}
+        if row.image_text.language:
+            body["language"] = row.image_text.language
+        items.append(
+            {
+                "id": f"{canvas_id}/search/{row.image_text_id}/{row.graph_id}",
+                "type": "Annotation",
+                "motivation": "highlighting",
+                "body": body,
+                "target": f"{canvas_id}#xywh={row.region}",
+            }
+        )
+
+    result: dict[str, Any] = {**empty, "items": items}
+    if total > PAGE_SIZE:
+        last = (total - 1) // PAGE_SIZE + 1
+        result["partOf"] = {
+            "id": _page_ref(url, params, 1)["id"],
+            "type": "AnnotationCollection",
+            "total": total,
+            "first": _page_ref(url, params, 1),
+            "last": _page_ref(url, params, last),
+        }
+        result["startIndex"] = start
+        if page < last:
+            result["next"] = _page_ref(url, params, page + 1)
+        if page > 1:
+            result["prev"] = _page_ref(url, params, page - 1)
+    return result
+
+
+def build_autocomplete(
+    item_part, *, query: str, user, base_url: str = "", ignore_diacritics: bool = False
+) -> dict[str, Any]:
+    """A TermPage of the most frequent words of *item_part*'s linked phrases starting with *query*."""
+    normalized = normalize_phrase(query or "")
+    url = f"{base_url}/api/v1/iiif/item-parts/{item_part.id}"
+    params: dict[str, Any] = {"q": " ".join((query or "").split())}
+    if ignore_diacritics:
+        params["diacritics"] = "ignore"
+    page: dict[str, Any] = {
+        "@context": SEARCH_CONTEXT,
+        "id": f"{url}/autocomplete?{urlencode(params)}",
+        "type": "TermPage",
+        "items": [],
+    }
+    if len(normalized) < MIN_AUTOCOMPLETE_LENGTH:
+        return page
+
+    needle = fold_diacritics(normalized) if ignore_diacritics else normalized
+    column = "folded" if ignore_diacritics else "normalized"
+    matches = _matching(item_part, needle=normalized, user=user, prefix=True, ignore_diacritics=ignore_diacritics)
+    counts: Counter[str] = Counter()
+    for phrase in matches.values_list(column, flat=True):
+        counts.update(word for word in _WORD.findall(phrase) if word.startswith(needle))
+    for term, _count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:AUTOCOMPLETE_LIMIT]:
+        search_params = {**params, "q": term}
+        page["items"].append(
+            {
+                "value": term,
+                "service": [{"id": f"{url}/search?{urlencode(search_params)}", "type": "SearchService2"}],
+            }
+        )
+    return page
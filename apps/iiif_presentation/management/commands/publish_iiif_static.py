@@ -0,0 +1,41 @@
+"""Management command: publish_iiif_static. Pre-render public IIIF/W3C documents to JSON-LD files."""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.iiif_presentation.publish import PublishInProgressError, publish_static
+
+
+class Command(BaseCommand):
+    help = "Render public manifests, transcription pages and W3C pages to static JSON-LD files (changed parts only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", type=Path, help="Directory to publish into (default: IIIF_STATIC_ROOT).")
+        parser.add_argument("--base-url", help="Public URL the document ids point at (default: IIIF_STATIC_BASE_URL).")
+        parser.add_argument(
+            "--item-part",
+            dest="item_parts",
+            action="append",
+            type=int,
+            help="ItemPart id; repeat for several (default: all).",
+        )
+        parser.add_argument("--full", action="store_true", help="Re-render every part, changed or not.")
+
+    def handle(self, *args, **options):
+        root = options["root"] or Path(settings.IIIF_STATIC_ROOT)
+        self.stdout.write(f"Publishing IIIF documents into {root}...")
+        try:
+            report = publish_static(
+                root, base_url=options["base_url"], item_part_ids=options["item_parts"], full=options["full"]
+            )
+        except PublishInProgressError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            f"  {len(report.published)} item parts rendered, {report.unchanged} unchanged, "
+            f"{len(report.removed)} removed"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Done. {report.files_written} files written, {report.files_removed} removed.")
+        )
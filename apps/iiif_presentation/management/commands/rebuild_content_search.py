@@ -0,0 +1,35 @@
+"""Management command: rebuild_content_search. Re-derive the IIIF Content Search phrase table."""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from apps.iiif_presentation.phrases import rebuild_text_phrases
+from apps.manuscripts.models import ImageText
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ContentSearchPhrase rows of every ImageText (or of the given item parts) from its links."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--item-part",
+            dest="item_parts",
+            action="append",
+            type=int,
+            help="ItemPart id; repeat for several (default: all).",
+        )
+        parser.add_argument("--batch-size", type=int, default=200, help="Texts parsed and written per batch.")
+
+    def handle(self, *args, **options):
+        texts = ImageText.objects.select_related("item_image").order_by("pk")
+        if options["item_parts"]:
+            texts = texts.filter(item_image__item_part_id__in=options["item_parts"])
+        batch_size = max(1, options["batch_size"])
+        done = phrases = 0
+        it = texts.iterator(chunk_size=batch_size)
+        while batch := list(islice(it, batch_size)):
+            phrases += rebuild_text_phrases(batch)
+            done += len(batch)
+            self.stdout.write(f"  {done} texts, {phrases} phrases")
+        self.stdout.write(self.style.SUCCESS(f"Done. {phrases} phrases from {done} texts."))
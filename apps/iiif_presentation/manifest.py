@@ -5,23 +5,21 @@ ItemImage (painting annotation = the IIIF image) and, where the image has a
 transcription/translation, a transcription AnnotationPage whose annotations are
 anchored to image regions (the TEXT-typed Graphs the TEI references).
 
-Canvas dimensions are resolved from the IIIF image info.json with a
-per-process cache; resolution is injectable so it can be stubbed in tests and
-falls back to a default when the image server is unreachable.
+Canvas dimensions are the ones stored on each ItemImage (see
+``apps.manuscripts.iiif.image_dimensions``), with a default while they are
+unknown, so building a manifest never calls the image server. Resolution is
+injectable so it can be stubbed in tests.
 """
 
 from __future__ import annotations
 
 from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
 from typing import Any, cast
 
 from apps.manuscripts.iiif import (
-    FALLBACK_IMAGE_DIMS as _FALLBACK_DIMS,
     get_iiif_region_from_geojson,
-    resolve_image_dimensions as resolve_dimensions,
+    image_dimensions,
 )
-from apps.manuscripts.services.tei import parse_graph_refs
 
 from .content_search import search_service
 
@@ -87,33 +85,32 @@ def _canvas(
 def _transcription_page(image, texts, graph_lookup, canvas_id, base_url, *, image_height: int) -> dict[str, Any]:
     items: list[dict[str, Any]] = []
     for text in texts:
-        for ref in parse_graph_refs(text.content or ""):
-            for gid in ref.graph_ids:
-                graph = graph_lookup.get(gid)
-                if graph is None:
-                    continue
-                try:
-                    # image_height flips the legacy Y-up geometry into IIIF's
-                    # top-left origin; without it every region is mislocated.
-                    region = get_iiif_region_from_geojson(graph.annotation, image_height=image_height)
-                except (ValueError, TypeError, KeyError):  # fmt: skip
-                    continue
-                body: dict[str, Any] = {
-                    "type": "TextualBody",
-                    "value": ref.text,
-                    "format": "text/plain",
+        for link in text.links.all():
+            graph = graph_lookup.get(link.graph_id)
+            if graph is None:
+                continue
+            try:
+                # image_height flips the legacy Y-up geometry into IIIF's
+                # top-left origin; without it every region is mislocated.
+                region = get_iiif_region_from_geojson(graph.annotation, image_height=image_height)
+            except (ValueError, TypeError, KeyError):  # fmt: skip
+                continue
+            body: dict[str, Any] = {
+                "type": "TextualBody",
+                "value": link.text,
+                "format": "text/plain",
+            }
+            if text.language:
+                body["language"] = text.language
+            items.append(
+                {
+                    "id": f"{base_url}/api/v1/iiif/canvas/{image.id}/text/{text.id}/{link.graph_id}",
+                    "type": "Annotation",
+                    "motivation": "supplementing",
+                    "body": body,
+                    "target": f"{canvas_id}#xywh={region}",
                 }
-                if text.language:
-                    body["language"] = text.language
-                items.append(
-                    {
-                        "id": f"{base_url}/api/v1/iiif/canvas/{image.id}/text/{text.id}/{gid}",
-                        "type": "Annotation",
-                        "motivation": "supplementing",
-                        "body": body,
-                        "target": f"{canvas_id}#xywh={region}",
-                    }
-                )
+            )
     return {
         "id": f"{canvas_id}/transcription",
         "type": "AnnotationPage",
@@ -128,23 +125,13 @@ def build_manifest(
     texts_by_image: dict,
     graph_lookup: dict,
     base_url: str = "",
-    dims: Callable[[str], tuple[int, int]] = resolve_dimensions,
+    dims: Callable[[Any], tuple[int, int]] = image_dimensions,
 ) -> dict[str, Any]:
     label = item_part.display_label() if hasattr(item_part, "display_label") else str(item_part)
 
-    # Resolve image dimensions concurrently so a cold cache over an N-image part
-    # costs ~one timeout, not N serial timeouts (and never blocks per-canvas).
-    identifiers = [_identifier(image) for image in images]
-    distinct = sorted({i for i in identifiers if i})
-    if distinct:
-        with ThreadPoolExecutor(max_workers=min(8, len(distinct))) as pool:
-            resolved = dict(zip(distinct, pool.map(dims, distinct), strict=True))
-    else:
-        resolved = {}
-
     canvases = []
-    for image, identifier in zip(images, identifiers, strict=True):
-        width, height = resolved.get(identifier, _FALLBACK_DIMS) if identifier else _FALLBACK_DIMS
+    for image in images:
+        width, height = dims(image)
         canvases.append(
             _canvas(
                 image,
@@ -153,7 +140,7 @@ def build_manifest(
                 graph_lookup=graph_lookup,
                 width=width,
                 height=height,
-                identifier=identifier,
+                identifier=_identifier(image),
             )
         )
     return {
@@ -166,3 +153,21 @@ def build_manifest(
         # linked transcription regions of this manuscript part.
         "service": [search_service(item_part.id, base_url=base_url)],
     }
+
+
+def build_collection(item_parts, *, base_url: str = "") -> dict[str, Any]:
+    """A Collection referencing the manifest of each of *item_parts*."""
+    return {
+        "@context": PRESENTATION_CONTEXT,
+        "id": f"{base_url}/api/v1/iiif/collection",
+        "type": "Collection",
+        "label": {"none": ["Manuscript parts"]},
+        "items": [
+            {
+                "id": f"{base_url}/api/v1/iiif/item-parts/{item_part.id}/manifest",
+                "type": "Manifest",
+                "label": {"none": [item_part.display_label()]},
+            }
+            for item_part in item_parts
+        ],
+    }
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.7 on 2026-10-18 06:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('annotations', '0009_alter_graph_allograph'),
+        ('manuscripts', '0024_itemimage_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSearchPhrase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('phrase', models.TextField()),
+                ('normalized', models.TextField()),
+                ('folded', models.TextField()),
+                ('region', models.CharField(max_length=64)),
+                ('graph', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='annotations.graph')),
+                ('image_text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='manuscripts.imagetext')),
+                ('item_image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='manuscripts.itemimage')),
+                ('item_part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='manuscripts.itempart')),
+            ],
+            options={
+                'ordering': ['item_part', 'item_image', 'image_text', 'position'],
+                'indexes': [models.Index(fields=['item_part', 'image_text', 'position'], name='content_search_part_order')],
+            },
+        ),
+    ]
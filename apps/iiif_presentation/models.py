@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class ContentSearchPhrase(models.Model):
+    """One linked transcription phrase of an ItemPart, ready for Content Search.
+
+    Derived data: a row per (text, element, graph) reference in
+    ``ImageText.content`` whose graph exists, with the region precomputed
+    against the image's stored height. Rebuilt by phrases.py whenever the
+    text, graph or image changes; ``rebuild_content_search`` rebuilds all.
+    """
+
+    item_part = models.ForeignKey("manuscripts.ItemPart", related_name="+", on_delete=models.CASCADE)
+    item_image = models.ForeignKey("manuscripts.ItemImage", related_name="+", on_delete=models.CASCADE)
+    image_text = models.ForeignKey("manuscripts.ImageText", related_name="+", on_delete=models.CASCADE)
+    graph = models.ForeignKey("annotations.Graph", related_name="+", on_delete=models.CASCADE)
+    # Order of the reference within its text.
+    position = models.PositiveIntegerField()
+    phrase = models.TextField()
+    # Case-folded, whitespace-collapsed phrase; `folded` also drops diacritics.
+    normalized = models.TextField()
+    folded = models.TextField()
+    # IIIF `xywh` region in the image's top-left origin.
+    region = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ["item_part", "item_image", "image_text", "position"]
+        indexes = [models.Index(fields=["item_part", "image_text", "position"], name="content_search_part_order")]
+
+    def __str__(self) -> str:
+        return f"{self.phrase} ({self.image_text_id}#{self.graph_id})"
@@ -0,0 +1,106 @@
+"""Maintenance of the ContentSearchPhrase table.
+
+Content Search reads precomputed rows instead of resolving every link of
+an ItemPart per query. A text's rows are rebuilt whenever its TextLinks
+are (``rebuild_text_phrases``); a graph, image or bulk change only moves
+regions (``refresh_regions``). signals.py wires these up, and the
+``rebuild_content_search`` command rebuilds the whole table.
+"""
+
+from collections.abc import Iterable
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.annotations.models import Graph
+from apps.manuscripts.iiif import get_iiif_region_from_geojson, image_dimensions
+from apps.manuscripts.models import ImageText
+
+from .models import ContentSearchPhrase
+
+_REGION_ERRORS = (ValueError, TypeError, KeyError)
+
+
+def normalize_phrase(text: str) -> str:
+    """Case-folded *text* with whitespace collapsed, as stored in ``normalized``."""
+    return " ".join(text.casefold().split())
+
+
+def fold_diacritics(text: str) -> str:
+    """*text* without combining marks, as stored in ``folded``."""
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def _region(graph: Graph, image) -> str | None:
+    try:
+        # The image height flips the legacy Y-up geometry into IIIF's
+        # top-left origin.
+        return get_iiif_region_from_geojson(graph.annotation, image_height=image_dimensions(image)[1])
+    except _REGION_ERRORS:
+        return None
+
+
+def phrase_rows(image_text: ImageText) -> list[ContentSearchPhrase]:
+    """The rows *image_text* contributes, unsaved."""
+    image = image_text.item_image
+    rows: list[ContentSearchPhrase] = []
+    # The join drops links whose Graph doesn't exist.
+    for link in image_text.links.exclude(text="").select_related("graph"):
+        region = _region(link.graph, image)
+        if region is None:
+            continue
+        normalized = normalize_phrase(link.text)
+        rows.append(
+            ContentSearchPhrase(
+                item_part_id=image.item_part_id,
+                item_image_id=image.pk,
+                image_text_id=image_text.pk,
+                graph_id=link.graph_id,
+                position=len(rows),
+                phrase=link.text,
+                normalized=normalized,
+                folded=fold_diacritics(normalized),
+                region=region,
+            )
+        )
+    return rows
+
+
+def rebuild_text_phrases(image_texts: Iterable[ImageText]) -> int:
+    """Replace the rows of *image_texts*; returns how many rows they now have."""
+    image_texts = list(image_texts)
+    rows = [row for image_text in image_texts for row in phrase_rows(image_text)]
+    with transaction.atomic():
+        ContentSearchPhrase.objects.filter(image_text__in=[text.pk for text in image_texts]).delete()
+        ContentSearchPhrase.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_regions(
+    *,
+    graph_ids: Iterable[int] = (),
+    item_image_ids: Iterable[int] = (),
+    item_part_ids: Iterable[int] = (),
+) -> int:
+    """Recompute the region and ItemPart of the rows of these graphs, images or parts.
+
+    Returns the number of rows updated; rows whose geometry no longer yields
+    a region are dropped, as a rebuild would.
+    """
+    scope = Q(graph_id__in=list(graph_ids)) | Q(item_image_id__in=list(item_image_ids))
+    scope |= Q(item_part_id__in=list(item_part_ids))
+    rows = list(ContentSearchPhrase.objects.filter(scope).select_related("graph", "item_image"))
+    changed: list[ContentSearchPhrase] = []
+    dropped: list[int] = []
+    for row in rows:
+        region = _region(row.graph, row.item_image)
+        if region is None:
+            dropped.append(row.pk)
+        elif (region, row.item_image.item_part_id) != (row.region, row.item_part_id):
+            row.region, row.item_part_id = region, row.item_image.item_part_id
+            changed.append(row)
+    ContentSearchPhrase.objects.bulk_update(changed, ["region", "item_part"])
+    if dropped:
+        ContentSearchPhrase.objects.filter(pk__in=dropped).delete()
+    return len(changed)
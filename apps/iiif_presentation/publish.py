@@ -0,0 +1,234 @@
+"""Static publication of the public IIIF and W3C documents.
+
+``publish_static`` renders, as an anonymous visitor would see them:
+
+  * every ItemPart's manifest;
+  * each canvas's transcription AnnotationPage (the ``.../transcription``
+    id the manifest embeds, which has no dynamic view);
+  * the W3C AnnotationPage of every public ImageText;
+  * a top-level Collection of all ItemParts.
+
+Each document is written to ``<root>/<url path>.json``, the path of the
+dynamic view that serves it with a trailing slash dropped, so a web server
+can answer from the file and fall back to Django when it's missing. Ids
+point at ``IIIF_STATIC_BASE_URL``.
+
+Publishing is incremental. Every ItemPart's files are recorded under
+``<root>/.publish-state/`` together with the manifest generation they were
+rendered at (see cache.py), and a part is re-rendered only when its
+generation has moved since, i.e. when a row it is built from changed. A
+re-render removes the files the part no longer produces, and parts that
+were deleted lose all of theirs.
+
+One run at a time publishes into a root: a run holds a lock in the
+``locks`` cache for its whole length, and every file is staged under a
+unique name before it replaces the old one.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import tempfile
+from typing import Any
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+
+from apps.annotations_w3c.documents import image_text_page_document
+
+from .cache import MANIFEST_FORMAT, manifest_generation
+from .manifest import build_collection, build_manifest
+from .sources import collection_item_parts, load_item_part_sources
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = ".publish-state"
+PUBLISH_LOCK_TIMEOUT_SECONDS = 6 * 60 * 60
+
+
+class PublishInProgressError(RuntimeError):
+    """Raised when another run is already publishing into the same root."""
+
+
+@dataclass
+class PublishReport:
+    """What one ``publish_static`` run did."""
+
+    published: list[int] = field(default_factory=list)
+    unchanged: int = 0
+    removed: list[int] = field(default_factory=list)
+    files_written: int = 0
+    files_removed: int = 0
+
+
+def static_path(root: Path, document_id: str) -> Path:
+    """Where the document with *document_id* (a URL) is written under *root*."""
+    url_path = urlsplit(document_id).path.strip("/")
+    return root / f"{url_path}.json"
+
+
+@contextmanager
+def publish_lock(root: Path):
+    """Hold the publish lock of *root* for the body; raises ``PublishInProgressError`` when taken.
+
+    Degrades to a no-op when the ``locks`` backend is unavailable.
+    """
+    key = f"iiif:static-publish:{root.resolve()}"
+    token = uuid4().hex
+    try:
+        acquired = caches["locks"].add(key, token, PUBLISH_LOCK_TIMEOUT_SECONDS)
+    except Exception as exc:  # lock backend down — degrade, don't block publishing
+        logger.warning("Static publish lock backend unavailable (%s); publishing %s without lock.", exc, root)
+        acquired = None
+    if acquired is False:
+        raise PublishInProgressError(f"A static publish into {root} is already running.")
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                cache = caches["locks"]
+                if cache.get(key) == token:
+                    cache.delete(key)
+            except Exception:
+                logger.warning("Failed to release the static publish lock of %s.", root)
+
+
+def _replace(path: Path, text: str) -> None:
+    """Write *text* to *path* through a uniquely named file in its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False, encoding="utf-8"
+    ) as staging:
+        staging.write(text)
+    try:
+        Path(staging.name).replace(path)
+    except OSError:
+        Path(staging.name).unlink(missing_ok=True)
+        raise
+
+
+def _write(root: Path, document: dict[str, Any]) -> str:
+    path = static_path(root, document["id"])
+    _replace(path, json.dumps(document, ensure_ascii=False))
+    return str(path.relative_to(root))
+
+
+def _remove(root: Path, names) -> int:
+    removed = 0
+    for name in names:
+        path = root / name
+        if path.is_file():
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def _state_path(root: Path, item_part_id: int) -> Path:
+    return root / STATE_DIR / f"{item_part_id}.json"
+
+
+def _read_states(root: Path) -> dict[int, dict[str, Any]]:
+    states: dict[int, dict[str, Any]] = {}
+    for path in (root / STATE_DIR).glob("*.json"):
+        try:
+            states[int(path.stem)] = json.loads(path.read_text())
+        except ValueError:
+            logger.warning("Ignoring unreadable publish state %s.", path)
+    return states
+
+
+def publish_item_part(item_part, *, root: Path, base_url: str) -> list[str]:
+    """Write the public documents of *item_part*; returns their paths relative to *root*."""
+    images, texts_by_image, graph_lookup = load_item_part_sources(item_part, AnonymousUser())
+    manifest = build_manifest(
+        item_part,
+        images=images,
+        texts_by_image=texts_by_image,
+        graph_lookup=graph_lookup,
+        base_url=base_url,
+    )
+    written = [_write(root, manifest)]
+    for canvas in manifest["items"]:
+        written.extend(_write(root, page) for page in canvas.get("annotations", []))
+    for texts in texts_by_image.values():
+        written.extend(_write(root, image_text_page_document(text, base_url=base_url)) for text in texts)
+    return written
+
+
+def publish_static(
+    root: Path | None = None,
+    *,
+    base_url: str | None = None,
+    item_part_ids: list[int] | None = None,
+    full: bool = False,
+) -> PublishReport:
+    """Bring the static documents under *root* up to date.
+
+    *item_part_ids* limits the run to those parts (deleted ones among them
+    are unpublished); *full* re-renders regardless of generations. The
+    Collection is rewritten on every run. Raises ``PublishInProgressError``
+    while another run publishes into *root*.
+    """
+    root = Path(root or settings.IIIF_STATIC_ROOT)
+    base_url = (base_url or settings.IIIF_STATIC_BASE_URL).rstrip("/")
+    (root / STATE_DIR).mkdir(parents=True, exist_ok=True)
+    with publish_lock(root):
+        return _publish(root, base_url=base_url, item_part_ids=item_part_ids, full=full)
+
+
+def _publish(root: Path, *, base_url: str, item_part_ids: list[int] | None, full: bool) -> PublishReport:
+    states = _read_states(root)
+    report = PublishReport()
+
+    item_parts = list(collection_item_parts())
+    selected = set(item_part_ids) if item_part_ids is not None else None
+    for item_part in item_parts:
+        if selected is not None and item_part.pk not in selected:
+            continue
+        # Read before rendering: a change made mid-render moves the
+        # generation past the recorded one, so the next run picks it up.
+        generation = manifest_generation(item_part.pk)
+        state = states.get(item_part.pk)
+        if (
+            not full
+            and generation is not None
+            and state is not None
+            and (state.get("generation"), state.get("format"), state.get("base_url"))
+            == (generation, MANIFEST_FORMAT, base_url)
+        ):
+            report.unchanged += 1
+            continue
+        files = publish_item_part(item_part, root=root, base_url=base_url)
+        if state is not None:
+            report.files_removed += _remove(root, set(state.get("files", [])) - set(files))
+        _replace(
+            _state_path(root, item_part.pk),
+            json.dumps({"generation": generation, "format": MANIFEST_FORMAT, "base_url": base_url, "files": files}),
+        )
+        report.published.append(item_part.pk)
+        report.files_written += len(files)
+
+    existing = {item_part.pk for item_part in item_parts}
+    for item_part_id, state in states.items():
+        if item_part_id in existing or (selected is not None and item_part_id not in selected):
+            continue
+        report.files_removed += _remove(root, state.get("files", []))
+        _state_path(root, item_part_id).unlink(missing_ok=True)
+        report.removed.append(item_part_id)
+
+    _write(root, build_collection(item_parts, base_url=base_url))
+    report.files_written += 1
+    logger.info(
+        "Published %d item parts (%d unchanged, %d removed) to %s.",
+        len(report.published),
+        report.unchanged,
+        len(report.removed),
+        root,
+    )
+    return report
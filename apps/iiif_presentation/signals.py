@@ -0,0 +1,167 @@
+"""Invalidate cached manifests when a row they are built from changes.
+
+A manifest reads its ItemPart (whose label comes from the CurrentItem and
+its Repository, or the HistoricalItem and its catalogue numbers), the
+part's ItemImages and their ImageTexts and Graphs. A save or delete of any
+of them bumps the generation of every ItemPart it feeds (see cache.py), at
+once and again when the transaction commits. A row moved to another parent
+feeds the old one until the save, so the parts it fed are looked up on
+``pre_save`` and bumped too. Bulk writes announce themselves through
+``iiif_sources_changed``. With ``IIIF_STATIC_PUBLISH_ON_CHANGE`` the same
+changes also schedule a static publish run (see publish.py).
+
+The ContentSearchPhrase table is kept current the same way (see
+phrases.py): a text's phrases are rebuilt with its TextLinks, and graph or
+image changes move the precomputed regions.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.annotations.models import Graph
+from apps.manuscripts.iiif import iiif_sources_changed
+from apps.manuscripts.models import (
+    BibliographicSource,
+    CatalogueNumber,
+    CurrentItem,
+    HistoricalItem,
+    ImageText,
+    ItemImage,
+    ItemPart,
+    Repository,
+)
+from apps.manuscripts.services.text_links import text_links_changed
+
+from .cache import bump_manifest_generation
+from .phrases import rebuild_text_phrases, refresh_regions
+from .tasks import schedule_static_publish
+
+# The ItemParts a row fed before the save that may move it, set on pre_save.
+_PREVIOUS_PARTS_ATTR = "_iiif_previous_item_part_ids"
+
+
+def _invalidate(item_part_ids: list[int]) -> None:
+    if not item_part_ids:
+        return
+    # Bumped again on commit: a reader between the first bump and the commit
+    # sees the old rows and may cache or publish them under the new generation.
+    bump_manifest_generation(item_part_ids)
+    transaction.on_commit(lambda: bump_manifest_generation(item_part_ids), robust=True)
+    if settings.IIIF_STATIC_PUBLISH_ON_CHANGE:
+        transaction.on_commit(schedule_static_publish, robust=True)
+
+
+def _item_part_ids(instance) -> list[int]:
+    if isinstance(instance, ItemPart):
+        return [instance.pk]
+    if isinstance(instance, ItemImage):
+        return [instance.item_part_id]
+    if isinstance(instance, ImageText | Graph):
+        if instance.item_image_id is None:
+            return []
+        return list(ItemImage.objects.filter(pk=instance.item_image_id).values_list("item_part_id", flat=True))
+    if isinstance(instance, CurrentItem):
+        parts = ItemPart.objects.filter(current_item=instance)
+    elif isinstance(instance, CatalogueNumber):
+        parts = ItemPart.objects.filter(historical_item_id=instance.historical_item_id)
+    elif isinstance(instance, Repository):
+        parts = ItemPart.objects.filter(current_item__repository=instance)
+    elif isinstance(instance, BibliographicSource):
+        parts = ItemPart.objects.filter(historical_item__catalogue_numbers__catalogue=instance).distinct()
+    else:
+        parts = ItemPart.objects.filter(historical_item=instance)
+    return list(parts.values_list("pk", flat=True))
+
+
+@receiver(pre_save, sender=ItemImage, dispatch_uid="iiif_manifest_item_image_moving")
+@receiver(pre_save, sender=ImageText, dispatch_uid="iiif_manifest_image_text_moving")
+@receiver(pre_save, sender=Graph, dispatch_uid="iiif_manifest_graph_moving")
+@receiver(pre_save, sender=CatalogueNumber, dispatch_uid="iiif_manifest_catalogue_number_moving")
+def remember_previous_item_parts(sender, instance, raw=False, **kwargs) -> None:
+    """Note the ItemParts the stored row feeds, which a move leaves behind."""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    stored = sender._default_manager.filter(pk=instance.pk).first()
+    setattr(instance, _PREVIOUS_PARTS_ATTR, _item_part_ids(stored) if stored is not None else [])
+
+
+@receiver(post_save, sender=ItemPart, dispatch_uid="iiif_manifest_item_part_saved")
+@receiver(post_delete, sender=ItemPart, dispatch_uid="iiif_manifest_item_part_deleted")
+@receiver(post_save, sender=ItemImage, dispatch_uid="iiif_manifest_item_image_saved")
+@receiver(post_delete, sender=ItemImage, dispatch_uid="iiif_manifest_item_image_deleted")
+@receiver(post_save, sender=ImageText, dispatch_uid="iiif_manifest_image_text_saved")
+@receiver(post_delete, sender=ImageText, dispatch_uid="iiif_manifest_image_text_deleted")
+@receiver(post_save, sender=Graph, dispatch_uid="iiif_manifest_graph_saved")
+@receiver(post_delete, sender=Graph, dispatch_uid="iiif_manifest_graph_deleted")
+@receiver(post_save, sender=CurrentItem, dispatch_uid="iiif_manifest_current_item_saved")
+@receiver(post_save, sender=HistoricalItem, dispatch_uid="iiif_manifest_historical_item_saved")
+@receiver(post_save, sender=Repository, dispatch_uid="iiif_manifest_repository_saved")
+@receiver(post_save, sender=CatalogueNumber, dispatch_uid="iiif_manifest_catalogue_number_saved")
+@receiver(post_delete, sender=CatalogueNumber, dispatch_uid="iiif_manifest_catalogue_number_deleted")
+@receiver(post_save, sender=BibliographicSource, dispatch_uid="iiif_manifest_bibliographic_source_saved")
+def invalidate_manifests(sender, instance, raw=False, **kwargs) -> None:
+    """Bump the manifest generation of the ItemParts *instance* feeds, and fed before a move."""
+    if raw:
+        return
+    previous = instance.__dict__.pop(_PREVIOUS_PARTS_ATTR, [])
+    _invalidate(sorted({*previous, *_item_part_ids(instance)}))
+
+
+@receiver(pre_delete, sender=CurrentItem, dispatch_uid="iiif_manifest_current_item_deleted")
+@receiver(pre_delete, sender=Repository, dispatch_uid="iiif_manifest_repository_deleted")
+def invalidate_manifests_losing_their_label(sender, instance, **kwargs) -> None:
+    """Deleting these nulls or cascades away the label source without an ItemPart signal."""
+    _invalidate(_item_part_ids(instance))
+
+
+@receiver(iiif_sources_changed, dispatch_uid="iiif_manifest_sources_changed")
+def invalidate_bulk_changed_manifests(sender, item_part_ids, **kwargs) -> None:
+    _invalidate(list(item_part_ids))
+    refresh_regions(item_part_ids=item_part_ids)
+
+
+@receiver(text_links_changed, dispatch_uid="content_search_text_links_changed")
+def rebuild_content_search_phrases(sender, image_texts, **kwargs) -> None:
+    """Re-derive the phrases of texts whose links were rebuilt, in the same transaction.
+
+    Also covers links rebuilt outside a save (``backfill_text_links``), so
+    the manifests reading them are invalidated too.
+    """
+    rebuild_text_phrases(image_texts)
+    image_ids = {image_text.item_image_id for image_text in image_texts}
+    _invalidate(list(ItemImage.objects.filter(pk__in=image_ids).values_list("item_part_id", flat=True).distinct()))
+
+
+@receiver(post_save, sender=ImageText, dispatch_uid="content_search_image_text_moved")
+def move_content_search_phrases(sender, instance: ImageText, raw=False, update_fields=None, **kwargs) -> None:
+    """A text moved to another image keeps its links, but its phrases carry the image.
+
+    Status and language are read through the join at query time, and saves
+    that may change the content rebuild the links, so only a move that
+    leaves the content alone is handled here.
+    """
+    if raw or update_fields is None or "item_image" not in update_fields or "content" in update_fields:
+        return
+    rebuild_text_phrases([instance])
+
+
+@receiver(post_save, sender=Graph, dispatch_uid="content_search_graph_saved")
+def refresh_content_search_graph(sender, instance: Graph, raw=False, created=False, **kwargs) -> None:
+    """A new region may complete a link a text already makes; an edited one
+    moves the regions of the phrases that point at it."""
+    if raw:
+        return
+    if created:
+        rebuild_text_phrases(ImageText.objects.filter(links__graph=instance).distinct().select_related("item_image"))
+    else:
+        refresh_regions(graph_ids=[instance.pk])
+
+
+@receiver(post_save, sender=ItemImage, dispatch_uid="content_search_item_image_saved")
+def refresh_content_search_image(sender, instance: ItemImage, raw=False, **kwargs) -> None:
+    """Image height and ItemPart are baked into the phrases of the image."""
+    if raw:
+        return
+    refresh_regions(item_image_ids=[instance.pk])
@@ -0,0 +1,35 @@
+"""The rows an ItemPart's IIIF documents are built from."""
+
+from django.db.models import QuerySet
+
+from apps.annotations.models import Graph
+from apps.manuscripts.models import ImageText, ItemImage, ItemPart
+
+
+def load_item_part_sources(item_part: ItemPart, user) -> tuple[list, dict[int, list], dict[int, Graph]]:
+    """(images, texts_by_image, graph_lookup) of *item_part* as *user* may see them.
+
+    Texts follow the public-visibility rule (anonymous users see Live/Reviewed
+    texts only); the graphs are those the visible texts reference.
+    """
+    images = list(ItemImage.objects.filter(item_part=item_part).order_by("locus", "id"))
+    image_ids = [img.id for img in images]
+
+    texts = list(ImageText.objects.filter(item_image_id__in=image_ids).visible_to(user).prefetch_related("links"))
+
+    texts_by_image: dict[int, list] = {}
+    for text in texts:
+        texts_by_image.setdefault(text.item_image_id, []).append(text)
+
+    graphs = Graph.objects.filter(text_links__image_text__in=texts).distinct().select_related("item_image")
+    graph_lookup = {g.id: g for g in graphs}
+    return images, texts_by_image, graph_lookup
+
+
+def collection_item_parts() -> QuerySet[ItemPart]:
+    """Every ItemPart, with what their labels are built from, in collection order."""
+    return (
+        ItemPart.objects.select_related("current_item__repository", "historical_item")
+        .prefetch_related("historical_item__catalogue_numbers__catalogue")
+        .order_by("pk")
+    )
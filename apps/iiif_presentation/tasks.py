@@ -0,0 +1,59 @@
+"""Celery tasks for static IIIF/W3C publication."""
+
+from dataclasses import asdict
+import logging
+from typing import Any
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import caches
+
+from .publish import PublishInProgressError, publish_static
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "iiif:static-publish-pending"
+
+
+def schedule_static_publish() -> None:
+    """Enqueue one debounced incremental publish, if publishing on change is enabled.
+
+    The first change in a window claims a marker in the ``locks`` cache and
+    schedules the run ``IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS`` out; later
+    changes ride along, since the run re-renders every part whose generation
+    moved. Without the cache every change schedules its own run.
+    """
+    if not settings.IIIF_STATIC_PUBLISH_ON_CHANGE:
+        return
+    debounce = max(int(settings.IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS), 0)
+    try:
+        claimed = caches["locks"].add(_PENDING_KEY, "1", debounce * 2 + 60)
+    except Exception as exc:  # lock backend down — degrade to undebounced
+        logger.warning("Static publish debounce backend unavailable (%s); scheduling anyway.", exc)
+        claimed = True
+    if claimed:
+        publish_iiif_static.apply_async(countdown=debounce)
+
+
+@shared_task
+def publish_iiif_static(item_part_ids: list[int] | None = None, full: bool = False) -> dict[str, Any]:
+    """Re-render the static documents of changed (or the given) item parts.
+
+    While another run holds the publish lock this one is re-queued a
+    debounce window later, since the running one may have rendered a part
+    before the change that queued this run.
+    """
+    try:
+        # Released first, so a change made during this run schedules the next one.
+        caches["locks"].delete(_PENDING_KEY)
+    except Exception:
+        logger.warning("Failed to release the static publish marker.")
+    try:
+        return asdict(publish_static(item_part_ids=item_part_ids, full=full))
+    except PublishInProgressError:
+        logger.info("Static publish already running; deferring this run.")
+        publish_iiif_static.apply_async(
+            kwargs={"item_part_ids": item_part_ids, "full": full},
+            countdown=max(int(settings.IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS), 1),
+        )
+        return {"deferred": True}
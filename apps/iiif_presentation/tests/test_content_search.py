@@ -1,11 +1,14 @@
 """Tests for the IIIF Content Search 2.0 service (search-within manifest regions)."""
 
+from django.contrib.auth.models import AnonymousUser
 import pytest
 
 from apps.annotations.models import Graph
-from apps.iiif_presentation.content_search import build_content_search
+from apps.iiif_presentation import content_search
+from apps.iiif_presentation.content_search import build_autocomplete, build_content_search
 from apps.iiif_presentation.manifest import build_manifest
-from apps.manuscripts.models import ImageText
+from apps.iiif_presentation.models import ContentSearchPhrase
+from apps.manuscripts.models import ImageText, ItemImage
 from apps.manuscripts.tests.factories import ItemImageFactory
 
 pytestmark = pytest.mark.django_db
@@ -14,94 +17,150 @@ POLY = {
     "type": "Feature",
     "geometry": {"type": "Polygon", "coordinates": [[[10, 20], [110, 20], [110, 70], [10, 70], [10, 20]]]},
 }
+ANON = AnonymousUser()
 
 
-def _stub_dims(_identifier):
+def _stub_dims(_image):
     return (4000, 6000)
 
 
-def _make(content: str, *, language: str = "la"):
+def _make(content: str, *, language: str = "la", status=ImageText.Status.LIVE):
     image = ItemImageFactory(locus="fol. 1r")
+    ItemImage.objects.filter(pk=image.pk).update(width=4000, height=6000)
+    image.refresh_from_db()
     graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
     text = ImageText.objects.create(
         item_image=image,
         content=content.format(gid=graph.id),
         type=ImageText.Type.TRANSCRIPTION,
-        status=ImageText.Status.LIVE,
+        status=status,
         language=language,
     )
     return image, graph, text
 
 
+def _search(image, query, **kwargs):
+    return build_content_search(image.item_part, query=query, user=ANON, base_url="http://x", **kwargs)
+
+
 def test_search_returns_matching_region_with_iiif_coords():
     image, graph, text = _make('<p><seg corresp="#gid-{gid}">William king of Scots</seg></p>')
-    page = build_content_search(
-        image.item_part,
-        images=[image],
-        texts_by_image={image.id: [text]},
-        graph_lookup={graph.id: graph},
-        query="william",
-        base_url="http://x",
-        dims=_stub_dims,
-    )
+    page = _search(image, "william")
     assert page["type"] == "AnnotationPage"
     assert page["@context"] == "http://iiif.io/api/search/2/context.json"
     assert len(page["items"]) == 1
     hit = page["items"][0]
+    assert hit["id"] == f"http://x/api/v1/iiif/canvas/{image.id}/search/{text.id}/{graph.id}"
     assert hit["motivation"] == "highlighting"
-    assert hit["body"]["value"] == "William king of Scots"
+    assert hit["body"] == {
+        "type": "TextualBody",
+        "value": "William king of Scots",
+        "format": "text/plain",
+        "language": "la",
+    }
     # Same Y-flip the manifest uses: legacy y=20..70 on a 6000px image → top 5930.
     assert hit["target"] == f"http://x/api/v1/iiif/canvas/{image.id}#xywh=10,5930,100,50"
 
 
 def test_search_is_case_insensitive_substring():
-    image, graph, text = _make('<p><seg corresp="#gid-{gid}">Willelmus rex Scottorum</seg></p>')
-    page = build_content_search(
-        image.item_part,
-        images=[image],
-        texts_by_image={image.id: [text]},
-        graph_lookup={graph.id: graph},
-        query="REX",
-        base_url="http://x",
-        dims=_stub_dims,
-    )
-    assert len(page["items"]) == 1
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">Willelmus rex Scottorum</seg></p>')
+    assert len(_search(image, "REX")["items"]) == 1
 
 
 def test_search_no_match_returns_empty_items():
-    image, graph, text = _make('<p><seg corresp="#gid-{gid}">Omnibus</seg></p>')
-    page = build_content_search(
-        image.item_part,
-        images=[image],
-        texts_by_image={image.id: [text]},
-        graph_lookup={graph.id: graph},
-        query="william",
-        base_url="http://x",
-        dims=_stub_dims,
-    )
-    assert page["items"] == []
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">Omnibus</seg></p>')
+    assert _search(image, "william")["items"] == []
 
 
 def test_search_empty_query_returns_empty_page():
-    image, graph, text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>')
-    page = build_content_search(
-        image.item_part,
-        images=[image],
-        texts_by_image={image.id: [text]},
-        graph_lookup={graph.id: graph},
-        query="   ",
-        base_url="http://x",
-        dims=_stub_dims,
-    )
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>')
+    page = _search(image, "   ")
     assert page["items"] == []
     assert page["type"] == "AnnotationPage"
 
 
+def test_prefix_matching_anchors_at_word_starts():
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">Willelmus rex Scottorum</seg></p>')
+    assert len(_search(image, "scot", prefix=True)["items"]) == 1
+    assert _search(image, "cott", prefix=True)["items"] == []
+    assert len(_search(image, "cott")["items"]) == 1
+
+
+def test_diacritics_are_folded_only_on_request():
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">Æthelstān cyning</seg></p>')
+    assert _search(image, "aethelstan")["items"] == []
+    assert _search(image, "æthelstan", ignore_diacritics=True)["items"][0]["body"]["value"] == "Æthelstān cyning"
+
+
+def test_draft_texts_are_hidden_from_anonymous_users():
+    image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>', status=ImageText.Status.DRAFT)
+    assert _search(image, "william")["items"] == []
+
+
+def test_phrases_follow_text_and_graph_edits():
+    image, graph, text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>')
+    text.content = f'<p><seg corresp="#gid-{graph.id}">Robert</seg></p>'
+    text.save()
+    assert _search(image, "william")["items"] == []
+
+    graph.annotation = {**POLY, "geometry": {**POLY["geometry"], "coordinates": [[[0, 0], [5, 0], [5, 5], [0, 0]]]}}
+    graph.save()
+    (hit,) = _search(image, "robert")["items"]
+    assert hit["target"].endswith("#xywh=0,5995,5,5")
+
+    graph.delete()
+    assert not ContentSearchPhrase.objects.filter(image_text=text).exists()
+
+
+def test_a_region_drawn_after_the_link_is_picked_up():
+    image, _graph, text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>')
+    pending = Graph.objects.order_by("-pk").values_list("pk", flat=True).first() + 100
+    text.content = f'<p><seg corresp="#gid-{pending}">Late</seg></p>'
+    text.save()
+    assert _search(image, "late")["items"] == []
+
+    Graph.objects.create(pk=pending, item_image=image, annotation=POLY, annotation_type="text")
+
+    assert len(_search(image, "late")["items"]) == 1
+
+
+def test_large_results_are_paged(monkeypatch):
+    monkeypatch.setattr(content_search, "PAGE_SIZE", 2)
+    refs = "".join(f'<seg corresp="#gid-{{gid}}">William {n}</seg>' for n in range(5))
+    image, _graph, _text = _make(f"<p>{refs}</p>")
+
+    first = _search(image, "william")
+    last = _search(image, "william", page=3)
+
+    assert len(first["items"]) == 2
+    assert first["partOf"]["total"] == 5
+    assert first["next"]["id"] == f"http://x/api/v1/iiif/item-parts/{image.item_part_id}/search?q=william&page=2"
+    assert "prev" not in first
+    assert [item["body"]["value"] for item in last["items"]] == ["William 4"]
+    assert (last["startIndex"], "next" in last) == (4, False)
+
+
+def test_autocomplete_suggests_words_of_linked_phrases():
+    image, _graph, _text = _make(
+        '<p><seg corresp="#gid-{gid}">Willelmus rex</seg> <seg corresp="#gid-{gid}">Willelmo regi</seg></p>'
+    )
+
+    terms = build_autocomplete(image.item_part, query="Will", user=ANON, base_url="http://x")
+
+    assert terms["type"] == "TermPage"
+    assert [term["value"] for term in terms["items"]] == ["willelmo", "willelmus"]
+    assert terms["items"][0]["service"][0]["id"].endswith("/search?q=willelmo")
+
+
 def test_search_endpoint(api_client):
     image, _graph, _text = _make('<p><seg corresp="#gid-{gid}">William</seg></p>')
     res = api_client.get(f"/api/v1/iiif/item-parts/{image.item_part_id}/search?q=william")
     assert res.status_code == 200
     assert res.data["type"] == "AnnotationPage"
+    assert len(res.data["items"]) == 1
+    assert api_client.get(f"/api/v1/iiif/item-parts/{image.item_part_id}/search?q=w&page=0").status_code == 400
+    terms = api_client.get(f"/api/v1/iiif/item-parts/{image.item_part_id}/autocomplete?q=wil")
+    assert [term["value"] for term in terms.data["items"]] == ["william"]
 
 
 def test_manifest_advertises_search_service():
@@ -117,3 +176,6 @@ def test_manifest_advertises_search_service():
     service = manifest["service"][0]
     assert service["type"] == "SearchService2"
     assert service["id"] == f"http://x/api/v1/iiif/item-parts/{image.item_part.id}/search"
+    assert service["service"] == [
+        {"id": f"http://x/api/v1/iiif/item-parts/{image.item_part.id}/autocomplete", "type": "AutoCompleteService2"}
+    ]
@@ -4,7 +4,7 @@ import pytest
 
 from apps.annotations.models import Graph
 from apps.iiif_presentation.manifest import build_manifest
-from apps.manuscripts.models import ImageText
+from apps.manuscripts.models import ImageText, ItemImage
 from apps.manuscripts.tests.factories import ItemImageFactory
 
 pytestmark = pytest.mark.django_db
@@ -15,7 +15,7 @@ POLY = {
 }
 
 
-def _stub_dims(_identifier):
+def _stub_dims(_image):
     return (4000, 6000)
 
 
@@ -98,3 +98,19 @@ def test_manifest_endpoint(api_client):
     assert res.status_code == 200
     assert res.data["type"] == "Manifest"
     assert len(res.data["items"]) >= 1
+
+
+def test_manifest_endpoint_uses_stored_dimensions_without_probing(api_client, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("the manifest must not contact the image server")
+
+    monkeypatch.setattr("httpx.Client.send", no_network)
+    monkeypatch.setattr("urllib.request.urlopen", no_network)
+    sized = ItemImageFactory(locus="1r")
+    ItemImage.objects.filter(pk=sized.pk).update(width=2400, height=3600)
+    ItemImageFactory(item_part=sized.item_part, locus="1v")
+
+    res = api_client.get(f"/api/v1/iiif/item-parts/{sized.item_part_id}/manifest")
+
+    assert res.status_code == 200
+    assert [(canvas["width"], canvas["height"]) for canvas in res.data["items"]] == [(2400, 3600), (1000, 1000)]
@@ -0,0 +1,187 @@
+"""Cached manifests: ETag/304 revalidation and invalidation by the rows they read."""
+
+from django.core.cache import caches
+import pytest
+
+from apps.annotations.models import Graph
+from apps.manuscripts.iiif import iiif_sources_changed
+from apps.manuscripts.models import ImageText, ItemPart
+from apps.manuscripts.tests.factories import CatalogueNumberFactory, ItemImageFactory, ItemPartFactory
+from apps.users.tests.factories import SuperuserFactory
+
+pytestmark = pytest.mark.django_db
+
+POLY = {
+    "type": "Feature",
+    "geometry": {"type": "Polygon", "coordinates": [[[10, 20], [110, 20], [110, 70], [10, 70], [10, 20]]]},
+}
+
+
+@pytest.fixture(autouse=True)
+def locmem_caches(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "manifest-tests"},
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "manifest-lock-tests"},
+    }
+    caches["default"].clear()
+    caches["locks"].clear()
+
+
+def _url(item_part_id: int) -> str:
+    return f"/api/v1/iiif/item-parts/{item_part_id}/manifest"
+
+
+def _text(image, status=ImageText.Status.LIVE) -> ImageText:
+    graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    return ImageText.objects.create(
+        item_image=image,
+        content=f'<p><seg corresp="#gid-{graph.id}">Omnibus</seg></p>',
+        type=ImageText.Type.TRANSCRIPTION,
+        status=status,
+    )
+
+
+def test_a_matching_etag_is_answered_304_without_queries(api_client, django_assert_num_queries):
+    image = ItemImageFactory()
+
+    first = api_client.get(_url(image.item_part_id))
+    with django_assert_num_queries(0):
+        repeat = api_client.get(_url(image.item_part_id), HTTP_IF_NONE_MATCH=first["ETag"])
+
+    assert first.status_code == 200
+    assert first["ETag"].startswith('"') and "Last-Modified" in first
+    assert "no-cache" in first["Cache-Control"]
+    assert repeat.status_code == 304
+    assert repeat["ETag"] == first["ETag"]
+
+
+def test_a_cached_manifest_is_served_without_rebuilding(api_client, django_assert_num_queries):
+    image = ItemImageFactory()
+    first = api_client.get(_url(image.item_part_id))
+
+    with django_assert_num_queries(0):
+        again = api_client.get(_url(image.item_part_id))
+
+    assert again.status_code == 200
+    assert (again.data, again["ETag"]) == (first.data, first["ETag"])
+
+
+def test_saving_a_feeding_row_invalidates_the_manifest(api_client):
+    image = ItemImageFactory()
+    before = api_client.get(_url(image.item_part_id))
+
+    _text(image)
+    after = api_client.get(_url(image.item_part_id), HTTP_IF_NONE_MATCH=before["ETag"])
+
+    assert after.status_code == 200
+    assert after["ETag"] != before["ETag"]
+    assert after.data["items"][0]["annotations"][0]["items"][0]["body"]["value"] == "Omnibus"
+
+
+def test_a_manifest_read_before_the_commit_is_invalidated_by_it(
+    api_client, monkeypatch, django_capture_on_commit_callbacks
+):
+    image = ItemImageFactory()
+    monkeypatch.setattr("apps.search.signals.schedule_pending_sync", lambda *args: None)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _text(image)
+        during = api_client.get(_url(image.item_part_id))
+
+    after = api_client.get(_url(image.item_part_id), HTTP_IF_NONE_MATCH=during["ETag"])
+    assert after.status_code == 200
+    assert after["ETag"] != during["ETag"]
+
+
+def test_last_modified_increases_with_every_change(api_client, monkeypatch):
+    image = ItemImageFactory()
+    monkeypatch.setattr("apps.iiif_presentation.cache.time.time_ns", lambda: 1_700_000_000_123_000_000)
+    before = api_client.get(_url(image.item_part_id))
+
+    ItemPart.objects.get(pk=image.item_part_id).save()
+    after = api_client.get(_url(image.item_part_id), HTTP_IF_MODIFIED_SINCE=before["Last-Modified"])
+
+    assert after.status_code == 200
+    assert after["Last-Modified"] != before["Last-Modified"]
+
+
+def test_unknown_parts_get_no_generation(api_client):
+    response = api_client.get(_url(987654))
+
+    assert response.status_code == 404
+    assert caches["locks"].get("iiif:manifest-generation:987654") is None
+
+
+def test_other_parts_keep_their_etag(api_client):
+    image, other = ItemImageFactory(), ItemImageFactory()
+    before = api_client.get(_url(other.item_part_id))
+
+    ItemPart.objects.get(pk=image.item_part_id).save()
+
+    assert api_client.get(_url(other.item_part_id))["ETag"] == before["ETag"]
+
+
+def test_moving_a_row_invalidates_the_part_it_left(api_client):
+    image, other = ItemImageFactory(), ItemImageFactory()
+    left = image.item_part_id
+    graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    etags = [api_client.get(_url(left))["ETag"]]
+
+    graph.item_image = other
+    graph.save()
+    etags.append(api_client.get(_url(left))["ETag"])
+    image.item_part = other.item_part
+    image.save()
+    etags.append(api_client.get(_url(left))["ETag"])
+
+    assert len(set(etags)) == 3
+
+
+def test_repository_and_catalogue_edits_invalidate_the_label(api_client):
+    part = ItemPartFactory()
+    number = CatalogueNumberFactory(historical_item=part.historical_item)
+    etags = [api_client.get(_url(part.pk))["ETag"]]
+
+    part.current_item.repository.label = "Renamed"
+    part.current_item.repository.save()
+    etags.append(api_client.get(_url(part.pk))["ETag"])
+    number.number = "Ker 1"
+    number.save()
+    etags.append(api_client.get(_url(part.pk))["ETag"])
+    number.delete()
+    etags.append(api_client.get(_url(part.pk))["ETag"])
+
+    assert len(set(etags)) == 4
+
+
+def test_bulk_writes_invalidate_through_the_signal(api_client):
+    image = ItemImageFactory()
+    before = api_client.get(_url(image.item_part_id))
+
+    iiif_sources_changed.send(ImageText, item_part_ids=[image.item_part_id])
+
+    assert api_client.get(_url(image.item_part_id))["ETag"] != before["ETag"]
+
+
+def test_staff_and_anonymous_users_get_separate_copies(api_client):
+    image = ItemImageFactory()
+    _text(image, status=ImageText.Status.DRAFT)
+    anonymous = api_client.get(_url(image.item_part_id))
+    api_client.force_authenticate(SuperuserFactory())
+
+    staff = api_client.get(_url(image.item_part_id), HTTP_IF_NONE_MATCH=anonymous["ETag"])
+
+    assert staff.status_code == 200
+    assert "annotations" not in anonymous.data["items"][0]
+    assert staff.data["items"][0]["annotations"]
+    assert "private" in staff["Cache-Control"]
+
+
+def test_without_the_generation_store_manifests_are_built_uncached(api_client, monkeypatch):
+    image = ItemImageFactory()
+    monkeypatch.setattr("apps.iiif_presentation.cache.caches", {})
+
+    response = api_client.get(_url(image.item_part_id))
+
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
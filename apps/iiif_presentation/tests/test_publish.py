@@ -0,0 +1,166 @@
+"""Static publication: files mirror the dynamic URLs and follow changed rows."""
+
+import json
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+import pytest
+
+from apps.annotations.models import Graph
+from apps.iiif_presentation import tasks
+from apps.iiif_presentation.publish import PublishInProgressError, publish_lock, publish_static, static_path
+from apps.manuscripts.models import ImageText, ItemPart
+from apps.manuscripts.tests.factories import ItemImageFactory
+
+pytestmark = pytest.mark.django_db
+
+POLY = {
+    "type": "Feature",
+    "geometry": {"type": "Polygon", "coordinates": [[[10, 20], [110, 20], [110, 70], [10, 70], [10, 20]]]},
+}
+BASE = "https://iiif.example.org"
+
+
+@pytest.fixture(autouse=True)
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "publish-tests"},
+    }
+    caches["locks"].clear()
+
+
+def _text(image, status=ImageText.Status.LIVE) -> ImageText:
+    graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    return ImageText.objects.create(
+        item_image=image,
+        content=f'<p><seg corresp="#gid-{graph.id}">Omnibus</seg></p>',
+        type=ImageText.Type.TRANSCRIPTION,
+        status=status,
+    )
+
+
+def _read(root, url: str) -> dict:
+    return json.loads(static_path(root, url).read_text())
+
+
+def test_publishes_what_the_dynamic_views_serve_anonymously(tmp_path, api_client):
+    image = ItemImageFactory()
+    text = _text(image)
+    draft = _text(ItemImageFactory(item_part=image.item_part), status=ImageText.Status.DRAFT)
+
+    report = publish_static(tmp_path, base_url=BASE)
+
+    part = image.item_part_id
+    for path in (f"/api/v1/iiif/item-parts/{part}/manifest", f"/api/v1/annotations-w3c/image-texts/{text.id}/"):
+        dynamic = json.dumps(api_client.get(path).data).replace("http://testserver", BASE)
+        assert _read(tmp_path, f"{BASE}{path}") == json.loads(dynamic)
+    page = _read(tmp_path, f"{BASE}/api/v1/iiif/canvas/{image.id}/transcription")
+    assert page["items"][0]["body"]["value"] == "Omnibus"
+    assert not static_path(tmp_path, f"{BASE}/api/v1/annotations-w3c/image-texts/{draft.id}/").exists()
+    collection = _read(tmp_path, f"{BASE}/api/v1/iiif/collection")
+    assert [item["id"] for item in collection["items"]] == [f"{BASE}/api/v1/iiif/item-parts/{part}/manifest"]
+    assert collection == json.loads(
+        json.dumps(api_client.get("/api/v1/iiif/collection").data).replace("http://testserver", BASE)
+    )
+    assert report.published == [part]
+
+
+def test_only_parts_with_changed_rows_are_rerendered(tmp_path):
+    image, other = ItemImageFactory(), ItemImageFactory()
+    publish_static(tmp_path, base_url=BASE)
+
+    text = _text(image)
+    report = publish_static(tmp_path, base_url=BASE)
+
+    assert (report.published, report.unchanged) == ([image.item_part_id], 1)
+    assert static_path(tmp_path, f"{BASE}/api/v1/annotations-w3c/image-texts/{text.id}/").exists()
+    assert publish_static(tmp_path, base_url=BASE).published == []
+    assert publish_static(tmp_path, base_url=BASE, full=True).published == sorted(
+        [image.item_part_id, other.item_part_id]
+    )
+
+
+def test_files_a_part_no_longer_produces_are_removed(tmp_path):
+    image = ItemImageFactory()
+    text = _text(image)
+    publish_static(tmp_path, base_url=BASE)
+    text_file = static_path(tmp_path, f"{BASE}/api/v1/annotations-w3c/image-texts/{text.id}/")
+    assert text_file.exists()
+
+    text.status = ImageText.Status.DRAFT
+    text.save()
+    publish_static(tmp_path, base_url=BASE)
+    assert not text_file.exists()
+
+    ItemPart.objects.filter(pk=image.item_part_id).delete()
+    report = publish_static(tmp_path, base_url=BASE)
+    assert report.removed == [image.item_part_id]
+    assert not static_path(tmp_path, f"{BASE}/api/v1/iiif/item-parts/{image.item_part_id}/manifest").exists()
+    assert _read(tmp_path, f"{BASE}/api/v1/iiif/collection")["items"] == []
+
+
+def test_the_command_publishes_selected_parts(tmp_path, settings):
+    settings.IIIF_STATIC_BASE_URL = BASE
+    image, other = ItemImageFactory(), ItemImageFactory()
+
+    call_command("publish_iiif_static", "--root", str(tmp_path), "--item-part", str(image.item_part_id))
+
+    assert static_path(tmp_path, f"{BASE}/api/v1/iiif/item-parts/{image.item_part_id}/manifest").exists()
+    assert not static_path(tmp_path, f"{BASE}/api/v1/iiif/item-parts/{other.item_part_id}/manifest").exists()
+
+
+def test_changes_schedule_one_debounced_publish_when_enabled(settings, monkeypatch, django_capture_on_commit_callbacks):
+    settings.IIIF_STATIC_PUBLISH_ON_CHANGE = True
+    settings.IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS = 30
+    dispatched: list[dict] = []
+    monkeypatch.setattr(tasks.publish_iiif_static, "apply_async", lambda **options: dispatched.append(options))
+    monkeypatch.setattr("apps.search.signals.schedule_pending_sync", lambda *args: None)
+    monkeypatch.setattr("apps.manuscripts.signals.refresh_image_dimensions", mock.MagicMock())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image = ItemImageFactory()
+        _text(image)
+
+    assert dispatched == [{"countdown": 30}]
+
+
+def test_one_run_at_a_time_publishes_into_a_root(tmp_path, settings, monkeypatch):
+    settings.IIIF_STATIC_BASE_URL = BASE
+    settings.IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS = 30
+    image = ItemImageFactory()
+    dispatched: list[dict] = []
+    monkeypatch.setattr(tasks.publish_iiif_static, "apply_async", lambda **options: dispatched.append(options))
+
+    with publish_lock(tmp_path):
+        with pytest.raises(PublishInProgressError):
+            publish_static(tmp_path)
+        with pytest.raises(CommandError):
+            call_command("publish_iiif_static", "--root", str(tmp_path))
+        settings.IIIF_STATIC_ROOT = str(tmp_path)
+        assert tasks.publish_iiif_static(item_part_ids=[image.item_part_id]) == {"deferred": True}
+
+    assert dispatched == [{"kwargs": {"item_part_ids": [image.item_part_id], "full": False}, "countdown": 30}]
+    assert not static_path(tmp_path, f"{BASE}/api/v1/iiif/item-parts/{image.item_part_id}/manifest").exists()
+    assert publish_static(tmp_path).published == [image.item_part_id]
+
+
+def test_files_are_staged_under_unique_names(tmp_path, settings, monkeypatch):
+    settings.IIIF_STATIC_BASE_URL = BASE
+    image = ItemImageFactory()
+    staged: list[str] = []
+    replace = type(tmp_path).replace
+
+    def record(self, target):
+        staged.append(self.name)
+        return replace(self, target)
+
+    monkeypatch.setattr(type(tmp_path), "replace", record)
+    publish_static(tmp_path)
+    publish_static(tmp_path, full=True)
+
+    assert len(staged) == len(set(staged)) > 0
+    assert all(name.startswith(".") and name.endswith(".tmp") for name in staged)
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert static_path(tmp_path, f"{BASE}/api/v1/iiif/item-parts/{image.item_part_id}/manifest").exists()
@@ -3,6 +3,8 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path("collection", views.item_part_collection, name="iiif-collection"),
     path("item-parts/<int:item_part_id>/manifest", views.item_part_manifest, name="iiif-manifest"),
     path("item-parts/<int:item_part_id>/search", views.item_part_search, name="iiif-content-search"),
+    path("item-parts/<int:item_part_id>/autocomplete", views.item_part_autocomplete, name="iiif-autocomplete"),
 ]
@@ -1,16 +1,20 @@
 """IIIF Presentation 3.0 endpoints (public, read-only)."""
 
+from django.http.response import HttpResponseBase
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from apps.annotations.models import Graph
-from apps.manuscripts.models import ImageText, ItemImage, ItemPart
-from apps.manuscripts.services.tei import referenced_graph_ids
+from apps.manuscripts.models import ItemPart
 
-from .content_search import build_content_search
-from .manifest import build_manifest
+from .cache import STAFF, ManifestVersion, manifest_generation, visibility_tier
+from .content_search import build_autocomplete, build_content_search
+from .manifest import build_collection, build_manifest
+from .sources import collection_item_parts, load_item_part_sources
 
 _IIIF = "application/ld+json"
 
@@ -20,53 +24,97 @@ def _base_url(request: Request) -> str:
 
 
 def _load_item_part_iiif_data(request: Request, item_part_id: int):
-    """Shared loader for the manifest + content-search views.
+    """Loader for the manifest view.
 
     Returns (item_part, images, texts_by_image, graph_lookup), with the same
     public-visibility filter (anon sees Live/Reviewed texts only).
     """
     item_part = get_object_or_404(ItemPart, pk=item_part_id)
-    images = list(ItemImage.objects.filter(item_part=item_part).order_by("locus", "id"))
-    image_ids = [img.id for img in images]
+    return (item_part, *load_item_part_sources(item_part, request.user))
 
-    texts_qs = ImageText.objects.filter(item_image_id__in=image_ids).visible_to(request.user)
 
-    texts_by_image: dict[int, list] = {}
-    wanted: set[int] = set()
-    for text in texts_qs:
-        texts_by_image.setdefault(text.item_image_id, []).append(text)
-        wanted |= referenced_graph_ids(text.content or "")
+@api_view(["GET"])
+@permission_classes([])
+def item_part_manifest(request: Request, item_part_id: int) -> HttpResponseBase:
+    """A IIIF Presentation 3.0 Manifest for a manuscript part.
 
-    graph_lookup = {g.id: g for g in Graph.objects.filter(id__in=wanted).select_related("item_image")}
-    return item_part, images, texts_by_image, graph_lookup
+    Served from the manifest cache with a strong ETag; a matching
+    If-None-Match is answered 304 without querying the database. Unknown
+    ids fall through to the uncached build, which answers 404.
+    """
+    base_url = _base_url(request)
+    tier = visibility_tier(request.user)
+
+    def build() -> dict:
+        item_part, images, texts_by_image, graph_lookup = _load_item_part_iiif_data(request, item_part_id)
+        return build_manifest(
+            item_part,
+            images=images,
+            texts_by_image=texts_by_image,
+            graph_lookup=graph_lookup,
+            base_url=base_url,
+        )
+
+    generation = manifest_generation(item_part_id, exists=ItemPart.objects.filter(pk=item_part_id).exists)
+    if generation is None:
+        return Response(build(), content_type=_IIIF)
+    version = ManifestVersion(item_part_id, tier=tier, generation=generation, base_url=base_url)
+    response = get_conditional_response(request, etag=version.etag, last_modified=version.last_modified)
+    if response is None:
+        response = Response(version.get_or_build(build), content_type=_IIIF)
+    response.headers["ETag"] = version.etag
+    response.headers["Last-Modified"] = http_date(version.last_modified)
+    # Clients revalidate every time; that costs a 304, not a rebuild.
+    if tier == STAFF:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True, public=True)
+    return response
 
 
 @api_view(["GET"])
 @permission_classes([])
-def item_part_manifest(request: Request, item_part_id: int) -> Response:
-    """A IIIF Presentation 3.0 Manifest for a manuscript part."""
-    item_part, images, texts_by_image, graph_lookup = _load_item_part_iiif_data(request, item_part_id)
-    manifest = build_manifest(
+def item_part_search(request: Request, item_part_id: int) -> Response:
+    """IIIF Content Search 2.0: regions whose linked transcription matches ?q.
+
+    Optional ``page`` (1-based), ``match=prefix`` and ``diacritics=ignore``.
+    """
+    item_part = get_object_or_404(ItemPart, pk=item_part_id)
+    try:
+        page = int(request.query_params.get("page", 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return Response({"detail": "page must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+    result = build_content_search(
         item_part,
-        images=images,
-        texts_by_image=texts_by_image,
-        graph_lookup=graph_lookup,
+        query=request.query_params.get("q", ""),
+        user=request.user,
         base_url=_base_url(request),
+        page=page,
+        prefix=request.query_params.get("match") == "prefix",
+        ignore_diacritics=request.query_params.get("diacritics") == "ignore",
     )
-    return Response(manifest, content_type=_IIIF)
+    return Response(result, content_type=_IIIF)
 
 
 @api_view(["GET"])
 @permission_classes([])
-def item_part_search(request: Request, item_part_id: int) -> Response:
-    """IIIF Content Search 2.0: regions whose linked transcription matches ?q."""
-    item_part, images, texts_by_image, graph_lookup = _load_item_part_iiif_data(request, item_part_id)
-    page = build_content_search(
+def item_part_autocomplete(request: Request, item_part_id: int) -> Response:
+    """IIIF Content Search 2.0 autocomplete: words of linked phrases starting with ?q."""
+    item_part = get_object_or_404(ItemPart, pk=item_part_id)
+    terms = build_autocomplete(
         item_part,
-        images=images,
-        texts_by_image=texts_by_image,
-        graph_lookup=graph_lookup,
         query=request.query_params.get("q", ""),
+        user=request.user,
         base_url=_base_url(request),
+        ignore_diacritics=request.query_params.get("diacritics") == "ignore",
     )
-    return Response(page, content_type=_IIIF)
+    return Response(terms, content_type=_IIIF)
+
+
+@api_view(["GET"])
+@permission_classes([])
+def item_part_collection(request: Request) -> Response:
+    """A IIIF Presentation 3.0 Collection of every manuscript part's manifest."""
+    return Response(build_collection(collection_item_parts(), base_url=_base_url(request)), content_type=_IIIF)
@@ -9,7 +9,7 @@ class ManuscriptsConfig(AppConfig):
     def ready(self) -> None:
         from apps.common.audit import register_audited_models
 
-        from . import signals  # noqa: F401  (registers the Graph pre_delete receiver)
+        from . import signals  # noqa: F401  (registers the Graph and ItemImage receivers)
         from .models import ImageText
 
         register_audited_models(ImageText)
@@ -1,32 +1,29 @@
-from functools import lru_cache
 import json
 from urllib.parse import urljoin
-import urllib.request
 
 from django.conf import settings
+from django.dispatch import Signal
 
-# Fallback canvas size when an image's info.json can't be fetched. The Y-flip
+# Canvas size used while an image's dimensions are unknown. The Y-flip
 # computed against this is only approximate, so callers should treat a fallback
 # as "dimensions unknown".
 FALLBACK_IMAGE_DIMS = (1000, 1000)
 
+# Sent with ``item_part_ids`` when rows that IIIF documents are built from
+# change through a bulk write (``QuerySet.update``/``bulk_update``), which
+# fires no model signals.
+iiif_sources_changed = Signal()
 
-@lru_cache(maxsize=4096)
-def _fetch_info_dimensions(identifier: str) -> tuple[int, int]:
-    """(width, height) from the image's info.json. Raises on any failure so
-    that only *successful* lookups are memoized (failures must not be cached)."""
-    with urllib.request.urlopen(f"{identifier}/info.json", timeout=3) as resp:
-        info = json.loads(resp.read())
-    return int(info["width"]), int(info["height"])
 
+def image_dimensions(image) -> tuple[int, int]:
+    """(width, height) stored on an ItemImage, or the fallback while unknown.
 
-def resolve_image_dimensions(identifier: str) -> tuple[int, int]:
-    """(width, height) for an IIIF image identifier; falls back without caching
-    the failure, so a recovered image server is re-probed on the next call."""
-    try:
-        return _fetch_info_dimensions(identifier)
-    except (OSError, ValueError, KeyError, TypeError):  # fmt: skip
-        return FALLBACK_IMAGE_DIMS
+    Never touches the network: dimensions are recorded when the image is saved
+    and by ``backfill_image_dimensions`` (see services/image_dimensions.py).
+    """
+    if image.width and image.height:
+        return image.width, image.height
+    return FALLBACK_IMAGE_DIMS
 
 
 def get_iiif_url(file_path: str, profile_name: str | None = None) -> str:
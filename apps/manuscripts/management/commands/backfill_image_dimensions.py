@@ -0,0 +1,43 @@
+"""Record ItemImage width/height from the image server's info.json.
+
+IIIF views read the stored dimensions and never probe the image server, so
+images saved before dimensions were stored (or whose file wasn't readable
+locally) fall back to a default canvas until this runs. Requests go out
+`--workers` at a time over one pooled HTTP client and rows are written in
+batches. Only images without dimensions are visited unless `--all` is given.
+"""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from apps.manuscripts.models import ItemImage
+from apps.manuscripts.services.image_dimensions import (
+    DEFAULT_WORKERS,
+    info_client,
+    missing_dimensions,
+    refresh_dimensions,
+)
+
+
+class Command(BaseCommand):
+    help = "Store ItemImage width/height fetched from the IIIF image server."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--all", action="store_true", help="Refresh every image, not only unknown ones.")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent info.json requests.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Images fetched and written per batch.")
+
+    def handle(self, *args, **options) -> None:
+        images = ItemImage.objects.exclude(image="") if options["all"] else missing_dimensions()
+        images = images.order_by("pk").only("pk", "item_part_id", "image", "width", "height")
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        seen = updated = 0
+        with info_client(workers) as client:
+            it = images.iterator(chunk_size=batch_size)
+            while batch := list(islice(it, batch_size)):
+                seen += len(batch)
+                updated += len(refresh_dimensions(batch, workers=workers, client=client))
+                self.stdout.write(f"{updated}/{seen} images updated")
+        self.stdout.write(self.style.SUCCESS(f"Stored dimensions of {updated} of {seen} images."))
@@ -0,0 +1,32 @@
+"""Rebuild the TextLink rows of every ImageText from its content.
+
+Saving an ImageText keeps its rows current and migration 0025 fills the
+table for existing texts; run this after any write that bypassed `save` (a `QuerySet.update`, raw SQL, a
+fixture load). Texts are parsed and written `--batch-size` at a time, each
+batch in one transaction together with the tables derived from the links.
+"""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from apps.manuscripts.models import ImageText
+from apps.manuscripts.services.text_links import rebuild_text_links
+
+
+class Command(BaseCommand):
+    help = "Rebuild TextLink rows from ImageText content."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500, help="Texts rebuilt per transaction.")
+
+    def handle(self, *args, **options) -> None:
+        batch_size = max(1, options["batch_size"])
+        texts = ImageText.objects.select_related("item_image").order_by("pk")
+        seen = links = 0
+        it = texts.iterator(chunk_size=batch_size)
+        while batch := list(islice(it, batch_size)):
+            seen += len(batch)
+            links += rebuild_text_links(batch)
+            self.stdout.write(f"{seen} texts rebuilt")
+        self.stdout.write(self.style.SUCCESS(f"Stored {links} links from {seen} texts."))
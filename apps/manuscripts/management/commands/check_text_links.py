@@ -1,17 +1,23 @@
 """Integrity check for text↔region links (text_annotation plan, Phase 1).
 
-Walks every ImageText, parses its in-text graph references, and flags any that
-point at a missing Graph, a non-TEXT Graph, or a Graph on a different image
-than the text. Read-only; exits non-zero when problems are found so it can gate
-CI or a pre-migration check.
+Flags TextLink rows that point at a missing Graph, a non-TEXT Graph, or a
+Graph on a different image than the text. Each is one anti-join over the
+stored links, so nothing is parsed. It also flags texts whose content has
+graph refs but that have no links at all — written around `ImageText.save`
+and in need of `backfill_text_links`; only texts without links that mention
+a ref attribute are parsed to find them. Read-only; exits non-zero when
+problems are found so it can gate CI or a pre-migration check.
 """
 
 from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
 
 from apps.annotations.models import Graph
-from apps.manuscripts.models import ImageText
+from apps.manuscripts.models import ImageText, TextLink
 from apps.manuscripts.services.tei import parse_graph_refs
 
+MAX_LISTED = 100
+
 
 class Command(BaseCommand):
     help = "Report text↔region links that point at missing, non-TEXT, or cross-image Graphs."
@@ -20,39 +26,63 @@ class Command(BaseCommand):
         parser.add_argument("--verbose-ok", action="store_true", help="Also print healthy totals per row.")
 
     def handle(self, *args, **options) -> None:
-        graph_meta = dict(Graph.objects.values_list("id", "annotation_type"))
-        graph_image = dict(Graph.objects.values_list("id", "item_image_id"))
+        links = TextLink.objects.order_by("image_text_id", "position")
+        graph = Graph.objects.filter(pk=OuterRef("graph_id"))
+        text_graph = graph.filter(annotation_type=Graph.AnnotationType.TEXT)
+        checks = {
+            "missing": (
+                links.filter(~Exists(graph)).values_list("image_text_id", "graph_id"),
+                lambda text_id, gid: f"ImageText #{text_id}: ref → Graph {gid} does not exist",
+            ),
+            "non_text": (
+                links.filter(Exists(graph), ~Exists(text_graph)).values_list(
+                    "image_text_id", "graph_id", "graph__annotation_type"
+                ),
+                lambda text_id, gid, kind: f"ImageText #{text_id}: ref → Graph {gid} is '{kind}', not text",
+            ),
+            "cross_image": (
+                links.filter(
+                    Exists(text_graph.exclude(item_image_id=OuterRef("image_text__item_image_id")))
+                ).values_list("image_text_id", "image_text__item_image_id", "graph_id", "graph__item_image_id"),
+                lambda text_id, image_id, gid, graph_image_id: (
+                    f"ImageText #{text_id} (image {image_id}): ref → Graph {gid} on image {graph_image_id}"
+                ),
+            ),
+        }
 
-        summary = {"texts": 0, "links": 0, "missing": 0, "non_text": 0, "cross_image": 0}
+        summary = {"texts": ImageText.objects.count(), "links": links.count()}
         problems: list[str] = []
-
-        for it in ImageText.objects.all().only("id", "content", "item_image_id"):
-            summary["texts"] += 1
-            for ref in parse_graph_refs(it.content or ""):
-                for gid in ref.graph_ids:
-                    summary["links"] += 1
-                    if gid not in graph_meta:
-                        summary["missing"] += 1
-                        problems.append(f"ImageText #{it.id}: ref → Graph {gid} does not exist")
-                    elif graph_meta[gid] != "text":
-                        summary["non_text"] += 1
-                        problems.append(f"ImageText #{it.id}: ref → Graph {gid} is '{graph_meta[gid]}', not text")
-                    elif graph_image.get(gid) != it.item_image_id:
-                        summary["cross_image"] += 1
-                        problems.append(
-                            f"ImageText #{it.id} (image {it.item_image_id}): "
-                            f"ref → Graph {gid} on image {graph_image.get(gid)}"
-                        )
+        for name, (rows, describe) in checks.items():
+            summary[name] = rows.count()
+            problems.extend(describe(*row) for row in rows[: max(0, MAX_LISTED - len(problems))])
+        unlinked = self._unlinked_texts()
+        summary["unlinked"] = len(unlinked)
+        problems.extend(
+            f"ImageText #{text_id}: has graph refs but no stored links (run backfill_text_links)"
+            for text_id in unlinked[: max(0, MAX_LISTED - len(problems))]
+        )
+        total = summary["missing"] + summary["non_text"] + summary["cross_image"] + summary["unlinked"]
 
         self.stdout.write("--- text-link integrity ---")
         for key, value in summary.items():
             self.stdout.write(f"{key}: {value}")
-        if problems:
+        if total:
             self.stdout.write("")
-            for line in problems[:100]:
+            for line in problems:
                 self.stdout.write(line)
-            if len(problems) > 100:
-                self.stdout.write(f"... and {len(problems) - 100} more")
-            self.stderr.write(f"FAILED: {len(problems)} problem link(s) found.")
+            if total > len(problems):
+                self.stdout.write(f"... and {total - len(problems)} more")
+            self.stderr.write(f"FAILED: {total} problem link(s) found.")
             raise SystemExit(1)
         self.stdout.write("All text↔region links resolve to live TEXT Graphs on the same image.")
+
+    @staticmethod
+    def _unlinked_texts() -> list[int]:
+        """Ids of the texts whose content has refs but that have no TextLink rows."""
+        candidates = (
+            ImageText.objects.filter(~Exists(TextLink.objects.filter(image_text_id=OuterRef("pk"))))
+            .filter(Q(content__contains="corresp=") | Q(content__contains="data-graph-id="))
+            .order_by("pk")
+            .values_list("pk", "content")
+        )
+        return [pk for pk, content in candidates.iterator() if parse_graph_refs(content)]
@@ -17,25 +17,25 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from apps.annotations.models import Graph
-from apps.manuscripts.models import ImageText
-from apps.manuscripts.services.tei import parse_graph_refs
+from apps.manuscripts.models import TextLink
 
 
 def build_reverse_map() -> dict[int, list[dict]]:
     """graph id → list of referencing elements across all ImageTexts."""
     reverse: dict[int, list[dict]] = defaultdict(list)
-    for it in ImageText.objects.all().only("id", "type", "content"):
-        for ref in parse_graph_refs(it.content or ""):
-            for gid in ref.graph_ids:
-                reverse[gid].append(
-                    {
-                        "image_text": it.id,
-                        "kind": it.type,
-                        "element": ref.element,
-                        "type": ref.type,
-                        "text": ref.text,
-                    }
-                )
+    links = TextLink.objects.select_related("image_text").only(
+        "graph_id", "element", "type", "text", "image_text__id", "image_text__type"
+    )
+    for link in links.order_by("image_text_id", "position"):
+        reverse[link.graph_id].append(
+            {
+                "image_text": link.image_text_id,
+                "kind": link.image_text.type,
+                "element": link.element,
+                "type": link.type or None,
+                "text": link.text,
+            }
+        )
     return reverse
 
 
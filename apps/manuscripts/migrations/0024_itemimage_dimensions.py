@@ -0,0 +1,23 @@
+# Generated by Django 6.0.7 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manuscripts', '0023_msdescarea'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
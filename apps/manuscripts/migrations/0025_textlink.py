@@ -0,0 +1,136 @@
+# Generated by Django 6.0.7 on 2026-10-18 06:08
+
+from html.parser import HTMLParser
+from itertools import islice
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of apps.manuscripts.services.tei.links.parse_graph_refs as of
+# this migration, so later changes to the live parser don't change what it
+# stores.
+_TEI_LINKABLE = {"seg", "persname", "placename", "ex", "supplied", "lb"}
+
+
+def _graph_ids(attrs):
+    if attrs.get("corresp"):
+        ids = []
+        for token in attrs["corresp"].split():
+            token = token.lstrip("#")
+            if token.startswith("gid-"):
+                token = token[len("gid-") :]
+            if token.isdigit():
+                ids.append(int(token))
+        return ids
+    if attrs.get("data-graph-id"):
+        return [int(part) for part in attrs["data-graph-id"].split(",") if part.strip().isdigit()]
+    return []
+
+
+class _RefCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.refs = []
+        self._stack = []
+        self._linkable_seen = -1
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {key: (value or "") for key, value in attrs}
+        linkable = tag in _TEI_LINKABLE or (tag == "span" and "data-dpt" in attrs)
+        if linkable:
+            self._linkable_seen += 1
+        ids = _graph_ids(attrs)
+        ref = None
+        if ids:
+            ref = {
+                "graph_ids": ids,
+                "element": tag,
+                "type": attrs.get("type") or attrs.get("data-dpt-type") or "",
+                "text": "",
+                "element_index": self._linkable_seen if linkable else None,
+            }
+            self.refs.append(ref)
+        self._stack.append(ref)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._stack:
+            self._stack.pop()
+
+    def handle_data(self, data):
+        for ref in reversed(self._stack):
+            if ref is not None:
+                ref["text"] += data
+                break
+
+
+def _link_values(content, element_length, type_length):
+    parser = _RefCollector()
+    parser.feed(content or "")
+    parser.close()
+    values = []
+    for ref in parser.refs:
+        text = re.sub(r"\s+", " ", ref["text"]).strip()
+        for graph_id in ref["graph_ids"]:
+            values.append(
+                {
+                    "position": len(values),
+                    "element_index": ref["element_index"],
+                    "element": ref["element"][:element_length],
+                    "type": ref["type"][:type_length],
+                    "graph_id": graph_id,
+                    "text": text,
+                }
+            )
+    return values
+
+
+def _fill_text_links(apps, schema_editor):
+    """Store the links of every existing text, so readers see them right after migrating.
+
+    Derived tables (content search phrases) are filled by their own migrations.
+    """
+    ImageText = apps.get_model("manuscripts", "ImageText")
+    TextLink = apps.get_model("manuscripts", "TextLink")
+    element_length = TextLink._meta.get_field("element").max_length
+    type_length = TextLink._meta.get_field("type").max_length
+    it = ImageText.objects.exclude(content="").order_by("pk").values_list("pk", "content").iterator(chunk_size=500)
+    while batch := list(islice(it, 500)):
+        TextLink.objects.bulk_create(
+            TextLink(image_text_id=pk, **values)
+            for pk, content in batch
+            for values in _link_values(content, element_length, type_length)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('annotations', '0009_alter_graph_allograph'),
+        ('manuscripts', '0024_itemimage_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('element_index', models.PositiveIntegerField(blank=True, null=True)),
+                ('element', models.CharField(max_length=32)),
+                ('type', models.CharField(blank=True, default='', max_length=64)),
+                ('text', models.TextField(blank=True, default='')),
+                ('graph', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='text_links', to='annotations.graph')),
+                ('image_text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='links', to='manuscripts.imagetext')),
+            ],
+            options={
+                'ordering': ['image_text', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('image_text', 'position'), name='textlink_unique_position')],
+            },
+        ),
+        migrations.RunPython(_fill_text_links, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from djiiif import IIIFField
 import tagulous.models
 
@@ -209,6 +209,10 @@ class CatalogueNumber(models.Model):
 class ItemImage(models.Model):
     item_part = models.ForeignKey(ItemPart, related_name="images", on_delete=models.CASCADE)
     image = IIIFField(max_length=200, upload_to="historical_items")
+    # Pixel size of the image, recorded on save or by backfill_image_dimensions
+    # so IIIF views never probe the image server. Null while unknown.
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     locus = models.CharField(max_length=72, blank=True, default="")
     tags = tagulous.models.TagField(force_lowercase=True, blank=True)
 
@@ -285,6 +289,52 @@ class ImageText(models.Model):
     def __str__(self) -> str:
         return f"{self.item_image} - {self.get_type_display()}"
 
+    def save(self, *args, **kwargs):
+        # TextLink rows are rebuilt in the same transaction as the content
+        # they are derived from, so they never disagree with a committed body.
+        from .services.text_links import rebuild_text_links
+
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or "content" in update_fields:
+                rebuild_text_links([self])
+
+
+class TextLink(models.Model):
+    """One in-text reference from an ImageText element to a region Graph.
+
+    Mirrors the `corresp`/`data-graph-id` attributes of `ImageText.content`
+    (see services/text_links.py), so readers join instead of parsing markup.
+    The graph is unconstrained on purpose: markup can name a Graph that
+    doesn't exist, and `check_text_links` reports those rows.
+    """
+
+    image_text = models.ForeignKey(ImageText, related_name="links", on_delete=models.CASCADE)
+    # Document order of the link within its text.
+    position = models.PositiveIntegerField()
+    # Index among the text's link-capable elements; null when the reference
+    # sits on another element.
+    element_index = models.PositiveIntegerField(null=True, blank=True)
+    element = models.CharField(max_length=32)
+    type = models.CharField(max_length=64, blank=True, default="")
+    graph = models.ForeignKey(
+        "annotations.Graph",
+        related_name="text_links",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    text = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["image_text", "position"]
+        constraints = [
+            models.UniqueConstraint(fields=["image_text", "position"], name="textlink_unique_position"),
+        ]
+
+    def __str__(self) -> str:
+        return f"ImageText #{self.image_text_id}[{self.position}] → Graph {self.graph_id}"
+
 
 class StatusTransition(models.Model):
     """Phase G — audit log of every status change on an `ImageText`.
@@ -0,0 +1,115 @@
+"""Recording the pixel size of ItemImages.
+
+IIIF manifests, content search and the W3C annotation views read
+``ItemImage.width``/``height`` and never contact the image server. The
+dimensions get there two ways:
+
+  * on save, Pillow reads the header of a newly uploaded or newly chosen
+    file (``read_file_dimensions``), so no HTTP is involved;
+  * out of band, ``refresh_dimensions`` asks the image server's
+    ``info.json`` for images whose file isn't readable locally. The
+    ``backfill_image_dimensions`` command and the ``refresh_image_dimensions``
+    task both use it, over one pooled HTTP client and a small thread pool.
+"""
+
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q, QuerySet
+import httpx
+
+from apps.manuscripts.iiif import iiif_sources_changed
+from apps.manuscripts.models import ItemImage
+
+logger = logging.getLogger(__name__)
+
+INFO_TIMEOUT_SECONDS = 5.0
+DEFAULT_WORKERS = 8
+_READ_ERRORS = (OSError, ValueError, SuspiciousFileOperation)
+_FETCH_ERRORS = (httpx.HTTPError, ValueError, KeyError, TypeError)
+
+
+def missing_dimensions() -> QuerySet[ItemImage]:
+    """Images whose width or height has not been recorded yet."""
+    return ItemImage.objects.filter(Q(width__isnull=True) | Q(height__isnull=True)).exclude(image="")
+
+
+def read_file_dimensions(field_file) -> tuple[int, int] | None:
+    """(width, height) of an ItemImage's file read with Pillow, or None if it can't be read.
+
+    Works on an uncommitted upload as well as on a file already in storage.
+    """
+    try:
+        width, height = field_file.width, field_file.height
+    except _READ_ERRORS:
+        return None
+    if not width or not height:
+        return None
+    return width, height
+
+
+def info_client(pool_size: int = DEFAULT_WORKERS) -> httpx.Client:
+    """An HTTP client whose connection pool is shared by *pool_size* concurrent fetches."""
+    return httpx.Client(
+        timeout=INFO_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        follow_redirects=True,
+    )
+
+
+def fetch_info_dimensions(client: httpx.Client, identifier: str) -> tuple[int, int]:
+    """(width, height) from the image's info.json; raises on any failure."""
+    response = client.get(f"{identifier}/info.json")
+    response.raise_for_status()
+    info = response.json()
+    return int(info["width"]), int(info["height"])
+
+
+def _identifier(image: ItemImage) -> str | None:
+    try:
+        return image.image.iiif.identifier
+    except (AttributeError, TypeError, ValueError):  # fmt: skip
+        return None
+
+
+def refresh_dimensions(
+    images: Iterable[ItemImage], *, workers: int = DEFAULT_WORKERS, client: httpx.Client | None = None
+) -> list[ItemImage]:
+    """Fetch the dimensions of *images* from the image server and store them.
+
+    Requests run *workers* at a time through one pooled client. Images whose
+    info.json can't be fetched are logged and left unknown for a later run.
+    Returns the images that were updated.
+    """
+    pending = [(image, identifier) for image in images if (identifier := _identifier(image))]
+    if not pending:
+        return []
+    workers = max(1, min(workers, len(pending)))
+    owned = client is None
+    client = client or info_client(workers)
+
+    def fetch(identifier: str) -> tuple[int, int] | None:
+        try:
+            return fetch_info_dimensions(client, identifier)
+        except _FETCH_ERRORS as exc:
+            logger.warning("Could not read dimensions of %s: %s", identifier, exc)
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, [identifier for _, identifier in pending]))
+    finally:
+        if owned:
+            client.close()
+
+    updated: list[ItemImage] = []
+    for (image, _), dims in zip(pending, results, strict=True):
+        if dims is not None:
+            image.width, image.height = dims
+            updated.append(image)
+    ItemImage.objects.bulk_update(updated, ["width", "height"])
+    if updated:
+        iiif_sources_changed.send(ItemImage, item_part_ids=sorted({image.item_part_id for image in updated}))
+    return updated
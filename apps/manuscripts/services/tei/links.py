@@ -6,6 +6,8 @@ content, `data-graph-id="N"` on a span) — pointing at a `Graph(annotation_type
 TEXT)` row. These helpers surface that relationship without a new model:
 
 - `parse_graph_refs(content)` → the referenced Graph ids, with element context.
+  Saving an ImageText stores its result as `TextLink` rows, which is what
+  readers should query.
 - `rewrite_graph_refs(content, mapping)` → renumber refs (e.g. after re-import).
 
 Both accept either storage format (TEI or legacy data-dpt) and are pure.
@@ -42,6 +44,9 @@ class GraphRef:
     element: str
     type: str | None
     text: str = ""
+    # Index among the link-capable elements (what add_graph_ref addresses);
+    # None when the reference sits on an element that isn't link-capable.
+    element_index: int | None = None
 
 
 def _ids_from_corresp(value: str) -> list[int]:
@@ -65,16 +70,25 @@ class _RefCollector(HTMLParser):
         self.refs: list[GraphRef] = []
         # Stack of (ref_or_None, text_accumulator_index) per open element.
         self._stack: list[GraphRef | None] = []
+        self._linkable_seen = -1
 
     def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
         d = {k: (v or "") for k, v in attrs}
+        linkable = _is_linkable(tag, d)
+        if linkable:
+            self._linkable_seen += 1
         ids: list[int] = []
         if d.get("corresp"):
             ids = _ids_from_corresp(d["corresp"])
         elif d.get("data-graph-id"):
             ids = _ids_from_data_graph_id(d["data-graph-id"])
         if ids:
-            ref = GraphRef(graph_ids=ids, element=tag, type=d.get("type") or d.get("data-dpt-type") or None)
+            ref = GraphRef(
+                graph_ids=ids,
+                element=tag,
+                type=d.get("type") or d.get("data-dpt-type") or None,
+                element_index=self._linkable_seen if linkable else None,
+            )
             self.refs.append(ref)
             self._stack.append(ref)
         else:
@@ -0,0 +1,56 @@
+"""The TextLink table: in-text graph references, stored.
+
+`ImageText.save` calls `rebuild_text_links` whenever `content` may have
+changed, inside the save's transaction. Tables derived from the links listen
+to `text_links_changed`, which is sent after the new rows are written: a
+`post_save` receiver would run before them. Writes that bypass `save`
+(`QuerySet.update`, raw SQL, fixtures loaded with `raw=True`) leave the
+rows stale until `backfill_text_links` runs.
+"""
+
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from apps.manuscripts.models import ImageText, TextLink
+from apps.manuscripts.services.tei import parse_graph_refs
+
+# Sent with ``image_texts`` once their rows are rebuilt, in the same transaction.
+text_links_changed = Signal()
+
+
+def link_values(content: str) -> list[dict]:
+    """The field values of the rows *content* yields, in document order."""
+    element_length = TextLink._meta.get_field("element").max_length
+    type_length = TextLink._meta.get_field("type").max_length
+    values: list[dict] = []
+    for ref in parse_graph_refs(content or ""):
+        for graph_id in ref.graph_ids:
+            values.append(
+                {
+                    "position": len(values),
+                    "element_index": ref.element_index,
+                    "element": ref.element[:element_length],
+                    "type": (ref.type or "")[:type_length],
+                    "graph_id": graph_id,
+                    "text": ref.text,
+                }
+            )
+    return values
+
+
+def link_rows(image_text: ImageText) -> list[TextLink]:
+    """The rows *image_text*'s content yields, unsaved, in document order."""
+    return [TextLink(image_text_id=image_text.pk, **values) for values in link_values(image_text.content)]
+
+
+def rebuild_text_links(image_texts: Iterable[ImageText]) -> int:
+    """Replace the TextLink rows of *image_texts*; returns how many they now have."""
+    image_texts = list(image_texts)
+    rows = [row for image_text in image_texts for row in link_rows(image_text)]
+    with transaction.atomic():
+        TextLink.objects.filter(image_text__in=[image_text.pk for image_text in image_texts]).delete()
+        TextLink.objects.bulk_create(rows)
+        text_links_changed.send(ImageText, image_texts=image_texts)
+    return len(rows)
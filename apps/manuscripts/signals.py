@@ -7,15 +7,23 @@ endpoint does this explicitly, but a Graph can be deleted by other paths too
 (the backoffice annotations table, the generic graph viewsets, an ItemImage
 cascade). This signal makes corresp-stripping an INVARIANT of graph deletion so
 no client can orphan a reference.
+
+ItemImage dimensions are kept with the file the same way: whenever the file
+changes, its size is read with Pillow before the row is written, and an image
+whose file can't be read locally is queued for an info.json refresh once the
+transaction commits.
 """
 
-from django.db.models.signals import pre_delete
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 from apps.annotations.models import Graph
 
-from .models import ImageText
+from .models import ImageText, ItemImage
+from .services.image_dimensions import read_file_dimensions
 from .services.tei import remove_graph_ref
+from .tasks import refresh_image_dimensions
 
 
 @receiver(pre_delete, sender=Graph, dispatch_uid="strip_text_region_corresp")
@@ -31,3 +39,32 @@ def strip_text_region_corresp(sender, instance: Graph, **kwargs) -> None:
         if updated != (text.content or ""):
             text.content = updated
             text.save(update_fields=["content", "modified"])
+
+
+def _image_changed(instance: ItemImage, update_fields) -> bool:
+    if update_fields is not None and "image" not in update_fields:
+        return False
+    if not instance.image._committed or instance.pk is None or instance.width is None:
+        return True
+    stored = ItemImage.objects.filter(pk=instance.pk).values_list("image", flat=True).first()
+    return stored != instance.image.name
+
+
+@receiver(pre_save, sender=ItemImage, dispatch_uid="record_item_image_dimensions")
+def record_item_image_dimensions(sender, instance: ItemImage, raw=False, update_fields=None, **kwargs) -> None:
+    """Store the pixel size of a new or replaced image file (unknown if unreadable)."""
+    if raw or not instance.image or not _image_changed(instance, update_fields):
+        return
+    instance.width, instance.height = read_file_dimensions(instance.image) or (None, None)
+    instance._refresh_dimensions = instance.width is None
+
+
+@receiver(post_save, sender=ItemImage, dispatch_uid="refresh_unknown_image_dimensions")
+def refresh_unknown_image_dimensions(sender, instance: ItemImage, raw=False, **kwargs) -> None:
+    """Queue an out-of-band info.json lookup for an image saved without dimensions."""
+    if raw or not getattr(instance, "_refresh_dimensions", False):
+        return
+    instance._refresh_dimensions = False
+    # robust: a broker outage must not fail the save that already committed;
+    # backfill_image_dimensions picks the image up later.
+    transaction.on_commit(lambda: refresh_image_dimensions.delay([instance.pk]), robust=True)
@@ -0,0 +1,16 @@
+"""Celery tasks for the manuscripts app."""
+
+from typing import Any
+
+from celery import shared_task
+
+from apps.manuscripts.models import ItemImage
+from apps.manuscripts.services.image_dimensions import refresh_dimensions
+
+
+@shared_task
+def refresh_image_dimensions(image_ids: list[int]) -> dict[str, Any]:
+    """Fetch and store the dimensions of images saved without readable ones."""
+    images = ItemImage.objects.filter(pk__in=image_ids, width__isnull=True)
+    updated = refresh_dimensions(images)
+    return {"requested": len(image_ids), "updated": [image.pk for image in updated]}
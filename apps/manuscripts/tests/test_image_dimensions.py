@@ -0,0 +1,106 @@
+"""Stored ItemImage dimensions: read on save, backfilled from info.json out of band."""
+
+import io
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+import httpx
+from PIL import Image
+import pytest
+
+from apps.manuscripts.iiif import FALLBACK_IMAGE_DIMS, image_dimensions
+from apps.manuscripts.models import ItemImage
+from apps.manuscripts.services import image_dimensions as service
+from apps.manuscripts.tests.factories import ItemImageFactory, ItemPartFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _info_client(sizes: dict[str, tuple[int, int]]) -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        for identifier, (width, height) in sizes.items():
+            if str(request.url) == f"{identifier}/info.json":
+                return httpx.Response(200, json={"width": width, "height": height})
+        return httpx.Response(404)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def test_an_upload_records_its_dimensions_on_save(media):
+    del media
+    image = ItemImage.objects.create(
+        item_part=ItemPartFactory(), image=SimpleUploadedFile("folio.png", _png(30, 45), content_type="image/png")
+    )
+
+    image.refresh_from_db()
+    assert (image.width, image.height) == (30, 45)
+    assert image_dimensions(image) == (30, 45)
+
+
+def test_replacing_the_file_rereads_its_dimensions(media, tmp_path):
+    del media
+    (tmp_path / "historical_items").mkdir()
+    (tmp_path / "historical_items" / "other.png").write_bytes(_png(12, 8))
+    image = ItemImage.objects.create(
+        item_part=ItemPartFactory(), image=SimpleUploadedFile("folio.png", _png(30, 45), content_type="image/png")
+    )
+
+    image.image = "historical_items/other.png"
+    image.save()
+    image.locus = "2r"
+    with mock.patch("apps.manuscripts.signals.read_file_dimensions") as read:
+        image.save(update_fields=["locus"])
+
+    image.refresh_from_db()
+    assert (image.width, image.height) == (12, 8)
+    read.assert_not_called()
+
+
+@mock.patch("apps.search.signals.schedule_pending_sync")
+def test_an_unreadable_file_is_queued_for_an_info_json_refresh(_sync, django_capture_on_commit_callbacks):
+    with mock.patch("apps.manuscripts.signals.refresh_image_dimensions") as task:
+        with django_capture_on_commit_callbacks(execute=True):
+            image = ItemImageFactory()
+
+    assert (image.width, image.height) == (None, None)
+    assert image_dimensions(image) == FALLBACK_IMAGE_DIMS
+    task.delay.assert_called_once_with([image.pk])
+
+
+def test_refresh_stores_what_the_image_server_reports_and_skips_failures():
+    found, missing = ItemImageFactory(), ItemImageFactory()
+    client = _info_client({found.image.iiif.identifier: (2000, 3000)})
+
+    updated = service.refresh_dimensions([found, missing], workers=2, client=client)
+
+    assert updated == [found]
+    assert list(ItemImage.objects.order_by("pk").values_list("width", "height")) == [(2000, 3000), (None, None)]
+
+
+def test_backfill_visits_only_unknown_images_unless_asked(monkeypatch):
+    known, unknown = ItemImageFactory(), ItemImageFactory()
+    ItemImage.objects.filter(pk=known.pk).update(width=1, height=1)
+    sizes = {image.image.iiif.identifier: (640, 480) for image in (known, unknown)}
+    monkeypatch.setattr(
+        "apps.manuscripts.management.commands.backfill_image_dimensions.info_client",
+        lambda workers: _info_client(sizes),
+    )
+
+    call_command("backfill_image_dimensions", "--workers", "2", stdout=io.StringIO())
+    assert ItemImage.objects.get(pk=known.pk).width == 1
+    assert ItemImage.objects.get(pk=unknown.pk).width == 640
+
+    call_command("backfill_image_dimensions", "--all", stdout=io.StringIO())
+    assert ItemImage.objects.get(pk=known.pk).width == 640
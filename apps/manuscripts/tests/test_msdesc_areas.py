@@ -10,6 +10,7 @@ import pytest
 from apps.manuscripts.models import MsDescArea
 from apps.manuscripts.services.tei import msdesc
 from apps.manuscripts.tests.factories import ItemPartFactory, MsDescAreaFactory
+from apps.search.types import IndexType
 
 
 class TestMsDescVocab:
@@ -185,32 +186,41 @@ class TestPublicItemPartDetail:
 
 @pytest.mark.django_db
 class TestMsDescAreaReindexPropagation:
-    """7.1 — every MsDescArea mutation enqueues an item-parts reindex on commit."""
+    """7.1 — every MsDescArea mutation marks its item part for an incremental sync on commit."""
 
-    def test_save_enqueues_item_parts_reindex(self, django_capture_on_commit_callbacks):
-        with mock.patch("apps.search.signals.reindex_search_index") as task:
+    @staticmethod
+    def _pending_item_parts() -> list[int]:
+        from apps.search.models import PendingIndexUpdate
+
+        return list(PendingIndexUpdate.objects.filter(index_type="item_parts").values_list("object_id", flat=True))
+
+    def test_save_schedules_item_parts_sync(self, django_capture_on_commit_callbacks):
+        with mock.patch("apps.search.signals.schedule_pending_sync") as schedule:
             with django_capture_on_commit_callbacks(execute=True):
-                MsDescAreaFactory()
-        task.delay.assert_called_once_with("item-parts")
+                area = MsDescAreaFactory()
+        assert area.item_part_id in self._pending_item_parts()
+        schedule.assert_any_call(IndexType.ITEM_PARTS)
 
-    def test_update_enqueues_item_parts_reindex(self, django_capture_on_commit_callbacks):
+    def test_update_schedules_item_parts_sync(self, django_capture_on_commit_callbacks):
         area = MsDescAreaFactory()
-        with mock.patch("apps.search.signals.reindex_search_index") as task:
+        with mock.patch("apps.search.signals.schedule_pending_sync") as schedule:
             with django_capture_on_commit_callbacks(execute=True):
                 area.is_published = True
                 area.save(update_fields=["is_published", "modified"])
-        task.delay.assert_called_once_with("item-parts")
+        # Resolved both before (old relations) and after the save; the task
+        # debounce collapses the two schedules into one run.
+        assert {call.args[0] for call in schedule.call_args_list} == {IndexType.ITEM_PARTS}
 
-    def test_delete_enqueues_item_parts_reindex(self, django_capture_on_commit_callbacks):
+    def test_delete_schedules_item_parts_sync(self, django_capture_on_commit_callbacks):
         area = MsDescAreaFactory()
-        with mock.patch("apps.search.signals.reindex_search_index") as task:
+        with mock.patch("apps.search.signals.schedule_pending_sync") as schedule:
             with django_capture_on_commit_callbacks(execute=True):
                 area.delete()
-        task.delay.assert_called_once_with("item-parts")
+        schedule.assert_called_once_with(IndexType.ITEM_PARTS)
 
-    def test_viewset_write_enqueues_via_on_commit(self, management_client, django_capture_on_commit_callbacks):
+    def test_viewset_write_schedules_via_on_commit(self, management_client, django_capture_on_commit_callbacks):
         part = ItemPartFactory()
-        with mock.patch("apps.search.signals.reindex_search_index") as task:
+        with mock.patch("apps.search.signals.schedule_pending_sync") as schedule:
             with django_capture_on_commit_callbacks(execute=True):
                 response = management_client.post(
                     "/api/v1/manuscripts/management/msdesc-areas/",
@@ -218,4 +228,5 @@ class TestMsDescAreaReindexPropagation:
                     format="json",
                 )
         assert response.status_code == 201
-        task.delay.assert_called_once_with("item-parts")
+        schedule.assert_called_once_with(IndexType.ITEM_PARTS)
+        assert part.pk in self._pending_item_parts()
@@ -31,6 +31,7 @@ def test_parse_graph_refs_tei():
     assert refs[0].type == "address"
     assert refs[0].text == "Alpha"
     assert refs[1].text == "John"
+    assert [r.element_index for r in refs] == [0, 1]
 
 
 def test_parse_graph_refs_legacy_dpt():
@@ -0,0 +1,131 @@
+"""Tests for the stored text↔region links (TextLink) and the checks built on them."""
+
+from io import StringIO
+
+from django.core.management import call_command
+import pytest
+
+from apps.annotations.models import Graph
+from apps.manuscripts.models import ImageText, TextLink
+from apps.manuscripts.tests.factories import ItemImageFactory
+
+pytestmark = pytest.mark.django_db
+
+POLY = {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}}
+
+
+def _text(image, content: str) -> ImageText:
+    return ImageText.objects.create(
+        item_image=image,
+        content=content,
+        type=ImageText.Type.TRANSCRIPTION,
+        status=ImageText.Status.LIVE,
+    )
+
+
+def _rows(text: ImageText) -> list[tuple]:
+    return list(text.links.values_list("position", "element_index", "element", "type", "graph_id", "text"))
+
+
+def test_saving_a_text_stores_its_links():
+    image = ItemImageFactory()
+    text = _text(
+        image,
+        '<p><seg type="address" corresp="#gid-12">Alpha</seg><seg>plain</seg>'
+        '<persName corresp="#gid-88 #gid-99">John  Smith</persName></p>',
+    )
+
+    assert _rows(text) == [
+        (0, 0, "seg", "address", 12, "Alpha"),
+        (1, 2, "persname", "", 88, "John Smith"),
+        (2, 2, "persname", "", 99, "John Smith"),
+    ]
+
+    text.content = '<p><span data-dpt="clause" data-graph-id="7">Beta</span></p>'
+    text.save(update_fields=["content", "modified"])
+    assert _rows(text) == [(0, 0, "span", "", 7, "Beta")]
+
+    text.status = ImageText.Status.REVIEWED
+    text.save(update_fields=["status"])
+    assert TextLink.objects.filter(image_text=text).count() == 1
+
+
+def test_backfill_rebuilds_links_after_a_bulk_write():
+    image = ItemImageFactory()
+    text = _text(image, '<p><seg corresp="#gid-1">Alpha</seg></p>')
+    ImageText.objects.filter(pk=text.pk).update(content='<p><seg corresp="#gid-2">Beta</seg></p>')
+    assert [link.graph_id for link in text.links.all()] == [1]
+
+    call_command("backfill_text_links", "--batch-size", "1", stdout=StringIO())
+
+    assert [link.graph_id for link in text.links.all()] == [2]
+
+
+def test_check_text_links_reports_each_kind_of_broken_link():
+    image, other_image = ItemImageFactory(), ItemImageFactory()
+    good = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    editorial = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="editorial")
+    elsewhere = Graph.objects.create(item_image=other_image, annotation=POLY, annotation_type="text")
+    text = _text(
+        image,
+        f'<p><seg corresp="#gid-{good.id}">a</seg><seg corresp="#gid-{editorial.id}">b</seg>'
+        f'<seg corresp="#gid-{elsewhere.id}">c</seg><seg corresp="#gid-999999">d</seg></p>',
+    )
+    out = StringIO()
+
+    with pytest.raises(SystemExit):
+        call_command("check_text_links", stdout=out, stderr=StringIO())
+
+    report = out.getvalue()
+    assert "links: 4" in report
+    assert "missing: 1" in report and "non_text: 1" in report and "cross_image: 1" in report
+    assert f"ImageText #{text.id}: ref → Graph 999999 does not exist" in report
+    assert f"ref → Graph {editorial.id} is 'editorial', not text" in report
+    assert f"ref → Graph {elsewhere.id} on image {other_image.id}" in report
+
+
+def test_check_text_links_fails_on_texts_with_refs_but_no_links():
+    image = ItemImageFactory()
+    graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    text = _text(image, f'<p><seg corresp="#gid-{graph.id}">a</seg></p>')
+    _text(ItemImageFactory(), "<p>no refs</p>")
+    TextLink.objects.all().delete()
+    out = StringIO()
+
+    with pytest.raises(SystemExit):
+        call_command("check_text_links", stdout=out, stderr=StringIO())
+
+    assert "unlinked: 1" in out.getvalue()
+    assert f"ImageText #{text.id}: has graph refs but no stored links" in out.getvalue()
+
+
+def test_migration_fills_links_of_existing_texts():
+    from importlib import import_module
+
+    from django.apps import apps
+
+    image = ItemImageFactory()
+    text = _text(
+        image,
+        '<p><seg corresp="#gid-5 #gid-6" type="x">a <hi>b</hi></seg><persName corresp="gid-7">c</persName>'
+        '<span data-dpt="person" data-graph-id="8,9">d</span><lb/></p>',
+    )
+    stored = _rows(text)
+    TextLink.objects.all().delete()
+
+    import_module("apps.manuscripts.migrations.0025_textlink")._fill_text_links(apps, None)
+
+    # The migration's frozen parser stores what the live one does today.
+    assert _rows(text) == stored
+    assert [graph_id for *_, graph_id, _ in stored] == [5, 6, 7, 8, 9]
+
+
+def test_check_text_links_passes_on_healthy_links():
+    image = ItemImageFactory()
+    graph = Graph.objects.create(item_image=image, annotation=POLY, annotation_type="text")
+    _text(image, f'<p><seg corresp="#gid-{graph.id}">a</seg></p>')
+    out = StringIO()
+
+    call_command("check_text_links", stdout=out)
+
+    assert "All text↔region links resolve" in out.getvalue()
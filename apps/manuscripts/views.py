@@ -24,6 +24,7 @@ from apps.common.views import (
     UnpaginatedPrivilegedViewSet,
 )
 
+from .iiif import iiif_sources_changed
 from .models import (
     BibliographicSource,
     CatalogueNumber,
@@ -67,7 +68,6 @@ from .services.htr import alto_to_lines, lines_to_tei, page_xml_to_lines
 from .services.tei import (
     add_graph_ref,
     data_dpt_to_tei,
-    parse_graph_refs,
     remove_graph_ref,
     remove_graph_ref_at,
     validate_tei_wellformed,
@@ -163,35 +163,35 @@ class ImageTextViewSet(GenericViewSet, ListModelMixin, RetrieveModelMixin):
     def regions(self, request: Request, pk: str | None = None) -> Response:
         """Resolve the image regions linked from this text's markup.
 
-        Parses the in-text graph references (`corresp`/`data-graph-id`) and
-        returns the matching TEXT-typed Graphs with their geometry. Each entry
+        Reads the text's stored links (its `corresp`/`data-graph-id`
+        references) and returns the matching Graphs with their geometry. Each entry
         flags whether the reference resolves to a live TEXT Graph, so callers
         (and the integrity check) can spot dangling links. (text_annotation
         plan, Phase 1.)
         """
         obj = self.get_object()
-        refs = parse_graph_refs(obj.content or "")
-        wanted = {gid for ref in refs for gid in ref.graph_ids}
         graphs = {
             g.id: g
-            for g in Graph.objects.filter(id__in=wanted).only("id", "annotation_type", "annotation", "item_image")
+            for g in Graph.objects.filter(text_links__image_text=obj)
+            .distinct()
+            .only("id", "annotation_type", "annotation", "item_image")
         }
         out = []
-        for ref in refs:
-            for gid in ref.graph_ids:
-                graph = graphs.get(gid)
-                out.append(
-                    {
-                        "graph_id": gid,
-                        "element": ref.element,
-                        "type": ref.type,
-                        "text": ref.text,
-                        "exists": graph is not None,
-                        "is_text": bool(graph and graph.annotation_type == "text"),
-                        "same_image": bool(graph and graph.item_image_id == obj.item_image_id),
-                        "geometry": graph.annotation if graph else None,
-                    }
-                )
+        for link in obj.links.all():
+            graph = graphs.get(link.graph_id)
+            out.append(
+                {
+                    "graph_id": link.graph_id,
+                    "element": link.element,
+                    "element_index": link.element_index,
+                    "type": link.type or None,
+                    "text": link.text,
+                    "exists": graph is not None,
+                    "is_text": bool(graph and graph.annotation_type == "text"),
+                    "same_image": bool(graph and graph.item_image_id == obj.item_image_id),
+                    "geometry": graph.annotation if graph else None,
+                }
+            )
         return Response({"count": len(out), "regions": out})
 
 
@@ -690,7 +690,9 @@ class ImageTextManagementViewSet(FilterablePrivilegedViewSet):
             # `language=""` is a valid target — it's how an editor clears a
             # wrong tag back to the "(unset)" bucket.
             language = str(payload["language"])
+            item_part_ids = sorted(set(qs.values_list("item_image__item_part_id", flat=True)))
             affected = qs.update(language=language)
+            iiif_sources_changed.send(ImageText, item_part_ids=item_part_ids)
             return Response({"affected": affected})
 
         if action_name == "delete":
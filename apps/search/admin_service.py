@@ -7,12 +7,15 @@ from celery.result import AsyncResult
 
 from apps.search.meilisearch.client import get_meilisearch_client
 from apps.search.meilisearch.writer import MeilisearchIndexWriter
-from apps.search.registry import get_queryset_for_index, get_registration
+from apps.search.models import PendingIndexUpdate
+from apps.search.registry import shared_source_groups
+from apps.search.scheduler import BULK, INTERACTIVE
 from apps.search.services import (
     VALID_PER_INDEX_ACTIONS,
     SearchOrchestrationService,
     resolve_index_type_segment,
 )
+from apps.search.sync_state import ensure_state, load_states
 from apps.search.types import IndexType
 
 logger = logging.getLogger(__name__)
@@ -35,17 +38,32 @@ class SearchAdminService:
             return False
 
     def get_index_stats_list(self) -> list[dict[str, Any]]:
+        """Per-index document counts and sync status for the admin dashboard.
+
+        Expected counts and checksums come from the materialised
+        ``IndexSyncState`` rows (one query for all indexes), so a poll never
+        recounts or re-parses the corpus. An index is in sync when the live
+        document count matches the expected count, the indexed checksum
+        matches the expected one and no incremental updates are pending.
+        The checksum catches edited content in the text-derived indexes
+        only; for the others it covers which rows are indexed.
+        """
         writer: MeilisearchIndexWriter = MeilisearchIndexWriter()
+        states = load_states()
+        pending = set(PendingIndexUpdate.objects.values_list("index_type", flat=True).distinct())
         result: list[dict[str, Any]] = []
         for index_type in IndexType:
             segment: str = index_type.to_url_segment()
             stats: dict[str, Any] = writer.get_stats(index_type)
             meilisearch_count: int = stats.get("numberOfDocuments", 0)
-            try:
-                db_count: int = self._get_expected_db_document_count(index_type)
-            except Exception:
-                logger.warning("Failed to compute expected db count for %s", segment, exc_info=True)
-                db_count = 0
+            state = states.get(index_type)
+            if state is None:
+                try:
+                    state = ensure_state(index_type)
+                except Exception:
+                    logger.warning("Failed to compute expected db count for %s", segment, exc_info=True)
+            db_count: int = state.expected_documents if state is not None else 0
+            content_in_sync: bool = state is not None and (state.indexed_checksum is None or state.in_sync)
             result.append(
                 {
                     "index_type": segment,
@@ -53,25 +71,18 @@ class SearchAdminService:
                     "label": segment.replace("-", " ").title(),
                     "meilisearch_count": meilisearch_count,
                     "db_count": db_count,
-                    "in_sync": meilisearch_count == db_count,
+                    "checksum": f"{state.expected_checksum:016x}" if state is not None else None,
+                    "indexed_checksum": (
+                        f"{state.indexed_checksum:016x}"
+                        if state is not None and state.indexed_checksum is not None
+                        else None
+                    ),
+                    "pending_updates": index_type.value in pending,
+                    "in_sync": (meilisearch_count == db_count and content_in_sync and index_type.value not in pending),
                 }
             )
         return result
 
-    def _get_expected_db_document_count(self, index_type: IndexType) -> int:
-        """Return expected indexed-document count from DB for the given index type."""
-        extractor = get_registration(index_type).count_extractor
-        queryset = get_queryset_for_index(index_type)
-        if extractor is None:
-            return int(queryset.count())
-
-        total: int = 0
-        contents = queryset.values_list("content", flat=True).iterator(chunk_size=500)
-        for content in contents:
-            if content:
-                total += extractor(content)
-        return total
-
     def resolve_index_type(self, index_type_segment: str) -> IndexType:
         return resolve_index_type_segment(index_type_segment)
 
@@ -79,29 +90,36 @@ class SearchAdminService:
         SearchOrchestrationService().clear_index(index_type_segment)
 
     def start_action(self, action: str, index_type_segment: str | None) -> dict[str, Any]:
-        from apps.search.tasks import (
-            clean_and_reindex_search_index,
-            clear_and_reindex_all_search_indexes,
-            clear_search_index,
-            reindex_search_index,
-        )
+        from apps.search.tasks import clear_and_reindex_all_search_indexes, clear_search_index, schedule_reindex
 
         if action in VALID_PER_INDEX_ACTIONS:
             if not index_type_segment:
                 raise ValueError(f"'index_type' is required for action '{action}'.")
-            resolve_index_type_segment(index_type_segment)
-
-            task_map: dict[str, Any] = {
-                "reindex": reindex_search_index,
-                "clear": clear_search_index,
-                "clean_and_reindex": clean_and_reindex_search_index,
-            }
-            task: AsyncResult[Any] = task_map[action].delay(index_type_segment)
-            return {"task_id": task.id, "message": f"Task '{action}' started for {index_type_segment}."}
+            index_type = resolve_index_type_segment(index_type_segment)
+
+            if action == "clear":
+                task: AsyncResult[Any] = clear_search_index.delay(index_type_segment)
+                return {"task_id": task.id, "message": f"Task '{action}' started for {index_type_segment}."}
+            # Rebuilds go through the coalescing scheduler: a request for an
+            # index that already has one queued joins that run.
+            scheduled = schedule_reindex([index_type], action=action, priority=INTERACTIVE)
+            if scheduled["coalesced"]:
+                message = f"Task '{action}' for {index_type_segment} joined the rebuild already queued."
+            else:
+                message = f"Task '{action}' queued for {index_type_segment}."
+            return {"task_id": scheduled["task_id"], "coalesced": scheduled["coalesced"], "message": message}
 
         if action == "reindex_all":
-            task_ids: list[str] = [reindex_search_index.delay(idx.to_url_segment()).id for idx in IndexType]
-            return {"task_ids": task_ids, "message": "Reindex started for all indexes."}
+            # Indexes sharing a source queryset (texts/clauses/people/places)
+            # go out as one task that streams their rows once. Bulk work runs
+            # behind interactive single-index rebuilds.
+            task_ids: list[str] = []
+            for group in shared_source_groups():
+                scheduled = schedule_reindex(list(group), priority=BULK)
+                for task_id in (scheduled["task_id"], *scheduled["joined"]):
+                    if task_id not in task_ids:
+                        task_ids.append(task_id)
+            return {"task_ids": task_ids, "message": "Reindex queued for all indexes."}
 
         if action == "clear_and_rebuild_all":
             task = clear_and_reindex_all_search_indexes.delay()
@@ -7,4 +7,4 @@ class SearchConfig(AppConfig):
     verbose_name = "Search & Discovery"
 
     def ready(self) -> None:
-        from . import signals  # noqa: F401  (registers the MsDescArea reindex receivers)
+        from . import signals  # noqa: F401  (registers the incremental-indexing receivers)
@@ -0,0 +1,227 @@
+"""Offline search artifacts: documents built once, loaded into Meilisearch later.
+
+``build_artifact`` runs the registry builders over the database exactly as a
+rebuild does. It streams each shared-source group once. Instead of posting
+the documents, it writes them to a directory:
+
+  * ``<segment>/part-NNNNN.ndjson.gz`` — gzip-compressed NDJSON, cut at
+    ``SEARCH_REINDEX_PAYLOAD_BYTES`` of uncompressed documents so every part
+    is one ingestion payload;
+  * ``<segment>/suggestions.json.gz`` — the autocomplete entries a rebuild
+    would store;
+  * ``manifest.json`` — per index the Meilisearch settings and their
+    fingerprint, the row and document counts, the sync-state checksum and
+    each part's document count and SHA-256. It is written last, so a build
+    that died half-way leaves no loadable artifact.
+
+``load_artifact`` checks the manifest against this deployment's registry
+before it touches Meilisearch, and refuses parts whose settings fingerprint
+differs. It then hands each index's parts, verified against their
+digests as they are read, to ``IndexingService.load_prebuilt``. That posts
+them to ``<uid>__build`` unchanged and swaps them in. So the ORM and
+document-building work can run anywhere with a copy of the database, and
+Meilisearch can be rebuilt from the files without it.
+"""
+
+from collections.abc import Iterable, Iterator
+import gzip
+import hashlib
+from itertools import islice
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.search.contracts import SearchDocument
+from apps.search.ingest import ndjson_line
+from apps.search.meilisearch.writer import MeilisearchIndexWriter, settings_fingerprint
+from apps.search.registry import get_queryset_for_index, get_registration, shared_source_groups
+from apps.search.services import IndexingService, build_batch_documents, preload_batch, resolve_index_type_segment
+from apps.search.suggestions import SuggestionCollector
+from apps.search.sync_state import IndexTally
+from apps.search.types import IndexType
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+SUGGESTIONS_NAME = "suggestions.json.gz"
+# Parts are written once and read many times; spend the CPU on size.
+PART_COMPRESS_LEVEL = 6
+
+
+class InvalidArtifactError(ValueError):
+    """Raised when an artifact is incomplete, corrupt or built for other index settings."""
+
+
+class _PartWriter:
+    """Cut one index's documents into gzip NDJSON parts under ``<directory>/<segment>/``."""
+
+    def __init__(self, directory: Path, segment: str, part_bytes: int) -> None:
+        self._root = directory
+        self._segment = segment
+        self._part_bytes = max(1, part_bytes)
+        self._lines: list[bytes] = []
+        self._size = 0
+        self.parts: list[dict[str, Any]] = []
+        (directory / segment).mkdir(parents=True, exist_ok=True)
+
+    def add(self, documents: Iterable[SearchDocument]) -> None:
+        for document in documents:
+            line = ndjson_line(document)
+            self._lines.append(line)
+            self._size += len(line)
+            if self._size >= self._part_bytes:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        name = f"{self._segment}/part-{len(self.parts):05d}.ndjson.gz"
+        compressed = gzip.compress(b"".join(self._lines), compresslevel=PART_COMPRESS_LEVEL, mtime=0)
+        (self._root / name).write_bytes(compressed)
+        self.parts.append(
+            {
+                "name": name,
+                "documents": len(self._lines),
+                "bytes": self._size,
+                "sha256": hashlib.sha256(compressed).hexdigest(),
+            }
+        )
+        self._lines = []
+        self._size = 0
+
+
+def build_artifact(
+    directory: Path, index_types: Iterable[IndexType] | None = None, *, part_bytes: int | None = None
+) -> dict[str, Any]:
+    """Build the documents of *index_types* (default: all) into an artifact in *directory*.
+
+    Needs the database only; Meilisearch is not contacted. Returns the
+    manifest it wrote.
+    """
+    selected = set(index_types or IndexType)
+    part_bytes = part_bytes or settings.SEARCH_REINDEX_PAYLOAD_BYTES
+    writer = MeilisearchIndexWriter()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Parts are rewritten in place: an old manifest must not outlive them.
+    (directory / MANIFEST_NAME).unlink(missing_ok=True)
+    indexes: dict[str, dict[str, Any]] = {}
+    for group in shared_source_groups():
+        members = [index_type for index_type in group if index_type in selected]
+        if not members:
+            continue
+        registrations = [get_registration(index_type) for index_type in members]
+        parts = {index_type: _PartWriter(directory, index_type.to_url_segment(), part_bytes) for index_type in members}
+        tallies = {index_type: IndexTally() for index_type in members}
+        collectors = {index_type: SuggestionCollector() for index_type in members}
+        rows = 0
+        it = get_queryset_for_index(members[0]).iterator(chunk_size=IndexingService.REINDEX_BATCH_SIZE)
+        while batch := list(islice(it, IndexingService.REINDEX_BATCH_SIZE)):
+            close_old_connections()
+            preload_batch(registrations, batch)
+            for registration in registrations:
+                index_type = registration.index_type
+                documents = build_batch_documents(registration, batch, preload=False, tally=tallies[index_type])
+                collectors[index_type].add_documents(documents)
+                parts[index_type].add(documents)
+            rows += len(batch)
+        for index_type in members:
+            segment = index_type.to_url_segment()
+            parts[index_type].flush()
+            suggestions_name = f"{segment}/{SUGGESTIONS_NAME}"
+            (directory / suggestions_name).write_bytes(
+                gzip.compress(json.dumps(collectors[index_type].as_dict()).encode(), mtime=0)
+            )
+            index_settings = writer.index_settings(index_type)
+            indexes[segment] = {
+                "uid": index_type.uid,
+                "settings": index_settings,
+                "settings_fingerprint": settings_fingerprint(index_settings),
+                "rows": rows,
+                **tallies[index_type].as_dict(),
+                "suggestions": suggestions_name,
+                "parts": parts[index_type].parts,
+            }
+            logger.info(
+                "Built %d %s documents into %d parts.",
+                tallies[index_type].documents,
+                segment,
+                len(parts[index_type].parts),
+            )
+
+    manifest = {"format": ARTIFACT_FORMAT, "created_at": timezone.now().isoformat(), "indexes": indexes}
+    staging = directory / f"{MANIFEST_NAME}.tmp"
+    staging.write_text(json.dumps(manifest, indent=2))
+    staging.replace(directory / MANIFEST_NAME)
+    return manifest
+
+
+def read_manifest(directory: Path) -> dict[str, Any]:
+    """The manifest of the artifact in *directory*, checked for format and consistency."""
+    path = directory / MANIFEST_NAME
+    if not path.is_file():
+        raise InvalidArtifactError(f"No {MANIFEST_NAME} in {directory}; the artifact is missing or incomplete.")
+    manifest = json.loads(path.read_text())
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise InvalidArtifactError(f"Unsupported artifact format {manifest.get('format')!r}.")
+    for segment, entry in manifest["indexes"].items():
+        if sum(part["documents"] for part in entry["parts"]) != entry["documents"]:
+            raise InvalidArtifactError(f"The parts of {segment} don't add up to its document count.")
+        for name in [entry["suggestions"], *(part["name"] for part in entry["parts"])]:
+            if not (directory / name).is_file():
+                raise InvalidArtifactError(f"{name} is missing from the artifact.")
+    return manifest
+
+
+def _verified_parts(directory: Path, parts: list[dict[str, Any]]) -> Iterator[bytes]:
+    for part in parts:
+        compressed = (directory / part["name"]).read_bytes()
+        if hashlib.sha256(compressed).hexdigest() != part["sha256"]:
+            raise InvalidArtifactError(f"{part['name']} doesn't match its manifest digest.")
+        yield compressed
+
+
+def load_artifact(
+    directory: Path, index_types: Iterable[IndexType] | None = None, *, service: IndexingService | None = None
+) -> dict[str, int]:
+    """Load *index_types* (default: every index in the artifact) into Meilisearch.
+
+    Every selected index is checked against the current registry before any
+    is loaded. Each index is then swapped in on its own; a part that fails
+    its digest aborts that index before the swap, leaving it live as it was.
+    Returns the number of documents loaded per index segment.
+    """
+    manifest = read_manifest(directory)
+    writer = MeilisearchIndexWriter()
+    if index_types is None:
+        index_types = [resolve_index_type_segment(segment) for segment in manifest["indexes"]]
+    entries: list[tuple[IndexType, dict[str, Any]]] = []
+    for index_type in index_types:
+        segment = index_type.to_url_segment()
+        entry = manifest["indexes"].get(segment)
+        if entry is None:
+            raise InvalidArtifactError(f"The artifact has no {segment} index.")
+        if entry["settings_fingerprint"] != settings_fingerprint(writer.index_settings(index_type)):
+            raise InvalidArtifactError(
+                f"{segment} was built for different index settings than this deployment's; rebuild the artifact."
+            )
+        entries.append((index_type, entry))
+
+    service = service or IndexingService()
+    loaded: dict[str, int] = {}
+    for index_type, entry in entries:
+        suggestions = json.loads(gzip.decompress((directory / entry["suggestions"]).read_bytes()))
+        service.load_prebuilt(
+            index_type,
+            _verified_parts(directory, entry["parts"]),
+            tally=IndexTally.from_dict(entry),
+            suggestions=SuggestionCollector.from_dict(suggestions),
+        )
+        loaded[index_type.to_url_segment()] = entry["documents"]
+        logger.info("Loaded %d %s documents from %s.", entry["documents"], index_type.to_url_segment(), directory)
+    return loaded
@@ -34,3 +34,21 @@ class SearchBackend(Protocol):
     def delete_all(self, index_type: IndexType) -> None: ...
 
     def get_stats(self, index_type: IndexType) -> dict[str, Any]: ...
+
+
+class AsyncSearchBackend(Protocol):
+    """The read side of ``SearchBackend`` as coroutines, used by the async search views."""
+
+    async def search(
+        self,
+        index_type: IndexType,
+        query: SearchQuery,
+        *,
+        facet_attributes: list[str] | None = None,
+    ) -> tuple[SearchResult, FacetResult | None]: ...
+
+    async def multi_search(
+        self, specs: list[tuple[IndexType, SearchQuery]]
+    ) -> list[tuple[IndexType, SearchResult]]: ...
+
+    async def get_document_by_id(self, index_type: IndexType, doc_id: int | str) -> SearchDocument | None: ...
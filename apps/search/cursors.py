@@ -0,0 +1,106 @@
+"""Opaque cursors for keyset pagination of the search endpoints.
+
+Offset pagination makes Meilisearch rank and skip every earlier hit, so a
+deep page of ``graphs`` or ``clauses`` gets slower the further a client
+pages. With ``?pagination=cursor`` (or any ``?cursor=``) pages are instead
+ordered by a total order over the index — the requested sort attribute, if
+any, then the registration's ``keyset_attributes`` — and each next page is
+the hits strictly after the last one, expressed as a range filter
+(``apps.search.meilisearch.filters.build_keyset_filter``).
+
+A cursor is the order-key values of a boundary hit plus a direction,
+base64-encoded JSON that also names the ordering it was cut from; a cursor
+replayed against another ordering is ignored. Cursors apply to filter-only
+browsing: with full-text terms Meilisearch ranks by relevance before the
+sort, so no range filter can describe "after this hit" and the request
+falls back to offsets. The same happens for sort attributes that aren't
+numeric or filterable.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from apps.search.registry import get_registration
+from apps.search.types import IndexType, SearchCursor, SearchQuery, SearchResult, SortSpec
+
+
+def order_keys(index_type: IndexType, sort_spec: SortSpec | None) -> list[SortSpec]:
+    """The total order cursor pages are sorted by."""
+    keyset = get_registration(index_type).keyset_attributes
+    keys: list[SortSpec] = []
+    if sort_spec is not None and sort_spec.attribute not in keyset:
+        keys.append(sort_spec)
+    for attribute in keyset:
+        ascending = sort_spec.ascending if sort_spec is not None and sort_spec.attribute == attribute else True
+        keys.append(SortSpec(attribute=attribute, ascending=ascending))
+    return keys
+
+
+def supports_cursor(index_type: IndexType, query: SearchQuery) -> bool:
+    """True when *query*'s hits come back in an order a range filter can seek in."""
+    spec = query.filter_spec
+    if query.q.strip() or any(spec.contains.values()) or any(spec.starts_with.values()):
+        return False
+    if query.sort_spec is None:
+        return True
+    registration = get_registration(index_type)
+    return (
+        query.sort_spec.attribute in registration.keyset_attributes
+        or query.sort_spec.attribute in registration.filterable_attributes
+    )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _valid_values(values: list[Any] | tuple[Any, ...], keys: list[SortSpec], index_type: IndexType) -> bool:
+    # Only a leading sort attribute may be missing from a hit; keyset attributes never are.
+    nullable = keys[0].attribute not in get_registration(index_type).keyset_attributes
+    return len(values) == len(keys) and all(
+        _is_number(value) or (value is None and position == 0 and nullable) for position, value in enumerate(values)
+    )
+
+
+def encode_cursor(keys: list[SortSpec], cursor: SearchCursor) -> str:
+    payload = {"o": [str(key) for key in keys], "v": list(cursor.values), "b": cursor.backward}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, index_type: IndexType, sort_spec: SortSpec | None) -> SearchCursor | None:
+    """Decode *token* for this ordering; ``None`` when it's malformed or was cut from another ordering."""
+    keys = order_keys(index_type, sort_spec)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):  # fmt: skip
+        return None
+    if not isinstance(payload, dict) or payload.get("o") != [str(key) for key in keys]:
+        return None
+    values, backward = payload.get("v"), payload.get("b")
+    if not isinstance(values, list) or not isinstance(backward, bool) or not _valid_values(values, keys, index_type):
+        return None
+    return SearchCursor(values=tuple(values), backward=backward)
+
+
+def page_cursors(index_type: IndexType, query: SearchQuery, result: SearchResult) -> tuple[str | None, str | None]:
+    """``(next, previous)`` cursor tokens for a page of *result*; ``None`` where there is no such page.
+
+    A boundary hit whose sort value isn't a number (a string sort attribute)
+    yields no token, and the caller falls back to offset links.
+    """
+    if not result.hits:
+        return None, None
+    keys = order_keys(index_type, query.sort_spec)
+
+    def token(hit: dict[str, Any], backward: bool) -> str | None:
+        values = tuple(hit.get(key.attribute) for key in keys)
+        if not _valid_values(values, keys, index_type):
+            return None
+        return encode_cursor(keys, SearchCursor(values=values, backward=backward))
+
+    next_token = token(result.hits[-1], False) if result.offset + len(result.hits) < result.total else None
+    previous_token = token(result.hits[0], True) if result.offset > 0 else None
+    return next_token, previous_token
@@ -5,8 +5,7 @@ builder returns a **list** of dicts — one Meilisearch document per clause
 fragment found inside the ``ImageText.content`` HTML.
 """
 
-from apps.search.documents.dpt_parser import extract_clauses
-from apps.search.documents.utils import annotation_coordinates_map, drop_none, get_attr
+from apps.search.documents.utils import annotation_coordinates_map, drop_none, extract_markup, get_attr
 
 
 def build_clause_documents(obj) -> list[dict]:
@@ -18,10 +17,10 @@ def build_clause_documents(obj) -> list[dict]:
     if not obj.content:
         return []
 
-    clauses = extract_clauses(obj.content)
+    clauses = extract_markup(obj)["clauses"]
     if not clauses:
         return []
-    annotation_coordinates = annotation_coordinates_map(clauses)
+    annotation_coordinates = annotation_coordinates_map(clauses, obj)
 
     # Pre-fetch shared metadata once (same traversal as texts builder)
     item_image = obj.item_image
@@ -29,6 +28,7 @@ def build_clause_documents(obj) -> list[dict]:
     historical_item = getattr(item_part, "historical_item", None) if item_part else None
 
     shared = {
+        "image_text": obj.id,
         "item_image": item_image.id if item_image else None,
         "item_part": item_part.id if item_part else None,
         "text_type": obj.type,
@@ -56,6 +56,7 @@ def build_clause_documents(obj) -> list[dict]:
         annotation_id = raw_annotation_id if isinstance(raw_annotation_id, int) else None
         doc = {
             "id": f"{obj.id}_{idx}",
+            "fragment": idx,
             "clause_type": clause["type"],
             "content": clause["content"],
             "annotation_id": annotation_id,
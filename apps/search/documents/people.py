@@ -5,8 +5,7 @@ document per person mention found inside the ``ImageText.content`` HTML via
 ``<span data-dpt="person" ...>`` markup.
 """
 
-from apps.search.documents.dpt_parser import extract_people_detailed
-from apps.search.documents.utils import annotation_coordinates_map, drop_none, get_attr
+from apps.search.documents.utils import annotation_coordinates_map, drop_none, extract_markup, get_attr
 
 
 def build_person_documents(obj) -> list[dict]:
@@ -18,10 +17,10 @@ def build_person_documents(obj) -> list[dict]:
     if not obj.content:
         return []
 
-    people = extract_people_detailed(obj.content)
+    people = extract_markup(obj)["people"]
     if not people:
         return []
-    annotation_coordinates = annotation_coordinates_map(people)
+    annotation_coordinates = annotation_coordinates_map(people, obj)
 
     # Pre-fetch shared metadata once (same traversal as texts/clauses builders)
     item_image = obj.item_image
@@ -29,6 +28,7 @@ def build_person_documents(obj) -> list[dict]:
     historical_item = getattr(item_part, "historical_item", None) if item_part else None
 
     shared = {
+        "image_text": obj.id,
         "item_image": item_image.id if item_image else None,
         "item_part": item_part.id if item_part else None,
         "text_type": obj.type,
@@ -56,6 +56,7 @@ def build_person_documents(obj) -> list[dict]:
         annotation_id = raw_annotation_id if isinstance(raw_annotation_id, int) else None
         doc = {
             "id": f"{obj.id}_p{idx}",
+            "fragment": idx,
             "name": person["name"],
             "person_type": person["type"],
             "ref": person["ref"],
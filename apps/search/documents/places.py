@@ -5,8 +5,7 @@ document per place mention found inside the ``ImageText.content`` HTML via
 ``<span data-dpt="place" ...>`` markup.
 """
 
-from apps.search.documents.dpt_parser import extract_places_detailed
-from apps.search.documents.utils import annotation_coordinates_map, drop_none, get_attr
+from apps.search.documents.utils import annotation_coordinates_map, drop_none, extract_markup, get_attr
 
 
 def build_place_documents(obj) -> list[dict]:
@@ -18,10 +17,10 @@ def build_place_documents(obj) -> list[dict]:
     if not obj.content:
         return []
 
-    places = extract_places_detailed(obj.content)
+    places = extract_markup(obj)["places"]
     if not places:
         return []
-    annotation_coordinates = annotation_coordinates_map(places)
+    annotation_coordinates = annotation_coordinates_map(places, obj)
 
     # Pre-fetch shared metadata once (same traversal as texts/clauses builders)
     item_image = obj.item_image
@@ -29,6 +28,7 @@ def build_place_documents(obj) -> list[dict]:
     historical_item = getattr(item_part, "historical_item", None) if item_part else None
 
     shared = {
+        "image_text": obj.id,
         "item_image": item_image.id if item_image else None,
         "item_part": item_part.id if item_part else None,
         "text_type": obj.type,
@@ -56,6 +56,7 @@ def build_place_documents(obj) -> list[dict]:
         annotation_id = raw_annotation_id if isinstance(raw_annotation_id, int) else None
         doc = {
             "id": f"{obj.id}_l{idx}",
+            "fragment": idx,
             "name": place["name"],
             "place_type": place["type"],
             "ref": place["ref"],
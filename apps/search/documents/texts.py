@@ -1,11 +1,8 @@
 """Document builder for texts index."""
 
-import json
 import re
 
-from apps.annotations.models import Graph
-from apps.search.documents.dpt_parser import extract_all
-from apps.search.documents.utils import drop_none, get_attr
+from apps.search.documents.utils import annotation_coordinates_map, drop_none, extract_markup, get_attr
 
 
 def build_text_document(obj) -> dict:
@@ -41,11 +38,14 @@ def build_text_document(obj) -> dict:
 
     # Extract places/people and an optional annotation id from data-dpt markup.
     if obj.content:
-        extracted = extract_all(obj.content)
+        extracted = extract_markup(obj)
         doc["places"] = list(dict.fromkeys(place["name"] for place in extracted["places"]))
         doc["people"] = list(dict.fromkeys(person["name"] for person in extracted["people"]))
-        doc["annotation_id"] = _first_annotation_id(extracted)
-        doc["annotation_coordinates"] = _get_annotation_coordinates(doc["annotation_id"])
+        annotation_id = _first_annotation_id(extracted)
+        doc["annotation_id"] = annotation_id
+        doc["annotation_coordinates"] = annotation_coordinates_map([{"annotation_id": annotation_id}], obj).get(
+            annotation_id
+        )
     else:
         doc["places"] = []
         doc["people"] = []
@@ -75,17 +75,3 @@ def _first_annotation_id(extracted: dict) -> int | None:
             if isinstance(annotation_id, int):
                 return annotation_id
     return None
-
-
-def _get_annotation_coordinates(annotation_id: int | None) -> str | None:
-    if annotation_id is None:
-        return None
-    try:
-        annotation = Graph.objects.only("annotation").get(id=annotation_id).annotation
-    except Graph.DoesNotExist:
-        return None
-    if annotation is None:
-        return None
-    if isinstance(annotation, dict):
-        return json.dumps(annotation)
-    return str(annotation)
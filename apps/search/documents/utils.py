@@ -3,6 +3,7 @@
 import json
 
 from apps.annotations.models import Graph
+from apps.search.documents.dpt_parser import extract_all
 
 
 def get_attr(obj, path: str):
@@ -36,16 +37,66 @@ def unique_preserve_order(values: list[str]) -> list[str]:
     return unique_values
 
 
-def annotation_coordinates_map(entries: list[dict]) -> dict[int, str]:
+# Instance attribute holding an ImageText's parsed data-dpt markup, so the four
+# text-derived builders parse a row once even when the process-wide parser
+# LRU has long since evicted its content.
+MARKUP_CACHE_ATTR = "_search_extracted_markup"
+
+
+def extract_markup(image_text) -> dict:
+    """Return ``extract_all`` of *image_text*'s content, parsed at most once per instance."""
+    extracted = getattr(image_text, MARKUP_CACHE_ATTR, None)
+    if extracted is None:
+        content = image_text.content
+        extracted = extract_all(content) if content else {"clauses": [], "places": [], "people": []}
+        setattr(image_text, MARKUP_CACHE_ATTR, extracted)
+    return extracted
+
+
+# Instance attribute a batch preloader stores resolved Graph coordinates under,
+# in the spirit of Django's ``_prefetched_objects_cache``.
+ANNOTATION_COORDINATES_CACHE_ATTR = "_search_annotation_coordinates"
+
+
+def annotation_coordinates_map(entries: list[dict], obj=None) -> dict[int, str]:
     """Map each entry's ``annotation_id`` to its Graph coordinates (JSON or str).
 
     *entries* are extracted clause/person/place dicts. Entries without an
     ``annotation_id`` are skipped, as are graphs that have no stored annotation.
+    When *obj* (the source ImageText) went through
+    ``preload_annotation_coordinates`` the lookup is served from its batch
+    cache; otherwise the graphs are queried directly.
     """
     annotation_ids = {annotation_id for entry in entries if (annotation_id := entry.get("annotation_id")) is not None}
     if not annotation_ids:
         return {}
+    preloaded = getattr(obj, ANNOTATION_COORDINATES_CACHE_ATTR, None)
+    if preloaded is not None:
+        return {
+            annotation_id: preloaded[annotation_id] for annotation_id in annotation_ids if annotation_id in preloaded
+        }
+    return _coordinates_by_graph_id(annotation_ids)
+
+
+def preload_annotation_coordinates(image_texts: list) -> None:
+    """Batch preloader for the ImageText-derived indexes.
+
+    Resolves every graph referenced from the markup of the whole batch in one
+    query and caches the result on each ImageText, so the texts, clauses,
+    people and places builders never query Graph per row.
+    """
+    annotation_ids: set[int] = set()
+    for image_text in image_texts:
+        for entries in extract_markup(image_text).values():
+            annotation_ids.update(
+                annotation_id for entry in entries if isinstance(annotation_id := entry.get("annotation_id"), int)
+            )
+    coordinates = _coordinates_by_graph_id(annotation_ids) if annotation_ids else {}
+    for image_text in image_texts:
+        setattr(image_text, ANNOTATION_COORDINATES_CACHE_ATTR, coordinates)
+
 
+def _coordinates_by_graph_id(annotation_ids: set[int]) -> dict[int, str]:
     coordinates_by_id = {}
     graphs = Graph.objects.filter(id__in=annotation_ids)
     if hasattr(graphs, "only"):
@@ -0,0 +1,273 @@
+"""Search result export: formats, streaming bodies and background export files.
+
+Exports used to page through Meilisearch by offset, stop at 2000 rows and
+hand the whole CSV/BibTeX body back inside a JSON envelope. Now:
+
+  * ``SearchService.iter_export_pages`` walks the full result set with
+    keyset pagination on the index's source attribute (``id``, or the
+    ImageText pk stamped on fan-out fragments). Deep pages cost the same as
+    the first one and there is no row cap.
+  * small exports are streamed straight to the client page by page
+    (``stream_export`` feeding a ``StreamingHttpResponse``);
+  * large ones run as the ``export_search_results`` Celery task, which
+    calls ``write_export_file`` to spool hits to a temporary NDJSON file
+    (collecting the CSV header as it goes) and then writes the requested
+    format into default storage under ``EXPORT_STORAGE_DIR``. Only signed-in
+    users can start one, at most ``SEARCH_EXPORT_MAX_JOBS_PER_USER`` at a
+    time (``claim_export_slot``), and each run deletes the files older than
+    ``EXPORT_MAX_AGE_SECONDS`` (``prune_export_files``).
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+import csv
+from datetime import timedelta
+import io
+import json
+import logging
+import shutil
+import tempfile
+from typing import IO, Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from apps.search.types import IndexType
+
+logger = logging.getLogger(__name__)
+
+EXPORT_STORAGE_DIR = "search-exports"
+# Export files are kept as long as their signed status links stay valid.
+EXPORT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# A job gives its slot back when it ends; a dead worker's slot expires after this.
+EXPORT_SLOT_TIMEOUT_SECONDS = 6 * 60 * 60
+BIBTEX_INDEX_TYPES = (IndexType.ITEM_PARTS, IndexType.SCRIBES, IndexType.HANDS)
+
+# format name -> (content type, file extension)
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "bibtex": ("application/x-bibtex; charset=utf-8", "bib"),
+}
+
+
+def export_row(hit: dict[str, Any]) -> dict[str, Any]:
+    """The exported shape of one hit: the document without highlighting."""
+    return {key: value for key, value in hit.items() if key != "_formatted"}
+
+
+def csv_fieldnames(rows: Iterable[dict[str, Any]]) -> list[str]:
+    ordered: list[str] = []
+    seen: set[str] = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for key in row:
+            if key in seen or key == "_formatted":
+                continue
+            seen.add(key)
+            ordered.append(key)
+    return ordered
+
+
+def csv_cell(value: object) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return str(value)
+    return str(value)
+
+
+def bibtex_entry(row: dict[str, Any], index: IndexType = IndexType.ITEM_PARTS) -> str:
+    if index == IndexType.SCRIBES:
+        name: str = str(row.get("name") or "unknown").strip().replace(" ", "_")
+        period: str = str(row.get("period") or "n.d.").strip()
+        key = f"scribe_{name}_{period}".replace("/", "_")
+        return "\n".join(
+            [
+                f"@misc{{{key},",
+                f"  author = {{{row.get('name') or ''}}},",
+                f"  title = {{Scribe: {row.get('name') or ''}}},",
+                f"  note = {{Scriptorium: {row.get('scriptorium') or 'unknown'}}},",
+                f"  year = {{{period}}},",
+                "}",
+            ]
+        )
+    if index == IndexType.HANDS:
+        hand_name: str = str(row.get("name") or "unknown").strip().replace(" ", "_")
+        repo: str = str(row.get("repository_name") or "repo").strip().replace(" ", "_")
+        date: str = str(row.get("date") or "n.d.").strip()
+        key = f"hand_{repo}_{hand_name}_{date}".replace("/", "_")
+        return "\n".join(
+            [
+                f"@misc{{{key},",
+                f"  title = {{{row.get('name') or hand_name}}},",
+                f"  institution = {{{row.get('repository_name') or ''}}},",
+                f"  note = {{Shelfmark: {row.get('shelfmark') or ''}, Place: {row.get('place') or ''}}},",
+                f"  year = {{{date}}},",
+                "}",
+            ]
+        )
+    repo = str(row.get("repository_name") or "repo").strip().replace(" ", "_")
+    raw_mark = row.get("shelfmark") or row.get("display_label") or "unknown"
+    shelfmark: str = str(raw_mark).strip().replace(" ", "_")
+    date = str(row.get("date") or row.get("date_min") or "n.d.").strip()
+    key = f"{repo}_{shelfmark}_{date}".replace("/", "_")
+    return "\n".join(
+        [
+            f"@misc{{{key},",
+            f"  title = {{{row.get('display_label') or shelfmark}}},",
+            f"  institution = {{{row.get('repository_name') or ''}}},",
+            f"  note = {{Shelfmark: {row.get('shelfmark') or ''}}},",
+            f"  year = {{{date}}},",
+            "}",
+        ]
+    )
+
+
+def _csv_line(values: list[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def _format_rows(
+    export_format: str, index: IndexType, rows: Iterable[dict[str, Any]], fieldnames: list[str]
+) -> Iterator[str]:
+    """Yield the body of *rows* in *export_format* chunk by chunk."""
+    if export_format == "csv":
+        yield _csv_line(fieldnames)
+        for row in rows:
+            yield _csv_line([csv_cell(row.get(key)) for key in fieldnames])
+    elif export_format == "ndjson":
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+    elif export_format == "bibtex":
+        for position, row in enumerate(rows):
+            yield ("\n\n" if position else "") + bibtex_entry(row, index)
+    else:
+        raise ValueError(f"Unsupported export format: '{export_format}'.")
+
+
+def _spool_pages(
+    pages: Iterable[list[dict[str, Any]]], spool: IO[bytes], on_rows: Callable[[int], None] | None = None
+) -> tuple[list[str], int]:
+    """Write the rows of *pages* to *spool* as NDJSON; returns ``(CSV fieldnames, rows)``."""
+    count = 0
+    fieldnames: dict[str, None] = {}
+    for page in pages:
+        for hit in page:
+            row = export_row(hit)
+            fieldnames.update(dict.fromkeys(row))
+            spool.write(json.dumps(row, ensure_ascii=False).encode() + b"\n")
+        count += len(page)
+        if on_rows is not None:
+            on_rows(count)
+    return list(fieldnames), count
+
+
+def stream_export(export_format: str, index: IndexType, pages: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]:
+    """Encoded body of an export of *pages*, fetched as the response is sent, for ``StreamingHttpResponse``.
+
+    NDJSON and BibTeX rows go out as their page arrives. CSV needs every
+    key for its header, so its rows are spooled to a temporary file first.
+    """
+    if export_format != "csv":
+        rows = (export_row(hit) for page in pages for hit in page)
+        for chunk in _format_rows(export_format, index, rows, []):
+            yield chunk.encode()
+        return
+    with tempfile.TemporaryFile() as spool:
+        fieldnames, _ = _spool_pages(pages, spool)
+        for chunk in _format_rows(export_format, index, _spooled_rows(spool), fieldnames):
+            yield chunk.encode()
+
+
+def export_storage_name(job_id: str, export_format: str) -> str:
+    return f"{EXPORT_STORAGE_DIR}/{job_id}.{EXPORT_FORMATS[export_format][1]}"
+
+
+def _spooled_rows(spool: IO[bytes]) -> Iterator[dict[str, Any]]:
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+def write_export_file(
+    pages: Iterable[list[dict[str, Any]]],
+    index: IndexType,
+    export_format: str,
+    name: str,
+    *,
+    on_rows: Callable[[int], None] | None = None,
+) -> tuple[str, int]:
+    """Write every hit of *pages* to storage as *export_format*; returns ``(stored name, rows)``.
+
+    Memory stays bounded by one page: hits are spooled to a temporary NDJSON
+    file first — CSV needs the union of all keys for its header before the
+    first row — and the requested format is produced from the spool.
+    """
+    with tempfile.TemporaryFile() as spool, tempfile.TemporaryFile() as output:
+        fieldnames, count = _spool_pages(pages, spool, on_rows)
+        if export_format == "ndjson":
+            spool.seek(0)
+            shutil.copyfileobj(spool, output)
+        else:
+            for chunk in _format_rows(export_format, index, _spooled_rows(spool), fieldnames):
+                output.write(chunk.encode())
+        output.seek(0)
+        stored = default_storage.save(name, File(output, name=name))
+    return stored, count
+
+
+def prune_export_files() -> int:
+    """Delete export files older than ``EXPORT_MAX_AGE_SECONDS``; returns how many."""
+    try:
+        _, names = default_storage.listdir(EXPORT_STORAGE_DIR)
+    except FileNotFoundError:
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=EXPORT_MAX_AGE_SECONDS)
+    deleted = 0
+    for name in names:
+        path = f"{EXPORT_STORAGE_DIR}/{name}"
+        if default_storage.get_modified_time(path) < cutoff:
+            default_storage.delete(path)
+            deleted += 1
+    return deleted
+
+
+def _slots_key(user_id: int) -> str:
+    return f"search:export-jobs:{user_id}"
+
+
+def claim_export_slot(user_id: int) -> bool:
+    """Count a background export of *user_id*; False when they already run the most allowed.
+
+    Best-effort like the reindex lock: without the ``locks`` backend exports
+    aren't capped.
+    """
+    try:
+        cache = caches["locks"]
+        key = _slots_key(user_id)
+        cache.add(key, 0, EXPORT_SLOT_TIMEOUT_SECONDS)
+        if cache.incr(key) > settings.SEARCH_EXPORT_MAX_JOBS_PER_USER:
+            cache.decr(key)
+            return False
+    except Exception as exc:  # lock backend down — don't cap
+        logger.warning("Export slot backend unavailable (%s); not capping exports.", exc)
+    return True
+
+
+def release_export_slot(user_id: int) -> None:
+    """Give back the slot ``claim_export_slot`` counted for *user_id*."""
+    try:
+        cache = caches["locks"]
+        key = _slots_key(user_id)
+        if cache.get(key):
+            cache.decr(key)
+    except Exception:
+        logger.warning("Failed to release the export slot of user %s.", user_id)
@@ -0,0 +1,100 @@
+"""Persistent, content-addressed cache of data-dpt extraction results.
+
+Parsing ImageText markup (TEI → data-dpt conversion plus the `_DptExtractor`
+state machine) is the expensive part of building the text-derived indexes
+and of every dashboard that counts clauses, people or places. The in-process
+LRU in `dpt_parser` dies with each worker and keys on whole content strings;
+this module stores results in the `MarkupExtraction` table instead, keyed by
+`content_hash(content)` — SHA-256 of `PARSER_VERSION` plus the content — so
+unchanged rows are parsed once for the lifetime of the parser version.
+
+Readers go through `extractions_for(contents)`, which looks a batch of
+contents up in one query and parses (and stores) only the misses.
+ImageText saves fill the cache ahead of time (`apps.search.signals`).
+Edits and `PARSER_VERSION` bumps leave rows nothing maps to any more;
+`prune_extractions` (the `prune_markup_extractions` command) deletes them.
+"""
+
+from collections.abc import Iterable
+import hashlib
+from itertools import islice
+
+from django.utils import timezone
+
+from apps.manuscripts.models import ImageText
+from apps.search.documents.dpt_parser import PARSER_VERSION, extract_all
+from apps.search.documents.utils import MARKUP_CACHE_ATTR
+from apps.search.models import MarkupExtraction
+
+
+def content_hash(content: str) -> str:
+    """Cache key for *content* under the current parser version."""
+    return hashlib.sha256(f"{PARSER_VERSION}\0{content}".encode()).hexdigest()
+
+
+def _build_extraction(key: str, content: str) -> MarkupExtraction:
+    extracted = extract_all(content)
+    return MarkupExtraction(
+        content_hash=key,
+        parser_version=PARSER_VERSION,
+        clauses=extracted["clauses"],
+        people=extracted["people"],
+        places=extracted["places"],
+        clause_count=len(extracted["clauses"]),
+        person_count=len(extracted["people"]),
+        place_count=len(extracted["places"]),
+        untyped_clause_count=sum(1 for clause in extracted["clauses"] if not clause.get("type")),
+    )
+
+
+def extractions_for(contents: Iterable[str]) -> dict[str, MarkupExtraction]:
+    """Return the extraction of every non-empty content, keyed by ``content_hash``.
+
+    Cached rows are read in one query; misses are parsed and stored in one
+    insert. Concurrent writers racing on the same content are harmless — the
+    rows are identical, so conflicts are ignored.
+    """
+    by_hash = {content_hash(content): content for content in contents if content}
+    if not by_hash:
+        return {}
+    found = {
+        extraction.content_hash: extraction for extraction in MarkupExtraction.objects.filter(content_hash__in=by_hash)
+    }
+    missing = [_build_extraction(key, content) for key, content in by_hash.items() if key not in found]
+    if missing:
+        MarkupExtraction.objects.bulk_create(missing, ignore_conflicts=True)
+        found.update((extraction.content_hash, extraction) for extraction in missing)
+    return found
+
+
+def preload_markup_extractions(image_texts: list) -> None:
+    """Batch preloader for the ImageText-derived indexes.
+
+    Serves the batch's parsed markup from the persistent cache (one query,
+    parsing only rows whose content changed) and hands it to the builders
+    through ``extract_markup``'s per-instance slot.
+    """
+    extractions = extractions_for(image_text.content for image_text in image_texts)
+    for image_text in image_texts:
+        if image_text.content:
+            setattr(image_text, MARKUP_CACHE_ATTR, extractions[content_hash(image_text.content)].as_extracted())
+
+
+def prune_extractions(*, batch_size: int = 2000) -> int:
+    """Delete the rows no current ImageText content maps to; returns how many.
+
+    Rows from another parser version go first. The rest are kept when the
+    hash of some text's content matches. Rows written after the prune started
+    are left alone, so a text saved meanwhile keeps its fresh extraction.
+    """
+    started = timezone.now()
+    deleted, _ = MarkupExtraction.objects.exclude(parser_version=PARSER_VERSION).delete()
+    contents = ImageText.objects.exclude(content="").values_list("content", flat=True)
+    live = {content_hash(content) for content in contents.iterator(chunk_size=batch_size)}
+    rows = MarkupExtraction.objects.filter(created__lt=started).order_by("pk").values_list("pk", "content_hash")
+    it = rows.iterator(chunk_size=batch_size)
+    while batch := list(islice(it, batch_size)):
+        stale = [pk for pk, key in batch if key not in live]
+        if stale:
+            deleted += MarkupExtraction.objects.filter(pk__in=stale).delete()[0]
+    return deleted
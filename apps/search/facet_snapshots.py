@@ -0,0 +1,165 @@
+"""Landing-page facet snapshots.
+
+Most visits to a search page start with no ``q``, no filters and the
+registry's ``default_facet_attributes``. That asks Meilisearch to compute
+full-corpus facet distributions over ``item_images``, ``graphs`` and
+``item_parts`` again and again, although the answer only changes when the
+index is written.
+
+So the indexing service captures that answer right after a rebuild swaps
+in, and after an incremental sync drains (``capture_landing_snapshot``). A
+capture stores the empty-query facet distribution, the facet stats, the
+total and the first ``LANDING_PAGE_SIZE`` hits as a ``FacetSnapshot`` row.
+The row is stamped with the index's result-cache generation, which is read
+*before* the query. ``SearchService.search_with_facets`` answers landing
+queries (``is_landing_query``) from it without a Meilisearch request. It
+does this only while the index is still at that generation, so any later
+write makes the snapshot fall through to Meilisearch until the next
+capture.
+"""
+
+from dataclasses import dataclass
+from functools import cache
+import logging
+import threading
+import time
+
+from apps.search.contracts import SearchBackend
+from apps.search.filter_contract import allowed_filter_attributes, default_facet_attributes
+from apps.search.models import FacetSnapshot
+from apps.search.result_cache import current_generations
+from apps.search.types import FacetResult, FilterSpec, IndexType, SearchCursor, SearchQuery, SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Hits kept per snapshot: the parser's default page size.
+LANDING_PAGE_SIZE = 20
+# A process that found no snapshot for a generation asks the database again
+# after this long, in case the capture was still running.
+MISS_RECHECK_SECONDS = 30
+
+
+def landing_facet_attributes(index_type: IndexType) -> list[str]:
+    """The facets a request without ``?facets=`` asks for (as ``parse_facet_attributes``)."""
+    allowed = allowed_filter_attributes(index_type)
+    return [facet for facet in default_facet_attributes(index_type) if facet in allowed]
+
+
+def is_landing_query(query: SearchQuery) -> bool:
+    """True for the first page of an unfiltered, unsorted, full-text-free query."""
+    return (
+        not query.q.strip()
+        and query.filter_spec == FilterSpec()
+        and query.sort_spec is None
+        and query.offset == 0
+        and query.limit <= LANDING_PAGE_SIZE
+        and query.cursor in (None, SearchCursor())
+        and query.matching_strategy is None
+        and not query.attributes_to_search_on
+        and not query.attributes_to_retrieve
+        and not query.attributes_to_crop
+    )
+
+
+def capture_landing_snapshot(index_type: IndexType, reader: SearchBackend) -> None:
+    """Query the live index for its landing page and store it as the index's snapshot.
+
+    A snapshot is an optimisation, so failures are logged rather than raised.
+    """
+    try:
+        generations = current_generations([index_type])
+        if generations is None:
+            return
+        facet_attributes = landing_facet_attributes(index_type)
+        result, facets = reader.search(
+            index_type, SearchQuery(limit=LANDING_PAGE_SIZE), facet_attributes=facet_attributes
+        )
+        facets = facets or FacetResult(facet_distribution={}, facet_stats={})
+        FacetSnapshot.objects.update_or_create(
+            index_type=index_type.value,
+            defaults={
+                "generation": generations[0],
+                "facet_attributes": facet_attributes,
+                "facet_distribution": facets.facet_distribution,
+                "facet_stats": facets.facet_stats,
+                "total": result.total,
+                "hits": result.hits,
+            },
+        )
+    except Exception:
+        logger.warning("Failed to capture the landing facet snapshot of %s.", index_type.value, exc_info=True)
+
+
+@dataclass(frozen=True)
+class LandingSnapshot:
+    generation: int
+    facet_attributes: frozenset[str]
+    facet_distribution: dict[str, dict[str, int]]
+    facet_stats: dict[str, dict[str, float]]
+    total: int
+    hits: list[dict]
+
+    def answer(self, query: SearchQuery, facet_attributes: list[str]) -> tuple[SearchResult, FacetResult] | None:
+        """The landing *query* answered from this snapshot, or ``None`` when it holds too little."""
+        if not set(facet_attributes) <= self.facet_attributes:
+            return None
+        result = SearchResult(
+            hits=[dict(hit) for hit in self.hits[: query.limit]], total=self.total, limit=query.limit, offset=0
+        )
+        facets = FacetResult(
+            facet_distribution={
+                attribute: dict(counts)
+                for attribute, counts in self.facet_distribution.items()
+                if attribute in facet_attributes
+            },
+            facet_stats={
+                attribute: dict(stats) for attribute, stats in self.facet_stats.items() if attribute in facet_attributes
+            },
+        )
+        return result, facets
+
+
+class LandingSnapshotStore:
+    """This process's copy of each index's snapshot, reloaded per generation."""
+
+    def __init__(self) -> None:
+        self._snapshots: dict[IndexType, LandingSnapshot] = {}
+        self._misses: dict[IndexType, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, index_type: IndexType) -> LandingSnapshot | None:
+        """The snapshot of *index_type* if it matches the index's current generation."""
+        generations = current_generations([index_type])
+        if generations is None:
+            return None
+        generation = generations[0]
+        with self._lock:
+            snapshot = self._snapshots.get(index_type)
+            miss = self._misses.get(index_type)
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        if miss is not None and miss[0] == generation and time.monotonic() - miss[1] < MISS_RECHECK_SECONDS:
+            return None
+
+        row = FacetSnapshot.objects.filter(index_type=index_type.value, generation=generation).first()
+        with self._lock:
+            if row is None:
+                self._misses[index_type] = (generation, time.monotonic())
+                return None
+            snapshot = LandingSnapshot(
+                generation=row.generation,
+                facet_attributes=frozenset(row.facet_attributes),
+                facet_distribution=row.facet_distribution,
+                facet_stats=row.facet_stats,
+                total=row.total,
+                hits=row.hits,
+            )
+            self._snapshots[index_type] = snapshot
+            self._misses.pop(index_type, None)
+        return snapshot
+
+
+@cache
+def get_landing_snapshots() -> LandingSnapshotStore:
+    """The process-wide landing snapshot store."""
+    return LandingSnapshotStore()
@@ -0,0 +1,185 @@
+"""Engine-agnostic filter expressions between `FilterSpec`/qb trees and engine syntax.
+
+Both the structured query params (`FilterSpec`) and the query-builder tree
+(`qb_parser`) compile to the small immutable tree below. `canonicalize`
+rewrites a tree into one normal form, so equivalent filters compile to the
+same tree and render to the same string. The engine adapter renders that
+tree, e.g. `apps.search.meilisearch.filters.render_filter`. Normalisation:
+
+  * nested ``And``/``Or`` are flattened, duplicate terms dropped and the
+    remaining terms sorted, so term order in the request doesn't matter;
+  * equality terms on one attribute under ``Or`` fold into one ``In``, and
+    exclusions under ``And`` into one negated ``In`` (``NOT IN``);
+  * repeated bounds on one attribute keep only the tightest (``And``) or the
+    loosest (``Or``) value per direction.
+
+Lower and upper bounds stay separate terms rather than becoming one
+``lo TO hi`` range. On multi-valued attributes they may be satisfied by
+different elements, and merging them would change which documents match.
+"""
+
+from dataclasses import dataclass
+import json
+
+from apps.search.types import FilterSpec
+
+FilterValue = str | int | float
+
+
+@dataclass(frozen=True)
+class In:
+    """``attribute`` equals one of ``values`` (``negated``: equals none of them)."""
+
+    attribute: str
+    values: tuple[FilterValue, ...]
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Bound:
+    """Inclusive bound: ``attribute >= value`` (``lower``) or ``attribute <= value``."""
+
+    attribute: str
+    value: int | float
+    lower: bool
+
+
+@dataclass(frozen=True)
+class IsNull:
+    """``attribute`` is null (``negated``: is not null)."""
+
+    attribute: str
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class And:
+    items: tuple[FilterNode, ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    items: tuple[FilterNode, ...]
+
+
+FilterNode = In | Bound | IsNull | And | Or
+
+
+def number(value: int | float) -> int | float:
+    """Integral floats as ints, so ``5`` and ``5.0`` compile (and cache) identically."""
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _value_key(value: FilterValue) -> tuple[int, float | str]:
+    return (0, float(value)) if isinstance(value, int | float) else (1, str(value))
+
+
+def _values(values: list[FilterValue] | tuple[FilterValue, ...]) -> tuple[FilterValue, ...]:
+    normalised = (number(value) if isinstance(value, int | float) else value for value in values)
+    return tuple(sorted(dict.fromkeys(normalised), key=_value_key))
+
+
+def sort_key(node: FilterNode) -> str:
+    """A stable, engine-independent description of *node*, for ordering and cache keys."""
+    return json.dumps(_describe(node), separators=(",", ":"))
+
+
+def _describe(node: FilterNode) -> list:
+    if isinstance(node, In):
+        return ["in", node.attribute, node.negated, [_value_key(v) for v in node.values]]
+    if isinstance(node, Bound):
+        return ["bound", node.attribute, node.lower, _value_key(node.value)]
+    if isinstance(node, IsNull):
+        return ["null", node.attribute, node.negated]
+    return ["and" if isinstance(node, And) else "or", [_describe(item) for item in node.items]]
+
+
+def _merge_terms(items: list[FilterNode], conjunction: bool) -> list[FilterNode]:
+    merged: list[FilterNode] = []
+    # Equalities fold under OR, exclusions under AND.
+    fold_negated = conjunction
+    folded: dict[str, list[FilterValue]] = {}
+    bounds: dict[tuple[str, bool], int | float] = {}
+    for item in items:
+        if isinstance(item, In) and item.negated == fold_negated:
+            folded.setdefault(item.attribute, []).extend(item.values)
+        elif isinstance(item, Bound):
+            key = (item.attribute, item.lower)
+            current = bounds.get(key)
+            tighter = (item.value > current) == item.lower if current is not None else True
+            # AND keeps the tightest bound per direction, OR the loosest.
+            if current is None or tighter == conjunction:
+                bounds[key] = item.value
+        else:
+            merged.append(item)
+    merged.extend(In(attribute, _values(values), fold_negated) for attribute, values in folded.items())
+    merged.extend(Bound(attribute, value, lower) for (attribute, lower), value in bounds.items())
+    return merged
+
+
+def canonicalize(node: FilterNode | None) -> FilterNode | None:
+    """Rewrite *node* into normal form; ``None`` when nothing is left to filter on."""
+    if node is None:
+        return None
+    if isinstance(node, In):
+        return In(node.attribute, _values(node.values), node.negated) if node.values else None
+    if isinstance(node, Bound):
+        return Bound(node.attribute, number(node.value), node.lower)
+    if isinstance(node, IsNull):
+        return node
+
+    conjunction = isinstance(node, And)
+    items: list[FilterNode] = []
+    for item in node.items:
+        item = canonicalize(item)
+        if item is None:
+            continue
+        if isinstance(item, And if conjunction else Or):
+            items.extend(item.items)
+        else:
+            items.append(item)
+    items = _merge_terms(items, conjunction)
+    unique = sorted({sort_key(item): item for item in items}.items())
+    if not unique:
+        return None
+    if len(unique) == 1:
+        return unique[0][1]
+    children = tuple(item for _, item in unique)
+    return And(children) if conjunction else Or(children)
+
+
+def filter_spec_to_node(spec: FilterSpec) -> FilterNode | None:
+    """Compile the structured filter criteria of *spec* (not contains/starts_with) to a canonical tree."""
+    items: list[FilterNode] = []
+    for attribute, value in spec.equal.items():
+        if value is None:
+            continue
+        items.append(In(attribute, tuple(value) if isinstance(value, list) else (value,)))
+    for attribute, value in spec.not_equal.items():
+        if value is None:
+            continue
+        values = [v for v in value if v is not None] if isinstance(value, list) else [value]
+        items.extend(In(attribute, (v,), negated=True) for v in values)
+    for attribute, values in spec.in_.items():
+        items.append(In(attribute, tuple(values)))
+    for attribute, (lo, hi) in spec.range_.items():
+        if lo is not None:
+            items.append(Bound(attribute, lo, lower=True))
+        if hi is not None:
+            items.append(Bound(attribute, hi, lower=False))
+
+    if spec.min_date is not None:
+        items.append(Bound("date_min", spec.min_date, lower=True))
+    if spec.max_date is not None:
+        items.append(Bound("date_max", spec.max_date, lower=False))
+    if spec.at_most_or_least and spec.date_diff is not None and spec.min_date is not None:
+        if spec.at_most_or_least == "at most":
+            items.append(Bound("date_max", spec.min_date + spec.date_diff, lower=False))
+        elif spec.at_most_or_least == "at least":
+            items.append(Bound("date_max", spec.min_date + spec.date_diff, lower=True))
+
+    items.extend(IsNull(attribute) for attribute in spec.empty)
+    items.extend(IsNull(attribute, negated=True) for attribute in spec.not_empty)
+    if spec.qb_filter is not None:
+        items.append(spec.qb_filter)
+    return canonicalize(And(tuple(items)))
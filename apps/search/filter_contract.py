@@ -62,5 +62,5 @@ def sanitize_filter_spec(spec: FilterSpec, index_type: IndexType) -> FilterSpec:
         starts_with={attr: v for attr, v in spec.starts_with.items() if attr in allowed},
         empty=[a for a in spec.empty if a in allowed],
         not_empty=[a for a in spec.not_empty if a in allowed],
-        qb_expr=spec.qb_expr,
+        qb_filter=spec.qb_filter,
     )
@@ -0,0 +1,125 @@
+"""Pipelined document ingestion for index rebuilds.
+
+A rebuild used to run each batch in strict sequence — fetch rows, build
+documents, then block on the upload — so the database and Meilisearch sat
+idle while the other worked. `BuildIngestPipeline` puts a bounded queue
+between the two halves:
+
+  * the calling thread keeps fetching rows and building documents, encoding
+    each one as an NDJSON line and cutting payloads by *byte size*
+    (`SEARCH_REINDEX_PAYLOAD_BYTES`) rather than by row count, so a batch of
+    long transcriptions and a batch of tiny scribe records cost the same;
+  * a writer thread gzips each payload and posts it to the build index,
+    collecting the Meilisearch task uids.
+
+The queue holds at most `SEARCH_REINDEX_QUEUE_DEPTH` payloads, which caps
+memory when Meilisearch is slower than the builders. Leaving the
+``with`` block cleanly flushes the last payload, joins the writer and waits
+for every ingestion task to succeed, so a caller that goes on to
+`swap_with_build` never swaps in a half-ingested index. Leaving it on an
+exception drops the queued payloads and cancels the writer, which finishes
+at most the post already in flight.
+"""
+
+from collections.abc import Iterable
+import json
+import logging
+from queue import Empty, Queue
+import threading
+
+from django.conf import settings
+
+from apps.search.contracts import SearchDocument
+from apps.search.meilisearch.writer import MeilisearchIndexWriter
+from apps.search.types import IndexType
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def ndjson_line(document: SearchDocument) -> bytes:
+    """One document as a compact NDJSON line, as rebuilds send it."""
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+class BuildIngestPipeline:
+    """Stream documents into ``<uid>__build`` through a background writer thread."""
+
+    def __init__(
+        self,
+        writer: MeilisearchIndexWriter,
+        index_type: IndexType,
+        *,
+        payload_bytes: int | None = None,
+        queue_depth: int | None = None,
+    ) -> None:
+        self._writer = writer
+        self._index_type = index_type
+        self._payload_bytes = max(1, payload_bytes or settings.SEARCH_REINDEX_PAYLOAD_BYTES)
+        self._queue: Queue = Queue(maxsize=max(1, queue_depth or settings.SEARCH_REINDEX_QUEUE_DEPTH))
+        self._buffer: list[bytes] = []
+        self._buffered_bytes = 0
+        self._task_uids: list[int] = []
+        self._error: BaseException | None = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._drain, name=f"search-ingest-{index_type.uid}", daemon=True)
+
+    def __enter__(self) -> BuildIngestPipeline:
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            # The build failed: stop the writer without waiting on Meilisearch.
+            # The partial build index is discarded by the next prepare/abort.
+            self._cancelled.set()
+            self._discard_queued()
+            self._queue.put(_DONE)
+            self._thread.join()
+            return
+        self._flush()
+        self._queue.put(_DONE)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        self._writer.wait_for_tasks(self._task_uids)
+
+    def add(self, documents: Iterable[SearchDocument]) -> None:
+        """Queue *documents* for ingestion, cutting a payload whenever the size budget fills."""
+        if self._error is not None:
+            raise self._error
+        for document in documents:
+            line = ndjson_line(document)
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            if self._buffered_bytes >= self._payload_bytes:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        # Blocks while the queue is full: backpressure on the builders.
+        self._queue.put(b"".join(self._buffer))
+        self._buffer = []
+        self._buffered_bytes = 0
+
+    def _discard_queued(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                return
+
+    def _drain(self) -> None:
+        while True:
+            payload = self._queue.get()
+            if payload is _DONE:
+                return
+            if self._error is not None or self._cancelled.is_set():
+                continue  # keep draining so the producer never blocks on a dead writer
+            try:
+                self._task_uids.append(self._writer.add_ndjson_to_build(self._index_type, payload))
+            except BaseException as exc:
+                logger.exception("Ingesting a build payload for %s failed.", self._index_type.uid)
+                self._error = exc
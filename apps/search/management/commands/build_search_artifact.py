@@ -0,0 +1,34 @@
+"""Management command: build_search_artifact <directory>. Build documents to NDJSON files."""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.search.artifacts import build_artifact
+from apps.search.services import index_type_segments, resolve_index_type_segment
+
+
+class Command(BaseCommand):
+    help = "Build search documents from the database into gzip NDJSON files plus a manifest (no Meilisearch needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=Path, help="Directory to write the artifact into.")
+        parser.add_argument(
+            "--index",
+            dest="indexes",
+            action="append",
+            choices=index_type_segments(),
+            help="Index type URL segment; repeat for several (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        directory: Path = options["directory"]
+        segments = options["indexes"]
+        index_types = [resolve_index_type_segment(segment) for segment in segments] if segments else None
+        self.stdout.write(f"Building search documents into {directory}...")
+        manifest = build_artifact(directory, index_types)
+        total = 0
+        for segment, entry in manifest["indexes"].items():
+            total += entry["documents"]
+            self.stdout.write(f"  {segment}: {entry['documents']} documents in {len(entry['parts'])} parts")
+        self.stdout.write(self.style.SUCCESS(f"Done. Total documents built: {total}."))
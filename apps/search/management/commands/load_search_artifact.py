@@ -0,0 +1,35 @@
+"""Management command: load_search_artifact <directory>. Swap prebuilt documents into Meilisearch."""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.artifacts import InvalidArtifactError, load_artifact
+from apps.search.services import index_type_segments, resolve_index_type_segment
+
+
+class Command(BaseCommand):
+    help = "Load a search artifact from build_search_artifact into Meilisearch, one atomic swap per index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=Path, help="Directory holding the artifact.")
+        parser.add_argument(
+            "--index",
+            dest="indexes",
+            action="append",
+            choices=index_type_segments(),
+            help="Index type URL segment; repeat for several (default: every index in the artifact).",
+        )
+
+    def handle(self, *args, **options):
+        directory: Path = options["directory"]
+        segments = options["indexes"]
+        index_types = [resolve_index_type_segment(segment) for segment in segments] if segments else None
+        self.stdout.write(f"Loading search documents from {directory}...")
+        try:
+            loaded = load_artifact(directory, index_types)
+        except InvalidArtifactError as exc:
+            raise CommandError(str(exc)) from exc
+        for segment, count in loaded.items():
+            self.stdout.write(f"  {segment}: {count} documents")
+        self.stdout.write(self.style.SUCCESS(f"Done. Total documents loaded: {sum(loaded.values())}."))
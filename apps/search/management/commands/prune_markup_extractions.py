@@ -0,0 +1,16 @@
+"""Management command: prune_markup_extractions. Drop cached extractions no text uses."""
+
+from django.core.management.base import BaseCommand
+
+from apps.search.extraction import prune_extractions
+
+
+class Command(BaseCommand):
+    help = "Delete MarkupExtraction rows of superseded content or parser versions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows read per query.")
+
+    def handle(self, *args, **options):
+        deleted = prune_extractions(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} markup extractions."))
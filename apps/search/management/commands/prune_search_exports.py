@@ -0,0 +1,13 @@
+"""Management command: prune_search_exports. Delete expired background export files."""
+
+from django.core.management.base import BaseCommand
+
+from apps.search.export import EXPORT_STORAGE_DIR, prune_export_files
+
+
+class Command(BaseCommand):
+    help = f"Delete export files under {EXPORT_STORAGE_DIR}/ whose status links have expired."
+
+    def handle(self, *args, **options):
+        deleted = prune_export_files()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} export files."))
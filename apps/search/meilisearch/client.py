@@ -1,4 +1,9 @@
-"""Meilisearch client factory."""
+"""Meilisearch client factory.
+
+All clients send through the process's pooled ``MeilisearchTransport`` (see
+``apps.search.meilisearch.transport``), so they share keep-alive connections,
+timeouts, the read retry policy and the circuit breaker.
+"""
 
 from django.conf import settings
 
@@ -9,9 +14,45 @@ def get_meilisearch_client():
     """Return a singleton Meilisearch Client. Thread-safe for Django's request model."""
     global _client
     if _client is None:
-        from meilisearch import Client
+        from apps.search.meilisearch.transport import PooledClient, get_transport
 
         url = getattr(settings, "MEILISEARCH_URL", "http://localhost:7700")
         api_key = settings.MEILISEARCH_API_KEY or None
-        _client = Client(url=url, api_key=api_key)
+        _client = PooledClient(url=url, api_key=api_key, transport=get_transport())
     return _client
+
+
+_ingest_client = None
+
+
+def get_meilisearch_ingest_client():
+    """Return a singleton Client whose requests carry ``Content-Encoding: gzip``.
+
+    Used only to post pre-compressed NDJSON document payloads during rebuilds;
+    every other call goes through ``get_meilisearch_client``.
+    """
+    global _ingest_client
+    if _ingest_client is None:
+        from apps.search.meilisearch.transport import PooledClient, get_transport
+
+        url = getattr(settings, "MEILISEARCH_URL", "http://localhost:7700")
+        api_key = settings.MEILISEARCH_API_KEY or None
+        _ingest_client = PooledClient(
+            url=url, api_key=api_key, transport=get_transport(), custom_headers={"Content-Encoding": "gzip"}
+        )
+    return _ingest_client
+
+
+_async_client = None
+
+
+def get_async_meilisearch_client():
+    """Return a singleton ``AsyncMeilisearchClient`` for the async search views."""
+    global _async_client
+    if _async_client is None:
+        from apps.search.meilisearch.transport import AsyncMeilisearchClient, get_transport
+
+        url = getattr(settings, "MEILISEARCH_URL", "http://localhost:7700")
+        api_key = settings.MEILISEARCH_API_KEY or None
+        _async_client = AsyncMeilisearchClient(url=url, api_key=api_key, transport=get_transport())
+    return _async_client
@@ -1,72 +1,77 @@
-"""Build Meilisearch filter expression from FilterSpec and manuscript date params."""
+"""Render filter trees (`apps.search.filter_ast`) as Meilisearch filter expressions."""
 
+from functools import lru_cache
+
+from apps.search.filter_ast import And, Bound, FilterNode, In, IsNull, Or, filter_spec_to_node
 from apps.search.filter_contract import escape_filter_value as _escape, sanitize_filter_spec
-from apps.search.types import IndexType
+from apps.search.types import FilterSpec, IndexType, SearchCursor, SortSpec
+
+# Canonical trees repeat across requests (facet refreshes, paging), so their
+# rendered strings are memoised too.
+RENDER_CACHE_SIZE = 1024
 
 
-def build_meilisearch_filter(spec, index_type: IndexType) -> str | None:
+def build_meilisearch_filter(spec: FilterSpec, index_type: IndexType) -> str | None:
     """
     Convert FilterSpec (and manuscript min_date, max_date, at_most_or_least, date_diff)
-    into a Meilisearch filter expression string.
+    into a canonical Meilisearch filter expression string.
     Returns None if no filter conditions.
     """
-    parts = []
-    spec = sanitize_filter_spec(spec, index_type)
+    node = filter_spec_to_node(sanitize_filter_spec(spec, index_type))
+    return render_filter(node) if node is not None else None
 
-    # Equality: field = value or field IN [v1, v2]
-    for attr, value in spec.equal.items():
-        if value is None:
-            continue
-        if isinstance(value, list):
-            if value:
-                escaped = [_escape(v) for v in value]
-                parts.append(f"({attr} = {escaped[0]}" + "".join(f" OR {attr} = {v}" for v in escaped[1:]) + ")")
-        else:
-            parts.append(f"{attr} = {_escape(value)}")
 
-    # Not equal (single or multiple values)
-    for attr, value in spec.not_equal.items():
-        if value is None:
-            continue
-        if isinstance(value, list):
-            for v in value:
-                if v is not None:
-                    parts.append(f"{attr} != {_escape(v)}")
-        else:
-            parts.append(f"{attr} != {_escape(value)}")
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_filter(node: FilterNode) -> str:
+    """Meilisearch syntax for a canonical filter tree."""
+    if isinstance(node, In):
+        if len(node.values) == 1:
+            return f"{node.attribute} {'!=' if node.negated else '='} {_escape(node.values[0])}"
+        values = ", ".join(_escape(value) for value in node.values)
+        return f"{node.attribute} {'NOT IN' if node.negated else 'IN'} [{values}]"
+    if isinstance(node, Bound):
+        return f"{node.attribute} {'>=' if node.lower else '<='} {node.value}"
+    if isinstance(node, IsNull):
+        return f"{node.attribute} IS {'NOT NULL' if node.negated else 'NULL'}"
+    # AND binds tighter than OR: only the nested group of the other kind needs parentheses.
+    nested = Or if isinstance(node, And) else And
+    parts = [f"({render_filter(item)})" if isinstance(item, nested) else render_filter(item) for item in node.items]
+    return (" AND " if isinstance(node, And) else " OR ").join(parts)
 
-    # IN (explicit list)
-    for attr, values in spec.in_.items():
-        if values:
-            escaped = [_escape(v) for v in values]
-            parts.append(f"({attr} = {escaped[0]}" + "".join(f" OR {attr} = {v}" for v in escaped[1:]) + ")")
 
-    # Numeric range
-    for attr, (lo, hi) in spec.range_.items():
-        if lo is not None:
-            parts.append(f"{attr} >= {lo}")
-        if hi is not None:
-            parts.append(f"{attr} <= {hi}")
+def build_keyset_filter(keys: list[SortSpec], cursor: SearchCursor, *, nullable_leading: bool) -> str | None:
+    """Filter matching the hits after *cursor* in the order *keys* (before it when ``backward``).
 
-    # Manuscript date range
-    if spec.min_date is not None:
-        parts.append(f"date_min >= {spec.min_date}")
-    if spec.max_date is not None:
-        parts.append(f"date_max <= {spec.max_date}")
-    if spec.at_most_or_least and spec.date_diff is not None and spec.min_date is not None:
-        if spec.at_most_or_least == "at most":
-            parts.append(f"date_max <= {spec.min_date + spec.date_diff}")
-        elif spec.at_most_or_least == "at least":
-            parts.append(f"date_max >= {spec.min_date + spec.date_diff}")
+    The usual lexicographic expansion: ``k0 > v0 OR (k0 = v0 AND k1 > v1) …``
+    with each comparison flipped for descending keys and backward cursors.
+    When the leading key is a sort attribute some documents may lack
+    (*nullable_leading*), Meilisearch sorts those after every valued one in
+    either direction, so that tail is folded in explicitly. A backward cursor
+    inside the tail matches only the tail hits before it: reversing the sort
+    can't put the valued hits after them, so the reader fetches those
+    separately (``build_valued_filter``).
+    """
+    if not cursor.values:
+        return None
+    missing = None
+    if nullable_leading:
+        attribute = keys[0].attribute
+        missing = f"({attribute} NOT EXISTS OR {attribute} IS NULL)"
 
-    for attr in spec.empty:
-        parts.append(f"{attr} IS NULL")
-    for attr in spec.not_empty:
-        parts.append(f"{attr} IS NOT NULL")
+    disjuncts: list[str] = []
+    prefix: list[str] = []
+    for position, (key, value) in enumerate(zip(keys, cursor.values, strict=True)):
+        if position == 0 and value is None:
+            prefix.append(missing or f"{key.attribute} IS NULL")
+            continue
+        op = ">" if key.ascending != cursor.backward else "<"
+        disjuncts.append(" AND ".join([*prefix, f"{key.attribute} {op} {value}"]))
+        prefix.append(f"{key.attribute} = {value}")
+    if missing is not None and cursor.values[0] is not None and not cursor.backward:
+        disjuncts.append(missing)
+    return " OR ".join(f"({part})" for part in disjuncts)
 
-    if spec.qb_expr:
-        parts.append(f"({spec.qb_expr})")
 
-    if not parts:
-        return None
-    return " AND ".join(parts)
+def build_valued_filter(attribute: str) -> str:
+    """Filter matching the documents that have a value for *attribute*."""
+    return f"{attribute} EXISTS AND {attribute} IS NOT NULL"
@@ -1,15 +1,17 @@
-"""Meilisearch search index reader."""
+"""Meilisearch search index readers: the SDK-backed one and its async counterpart."""
 
+from dataclasses import replace
 import logging
 from typing import Any
 
 from django.conf import settings
 from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
 
-from apps.search.meilisearch.client import get_meilisearch_client
-from apps.search.meilisearch.filters import build_meilisearch_filter
+from apps.search.cursors import order_keys
+from apps.search.meilisearch.client import get_async_meilisearch_client, get_meilisearch_client
+from apps.search.meilisearch.filters import build_keyset_filter, build_meilisearch_filter, build_valued_filter
 from apps.search.registry import get_registration
-from apps.search.types import FacetResult, IndexType, SearchQuery, SearchResult
+from apps.search.types import FacetResult, IndexType, SearchCursor, SearchQuery, SearchResult
 
 logger = logging.getLogger(__name__)
 
@@ -20,17 +22,18 @@ HIGHLIGHT_PRE_TAG = "__hl_start__"
 HIGHLIGHT_POST_TAG = "__hl_end__"
 
 
-class MeilisearchIndexReader:
-    """Read/search Meilisearch indexes using the SDK."""
+def _backward_in_null_tail(cursor: SearchCursor) -> bool:
+    """True for a backward cursor cut from a hit missing the (nullable) leading key."""
+    return cursor.backward and bool(cursor.values) and cursor.values[0] is None
 
-    def __init__(self):
-        self._client: Any | None = None
 
-    @property
-    def client(self) -> Any:
-        if self._client is None:
-            self._client = get_meilisearch_client()
-        return self._client
+def _hits(body: dict[str, Any]) -> list[dict[str, Any]]:
+    hits = body.get("hits", [])
+    return hits if isinstance(hits, list) else []
+
+
+class BaseMeilisearchReader:
+    """Request building and response mapping shared by the sync and async readers."""
 
     def _index_uid(self, index_type: IndexType) -> str:
         prefix = getattr(settings, "MEILISEARCH_INDEX_PREFIX", "") or ""
@@ -73,10 +76,37 @@ class MeilisearchIndexReader:
         opt_params: dict[str, Any] = {
             "limit": search_query.limit,
             "offset": search_query.offset,
-            "attributesToHighlight": ["*"],
-            "highlightPreTag": HIGHLIGHT_PRE_TAG,
-            "highlightPostTag": HIGHLIGHT_POST_TAG,
         }
+        # limit=0 is a facet/total-only request: there are no hits to highlight.
+        if search_query.limit:
+            opt_params.update(
+                {
+                    "attributesToHighlight": ["*"],
+                    "highlightPreTag": HIGHLIGHT_PRE_TAG,
+                    "highlightPostTag": HIGHLIGHT_POST_TAG,
+                }
+            )
+        retrieve = search_query.attributes_to_retrieve
+        cursor = search_query.cursor
+        if cursor is not None:
+            # Cursor pages sort by the full order and seek past the boundary
+            # hit with a range filter instead of an offset.
+            keys = order_keys(index_type, search_query.sort_spec)
+            # Within the tail missing the leading key only the keyset attributes order the hits.
+            sort_keys = keys[1:] if _backward_in_null_tail(cursor) else keys
+            sort_list = [
+                f"{key.attribute}:{'asc' if key.ascending != cursor.backward else 'desc'}" for key in sort_keys
+            ]
+            keyset_expr = build_keyset_filter(
+                keys,
+                cursor,
+                nullable_leading=keys[0].attribute not in get_registration(index_type).keyset_attributes,
+            )
+            if keyset_expr:
+                filter_expr = f"({filter_expr}) AND ({keyset_expr})" if filter_expr else keyset_expr
+                opt_params["offset"] = 0
+            if retrieve:
+                retrieve = list(dict.fromkeys([*retrieve, *(key.attribute for key in keys)]))
         if filter_expr:
             opt_params["filter"] = filter_expr
         if sort_list:
@@ -87,8 +117,8 @@ class MeilisearchIndexReader:
             opt_params["matchingStrategy"] = search_query.matching_strategy
         if attrs_to_search:
             opt_params["attributesToSearchOn"] = attrs_to_search
-        if search_query.attributes_to_retrieve:
-            opt_params["attributesToRetrieve"] = search_query.attributes_to_retrieve
+        if retrieve:
+            opt_params["attributesToRetrieve"] = retrieve
         if search_query.attributes_to_crop:
             opt_params["attributesToCrop"] = search_query.attributes_to_crop
             if search_query.crop_length:
@@ -105,6 +135,93 @@ class MeilisearchIndexReader:
         offset = body.get("offset", search_query.offset)
         return SearchResult(hits=hits, total=total, limit=limit, offset=offset)
 
+    def _facet_result(self, body: dict[str, Any], facet_attributes: list[str] | None) -> FacetResult | None:
+        if not facet_attributes:
+            return None
+        return FacetResult(
+            facet_distribution=body.get("facetDistribution", {}),
+            facet_stats=body.get("facetStats", {}),
+        )
+
+    def _cursor_queries(
+        self, index_type: IndexType, search_query: SearchQuery, facet_attributes: list[str] | None
+    ) -> list[dict[str, Any]]:
+        """The multi-search queries of a cursor page: the unrestricted count (and facets), then the page.
+
+        A backward page from inside the null tail adds a third query: the last
+        valued hits, which precede the whole tail and fill the page once the
+        tail before the cursor runs out.
+        """
+        count_query = replace(search_query, cursor=None, limit=0, offset=0)
+        queries: list[dict[str, Any]] = []
+        for query, facets in ((count_query, facet_attributes), (search_query, None)):
+            uid, q_text, opt_params = self._build_search_params(index_type, query, facets)
+            queries.append({"indexUid": uid, "q": q_text, **opt_params})
+        if search_query.cursor is not None and _backward_in_null_tail(search_query.cursor):
+            from_end = replace(search_query, cursor=SearchCursor(backward=True), offset=0)
+            uid, q_text, opt_params = self._build_search_params(index_type, from_end)
+            valued = build_valued_filter(order_keys(index_type, search_query.sort_spec)[0].attribute)
+            opt_params["filter"] = f"({opt_params['filter']}) AND ({valued})" if "filter" in opt_params else valued
+            queries.append({"indexUid": uid, "q": q_text, **opt_params})
+        return queries
+
+    def _cursor_result(
+        self,
+        body: dict[str, Any],
+        search_query: SearchQuery,
+        cursor: SearchCursor,
+        facet_attributes: list[str] | None,
+    ) -> tuple[SearchResult, FacetResult | None]:
+        """Map the response to ``_cursor_queries``.
+
+        The page query only matches hits past the cursor, so its total is
+        the number left in that direction; the page's offset follows from it.
+        """
+        count_body, page_body, *valued_bodies = body["results"]
+        hits = _hits(page_body)
+        total = count_body.get("estimatedTotalHits", count_body.get("totalHits", 0))
+        remaining = page_body.get("estimatedTotalHits", page_body.get("totalHits", len(hits)))
+        for valued_body in valued_bodies:
+            valued_hits = _hits(valued_body)
+            hits = [*hits, *valued_hits[: max(search_query.limit - len(hits), 0)]]
+            remaining += valued_body.get("estimatedTotalHits", valued_body.get("totalHits", len(valued_hits)))
+        if cursor.backward:
+            hits = hits[::-1]
+            offset = max(remaining - len(hits), 0)
+        else:
+            offset = max(total - remaining, 0)
+        search_result = SearchResult(hits=hits, total=total, limit=search_query.limit, offset=offset)
+        return search_result, self._facet_result(count_body, facet_attributes)
+
+    def _multi_search_queries(self, specs: list[tuple[IndexType, SearchQuery]]) -> list[dict[str, Any]]:
+        queries: list[dict[str, Any]] = []
+        for index_type, search_query in specs:
+            uid, q_text, opt_params = self._build_search_params(index_type, search_query)
+            queries.append({"indexUid": uid, "q": q_text, **opt_params})
+        return queries
+
+    def _multi_search_results(
+        self, body: Any, specs: list[tuple[IndexType, SearchQuery]]
+    ) -> list[tuple[IndexType, SearchResult]]:
+        raw_results = body.get("results", []) if isinstance(body, dict) else []
+        return [
+            (index_type, self._to_search_result(result_body, search_query))
+            for (index_type, search_query), result_body in zip(specs, raw_results, strict=False)
+        ]
+
+
+class MeilisearchIndexReader(BaseMeilisearchReader):
+    """Read/search Meilisearch indexes using the SDK."""
+
+    def __init__(self):
+        self._client: Any | None = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_meilisearch_client()
+        return self._client
+
     def search(
         self,
         index_type: IndexType,
@@ -112,20 +229,25 @@ class MeilisearchIndexReader:
         facet_attributes: list[str] | None = None,
     ) -> tuple[SearchResult, FacetResult | None]:
         """Run search (and optionally facets). Returns (SearchResult, FacetResult or None)."""
+        if search_query.cursor is not None and search_query.cursor.values:
+            return self._search_after_cursor(index_type, search_query, search_query.cursor, facet_attributes)
         uid, q_text, opt_params = self._build_search_params(index_type, search_query, facet_attributes)
         index = self.client.index(uid)
         body: dict[str, Any] = index.search(q_text, opt_params)
 
-        search_result = self._to_search_result(body, search_query)
-
-        facet_result = None
-        if facet_attributes:
-            facet_result = FacetResult(
-                facet_distribution=body.get("facetDistribution", {}),
-                facet_stats=body.get("facetStats", {}),
-            )
+        return self._to_search_result(body, search_query), self._facet_result(body, facet_attributes)
 
-        return search_result, facet_result
+    def _search_after_cursor(
+        self,
+        index_type: IndexType,
+        search_query: SearchQuery,
+        cursor: SearchCursor,
+        facet_attributes: list[str] | None,
+    ) -> tuple[SearchResult, FacetResult | None]:
+        """A cursor page plus the unrestricted total and facets, in one round-trip."""
+        queries = self._cursor_queries(index_type, search_query, facet_attributes)
+        body: dict[str, Any] = self.client.multi_search(queries)
+        return self._cursor_result(body, search_query, cursor, facet_attributes)
 
     def multi_search(self, specs: list[tuple[IndexType, SearchQuery]]) -> list[tuple[IndexType, SearchResult]]:
         """Run several index searches in ONE Meilisearch round-trip (federated).
@@ -134,17 +256,8 @@ class MeilisearchIndexReader:
         """
         if not specs:
             return []
-        queries: list[dict[str, Any]] = []
-        for index_type, search_query in specs:
-            uid, q_text, opt_params = self._build_search_params(index_type, search_query)
-            queries.append({"indexUid": uid, "q": q_text, **opt_params})
-
-        body: dict[str, Any] = self.client.multi_search(queries)
-        raw_results = body.get("results", []) if isinstance(body, dict) else []
-        out: list[tuple[IndexType, SearchResult]] = []
-        for (index_type, search_query), result_body in zip(specs, raw_results, strict=False):
-            out.append((index_type, self._to_search_result(result_body, search_query)))
-        return out
+        body: dict[str, Any] = self.client.multi_search(self._multi_search_queries(specs))
+        return self._multi_search_results(body, specs)
 
     def get_document_by_id(self, index_type: IndexType, document_id: int | str) -> dict | None:
         """Return one document by id or None if not found."""
@@ -159,3 +272,48 @@ class MeilisearchIndexReader:
         except Exception:
             logger.exception("Unexpected error in get_document_by_id for %s doc %s", uid, document_id)
             raise
+
+
+class AsyncMeilisearchIndexReader(BaseMeilisearchReader):
+    """The read side of ``MeilisearchIndexReader`` as coroutines, for the async search views."""
+
+    def __init__(self):
+        self._client: Any | None = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_async_meilisearch_client()
+        return self._client
+
+    async def search(
+        self,
+        index_type: IndexType,
+        search_query: SearchQuery,
+        facet_attributes: list[str] | None = None,
+    ) -> tuple[SearchResult, FacetResult | None]:
+        """Run search (and optionally facets). Returns (SearchResult, FacetResult or None)."""
+        cursor = search_query.cursor
+        if cursor is not None and cursor.values:
+            queries = self._cursor_queries(index_type, search_query, facet_attributes)
+            body: dict[str, Any] = await self.client.multi_search(queries)
+            return self._cursor_result(body, search_query, cursor, facet_attributes)
+        uid, q_text, opt_params = self._build_search_params(index_type, search_query, facet_attributes)
+        body = await self.client.search(uid, q_text, opt_params)
+        return self._to_search_result(body, search_query), self._facet_result(body, facet_attributes)
+
+    async def multi_search(self, specs: list[tuple[IndexType, SearchQuery]]) -> list[tuple[IndexType, SearchResult]]:
+        """Run several index searches in one Meilisearch round-trip, as ``MeilisearchIndexReader.multi_search``."""
+        if not specs:
+            return []
+        body: dict[str, Any] = await self.client.multi_search(self._multi_search_queries(specs))
+        return self._multi_search_results(body, specs)
+
+    async def get_document_by_id(self, index_type: IndexType, document_id: int | str) -> dict | None:
+        """Return one document by id or None if not found."""
+        uid = self._index_uid(index_type)
+        try:
+            return await self.client.get_document(uid, str(document_id))
+        except (MeilisearchApiError, MeilisearchCommunicationError, OSError) as e:
+            logger.debug("Meilisearch get_document failed for %s doc %s: %s", uid, document_id, e)
+            return None
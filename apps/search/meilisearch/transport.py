@@ -0,0 +1,438 @@
+"""Pooled, instrumented HTTP transport under the Meilisearch SDK clients.
+
+The SDK's ``HttpRequests`` calls module-level ``requests.get``/``post``, so
+every call opens a new connection. Every call also shares a single timeout,
+and a Meilisearch outage holds each request thread for that whole timeout.
+``PooledHttpRequests`` sends the same requests through the process's
+``MeilisearchTransport`` instead. The transport provides:
+
+* one keep-alive ``requests.Session`` whose pool holds up to
+  ``MEILISEARCH_POOL_SIZE`` connections;
+* a connect timeout plus separate read and write timeouts. Searches,
+  document fetches and ``GET`` requests are reads; everything else is a
+  write;
+* bounded retries with full jitter for reads that failed to connect, timed
+  out or got a gateway error. Writes are never retried, since Meilisearch
+  may already have enqueued the task;
+* a ``CircuitBreaker`` that raises ``CircuitOpenError`` without a network
+  call after ``MEILISEARCH_BREAKER_THRESHOLD`` consecutive failures. After
+  the cool-down it lets one probe through. ``CircuitOpenError`` is a
+  ``MeilisearchCommunicationError``, so existing handlers treat it as an
+  unreachable server;
+* a ``LatencyHistogram`` per operation (``"POST indexes/{uid}/search"``),
+  reported by the management stats endpoint.
+
+``PooledClient`` gives every ``Index`` and task handler it creates the
+pooled ``HttpRequests``, so reader and writer code keeps using the SDK as
+before. Both reach into the SDK's private ``HttpRequests``, so pyproject pins
+``meilisearch`` to the minor release they were written against, and
+test_transport checks that every entry point the search app uses still goes
+through the pool.
+
+``AsyncMeilisearchClient`` serves the async reader. It sends the search,
+multi-search and document reads over one ``httpx.AsyncClient`` per event
+loop, sized like the session, under the same policy.
+"""
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable
+from functools import cache
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any
+from urllib.parse import quote
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+import httpx
+from meilisearch import Client
+from meilisearch._httprequests import HttpRequests
+from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError, MeilisearchTimeoutError
+from meilisearch.index import Index
+from meilisearch.models.task import TaskInfo
+from meilisearch.version import qualified_version
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# POST endpoints that only read, keyed by their last path segment.
+READ_ONLY_POSTS = frozenset({"search", "multi-search", "facet-search", "fetch", "similar"})
+# Gateway statuses worth retrying a read on: the server never saw the request
+# or is restarting.
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Base of the exponential backoff between read attempts, before jitter.
+RETRY_BACKOFF_SECONDS = 0.05
+# Upper bounds of the latency histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(MeilisearchCommunicationError):
+    """Meilisearch is considered down; the request was not sent."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed, open for ``cooldown`` seconds, then one probe."""
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def before_request(self) -> None:
+        """Raise ``CircuitOpenError`` unless a request may be sent now."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if not self._probing and time.monotonic() - self._opened_at >= self.cooldown:
+                self._probing = True
+                return
+        raise CircuitOpenError("Meilisearch circuit breaker is open; request not sent.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self.threshold > 0 and self._failures >= self.threshold):
+                if self._opened_at is None or self._probing:
+                    logger.warning("Meilisearch circuit breaker opened after %d failures.", self._failures)
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class LatencyHistogram:
+    """Request counts per latency bucket for one operation."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, elapsed_ms: float, *, error: bool) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.total_ms += elapsed_ms
+        self.errors += int(error)
+
+    def as_dict(self) -> dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "count": count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / count, 2) if count else 0.0,
+            "buckets": dict(zip(labels, self.counts, strict=True)),
+        }
+
+
+def operation_name(method: str, path: str) -> str:
+    """*path* with index uids and ids replaced, prefixed by the HTTP method."""
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    if segments[0] == "indexes" and len(segments) > 1:
+        segments[1] = "{uid}"
+        if len(segments) > 3 and segments[2] == "documents" and segments[3] not in ("fetch", "delete", "delete-batch"):
+            segments[3] = "{id}"
+    elif segments[0] in ("tasks", "batches") and len(segments) > 1 and segments[1].isdigit():
+        segments[1] = "{id}"
+    return f"{method} {'/'.join(segments)}"
+
+
+def is_read(method: str, path: str) -> bool:
+    """True for requests that only read: ``GET`` and the search/fetch ``POST`` endpoints."""
+    endpoint = path.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+    return method == "GET" or (method == "POST" and endpoint in READ_ONLY_POSTS)
+
+
+class MeilisearchTransport:
+    """The process's keep-alive session, timeouts, retry policy, breaker and histograms."""
+
+    def __init__(
+        self,
+        *,
+        pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+        write_timeout: float,
+        read_retries: int,
+        breaker_threshold: int,
+        breaker_cooldown: float,
+    ) -> None:
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.read_retries = read_retries
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_sessions: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = WeakKeyDictionary()
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> MeilisearchTransport:
+        return cls(
+            pool_size=settings.MEILISEARCH_POOL_SIZE,
+            connect_timeout=settings.MEILISEARCH_CONNECT_TIMEOUT,
+            read_timeout=settings.MEILISEARCH_READ_TIMEOUT,
+            write_timeout=settings.MEILISEARCH_WRITE_TIMEOUT,
+            read_retries=settings.MEILISEARCH_READ_RETRIES,
+            breaker_threshold=settings.MEILISEARCH_BREAKER_THRESHOLD,
+            breaker_cooldown=settings.MEILISEARCH_BREAKER_COOLDOWN_SECONDS,
+        )
+
+    def _policy(self, method: str, path: str) -> tuple[str, int, float]:
+        """Operation name, retry budget and read timeout of a request."""
+        read = is_read(method, path)
+        return (
+            operation_name(method, path),
+            self.read_retries if read else 0,
+            self.read_timeout if read else self.write_timeout,
+        )
+
+    def _failed(self, operation: str, started: float) -> None:
+        self._observe(operation, started, error=True)
+        self.breaker.record_failure()
+
+    def _answered(self, operation: str, started: float, status_code: int) -> bool:
+        """Record a response; ``False`` when its status is worth another attempt."""
+        self._observe(operation, started, error=status_code >= 500)
+        if status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+            return False
+        self.breaker.record_success()
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        with self._lock:
+            self._retries += 1
+        return random.uniform(0, RETRY_BACKOFF_SECONDS * 2**attempt)
+
+    def request(self, method: str, url: str, path: str, *, headers: dict[str, str], data: Any) -> requests.Response:
+        """Send one request under the policy for its kind; a response is returned whatever its status."""
+        operation, retries, read_timeout = self._policy(method, path)
+        timeout = (self.connect_timeout, read_timeout)
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            started = time.perf_counter()
+            answered = False
+            try:
+                response = self.session.request(method, url, headers=headers, data=data, timeout=timeout)
+                answered = True
+            except requests.RequestException:
+                if attempt >= retries:
+                    raise
+            finally:
+                # Whatever ended an attempt without a response settles the
+                # breaker, or a half-open probe would never be released.
+                if not answered:
+                    self._failed(operation, started)
+            if answered and (self._answered(operation, started, response.status_code) or attempt >= retries):
+                return response
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def async_session(self) -> httpx.AsyncClient:
+        """The running event loop's shared ``httpx.AsyncClient``; httpx clients can't cross loops."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_sessions.get(loop)
+            if client is None:
+                client = self._async_sessions[loop] = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                )
+        return client
+
+    async def arequest(
+        self, method: str, url: str, path: str, *, headers: dict[str, str], content: bytes | None
+    ) -> httpx.Response:
+        """``request`` on the event loop, over ``async_session``."""
+        operation, retries, read_timeout = self._policy(method, path)
+        timeout = httpx.Timeout(read_timeout, connect=self.connect_timeout)
+        session = self.async_session()
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            started = time.perf_counter()
+            answered = False
+            try:
+                response = await session.request(method, url, headers=headers, content=content, timeout=timeout)
+                answered = True
+            except httpx.RequestError:
+                if attempt >= retries:
+                    raise
+            finally:
+                # Includes a cancelled task: a probe left unsettled keeps the
+                # breaker half-open for good.
+                if not answered:
+                    self._failed(operation, started)
+            if answered and (self._answered(operation, started, response.status_code) or attempt >= retries):
+                return response
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _observe(self, operation: str, started: float, *, error: bool) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = LatencyHistogram()
+            histogram.observe(elapsed_ms, error=error)
+
+    def stats(self) -> dict[str, Any]:
+        """Breaker state, retry count and this process's latency histograms per operation."""
+        with self._lock:
+            operations = {operation: histogram.as_dict() for operation, histogram in sorted(self._histograms.items())}
+            retries = self._retries
+        return {"circuit": self.breaker.state, "retries": retries, "operations": operations}
+
+
+@cache
+def get_transport() -> MeilisearchTransport:
+    """The process-wide Meilisearch transport."""
+    return MeilisearchTransport.from_settings()
+
+
+class PooledHttpRequests(HttpRequests):
+    """``HttpRequests`` that sends through a ``MeilisearchTransport``.
+
+    Headers are built per call rather than by mutating ``self.headers``, so one
+    instance can be shared between threads.
+    """
+
+    def __init__(self, config: Any, custom_headers: dict[str, str] | None, transport: MeilisearchTransport) -> None:
+        super().__init__(config, custom_headers)
+        self.transport = transport
+
+    def send_request(
+        self,
+        http_method: Callable,
+        path: str,
+        body: Any = None,
+        content_type: str | None = None,
+        *,
+        serializer: type[json.JSONEncoder] | None = None,
+    ) -> Any:
+        method = http_method.__name__.upper()
+        headers = {key: value for key, value in self.headers.items() if key != "Content-Type"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if method == "GET":
+            data = None
+        elif isinstance(body, bytes):
+            data = body
+        elif isinstance(body, bool) or isinstance(body, dict) or body:
+            data = json.dumps(body, cls=serializer)
+        else:
+            data = "" if body == "" else "null"
+        try:
+            response = self.transport.request(method, f"{self.config.url}/{path}", path, headers=headers, data=data)
+        except requests.exceptions.Timeout as err:
+            raise MeilisearchTimeoutError(str(err)) from err
+        except requests.exceptions.RequestException as err:
+            raise MeilisearchCommunicationError(str(err)) from err
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            raise MeilisearchApiError(str(err), response) from err
+        return response if response.content == b"" else response.json()
+
+
+class PooledClient(Client):
+    """SDK ``Client`` whose requests, and those of its indexes and task handler, go through *transport*."""
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str | None,
+        transport: MeilisearchTransport,
+        custom_headers: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(url=url, api_key=api_key, custom_headers=custom_headers)
+        self.pooled_headers = custom_headers
+        self.http = PooledHttpRequests(self.config, custom_headers, transport)
+        self.task_handler.http = self.http
+
+    def _pooled(self, index: Index) -> Index:
+        index.http = self.http
+        index.task_handler.http = self.http
+        return index
+
+    def index(self, uid: str) -> Index:
+        return self._pooled(super().index(uid))
+
+    def get_index(self, uid: str) -> Index:
+        return self._pooled(Index(self.config, uid, custom_headers=self.pooled_headers)).fetch_info()
+
+    def get_indexes(self, parameters: dict[str, Any] | None = None) -> dict[str, Any]:
+        indexes = super().get_indexes(parameters)
+        indexes["results"] = [self._pooled(index) for index in indexes["results"]]
+        return indexes
+
+    def create_index(self, uid: str, options: dict[str, Any] | None = None) -> TaskInfo:
+        return TaskInfo(**self.http.post(self.config.paths.index, {**(options or {}), "uid": uid}))
+
+
+class AsyncMeilisearchClient:
+    """The read endpoints of the SDK client, for the event loop.
+
+    Requests go through ``MeilisearchTransport.arequest``, so they share the
+    breaker, retry policy and histograms of the SDK clients and raise the
+    same ``meilisearch.errors`` exceptions.
+    """
+
+    def __init__(self, url: str, api_key: str | None, transport: MeilisearchTransport) -> None:
+        self.url = url.rstrip("/")
+        self.transport = transport
+        self.headers = {"User-Agent": qualified_version(), "Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    async def search(self, index_uid: str, query: str, opt_params: dict[str, Any]) -> dict[str, Any]:
+        return await self._send("POST", f"indexes/{index_uid}/search", {"q": query, **opt_params})
+
+    async def multi_search(self, queries: list[dict[str, Any]]) -> dict[str, Any]:
+        return await self._send("POST", "multi-search", {"queries": queries})
+
+    async def get_document(self, index_uid: str, document_id: str) -> dict[str, Any]:
+        return await self._send("GET", f"indexes/{index_uid}/documents/{quote(document_id, safe='')}")
+
+    async def _send(self, method: str, path: str, body: Any = None) -> Any:
+        content = json.dumps(body).encode() if body is not None else None
+        try:
+            response = await self.transport.arequest(
+                method, f"{self.url}/{path}", path, headers=self.headers, content=content
+            )
+        except httpx.TimeoutException as err:
+            raise MeilisearchTimeoutError(str(err)) from err
+        except httpx.RequestError as err:
+            raise MeilisearchCommunicationError(str(err)) from err
+        if response.is_error:
+            raise MeilisearchApiError(f"{response.status_code} error for {method} {path}", response)
+        return response.json()
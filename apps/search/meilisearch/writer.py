@@ -1,5 +1,8 @@
 """Meilisearch index writer."""
 
+import gzip
+import hashlib
+import json
 import logging
 from typing import Any
 
@@ -7,12 +10,41 @@ from django.conf import settings
 from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
 
 from apps.search.contracts import SearchDocument
-from apps.search.meilisearch.client import get_meilisearch_client
+from apps.search.meilisearch.client import get_meilisearch_client, get_meilisearch_ingest_client
 from apps.search.registry import get_registration
+from apps.search.result_cache import bump_generation
 from apps.search.types import IndexType
 
 logger = logging.getLogger(__name__)
 
+# Settings Meilisearch treats as sets; searchable attributes are ranked in order.
+UNORDERED_SETTINGS = frozenset({"filterableAttributes", "sortableAttributes"})
+
+
+def settings_fingerprint(index_settings: dict[str, Any]) -> str:
+    """Stable digest of a settings body; attribute order only counts where Meilisearch ranks by it."""
+    normalised = {
+        key: sorted(value) if key in UNORDERED_SETTINGS and isinstance(value, list) else value
+        for key, value in index_settings.items()
+    }
+    return hashlib.sha256(json.dumps(normalised, sort_keys=True).encode()).hexdigest()
+
+
+def comparable_settings(current: dict[str, Any], desired: dict[str, Any]) -> dict[str, Any]:
+    """The part of an index's *current* settings that *desired* sets.
+
+    Object settings (pagination, typo tolerance) are narrowed to the keys
+    *desired* sets, so defaults Meilisearch reports for the rest don't count
+    as a difference.
+    """
+    live: dict[str, Any] = {}
+    for key, value in desired.items():
+        current_value = current.get(key)
+        if isinstance(value, dict) and isinstance(current_value, dict):
+            current_value = {name: current_value.get(name) for name in value}
+        live[key] = current_value
+    return live
+
 
 class MeilisearchIndexWriter:
     """Write/clear Meilisearch indexes using the SDK."""
@@ -24,9 +56,16 @@ class MeilisearchIndexWriter:
     # 1000), which made every category with ≥1000 records read exactly "1,000".
     # Raise it well above the corpus size so result counts are exact.
     MAX_TOTAL_HITS = 1_000_000
+    # Fast gzip: payloads are large and compressed on the rebuild's critical
+    # path; level 3 keeps most of the size win at a fraction of level 9's CPU.
+    NDJSON_COMPRESS_LEVEL = 3
+    # Ingesting a multi-megabyte payload can take far longer than the SDK's
+    # 5 s default wait.
+    INGEST_WAIT_TIMEOUT_MS = 10 * 60 * 1000
 
     def __init__(self):
         self._client: Any | None = None
+        self._ingest_client: Any | None = None
 
     @property
     def client(self) -> Any:
@@ -34,6 +73,12 @@ class MeilisearchIndexWriter:
             self._client = get_meilisearch_client()
         return self._client
 
+    @property
+    def ingest_client(self) -> Any:
+        if self._ingest_client is None:
+            self._ingest_client = get_meilisearch_ingest_client()
+        return self._ingest_client
+
     def _index_uid(self, index_type: IndexType) -> str:
         prefix = getattr(settings, "MEILISEARCH_INDEX_PREFIX", "") or ""
         return f"{prefix}{index_type.uid}".strip() or index_type.uid
@@ -42,40 +87,80 @@ class MeilisearchIndexWriter:
         """UID for the staging index used during atomic reindex (P1.3)."""
         return f"{self._index_uid(index_type)}{self.BUILD_SUFFIX}"
 
-    def _apply_index_settings(self, index_uid: str, index_type: IndexType) -> None:
+    def index_settings(self, index_type: IndexType) -> dict[str, Any]:
+        """The Meilisearch settings *index_type* is built with, as an ``update_settings`` body."""
         registration = get_registration(index_type)
-        index = self.client.index(index_uid)
-        tasks = [
-            index.update_filterable_attributes(registration.filterable_attributes),
-            index.update_sortable_attributes(registration.sortable_attributes),
-            index.update_searchable_attributes(registration.searchable_attributes),
-            index.update_pagination_settings({"maxTotalHits": self.MAX_TOTAL_HITS}),
+        # Exports and cursor pagination seek on the keyset attributes with
+        # range filters; keep them filterable and sortable even where the UI
+        # doesn't offer them.
+        keyset = registration.keyset_attributes
+        return {
+            "filterableAttributes": list(dict.fromkeys([*registration.filterable_attributes, *keyset])),
+            "sortableAttributes": list(dict.fromkeys([*registration.sortable_attributes, *keyset])),
+            "searchableAttributes": list(registration.searchable_attributes),
+            "pagination": {"maxTotalHits": self.MAX_TOTAL_HITS},
             # Disable typo tolerance on numbers: charter dates (1124 vs 1224) and
             # numeric shelfmark/catalogue tokens must match exactly, not fuzzily.
-            index.update_typo_tolerance({"disableOnNumbers": True}),
-        ]
-        # Wait for the settings to actually apply before any documents are added
-        # or the index is swapped live. Meilisearch processes an index's tasks in
-        # order, so awaiting the last enqueued settings task means all of them
-        # are done — rather than relying on that FIFO ordering implicitly.
-        self.client.wait_for_task(tasks[-1].task_uid)
+            "typoTolerance": {"disableOnNumbers": True},
+        }
+
+    def _apply_index_settings(
+        self, index_uid: str, index_type: IndexType, *, current: dict[str, Any] | None = None
+    ) -> None:
+        """Bring *index_uid*'s settings in line with the registration of *index_type*.
+
+        With the index's *current* settings, only the settings that differ are
+        sent, and nothing at all when the fingerprints match: on Meilisearch a
+        settings update can re-index every document already in the index.
+        """
+        desired = self.index_settings(index_type)
+        if current is not None:
+            live = comparable_settings(current, desired)
+            if settings_fingerprint(live) == settings_fingerprint(desired):
+                logger.debug("Settings of %s are up to date; skipping the update.", index_uid)
+                return
+            desired = {
+                key: value
+                for key, value in desired.items()
+                if settings_fingerprint({key: live[key]}) != settings_fingerprint({key: value})
+            }
+            logger.info("Updating settings of %s: %s.", index_uid, ", ".join(desired))
+        # One task for all of them, awaited before any documents are added or
+        # the index is swapped live.
+        self._wait_for_success(self.client.index(index_uid).update_settings(desired))
+
+    def ensure_index(self, index_type: IndexType) -> None:
+        """Create the live index if it doesn't exist yet, leaving its settings alone.
+
+        Enough before a build-and-swap rebuild: the swap brings the build
+        index's settings live along with its documents.
+        """
+        self._get_or_create_index(self._index_uid(index_type))
 
     def ensure_index_and_settings(self, index_type: IndexType) -> None:
-        """Create index if needed and set filterable/sortable/searchable attributes."""
+        """Create index if needed and set filterable/sortable/searchable attributes.
+
+        Settings that already match the registration are not re-sent.
+        """
         uid = self._index_uid(index_type)
+        created = self._get_or_create_index(uid)
+        current = None if created else self.client.index(uid).get_settings()
+        self._apply_index_settings(uid, index_type, current=current)
+
+    def _get_or_create_index(self, uid: str) -> bool:
+        """Ensure index *uid* exists; True when it had to be created."""
         try:
             self.client.get_index(uid)
         except MeilisearchApiError as e:
             if e.code == "index_not_found":
                 task_info = self.client.create_index(uid, {"primaryKey": self.PRIMARY_KEY})
                 self.client.wait_for_task(task_info.task_uid)
-            else:
-                raise
+                return True
+            raise
         except (MeilisearchCommunicationError, OSError, ConnectionError) as e:
             logger.exception("Meilisearch connection error ensuring index %s: %s", uid, e)
             raise
-
-        self._apply_index_settings(uid, index_type)
+        return False
 
     def replace_documents(self, index_type: IndexType, documents: list[SearchDocument]) -> None:
         """Replace index contents with documents. Creates index and sets settings if needed."""
@@ -85,15 +170,21 @@ class MeilisearchIndexWriter:
         for i in range(0, len(documents), self.BATCH_SIZE):
             batch = documents[i : i + self.BATCH_SIZE]
             index.update_documents(batch, primary_key=self.PRIMARY_KEY)
+        bump_generation(index_type)
 
     def prepare_build_index(self, index_type: IndexType) -> None:
         """Drop any stale build index from a prior failed reindex, then create a fresh one
-        with the same settings as the live index. The build index is the staging target
-        for atomic reindex via swap_indexes."""
+        with the registration's settings. The build index is the staging target
+        for atomic reindex via swap_indexes.
+
+        The settings are applied while the index is still empty, so they cost no
+        document re-indexing. Meilisearch runs an index's tasks in order, so
+        creation and settings are enqueued together and only the settings task
+        is awaited.
+        """
         build_uid = self._build_uid(index_type)
         self._drop_index_if_exists(build_uid)
-        task_info = self.client.create_index(build_uid, {"primaryKey": self.PRIMARY_KEY})
-        self.client.wait_for_task(task_info.task_uid)
+        self.client.create_index(build_uid, {"primaryKey": self.PRIMARY_KEY})
         self._apply_index_settings(build_uid, index_type)
 
     def add_documents_to_build(self, index_type: IndexType, documents: list[SearchDocument]) -> None:
@@ -104,6 +195,66 @@ class MeilisearchIndexWriter:
         index = self.client.index(build_uid)
         index.update_documents(documents, primary_key=self.PRIMARY_KEY)
 
+    def add_ndjson_to_build(self, index_type: IndexType, payload: bytes) -> int:
+        """Post one NDJSON payload, gzip-compressed, to the build index.
+
+        Returns the enqueued task uid without waiting; the rebuild waits for
+        all of them (``wait_for_tasks``) before swapping.
+        """
+        compressed = gzip.compress(payload, compresslevel=self.NDJSON_COMPRESS_LEVEL)
+        return self.add_compressed_ndjson_to_build(index_type, compressed)
+
+    def add_compressed_ndjson_to_build(self, index_type: IndexType, compressed: bytes) -> int:
+        """Post an already gzip-compressed NDJSON payload to the build index, without waiting."""
+        index = self.ingest_client.index(self._build_uid(index_type))
+        return index.add_documents_ndjson(compressed, primary_key=self.PRIMARY_KEY).task_uid
+
+    def wait_for_tasks(self, task_uids: list[int]) -> None:
+        """Wait for every task in *task_uids*, raising if any of them failed."""
+        for task_uid in task_uids:
+            self._wait_for_task_uid(task_uid, timeout_in_ms=self.INGEST_WAIT_TIMEOUT_MS)
+
+    def upsert_documents(self, index_type: IndexType, documents: list[SearchDocument]) -> None:
+        """Add or fully replace documents in the live index (incremental sync).
+
+        Uses ``add_documents`` rather than ``update_documents``: builders drop
+        None-valued keys, so a partial merge would keep a field the row no
+        longer has. Waits for the last task so the caller only acknowledges
+        pending changes once Meilisearch has applied them.
+        """
+        if not documents:
+            return
+        index = self.client.index(self._index_uid(index_type))
+        task_info = None
+        for i in range(0, len(documents), self.BATCH_SIZE):
+            task_info = index.add_documents(documents[i : i + self.BATCH_SIZE], primary_key=self.PRIMARY_KEY)
+        self._wait_for_success(task_info)
+        bump_generation(index_type)
+
+    def delete_documents(self, index_type: IndexType, document_ids: list[int | str]) -> None:
+        """Delete documents from the live index by primary key."""
+        if not document_ids:
+            return
+        index = self.client.index(self._index_uid(index_type))
+        self._wait_for_success(index.delete_documents(list(document_ids)))
+        bump_generation(index_type)
+
+    def delete_documents_by_filter(self, index_type: IndexType, filter_expr: str) -> None:
+        """Delete every live document matching a Meilisearch filter expression."""
+        index = self.client.index(self._index_uid(index_type))
+        self._wait_for_success(index.delete_documents(filter=filter_expr))
+        bump_generation(index_type)
+
+    def _wait_for_success(self, task_info: Any) -> None:
+        if task_info is None:
+            return
+        self._wait_for_task_uid(task_info.task_uid)
+
+    def _wait_for_task_uid(self, task_uid: int, **kwargs: Any) -> None:
+        task = self.client.wait_for_task(task_uid, **kwargs)
+        if getattr(task, "status", "succeeded") == "failed":
+            raise RuntimeError(f"Meilisearch task {task_uid} failed: {getattr(task, 'error', None)}")
+
     def swap_with_build(self, index_type: IndexType) -> None:
         """Atomically swap the live index with the build index. After this call,
         the freshly-built documents are live and the previous live contents are
@@ -112,6 +263,16 @@ class MeilisearchIndexWriter:
         build_uid = self._build_uid(index_type)
         task_info = self.client.swap_indexes([{"indexes": [live_uid, build_uid]}])
         self.client.wait_for_task(task_info.task_uid)
+        bump_generation(index_type)
+
+    def swap_many_with_build(self, index_types: list[IndexType]) -> None:
+        """Swap several live indexes with their build indexes in one atomic
+        Meilisearch operation, so indexes rebuilt together go live together."""
+        swaps = [{"indexes": [self._index_uid(index_type), self._build_uid(index_type)]} for index_type in index_types]
+        task_info = self.client.swap_indexes(swaps)
+        self._wait_for_success(task_info)
+        for index_type in index_types:
+            bump_generation(index_type)
 
     def drop_build_index(self, index_type: IndexType) -> None:
         """Drop the build index. Called after swap to clean up the now-stale data."""
@@ -132,6 +293,7 @@ class MeilisearchIndexWriter:
             index = self.client.index(uid)
             task_info = index.delete_all_documents()
             self.client.wait_for_task(task_info.task_uid)
+            bump_generation(index_type)
         except (MeilisearchApiError, MeilisearchCommunicationError, OSError, ConnectionError) as e:
             # Re-raise: a failed clear must propagate to the caller/task result,
             # not be swallowed so the operation looks like it succeeded while the
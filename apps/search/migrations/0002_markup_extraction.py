@@ -0,0 +1,29 @@
+# Generated by Django 6.0.7 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarkupExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('parser_version', models.PositiveSmallIntegerField()),
+                ('clauses', models.JSONField(default=list)),
+                ('people', models.JSONField(default=list)),
+                ('places', models.JSONField(default=list)),
+                ('clause_count', models.PositiveIntegerField(default=0)),
+                ('person_count', models.PositiveIntegerField(default=0)),
+                ('place_count', models.PositiveIntegerField(default=0)),
+                ('untyped_clause_count', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.7 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_markup_extraction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_type', models.CharField(max_length=32, unique=True)),
+                ('expected_documents', models.BigIntegerField(default=0)),
+                ('expected_checksum', models.BigIntegerField(default=0)),
+                ('indexed_documents', models.BigIntegerField(blank=True, null=True)),
+                ('indexed_checksum', models.BigIntegerField(blank=True, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
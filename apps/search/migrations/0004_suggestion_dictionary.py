@@ -0,0 +1,23 @@
+# Generated by Django 6.0.7 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_index_sync_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_type', models.CharField(max_length=32, unique=True)),
+                ('entries', models.JSONField(default=list)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
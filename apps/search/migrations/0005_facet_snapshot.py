@@ -0,0 +1,27 @@
+# Generated by Django 6.0.7 on 2026-10-18 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0004_suggestion_dictionary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_type', models.CharField(max_length=32, unique=True)),
+                ('generation', models.BigIntegerField()),
+                ('facet_attributes', models.JSONField(default=list)),
+                ('facet_distribution', models.JSONField(default=dict)),
+                ('facet_stats', models.JSONField(default=dict)),
+                ('total', models.BigIntegerField(default=0)),
+                ('hits', models.JSONField(default=list)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
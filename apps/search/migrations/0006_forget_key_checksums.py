@@ -0,0 +1,20 @@
+from django.db import migrations
+
+# The indexes built from models other than ImageText when this migration was written.
+_KEY_CHECKSUM_INDEXES = ("item_parts", "item_images", "scribes", "hands", "graphs")
+
+
+def _forget_key_checksums(apps, schema_editor):
+    """Drop the state of indexes over models without content; their checksum is now the sum of their keys."""
+    IndexSyncState = apps.get_model("search", "IndexSyncState")
+    IndexSyncState.objects.filter(index_type__in=_KEY_CHECKSUM_INDEXES).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0005_facet_snapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(_forget_key_checksums, migrations.RunPython.noop),
+    ]
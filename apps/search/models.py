@@ -0,0 +1,123 @@
+from django.db import models
+
+
+class PendingIndexUpdate(models.Model):
+    """A source row whose search documents are stale in the live index.
+
+    Written by the change receivers in ``apps.search.signals`` and drained by
+    the debounced ``sync_pending_search_documents`` task, which upserts (or
+    deletes) only the affected documents. ``object_id`` is the primary key of
+    the registry model for ``index_type``. Repeated saves of one row may add
+    duplicate entries on purpose: the drain deletes exactly the entries it
+    read, so a change recorded mid-drain is never acknowledged by mistake.
+    """
+
+    index_type = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["index_type", "id"], name="pendingindexupdate_drain_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.index_type}#{self.object_id}"
+
+
+class MarkupExtraction(models.Model):
+    """Parsed data-dpt markup for one version of ``ImageText.content``.
+
+    Keyed by ``content_hash`` — a SHA-256 of the content together with the
+    parser version — so identical texts share one row, an edited text simply
+    misses, and bumping ``PARSER_VERSION`` orphans every old row instead of
+    serving stale results. Filled on ImageText save and lazily by readers and
+    pruned by ``prune_markup_extractions``; see ``apps.search.extraction``.
+    The counts let dashboards and admin stats skip the JSON entirely.
+    """
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    parser_version = models.PositiveSmallIntegerField()
+    clauses = models.JSONField(default=list)
+    people = models.JSONField(default=list)
+    places = models.JSONField(default=list)
+    clause_count = models.PositiveIntegerField(default=0)
+    person_count = models.PositiveIntegerField(default=0)
+    place_count = models.PositiveIntegerField(default=0)
+    untyped_clause_count = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.content_hash[:12]} (v{self.parser_version})"
+
+    def as_extracted(self) -> dict:
+        """The stored result in ``dpt_parser.extract_all`` shape."""
+        return {"clauses": self.clauses, "places": self.places, "people": self.people}
+
+
+class IndexSyncState(models.Model):
+    """Materialised in-sync bookkeeping for one search index.
+
+    ``expected_*`` describe what the database says the index should hold:
+    the document count and an order-independent checksum over the source
+    rows (primary key plus content hash, see ``apps.search.sync_state``).
+    ``indexed_*`` describe what the live index was last brought to by a
+    rebuild or a fully drained incremental sync. The admin dashboard compares
+    the two pairs instead of recounting and re-parsing the corpus per poll.
+    """
+
+    index_type = models.CharField(max_length=32, unique=True)
+    expected_documents = models.BigIntegerField(default=0)
+    expected_checksum = models.BigIntegerField(default=0)
+    indexed_documents = models.BigIntegerField(null=True, blank=True)
+    indexed_checksum = models.BigIntegerField(null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return self.index_type
+
+    @property
+    def in_sync(self) -> bool:
+        return (self.indexed_documents, self.indexed_checksum) == (self.expected_documents, self.expected_checksum)
+
+
+class SuggestionDictionary(models.Model):
+    """Autocomplete entries of one search index, built by its last rebuild.
+
+    ``entries`` is a list of ``[label, document_id, weight]`` — the label
+    values (display labels, shelfmarks, names, allographs, loci) and top
+    content terms of the index's documents, with the id of a document that
+    carries each and the number of documents that do. ``version`` changes on
+    every rebuild so web workers know to reload their in-memory prefix
+    dictionary; see ``apps.search.suggestions``.
+    """
+
+    index_type = models.CharField(max_length=32, unique=True)
+    entries = models.JSONField(default=list)
+    version = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return self.index_type
+
+
+class FacetSnapshot(models.Model):
+    """Empty-query facets and first page of one search index, captured after a write.
+
+    Taken right after a rebuild swaps in (and after an incremental sync
+    drains) so landing-page facet requests — no ``q``, no filters — can be
+    answered without Meilisearch. ``generation`` is the index's result-cache
+    generation the snapshot was read at; once a write bumps it, the snapshot
+    is ignored until the next capture. See ``apps.search.facet_snapshots``.
+    """
+
+    index_type = models.CharField(max_length=32, unique=True)
+    generation = models.BigIntegerField()
+    facet_attributes = models.JSONField(default=list)
+    facet_distribution = models.JSONField(default=dict)
+    facet_stats = models.JSONField(default=dict)
+    total = models.BigIntegerField(default=0)
+    hits = models.JSONField(default=list)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.index_type}@{self.generation}"
@@ -1,7 +1,10 @@
 """Parse request query params into SearchQuery, FilterSpec, SortSpec."""
 
+from dataclasses import replace
 from typing import Any, cast
 
+from apps.search.cursors import decode_cursor, supports_cursor
+from apps.search.filter_ast import And, FilterNode, canonicalize
 from apps.search.filter_contract import (
     allowed_filter_attributes,
     default_facet_attributes,
@@ -11,16 +14,11 @@ from apps.search.filter_contract import (
 )
 from apps.search.qb_parser import parse_qb_param
 from apps.search.registry import get_registration
-from apps.search.types import FilterSpec, IndexType, SearchQuery, SortSpec
+from apps.search.types import FilterSpec, IndexType, SearchCursor, SearchQuery, SortSpec
 
 
-def _and_qb_expr(a: str | None, b: str | None) -> str | None:
-    parts = [p for p in (a, b) if p]
-    if not parts:
-        return None
-    if len(parts) == 1:
-        return parts[0]
-    return " AND ".join(f"({p})" for p in parts)
+def _and_qb_filter(a: FilterNode | None, b: FilterNode | None) -> FilterNode | None:
+    return canonicalize(And(tuple(node for node in (a, b) if node is not None)))
 
 
 def _merge_filter_with_qb(base: FilterSpec, qb: FilterSpec | None) -> FilterSpec:
@@ -39,7 +37,7 @@ def _merge_filter_with_qb(base: FilterSpec, qb: FilterSpec | None) -> FilterSpec
         starts_with={**base.starts_with, **qb.starts_with},
         empty=list(dict.fromkeys([*base.empty, *qb.empty])),
         not_empty=list(dict.fromkeys([*base.not_empty, *qb.not_empty])),
-        qb_expr=_and_qb_expr(base.qb_expr, qb.qb_expr),
+        qb_filter=_and_qb_filter(base.qb_filter, qb.qb_filter),
     )
 
 
@@ -53,6 +51,7 @@ def parse_search_query(
     Build SearchQuery from request query params.
     Supports: q, filter (structured as param=value), sort, limit, offset.
     Manuscript-specific: min_date, max_date, at_most_or_least, date_diff.
+    Cursor pagination: `pagination=cursor` for the first page, then `cursor`.
     """
     q = (query_params.get("q") or "").strip()
     limit = _int_param(query_params.get("limit"), default_limit, 1, max_limit) or default_limit
@@ -64,7 +63,7 @@ def parse_search_query(
     attributes_to_search_on = _parse_attributes_to_search_on(query_params, index_type)
     attributes_to_retrieve = _parse_csv_param(query_params.get("attributes_to_retrieve"))
 
-    return SearchQuery(
+    query = SearchQuery(
         q=q,
         filter_spec=filter_spec,
         sort_spec=sort_spec,
@@ -74,6 +73,20 @@ def parse_search_query(
         attributes_to_search_on=attributes_to_search_on,
         attributes_to_retrieve=attributes_to_retrieve,
     )
+    return _apply_cursor(query_params, index_type, query)
+
+
+def _apply_cursor(query_params: Any, index_type: IndexType, query: SearchQuery) -> SearchQuery:
+    token = (query_params.get("cursor") or "").strip()
+    opted_in = token or (query_params.get("pagination") or "").strip().lower() == "cursor"
+    if not opted_in or not supports_cursor(index_type, query):
+        return query
+    cursor = decode_cursor(token, index_type, query.sort_spec) if token else None
+    if cursor is None:
+        # No cursor yet (or a malformed/stale one, which restarts at the top):
+        # an ordinary offset page in cursor order, whose hits seed the cursors.
+        return replace(query, cursor=SearchCursor(), offset=0 if token else query.offset)
+    return replace(query, cursor=cursor, offset=0)
 
 
 def _normalize_facet_attr(attr: str, index_type: IndexType) -> str:
@@ -100,7 +113,10 @@ def _parse_filter_spec(query_params: Any, index_type: IndexType) -> FilterSpec:
         "advanced",
         "view",
         "format",
+        "export_format",
         "scope",
+        "cursor",
+        "pagination",
     }
     equal: dict[str, str | int | float | list[str | int | float]] = {}
     not_equal: dict[str, str | int | float | list[str | int | float]] = {}
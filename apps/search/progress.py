@@ -69,16 +69,27 @@ class CeleryTaskReporter:
     For single-index reindex tasks, callers should call
     `advance_to(1, 1, segment)` once after `start(...)` so batch reports
     carry the right segment label.
+
+    Shards of a sharded reindex pass the dispatching task's id as *task_id*:
+    every shard then reports into the one result the management UI polls,
+    with `done` already summed across shards by the indexing service.
+    Non-reindex jobs (search exports) relabel the message through
+    *activity* and *unit*.
     """
 
-    def __init__(self, task: Task) -> None:
+    def __init__(
+        self, task: Task, *, task_id: str | None = None, activity: str = "Reindexing", unit: str = "docs"
+    ) -> None:
         self._task = task
+        self._task_id = task_id
+        self._activity = activity
+        self._unit = unit
         self._index_position = 1
         self._total_indexes = 1
         self._segment = ""
 
     def start(self, message: str) -> None:
-        self._task.update_state(
+        self._update_state(
             state="STARTED",
             meta={
                 "current": 0,
@@ -95,13 +106,18 @@ class CeleryTaskReporter:
         self._segment = segment
 
     def report_batch(self, done: int, total: int) -> None:
-        self._task.update_state(
+        self._update_state(
             state="PROGRESS",
             meta={
                 "current": self._index_position,
                 "total": self._total_indexes,
-                "message": f"Reindexing {self._segment}… {done}/{total} docs",
+                "message": f"{self._activity} {self._segment}… {done}/{total} {self._unit}",
                 "index_done": done,
                 "index_total": total,
             },
         )
+
+    def _update_state(self, **kwargs) -> None:
+        if self._task_id is not None:
+            kwargs["task_id"] = self._task_id
+        self._task.update_state(**kwargs)
@@ -1,16 +1,19 @@
-"""Parse URL `qb` (base64url JSON) query-builder trees into FilterSpec fragments."""
+"""Parse URL `qb` (base64url JSON) query-builder trees into FilterSpec fragments.
+
+The tree compiles to a canonical `filter_ast` node, so the same advanced
+search sent with its conditions in another order caches and renders
+identically. Compiled blobs are memoised in a bounded LRU.
+"""
 
 from __future__ import annotations
 
 import base64
+from functools import lru_cache
 import json
 from typing import Any
 
-from apps.search.filter_contract import (
-    allowed_filter_attributes,
-    escape_filter_value,
-    normalize_filter_attribute,
-)
+from apps.search.filter_ast import And, Bound, FilterNode, In, IsNull, Or, canonicalize
+from apps.search.filter_contract import allowed_filter_attributes, normalize_filter_attribute
 from apps.search.types import FilterSpec, IndexType
 
 
@@ -25,10 +28,27 @@ def _b64url_decode(raw: str) -> bytes | None:
         return None
 
 
+# Distinct qb blobs kept compiled. The frontend re-sends the same blob on
+# every page, facet refresh and sort change of a saved advanced search.
+QB_CACHE_SIZE = 512
+
+
 def parse_qb_param(raw: str, index_type: IndexType) -> FilterSpec | None:
-    """Decode qb param and return FilterSpec (qb_expr + contains + starts_with)."""
+    """Decode qb param and return FilterSpec (qb_filter + contains + starts_with)."""
     if not raw or not raw.strip():
         return None
+    compiled = _compile_qb(raw.strip(), index_type)
+    if compiled is None:
+        return None
+    node, contains, starts_with = compiled
+    return FilterSpec(qb_filter=node, contains=dict(contains), starts_with=dict(starts_with))
+
+
+@lru_cache(maxsize=QB_CACHE_SIZE)
+def _compile_qb(
+    raw: str, index_type: IndexType
+) -> tuple[FilterNode | None, tuple[tuple[str, str], ...], tuple[tuple[str, str], ...]] | None:
+    """Decode and compile one qb blob to a canonical tree; memoised, so results are immutable."""
     blob = _b64url_decode(raw)
     if not blob:
         return None
@@ -38,10 +58,11 @@ def parse_qb_param(raw: str, index_type: IndexType) -> FilterSpec | None:
         return None
     if not isinstance(data, dict):
         return None
-    expr, contains, starts_with = _eval_node(data, index_type)
-    if expr is None and not contains and not starts_with:
+    node, contains, starts_with = _eval_node(data, index_type)
+    node = canonicalize(node)
+    if node is None and not contains and not starts_with:
         return None
-    return FilterSpec(qb_expr=expr, contains=contains, starts_with=starts_with)
+    return node, tuple(contains.items()), tuple(starts_with.items())
 
 
 def _filterable(field: str, index_type: IndexType) -> str | None:
@@ -60,7 +81,7 @@ def _parse_number(s: str) -> float | None:
         return None
 
 
-def _eval_cond(node: dict[str, Any], index_type: IndexType) -> tuple[str | None, dict[str, str], dict[str, str]]:
+def _eval_cond(node: dict[str, Any], index_type: IndexType) -> tuple[FilterNode | None, dict[str, str], dict[str, str]]:
     field_raw = str(node.get("field") or "").strip()
     op = str(node.get("op") or "is").lower()
     value = node.get("value")
@@ -86,33 +107,33 @@ def _eval_cond(node: dict[str, Any], index_type: IndexType) -> tuple[str | None,
         return None, contains, starts_with
 
     if op == "is_empty":
-        return f"{field} IS NULL", contains, starts_with
+        return IsNull(field), contains, starts_with
     if op == "is_not_empty":
-        return f"{field} IS NOT NULL", contains, starts_with
+        return IsNull(field, negated=True), contains, starts_with
     if op == "is":
-        return f"{field} = {escape_filter_value(val_s)}", contains, starts_with
+        return In(field, (val_s,)), contains, starts_with
     if op == "is_not":
-        return f"{field} != {escape_filter_value(val_s)}", contains, starts_with
+        return In(field, (val_s,), negated=True), contains, starts_with
     if op == "gt":
         num = _parse_number(val_s)
         if num is None:
             return None, contains, starts_with
-        return f"{field} >= {num}", contains, starts_with
+        return Bound(field, num, lower=True), contains, starts_with
     if op == "lt":
         num = _parse_number(val_s)
         if num is None:
             return None, contains, starts_with
-        return f"{field} <= {num}", contains, starts_with
+        return Bound(field, num, lower=False), contains, starts_with
     if op == "between":
         lo = _parse_number(val_s)
         hi = _parse_number(val_to_s)
         if lo is None or hi is None:
             return None, contains, starts_with
-        return f"({field} >= {lo} AND {field} <= {hi})", contains, starts_with
+        return And((Bound(field, lo, lower=True), Bound(field, hi, lower=False))), contains, starts_with
     return None, contains, starts_with
 
 
-def _eval_node(node: dict[str, Any], index_type: IndexType) -> tuple[str | None, dict[str, str], dict[str, str]]:
+def _eval_node(node: dict[str, Any], index_type: IndexType) -> tuple[FilterNode | None, dict[str, str], dict[str, str]]:
     t = node.get("t")
     if t == "cond":
         return _eval_cond(node, index_type)
@@ -135,11 +156,7 @@ def _eval_node(node: dict[str, Any], index_type: IndexType) -> tuple[str | None,
         merged_contains.update(c)
         merged_starts.update(s)
 
-    filter_parts = [e for e, _, _ in child_results if e]
+    filter_parts = tuple(e for e, _, _ in child_results if e is not None)
     if not filter_parts:
         return None, merged_contains, merged_starts
-    if op == "OR":
-        expr = "(" + " OR ".join(filter_parts) + ")"
-    else:
-        expr = " AND ".join(f"({p})" if " OR " in p else p for p in filter_parts)
-    return expr, merged_contains, merged_starts
+    return (Or(filter_parts) if op == "OR" else And(filter_parts)), merged_contains, merged_starts
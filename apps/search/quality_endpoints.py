@@ -8,14 +8,14 @@ from __future__ import annotations
 
 from datetime import timedelta
 
-from django.db.models import Count
+from django.db.models import Count, Exists, OuterRef
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from apps.annotations.models import Graph
 from apps.common.permissions import IsSuperuser
-from apps.manuscripts.models import ImageText
+from apps.manuscripts.models import ImageText, TextLink
 
 
 def _stale_drafts(days: int = 30) -> dict:
@@ -35,18 +35,20 @@ def _stale_drafts(days: int = 30) -> dict:
 def _untyped_clauses() -> dict:
     """Image-texts whose data-dpt clauses have no `data-dpt-type` attribute.
 
-    We don't pre-compute this; instead we sample the most recent 200 image-texts
-    and run the parser server-side. Gives a "good enough" snapshot for the
-    dashboard without scanning the entire corpus.
+    We sample the most recent 200 image-texts and read their untyped-clause
+    counts from the persistent extraction cache, parsing only texts whose
+    content changed since it was last seen. Gives a "good enough" snapshot
+    for the dashboard without scanning the entire corpus.
     """
-    from apps.search.documents.dpt_parser import extract_clauses
+    from apps.search.extraction import content_hash, extractions_for
 
+    recent = list(ImageText.objects.exclude(content="").order_by("-modified").values_list("id", "content")[:200])
+    extractions = extractions_for(content for _, content in recent)
     flagged: list[dict] = []
-    for it in ImageText.objects.exclude(content="").order_by("-modified")[:200]:
-        clauses = extract_clauses(it.content)
-        without_type = [c for c in clauses if not c.get("type")]
-        if without_type:
-            flagged.append({"id": it.id, "count": len(without_type)})
+    for image_text_id, content in recent:
+        untyped = extractions[content_hash(content)].untyped_clause_count
+        if untyped:
+            flagged.append({"id": image_text_id, "count": untyped})
     return {
         "id": "untyped-clauses",
         "label": "Recent image-texts with untyped clauses",
@@ -78,18 +80,20 @@ def _hands_without_images() -> dict:
 
 
 def _orphan_text_graphs() -> dict:
-    """TEXT-typed Graphs sitting on images whose ImageTexts are all empty.
+    """TEXT-typed Graphs that no ImageText links to.
 
-    A TEXT graph is a region referenced from an ImageText.content span via
-    `data-graph-id`. If every text on its image is blank, nothing can refer
-    to it — that's a likely orphan.
+    A TEXT graph is a region referenced from an ImageText element via
+    `corresp`/`data-graph-id`, stored as a TextLink. One without any link
+    is a likely orphan.
     """
-    qs = Graph.objects.filter(annotation_type=Graph.AnnotationType.TEXT).exclude(
-        item_image__texts__content__regex=r".+"
+    qs = (
+        Graph.objects.filter(annotation_type=Graph.AnnotationType.TEXT)
+        .filter(~Exists(TextLink.objects.filter(graph_id=OuterRef("pk"))))
+        .order_by("pk")
     )
     return {
         "id": "orphan-text-graphs",
-        "label": "TEXT-typed graphs on images with no text content",
+        "label": "TEXT-typed graphs no text links to",
         "count": qs.count(),
         "sample": [{"id": r.id, "item_image": r.item_image_id} for r in qs[:10]],
     }
@@ -2,8 +2,8 @@
 
 Each :class:`IndexType` maps to exactly one :class:`IndexRegistration` holding
 *all* of its configuration — model, document builder, the Meilisearch attribute
-lists (filterable/sortable/facet/searchable), the ORM prefetch spec, and the
-optional one-to-many count extractor used by admin stats. Adding or changing an
+lists (filterable/sortable/facet/searchable), the ORM prefetch spec and batch
+preloaders, and the optional one-to-many count extractor used by admin stats. Adding or changing an
 index is a single-entry edit here; nothing about an index lives anywhere else.
 """
 
@@ -27,14 +27,25 @@ from apps.search.documents import (
     build_text_document,
     normalize_builder,
 )
-from apps.search.documents.dpt_parser import (
-    extract_clauses,
-    extract_people_detailed,
-    extract_places_detailed,
-)
+from apps.search.documents.utils import preload_annotation_coordinates
+from apps.search.extraction import preload_markup_extractions
+from apps.search.models import MarkupExtraction
 from apps.search.types import IndexType
 
 
+@dataclass(frozen=True)
+class IndexDependency:
+    """An upstream model whose rows are denormalised into an index's documents.
+
+    ``path`` is the ORM lookup from the index model to the upstream model, so
+    ``<index model>.filter(<path>__in=changed_pks)`` yields the source rows whose
+    documents a change to those upstream rows makes stale.
+    """
+
+    model_label: tuple[str, str]
+    path: str
+
+
 @dataclass(frozen=True)
 class IndexRegistration:
     """The complete configuration for one search index."""
@@ -48,6 +59,12 @@ class IndexRegistration:
     searchable_attributes: list[str]
     select_related: tuple[str, ...] = ()
     prefetch_related: tuple[str, ...] = ()
+    # Batch-level preloaders run over each fetched batch (a list of model
+    # instances) before the builder sees any of them, for data that
+    # ``select_related``/``prefetch_related`` can't express — e.g. the Graph
+    # regions referenced from ImageText markup rather than by foreign key.
+    # Each resolves the whole batch in one query and caches onto the instances.
+    preloaders: tuple[Callable[[list[Any]], None], ...] = ()
     # Filter kwargs applied to the index queryset. Used to keep the legacy
     # migration sentinel out of search: the DigiPal import created ItemPart
     # pk=-1 ("Created for all the nulls contained in public.digipal_image")
@@ -55,8 +72,30 @@ class IndexRegistration:
     # card whose links point at /manuscripts/-1.
     queryset_filter: dict[str, Any] | None = None
     # ImageText-derived indexes fan one row out to N documents; this returns the
-    # expected document count for a given `content` string (admin in-sync stats).
-    count_extractor: Callable[[str], int] | None = None
+    # expected document count from a row's cached ``MarkupExtraction`` (admin
+    # in-sync stats), so the check never re-parses unchanged content.
+    count_extractor: Callable[[MarkupExtraction], int] | None = None
+    # Document attribute holding the source row's primary key. One-to-one
+    # indexes use the document ``id`` itself; fan-out indexes stamp the
+    # ImageText pk on every fragment so an incremental sync can drop all of a
+    # row's previous documents with one filter before re-adding them.
+    source_attribute: str = "id"
+    # Upstream tables the builder reads through relations (repository name,
+    # dates, catalogue numbers, taxonomy names, …). Drives targeted reindexing
+    # when one of those rows changes — see ``affected_object_ids``.
+    dependencies: tuple[IndexDependency, ...] = ()
+
+    @property
+    def keyset_attributes(self) -> tuple[str, ...]:
+        """Numeric attributes that together identify one document, in sort order.
+
+        Deep pagination and exports seek on these with range filters. Fan-out
+        fragments have string ids, so they are keyed by their source row and
+        their ``fragment`` position within it instead.
+        """
+        if self.source_attribute == "id":
+            return ("id",)
+        return (self.source_attribute, "fragment")
 
     @property
     def url_segment(self) -> str:
@@ -64,12 +103,49 @@ class IndexRegistration:
         return self.index_type.value.replace("_", "-")
 
 
+def _dependencies_via(prefix: str, dependencies: tuple[IndexDependency, ...]) -> tuple[IndexDependency, ...]:
+    """Re-root *dependencies* declared on a related model under the lookup *prefix*."""
+    return tuple(IndexDependency(dep.model_label, f"{prefix}__{dep.path}") for dep in dependencies)
+
+
+# What an ItemPart's label/shelfmark/date/catalogue data is denormalised from.
+# Every index that shows manuscript metadata reaches these through its own
+# path to ItemPart.
+_ITEM_PART_METADATA_DEPENDENCIES = (
+    IndexDependency(("manuscripts", "CurrentItem"), "current_item"),
+    IndexDependency(("manuscripts", "Repository"), "current_item__repository"),
+    IndexDependency(("manuscripts", "HistoricalItem"), "historical_item"),
+    IndexDependency(("common", "Date"), "historical_item__date"),
+    IndexDependency(("manuscripts", "CatalogueNumber"), "historical_item__catalogue_numbers"),
+    IndexDependency(("manuscripts", "BibliographicSource"), "historical_item__catalogue_numbers__catalogue"),
+)
+
+# Component/feature/position names a graph document flattens.
+_GRAPH_DESCRIPTION_DEPENDENCIES = (
+    IndexDependency(("symbols_structure", "Component"), "components"),
+    IndexDependency(("annotations", "GraphComponent"), "graphcomponent"),
+    IndexDependency(("symbols_structure", "Feature"), "graphcomponent__features"),
+    IndexDependency(("symbols_structure", "Position"), "positions"),
+)
+
+# ImageText-derived indexes (texts/clauses/people/places) share one dependency
+# set. Linked Graph regions are referenced from the TEI body, not by FK; they
+# always sit on the text's own image, so ``item_image__graphs`` covers them.
+_TEXT_DERIVED_DEPENDENCIES = (
+    IndexDependency(("manuscripts", "ItemImage"), "item_image"),
+    IndexDependency(("manuscripts", "ItemPart"), "item_image__item_part"),
+    IndexDependency(("annotations", "Graph"), "item_image__graphs"),
+    *_dependencies_via("item_image__item_part", _ITEM_PART_METADATA_DEPENDENCIES),
+)
+
 # ImageText-derived indexes (texts/clauses/people/places) share one prefetch spec.
 _TEXT_DERIVED_SELECT_RELATED = (
     "item_image__item_part__current_item__repository",
     "item_image__item_part__historical_item__date",
 )
 _TEXT_DERIVED_PREFETCH = ("item_image__item_part__historical_item__catalogue_numbers__catalogue",)
+# Markup first: the coordinates preloader reads the parsed markup it caches.
+_TEXT_DERIVED_PRELOADERS = (preload_markup_extractions, preload_annotation_coordinates)
 
 
 INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
@@ -83,6 +159,12 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
             "historical_item__format",
         ),
         prefetch_related=("historical_item__catalogue_numbers__catalogue", "images"),
+        dependencies=(
+            *_ITEM_PART_METADATA_DEPENDENCIES,
+            IndexDependency(("manuscripts", "ItemFormat"), "historical_item__format"),
+            IndexDependency(("manuscripts", "ItemImage"), "images"),
+            IndexDependency(("manuscripts", "MsDescArea"), "msdesc_areas"),
+        ),
         queryset_filter={"pk__gte": 1},
         filterable_attributes=[
             "id",
@@ -141,8 +223,15 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
             "graphs__components",
             "graphs__graphcomponent_set__component",
             "graphs__graphcomponent_set__features",
+            "tags",
         ),
         queryset_filter={"item_part_id__gte": 1},
+        dependencies=(
+            IndexDependency(("manuscripts", "ItemPart"), "item_part"),
+            *_dependencies_via("item_part", _ITEM_PART_METADATA_DEPENDENCIES),
+            IndexDependency(("annotations", "Graph"), "graphs"),
+            *_dependencies_via("graphs", _GRAPH_DESCRIPTION_DEPENDENCIES),
+        ),
         filterable_attributes=[
             "id",
             "item_part",
@@ -192,6 +281,7 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
         index_type=IndexType.SCRIBES,
         model_label=("scribes", "Scribe"),
         builder=normalize_builder(build_scribe_document),
+        dependencies=(IndexDependency(("common", "Date"), "period"),),
         filterable_attributes=["id", "name", "period", "scriptorium"],
         sortable_attributes=["id", "name", "scriptorium"],
         default_facet_attributes=["scriptorium"],
@@ -207,6 +297,11 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
             "date",
         ),
         prefetch_related=("item_part__historical_item__catalogue_numbers__catalogue",),
+        dependencies=(
+            IndexDependency(("manuscripts", "ItemPart"), "item_part"),
+            *_dependencies_via("item_part", _ITEM_PART_METADATA_DEPENDENCIES),
+            IndexDependency(("common", "Date"), "date"),
+        ),
         filterable_attributes=[
             "id",
             "name",
@@ -246,6 +341,16 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
             "graphcomponent_set__component",
             "graphcomponent_set__features",
         ),
+        dependencies=(
+            IndexDependency(("manuscripts", "ItemImage"), "item_image"),
+            IndexDependency(("manuscripts", "ItemPart"), "item_image__item_part"),
+            *_dependencies_via("item_image__item_part", _ITEM_PART_METADATA_DEPENDENCIES),
+            IndexDependency(("symbols_structure", "Allograph"), "allograph"),
+            IndexDependency(("symbols_structure", "Character"), "allograph__character"),
+            IndexDependency(("scribes", "Hand"), "hand"),
+            IndexDependency(("scribes", "Scribe"), "hand__scribe"),
+            *_GRAPH_DESCRIPTION_DEPENDENCIES,
+        ),
         filterable_attributes=[
             "id",
             "image_iiif",
@@ -313,6 +418,8 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
         builder=normalize_builder(build_text_document),
         select_related=_TEXT_DERIVED_SELECT_RELATED,
         prefetch_related=_TEXT_DERIVED_PREFETCH,
+        preloaders=_TEXT_DERIVED_PRELOADERS,
+        dependencies=_TEXT_DERIVED_DEPENDENCIES,
         filterable_attributes=[
             "id",
             "repository_name",
@@ -367,11 +474,15 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
         index_type=IndexType.CLAUSES,
         model_label=("manuscripts", "ImageText"),
         builder=normalize_builder(build_clause_documents),
-        count_extractor=lambda content: len(extract_clauses(content)),
+        count_extractor=lambda extraction: extraction.clause_count,
+        source_attribute="image_text",
         select_related=_TEXT_DERIVED_SELECT_RELATED,
         prefetch_related=_TEXT_DERIVED_PREFETCH,
+        preloaders=_TEXT_DERIVED_PRELOADERS,
+        dependencies=_TEXT_DERIVED_DEPENDENCIES,
         filterable_attributes=[
             "id",
+            "image_text",
             "clause_type",
             "text_type",
             "repository_name",
@@ -410,11 +521,15 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
         index_type=IndexType.PEOPLE,
         model_label=("manuscripts", "ImageText"),
         builder=normalize_builder(build_person_documents),
-        count_extractor=lambda content: len(extract_people_detailed(content)),
+        count_extractor=lambda extraction: extraction.person_count,
+        source_attribute="image_text",
         select_related=_TEXT_DERIVED_SELECT_RELATED,
         prefetch_related=_TEXT_DERIVED_PREFETCH,
+        preloaders=_TEXT_DERIVED_PRELOADERS,
+        dependencies=_TEXT_DERIVED_DEPENDENCIES,
         filterable_attributes=[
             "id",
+            "image_text",
             "name",
             "person_type",
             "ref",
@@ -456,11 +571,15 @@ INDEX_REGISTRY: dict[IndexType, IndexRegistration] = {
         index_type=IndexType.PLACES,
         model_label=("manuscripts", "ImageText"),
         builder=normalize_builder(build_place_documents),
-        count_extractor=lambda content: len(extract_places_detailed(content)),
+        count_extractor=lambda extraction: extraction.place_count,
+        source_attribute="image_text",
         select_related=_TEXT_DERIVED_SELECT_RELATED,
         prefetch_related=_TEXT_DERIVED_PREFETCH,
+        preloaders=_TEXT_DERIVED_PRELOADERS,
+        dependencies=_TEXT_DERIVED_DEPENDENCIES,
         filterable_attributes=[
             "id",
+            "image_text",
             "name",
             "place_type",
             "ref",
@@ -517,6 +636,35 @@ def get_registration_by_segment(url_segment: str) -> IndexRegistration | None:
     return INDEX_REGISTRY[index_type]
 
 
+def indexed_model_labels() -> set[tuple[str, str]]:
+    """Every model whose changes can stale a document: index models and their dependencies."""
+    labels: set[tuple[str, str]] = set()
+    for registration in INDEX_REGISTRY.values():
+        labels.add(registration.model_label)
+        labels.update(dep.model_label for dep in registration.dependencies)
+    return labels
+
+
+def shared_source_groups() -> list[tuple[IndexType, ...]]:
+    """Partition ``IndexType`` into groups built from the identical source queryset.
+
+    Indexes in one group (the four ImageText-derived ones) can be rebuilt from a
+    single pass over their rows — see ``IndexingService.reindex_group``. Groups
+    keep ``IndexType`` order, positioned at their first member.
+    """
+    groups: dict[tuple, list[IndexType]] = {}
+    for index_type in IndexType:
+        registration = get_registration(index_type)
+        key = (
+            registration.model_label,
+            registration.select_related,
+            registration.prefetch_related,
+            tuple(sorted((registration.queryset_filter or {}).items())),
+        )
+        groups.setdefault(key, []).append(index_type)
+    return [tuple(group) for group in groups.values()]
+
+
 def get_queryset_for_index(index_type: IndexType) -> QuerySet[Any]:
     registration = get_registration(index_type)
     model = apps.get_model(*registration.model_label)
@@ -0,0 +1,278 @@
+"""Generation-keyed response cache for the public search endpoints.
+
+Search results only change when the writer touches an index: a rebuild
+swapping its build index in, or an incremental upsert/delete. Each index has
+a *generation* number in the shared ``locks`` cache that those writes bump
+(``bump_generation``). Cached responses are keyed by the normalised request
+plus the generations of every index it read, so once an index changes its
+old entries can no longer be looked up. They are never flushed; the LRU
+eviction drops them as newer entries arrive.
+
+Responses live in a per-process LRU bounded by entry count and by pickled
+size (``SEARCH_RESULT_CACHE_MAX_ENTRIES`` / ``SEARCH_RESULT_CACHE_MAX_BYTES``).
+Storing pickles also means a caller mutating a returned result can't corrupt
+the cached copy. When the generation store is unreachable the cache is
+bypassed, because it could no longer tell stale entries from fresh ones.
+Hit/miss counters are flushed into the shared cache in small batches, so the
+management stats add up across web workers.
+"""
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import asdict, replace
+from functools import cache
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.search.filter_ast import filter_spec_to_node, sort_key
+from apps.search.types import FilterSpec, IndexType, SearchQuery
+
+logger = logging.getLogger(__name__)
+
+# Flush local hit/miss counts to the shared counters after this many lookups.
+COUNTER_FLUSH_EVERY = 50
+# Safety net for entries cached while generation bumps were failing.
+ENTRY_MAX_AGE_SECONDS = 60 * 60
+
+
+def _generation_key(index_type: IndexType) -> str:
+    return f"search:generation:{index_type.value}"
+
+
+def _counter_key(name: str) -> str:
+    return f"search:result_cache:{name}"
+
+
+def _fresh_generation() -> int:
+    # Seeded from the clock rather than 0, so a generation that was lost (a
+    # flushed Redis) never restarts at a number old entries were stored under.
+    return time.time_ns() // 1000
+
+
+def bump_generation(index_type: IndexType) -> None:
+    """Make every cached response that read *index_type* unreachable."""
+    store = caches["locks"]
+    key = _generation_key(index_type)
+    try:
+        try:
+            store.incr(key)
+        except ValueError:
+            if not store.add(key, _fresh_generation(), timeout=None):
+                store.incr(key)
+    except Exception:
+        logger.warning("Failed to bump the search result generation for %s.", index_type.value, exc_info=True)
+
+
+def current_generations(index_types: Iterable[IndexType]) -> tuple[int, ...] | None:
+    """Generations of *index_types* in order, or ``None`` when the store is unreachable."""
+    store = caches["locks"]
+    keys = [_generation_key(index_type) for index_type in index_types]
+    try:
+        found = store.get_many(keys)
+        for key in keys:
+            if key not in found:
+                store.add(key, _fresh_generation(), timeout=None)
+                found[key] = store.get(key)
+    except Exception:
+        logger.warning("Search result generations unavailable; bypassing the result cache.", exc_info=True)
+        return None
+    if any(found[key] is None for key in keys):
+        return None
+    return tuple(int(found[key]) for key in keys)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_canonical(item) for item in value]
+    if isinstance(value, list):
+        # Every list in a SearchQuery is a set in disguise (OR'ed filter
+        # values, attribute names), so its order must not split the cache.
+        return sorted((_canonical(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    return value
+
+
+def normalise_query(query: SearchQuery) -> dict[str, Any]:
+    """Canonical, JSON-serialisable form of *query* used in cache keys.
+
+    The filter criteria (structured params and the decoded qb tree alike)
+    are keyed by their canonical filter tree, so equivalent filters written
+    in another order or split across params share an entry.
+    """
+    spec = query.filter_spec
+    data = _canonical(asdict(replace(query, filter_spec=FilterSpec())))
+    node = filter_spec_to_node(spec)
+    data["filter_spec"] = {
+        "filter": sort_key(node) if node is not None else None,
+        "contains": _canonical(spec.contains),
+        "starts_with": _canonical(spec.starts_with),
+    }
+    data["q"] = " ".join(query.q.split())
+    return data
+
+
+class SearchResultCache:
+    """Bounded, thread-safe LRU of pickled search responses."""
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0}
+        self._unflushed = {"hits": 0, "misses": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get_or_compute(self, scope: Any, index_types: Iterable[IndexType], compute: Callable[[], Any]) -> Any:
+        """Return the cached response for *scope*, computing and storing it on a miss.
+
+        *scope* is any JSON-serialisable description of the request (method,
+        index, normalised query, …); *index_types* are the indexes the
+        response reads, whose generations become part of the key.
+        """
+        if not self.enabled:
+            return compute()
+        index_types = list(index_types)
+        generations = current_generations(index_types)
+        if generations is None:
+            return compute()
+        key = self._key(scope, index_types, generations)
+        now = time.monotonic()
+        blob = self._lookup(key, now)
+        if blob is not None:
+            self._count("hits")
+            return pickle.loads(blob)
+
+        self._count("misses")
+        value = compute()
+        self._store(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now)
+        return value
+
+    async def aget_or_compute(
+        self, scope: Any, index_types: Iterable[IndexType], compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """``get_or_compute`` for the async views.
+
+        *compute* is awaited; the generation reads and counter flushes, which
+        hit the shared cache, run in a worker thread.
+        """
+        if not self.enabled:
+            return await compute()
+        index_types = list(index_types)
+        generations = await sync_to_async(current_generations, thread_sensitive=False)(index_types)
+        if generations is None:
+            return await compute()
+        key = self._key(scope, index_types, generations)
+        now = time.monotonic()
+        blob = self._lookup(key, now)
+        if blob is not None:
+            await sync_to_async(self._count, thread_sensitive=False)("hits")
+            return pickle.loads(blob)
+
+        await sync_to_async(self._count, thread_sensitive=False)("misses")
+        value = await compute()
+        self._store(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now)
+        return value
+
+    @staticmethod
+    def _key(scope: Any, index_types: list[IndexType], generations: tuple[int, ...]) -> str:
+        return hashlib.sha256(
+            json.dumps([scope, [t.value for t in index_types], generations], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _lookup(self, key: str, now: float) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[1] >= ENTRY_MAX_AGE_SECONDS:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key: str, blob: bytes, now: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (blob, now)
+            self._bytes += len(blob)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+            self._unflushed[name] += 1
+            flush = sum(self._unflushed.values()) >= COUNTER_FLUSH_EVERY
+        if flush:
+            self._flush_counts()
+
+    def _flush_counts(self) -> None:
+        with self._lock:
+            pending, self._unflushed = self._unflushed, {"hits": 0, "misses": 0}
+        store = caches["locks"]
+        try:
+            for name, amount in pending.items():
+                if not amount:
+                    continue
+                key = _counter_key(name)
+                if not store.add(key, amount, timeout=None):
+                    store.incr(key, amount)
+        except Exception:
+            logger.debug("Search result cache counters unavailable; keeping them local.", exc_info=True)
+            with self._lock:
+                for name, amount in pending.items():
+                    self._unflushed[name] += amount
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters (shared across processes when possible) and this process's size."""
+        self._flush_counts()
+        with self._lock:
+            counts = dict(self._counts)
+            entries, size = len(self._entries), self._bytes
+        try:
+            shared = caches["locks"].get_many([_counter_key(name) for name in counts])
+        except Exception:
+            shared = None
+        if shared is not None:
+            counts = {name: int(shared.get(_counter_key(name), 0)) for name in counts}
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+            "shared_counters": shared is not None,
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+@cache
+def get_result_cache() -> SearchResultCache:
+    """The process-wide result cache, sized from settings."""
+    return SearchResultCache(
+        max_entries=settings.SEARCH_RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.SEARCH_RESULT_CACHE_MAX_BYTES,
+    )
@@ -0,0 +1,217 @@
+"""Coalescing scheduler for full index rebuilds.
+
+A rebuild request names one index, or a group of indexes sharing a source
+queryset, an action and a priority. Each index has at most one *queued*
+rebuild: a marker in the ``locks`` cache holding the id and action of the
+task that will run it. A request for an index that already has one
+coalesces into that task instead of enqueueing another, so a burst of
+requests costs one rebuild — unless it asks for a stronger action
+(``ACTION_STRENGTH``: a ``clean_and_reindex`` covers a ``reindex``, not the
+other way round), in which case it takes the index over.
+
+A rebuild task releases its markers when it starts (``begin_rebuild``), so
+requests arriving while it runs claim a fresh marker and collapse into
+exactly one follow-up run. A run that finds the index's reindex lock still
+held re-requests itself through the same path rather than failing.
+
+Interactive requests (an operator rebuilding one index) go out at once at
+``INTERACTIVE`` priority; bulk ``reindex_all`` work goes out
+``SEARCH_REINDEX_DEBOUNCE_SECONDS`` out at ``BULK``. Celery holds a message
+with a countdown back until it is due, whatever its priority, so only
+messages without one are ordered by priority. An interactive request that
+finds a bulk rebuild queued takes the index over; the bulk task skips the
+index when it starts.
+
+Like the reindex lock, the scheduler is best-effort: if the ``locks``
+backend is unavailable every request dispatches its own run.
+"""
+
+from dataclasses import asdict, dataclass
+import logging
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.search.services import REINDEX_LOCK_TIMEOUT_SECONDS
+from apps.search.types import IndexType
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# Celery message priorities; the Redis broker serves 0 first.
+CELERY_PRIORITIES = {INTERACTIVE: 0, BULK: 9}
+# A queued rebuild is taken over by a request for a stronger action.
+ACTION_STRENGTH = {"reindex": 0, "clean_and_reindex": 1}
+# A run that found the reindex lock held asks again after at least this long.
+RETRY_SECONDS = 10
+# Counters reported by ``scheduler_stats``.
+COUNTERS = ("coalesced", "superseded", "deferred")
+
+
+@dataclass(frozen=True)
+class QueuedRebuild:
+    """The rebuild queued for one index."""
+
+    task_id: str
+    priority: str
+    queued_at: float
+    action: str = "reindex"
+
+
+@dataclass(frozen=True)
+class RebuildClaim:
+    """Outcome of ``claim_rebuild``.
+
+    *claimed* are the indexes the new task now owns; *coalesced* maps every
+    other requested index to the id of the queued task it was folded into.
+    """
+
+    claimed: list[IndexType]
+    coalesced: dict[IndexType, str]
+
+
+def _queued_key(index_type: IndexType) -> str:
+    return f"search:reindex-queued:{index_type.uid}"
+
+
+def _superseded_key(task_id: str, index_type: IndexType) -> str:
+    return f"search:reindex-superseded:{task_id}:{index_type.uid}"
+
+
+def _counter_key(counter: str, index_type: IndexType) -> str:
+    return f"search:reindex-{counter}:{index_type.uid}"
+
+
+def _queued_timeout() -> int:
+    # A queued run can wait out the debounce and then a full rebuild ahead of
+    # it; past that the marker expires on its own if its worker died.
+    return REINDEX_LOCK_TIMEOUT_SECONDS + debounce_seconds()
+
+
+def debounce_seconds() -> int:
+    """Countdown of a newly queued bulk rebuild."""
+    return max(int(settings.SEARCH_REINDEX_DEBOUNCE_SECONDS), 0)
+
+
+def dispatch_countdown(priority: str) -> int | None:
+    """Countdown of a newly queued rebuild at *priority*; interactive ones go out at once."""
+    return None if priority == INTERACTIVE else debounce_seconds()
+
+
+def _takes_over(queued: QueuedRebuild, *, action: str, priority: str) -> bool:
+    if ACTION_STRENGTH[action] != ACTION_STRENGTH.get(queued.action, 0):
+        return ACTION_STRENGTH[action] > ACTION_STRENGTH.get(queued.action, 0)
+    return priority == INTERACTIVE and queued.priority == BULK
+
+
+def _load(value: Any) -> QueuedRebuild | None:
+    return QueuedRebuild(**value) if isinstance(value, dict) else None
+
+
+def _count(counter: str, index_type: IndexType) -> None:
+    cache = caches["locks"]
+    key = _counter_key(counter, index_type)
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def claim_rebuild(
+    index_types: list[IndexType], *, priority: str, task_id: str, action: str = "reindex"
+) -> RebuildClaim:
+    """Queue *task_id* as the next rebuild of each of *index_types* that has none.
+
+    An index whose queued rebuild is a weaker action, or the same action as
+    bulk work when this request is interactive, is taken over; every other
+    index with a queued rebuild coalesces into it.
+    """
+    marker = asdict(QueuedRebuild(task_id=task_id, priority=priority, queued_at=time.time(), action=action))
+    claimed: list[IndexType] = []
+    coalesced: dict[IndexType, str] = {}
+    try:
+        cache = caches["locks"]
+        for index_type in index_types:
+            key = _queued_key(index_type)
+            if cache.add(key, marker, _queued_timeout()):
+                claimed.append(index_type)
+                continue
+            queued = _load(cache.get(key))
+            if queued is None or _takes_over(queued, action=action, priority=priority):
+                cache.set(key, marker, _queued_timeout())
+                if queued is not None:
+                    cache.set(_superseded_key(queued.task_id, index_type), True, _queued_timeout())
+                    _count("superseded", index_type)
+                claimed.append(index_type)
+            else:
+                coalesced[index_type] = queued.task_id
+                _count("coalesced", index_type)
+    except Exception as exc:  # lock backend down — degrade to one run per request
+        logger.warning("Reindex scheduler backend unavailable (%s); dispatching without coalescing.", exc)
+        return RebuildClaim(claimed=list(index_types), coalesced={})
+    return RebuildClaim(claimed=claimed, coalesced=coalesced)
+
+
+def begin_rebuild(index_types: list[IndexType], task_id: str | None) -> list[IndexType]:
+    """Release the queued markers of *task_id*; returns the indexes it should rebuild.
+
+    Indexes taken over by another request since *task_id* was queued are
+    left out. A task run without an id (called directly rather than
+    through the broker) was never queued and owns all of *index_types*.
+    """
+    if task_id is None:
+        return list(index_types)
+    owned: list[IndexType] = []
+    try:
+        cache = caches["locks"]
+        for index_type in index_types:
+            if cache.get(_superseded_key(task_id, index_type)):
+                cache.delete(_superseded_key(task_id, index_type))
+                continue
+            key = _queued_key(index_type)
+            queued = _load(cache.get(key))
+            if queued is not None and queued.task_id == task_id:
+                cache.delete(key)
+            owned.append(index_type)
+    except Exception:
+        logger.warning("Failed to release queued reindex markers of task %s.", task_id)
+        return list(index_types)
+    return owned
+
+
+def record_deferred(index_types: list[IndexType]) -> None:
+    """Count a run of *index_types* that found the reindex lock held."""
+    try:
+        for index_type in index_types:
+            _count("deferred", index_type)
+    except Exception:
+        logger.warning("Failed to count a deferred reindex.")
+
+
+def retry_countdown() -> int:
+    """Seconds a deferred run waits before it asks for the lock again, whatever its priority."""
+    return max(debounce_seconds(), RETRY_SECONDS)
+
+
+def scheduler_stats() -> dict[str, Any]:
+    """Queue depth, the queued rebuild of each index and the per-index counters."""
+    keys = {_queued_key(index_type): index_type for index_type in IndexType}
+    counter_keys = {
+        _counter_key(counter, index_type): (counter, index_type) for counter in COUNTERS for index_type in IndexType
+    }
+    try:
+        values = caches["locks"].get_many([*keys, *counter_keys])
+    except Exception:
+        logger.warning("Reindex scheduler backend unavailable; no scheduler stats.")
+        return {"available": False, "depth": 0, "queued": {}, **{counter: {} for counter in COUNTERS}}
+    queued: dict[str, dict[str, Any]] = {}
+    for key, index_type in keys.items():
+        rebuild = _load(values.get(key))
+        if rebuild is not None:
+            queued[index_type.to_url_segment()] = asdict(rebuild)
+    counters: dict[str, dict[str, int]] = {counter: {} for counter in COUNTERS}
+    for key, (counter, index_type) in counter_keys.items():
+        if values.get(key):
+            counters[counter][index_type.to_url_segment()] = int(values[key])
+    return {"available": True, "depth": len(queued), "queued": queued, **counters}
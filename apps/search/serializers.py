@@ -10,6 +10,9 @@ class SearchResultSerializer(serializers.Serializer):
     total = serializers.IntegerField()
     limit = serializers.IntegerField()
     offset = serializers.IntegerField()
+    # Only present under cursor pagination (`?pagination=cursor` / `?cursor=`).
+    next_cursor = serializers.CharField(allow_null=True, required=False)
+    previous_cursor = serializers.CharField(allow_null=True, required=False)
 
 
 class FacetResultSerializer(serializers.Serializer):
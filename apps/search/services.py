@@ -1,18 +1,55 @@
 """Search and indexing services (Meilisearch)."""
 
-from contextlib import contextmanager
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import replace
 from itertools import islice
 import logging
+from typing import Any
+from uuid import uuid4
 
+from asgiref.sync import sync_to_async
+from django.apps import apps
 from django.core.cache import caches
 from django.db import close_old_connections
 
-from apps.search.contracts import SearchBackend, SearchDocument
-from apps.search.meilisearch.reader import HIGHLIGHT_PRE_TAG, MeilisearchIndexReader
+from apps.search.contracts import AsyncSearchBackend, SearchBackend, SearchDocument
+from apps.search.cursors import page_cursors
+from apps.search.facet_snapshots import (
+    LandingSnapshotStore,
+    capture_landing_snapshot,
+    get_landing_snapshots,
+    is_landing_query,
+)
+from apps.search.ingest import BuildIngestPipeline
+from apps.search.meilisearch.reader import HIGHLIGHT_PRE_TAG, AsyncMeilisearchIndexReader, MeilisearchIndexReader
 from apps.search.meilisearch.writer import MeilisearchIndexWriter
+from apps.search.models import PendingIndexUpdate
 from apps.search.progress import NoopReporter, ProgressReporter
-from apps.search.registry import get_queryset_for_index, get_registration
-from apps.search.types import FacetResult, IndexType, SearchQuery, SearchResult
+from apps.search.registry import (
+    INDEX_REGISTRY,
+    IndexRegistration,
+    get_queryset_for_index,
+    get_registration,
+    shared_source_groups,
+)
+from apps.search.result_cache import SearchResultCache, normalise_query
+from apps.search.suggestions import (
+    LABEL_ATTRIBUTES,
+    PrefixDictionary,
+    SuggestionCollector,
+    SuggestionStore,
+    get_suggestion_store,
+    store_suggestions,
+)
+from apps.search.sync_state import (
+    IndexTally,
+    current_state,
+    record_cleared,
+    record_indexed,
+    record_rebuilt,
+)
+from apps.search.types import FacetResult, IndexType, SearchQuery, SearchResult, SortSpec
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +64,40 @@ class ReindexInProgressError(RuntimeError):
     """Raised when a reindex for the same index is already running."""
 
 
+def _reindex_lock_key(index_type: IndexType) -> str:
+    return f"search:reindex:{index_type.uid}"
+
+
+def acquire_reindex_lock(index_type: IndexType, token: str) -> None:
+    """Take the reindex lock for *index_type* on behalf of *token*.
+
+    Split out of ``reindex_lock`` for sharded rebuilds, where the lock is taken
+    by the dispatching task and released by the chord callback (or its error
+    handler) in another process. Raises ``ReindexInProgressError`` when held;
+    degrades to a no-op when the ``locks`` backend is unavailable.
+    """
+    try:
+        acquired = caches["locks"].add(_reindex_lock_key(index_type), token, REINDEX_LOCK_TIMEOUT_SECONDS)
+    except Exception as exc:  # lock backend down — degrade, don't block reindex
+        logger.warning("Reindex lock backend unavailable (%s); proceeding without lock for %s.", exc, index_type.uid)
+        return
+    if not acquired:
+        raise ReindexInProgressError(f"A reindex for '{index_type.uid}' is already running.")
+
+
+def release_reindex_lock(index_type: IndexType, token: str) -> None:
+    """Release the reindex lock if *token* still holds it."""
+    key = _reindex_lock_key(index_type)
+    try:
+        cache = caches["locks"]
+        # Only the holder may release: a late error handler from an earlier
+        # sharded run must not free the lock of the run that followed it.
+        if cache.get(key) == token:
+            cache.delete(key)
+    except Exception:
+        logger.warning("Failed to release reindex lock for %s.", index_type.uid)
+
+
 @contextmanager
 def reindex_lock(index_type: IndexType):
     """Cross-process single-flight lock for one index's atomic rebuild.
@@ -39,25 +110,97 @@ def reindex_lock(index_type: IndexType):
     host tests without Redis) the lock degrades to a no-op rather than blocking
     indexing — protection is best-effort, never a hard dependency.
     """
-    key = f"search:reindex:{index_type.uid}"
-    try:
-        cache = caches["locks"]
-        acquired = cache.add(key, "1", REINDEX_LOCK_TIMEOUT_SECONDS)
-    except Exception as exc:  # lock backend down — degrade, don't block reindex
-        logger.warning("Reindex lock backend unavailable (%s); proceeding without lock for %s.", exc, index_type.uid)
-        yield
-        return
-    if not acquired:
-        raise ReindexInProgressError(f"A reindex for '{index_type.uid}' is already running.")
+    token = uuid4().hex
+    acquire_reindex_lock(index_type, token)
     try:
         yield
     finally:
-        try:
-            cache.delete(key)
-        except Exception:
-            logger.warning("Failed to release reindex lock for %s.", index_type.uid)
+        release_reindex_lock(index_type, token)
 
 
+def _reindex_progress_key(index_type: IndexType) -> str:
+    return f"search:reindex-progress:{index_type.uid}"
+
+
+def record_pending_updates(index_type: IndexType, object_ids: Iterable[int]) -> None:
+    """Mark source rows of *index_type* as needing an incremental sync."""
+    PendingIndexUpdate.objects.bulk_create(
+        [PendingIndexUpdate(index_type=index_type.value, object_id=object_id) for object_id in object_ids]
+    )
+
+
+def affected_object_ids(model_label: tuple[str, str], object_ids: Iterable[int]) -> dict[IndexType, set[int]]:
+    """Map changed rows of *model_label* to the index source rows whose documents they feed.
+
+    Rows of an index's own model map to themselves. For upstream rows each
+    declared ``IndexDependency`` path becomes one ``pk IN (SELECT … JOIN …)``
+    query on the index model, so a repository rename costs one query per
+    dependent index rather than a full rebuild. Indexes sharing a model and
+    path (the four ImageText-derived ones) share the query.
+    """
+    ids = sorted({object_id for object_id in object_ids if object_id is not None})
+    affected: dict[IndexType, set[int]] = {}
+    if not ids:
+        return affected
+
+    resolved: dict[tuple[tuple[str, str], str], set[int]] = {}
+    for registration in INDEX_REGISTRY.values():
+        matched: set[int] = set()
+        if registration.model_label == model_label:
+            matched.update(ids)
+        for dependency in registration.dependencies:
+            if dependency.model_label != model_label:
+                continue
+            key = (registration.model_label, dependency.path)
+            if key not in resolved:
+                model = apps.get_model(*registration.model_label)
+                resolved[key] = set(
+                    model._base_manager.filter(**{f"{dependency.path}__in": ids})
+                    .order_by()
+                    .values_list("pk", flat=True)
+                    .distinct()
+                )
+            matched |= resolved[key]
+        if matched:
+            affected[registration.index_type] = matched
+    return affected
+
+
+def preload_batch(registrations: Iterable[IndexRegistration], objs: list) -> None:
+    """Run the batch preloaders of *registrations* over *objs*, each preloader once."""
+    seen: set[Callable[[list[Any]], None]] = set()
+    for registration in registrations:
+        for preload in registration.preloaders:
+            if preload not in seen:
+                seen.add(preload)
+                preload(objs)
+
+
+def build_batch_documents(
+    registration: IndexRegistration, objs: list, *, preload: bool = True, tally: IndexTally | None = None
+) -> list[SearchDocument]:
+    """Build the documents of one fetched batch of source rows.
+
+    Runs the registration's batch preloaders over the whole batch first, so
+    lookups the ORM prefetch can't cover cost one query per batch rather
+    than one per row, then applies the per-row builder. Pass
+    ``preload=False`` when ``preload_batch`` already ran for these objects,
+    and a *tally* to count the rows into the index's sync state.
+    """
+    if preload:
+        preload_batch([registration], objs)
+    documents: list[SearchDocument] = []
+    for obj in objs:
+        built = registration.builder(obj)
+        documents.extend(built)
+        if tally is not None:
+            tally.add_row(obj, len(built))
+    return documents
+
+
+# Hits per keyset page when walking a full result set for export.
+EXPORT_PAGE_SIZE = 1000
+
 # Words of context to keep around a match when building autocomplete KWIC
 # snippets from a text-bearing index's `content` field.
 SUGGEST_SNIPPET_CROP_LENGTH = 24
@@ -77,30 +220,146 @@ def index_type_segments() -> list[str]:
     return [index_type.to_url_segment() for index_type in IndexType]
 
 
+def _with_cursors(index_type: IndexType, query: SearchQuery, result: SearchResult) -> SearchResult:
+    """Stamp next/previous cursor tokens on a cursor-paginated *result*."""
+    if query.cursor is None:
+        return result
+    next_cursor, previous_cursor = page_cursors(index_type, query, result)
+    return replace(result, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+
 class SearchService:
     """Meilisearch search operations."""
 
-    def __init__(self, reader: SearchBackend | None = None):
+    def __init__(
+        self,
+        reader: SearchBackend | None = None,
+        cache: SearchResultCache | None = None,
+        suggestions: SuggestionStore | None = None,
+        snapshots: LandingSnapshotStore | None = None,
+    ):
         self._reader = reader or MeilisearchIndexReader()
+        self._cache = cache
+        self._suggestions = suggestions or get_suggestion_store()
+        self._snapshots = snapshots or get_landing_snapshots()
+
+    def _cached(self, scope: Any, index_types: list[IndexType], compute: Callable[[], Any]) -> Any:
+        if self._cache is None:
+            return compute()
+        return self._cache.get_or_compute(scope, index_types, compute)
 
     def search(self, index_type: IndexType, query: SearchQuery) -> SearchResult:
-        result, _ = self._reader.search(index_type, query, facet_attributes=None)
-        return result
+        def compute() -> SearchResult:
+            result, _ = self._reader.search(index_type, query, facet_attributes=None)
+            return _with_cursors(index_type, query, result)
+
+        return self._cached(("search", normalise_query(query)), [index_type], compute)
 
     def get_document(self, index_type: IndexType, doc_id: int | str) -> dict | None:
         return self._reader.get_document_by_id(index_type, doc_id)
 
+    def search_with_facets(
+        self,
+        index_type: IndexType,
+        query: SearchQuery,
+        facet_attributes: list[str],
+    ) -> tuple[SearchResult, FacetResult]:
+        """Hits plus ``facetDistribution``/``facetStats`` from one Meilisearch request.
+
+        Pass a query with ``limit=0`` to refresh facet counts (and the total)
+        without computing or transferring any hits. Landing queries (no ``q``,
+        no filters, first page) are answered from the index's facet snapshot
+        while it is current.
+        """
+        if is_landing_query(query):
+            snapshot = self._snapshots.get(index_type)
+            answer = snapshot.answer(query, facet_attributes) if snapshot is not None else None
+            if answer is not None:
+                result, facets = answer
+                return _with_cursors(index_type, query, result), facets
+
+        def compute() -> tuple[SearchResult, FacetResult]:
+            result, facets = self._reader.search(index_type, query, facet_attributes=facet_attributes)
+            if facets is None:
+                facets = FacetResult(facet_distribution={}, facet_stats={})
+            return _with_cursors(index_type, query, result), facets
+
+        scope = ("search_with_facets", normalise_query(query), sorted(facet_attributes))
+        return self._cached(scope, [index_type], compute)
+
     def get_facets(
         self,
         index_type: IndexType,
         query: SearchQuery,
         facet_attributes: list[str],
     ) -> FacetResult:
-        _, facets = self._reader.search(index_type, query, facet_attributes=facet_attributes)
-        if facets is None:
-            return FacetResult(facet_distribution={}, facet_stats={})
+        """Facet counts only: runs *query* with ``limit=0`` so no hits are fetched."""
+        _, facets = self.search_with_facets(
+            index_type, replace(query, limit=0, offset=0, cursor=None), facet_attributes
+        )
         return facets
 
+    def iter_export_pages(
+        self, index_type: IndexType, query: SearchQuery, *, page_size: int = EXPORT_PAGE_SIZE
+    ) -> Iterator[SearchResult]:
+        """Walk every hit of *query* with keyset pagination, one page at a time.
+
+        Pages are sorted by the index's ``source_attribute`` (the document
+        ``id``, or the ImageText pk on fan-out indexes) and each next page
+        starts after the last key seen, so deep pages cost the same as the
+        first and the walk isn't bounded by ``maxTotalHits``. On fan-out
+        indexes a page never splits one source row's fragments: trailing
+        fragments of a row cut off by the page limit are fetched again with
+        the next page. The query's own sort and offset are ignored.
+        """
+        key = get_registration(index_type).source_attribute
+        user_lower, upper = query.filter_spec.range_.get(key, (None, None))
+        lower = user_lower
+        retrieve = query.attributes_to_retrieve
+        if retrieve and key not in retrieve:
+            retrieve = [*retrieve, key]
+
+        def fetch(lo, hi, *, limit: int, offset: int = 0) -> SearchResult:
+            spec = replace(query.filter_spec, range_={**query.filter_spec.range_, key: (lo, hi)})
+            page_query = replace(
+                query,
+                filter_spec=spec,
+                sort_spec=SortSpec(attribute=key),
+                limit=limit,
+                offset=offset,
+                attributes_to_retrieve=retrieve,
+                cursor=None,
+            )
+            result, _ = self._reader.search(index_type, page_query, facet_attributes=None)
+            return result
+
+        while True:
+            page = fetch(lower, upper, limit=page_size)
+            if len(page.hits) < page_size:
+                if page.hits:
+                    yield page
+                return
+            last = page.hits[-1][key]
+            if key == "id":
+                yield page
+                lower = last + 1
+                continue
+            complete = [hit for hit in page.hits if hit[key] != last]
+            if complete:
+                yield replace(page, hits=complete)
+                lower = last
+                continue
+            # One source row fans out to more than a page: page through it alone.
+            offset = 0
+            while True:
+                group = fetch(last, last, limit=page_size, offset=offset)
+                if group.hits:
+                    yield group
+                if len(group.hits) < page_size:
+                    break
+                offset += page_size
+            lower = last + 1
+
     def suggest(
         self,
         index_types: list[IndexType],
@@ -108,78 +367,213 @@ class SearchService:
         *,
         per_type_limit: int = 5,
     ) -> dict[str, list[dict[str, str | int | float]]]:
-        suggestions: dict[str, list[dict[str, str | int | float]]] = {}
         normalized_q = query_text.strip()
         if not normalized_q:
-            return suggestions
-
-        # Build one query per index and run them in a single federated
-        # round-trip (POST /multi-search) instead of N sequential searches.
-        specs: list[tuple[IndexType, SearchQuery]] = []
-        for index_type in index_types:
-            # Text-bearing indexes (texts/clauses) hold the transcription in a
-            # `content` field. For those, crop+highlight `content` so the
-            # suggestion can show a KWIC line — the passage where the term occurs.
-            has_content = "content" in get_registration(index_type).searchable_attributes
-            attributes_to_retrieve = ["id", "display_label", "shelfmark", "name", "allograph", "locus"]
-            if has_content:
-                attributes_to_retrieve.append("content")
-            specs.append(
-                (
-                    index_type,
-                    SearchQuery(
-                        q=normalized_q,
-                        limit=per_type_limit,
-                        offset=0,
-                        attributes_to_retrieve=attributes_to_retrieve,
-                        attributes_to_crop=["content"] if has_content else [],
-                        crop_length=SUGGEST_SNIPPET_CROP_LENGTH if has_content else None,
-                    ),
-                )
+            return {}
+        dictionaries = self._suggestions.current(index_types)
+        # Dictionary versions are part of the key: a rebuild stores its
+        # dictionary after the swap has already bumped the index generation.
+        versions = [dictionaries[t].version if t in dictionaries else 0 for t in index_types]
+        scope = ("suggest", " ".join(normalized_q.split()), per_type_limit, versions)
+        return self._cached(
+            scope, list(index_types), lambda: self._suggest(index_types, normalized_q, per_type_limit, dictionaries)
+        )
+
+    def _suggest(
+        self,
+        index_types: list[IndexType],
+        normalized_q: str,
+        per_type_limit: int,
+        dictionaries: dict[IndexType, PrefixDictionary],
+    ) -> dict[str, list[dict[str, str | int | float]]]:
+        specs = _suggest_specs(index_types, normalized_q, per_type_limit, dictionaries)
+        results = dict(self._reader.multi_search(specs)) if specs else {}
+        return _merge_suggestions(index_types, normalized_q, per_type_limit, dictionaries, results)
+
+
+def _suggest_specs(
+    index_types: list[IndexType],
+    normalized_q: str,
+    per_type_limit: int,
+    dictionaries: dict[IndexType, PrefixDictionary],
+) -> list[tuple[IndexType, SearchQuery]]:
+    """The Meilisearch queries behind a suggest request.
+
+    Labels and terms come from the precomputed dictionaries. Meilisearch is
+    asked only for KWIC snippets of the text-bearing indexes, plus full
+    label queries for any index whose dictionary isn't built yet, all in one
+    federated round-trip (POST /multi-search).
+    """
+    specs: list[tuple[IndexType, SearchQuery]] = []
+    for index_type in index_types:
+        # Text-bearing indexes (texts/clauses) hold the transcription in a
+        # `content` field. For those, crop+highlight `content` so the
+        # suggestion can show a KWIC line — the passage where the term occurs.
+        has_content = "content" in get_registration(index_type).searchable_attributes
+        kwic_only = index_type in dictionaries
+        if kwic_only and not has_content:
+            continue
+        attributes_to_retrieve = ["id", *LABEL_ATTRIBUTES]
+        if has_content:
+            attributes_to_retrieve.append("content")
+        specs.append(
+            (
+                index_type,
+                SearchQuery(
+                    q=normalized_q,
+                    limit=per_type_limit,
+                    offset=0,
+                    attributes_to_search_on=["content"] if kwic_only else [],
+                    attributes_to_retrieve=attributes_to_retrieve,
+                    attributes_to_crop=["content"] if has_content else [],
+                    crop_length=SUGGEST_SNIPPET_CROP_LENGTH if has_content else None,
+                ),
             )
+        )
+    return specs
 
-        for index_type, result in self._reader.multi_search(specs):
-            has_content = "content" in get_registration(index_type).searchable_attributes
-            items: list[dict[str, str | int | float]] = []
-            seen_labels: set[str] = set()
-            for hit in result.hits:
-                if not isinstance(hit, dict):
-                    continue
-                raw_label = (
-                    hit.get("display_label")
-                    or hit.get("shelfmark")
-                    or hit.get("name")
-                    or hit.get("allograph")
-                    or hit.get("locus")
-                )
-                label = str(raw_label or "").strip()
-                if not label or label in seen_labels:
+
+def _merge_suggestions(
+    index_types: list[IndexType],
+    normalized_q: str,
+    per_type_limit: int,
+    dictionaries: dict[IndexType, PrefixDictionary],
+    results: dict[IndexType, SearchResult],
+) -> dict[str, list[dict[str, str | int | float]]]:
+    """Suggestions per index: Meilisearch hits of ``_suggest_specs`` first, then dictionary entries."""
+    suggestions: dict[str, list[dict[str, str | int | float]]] = {}
+    for index_type in index_types:
+        has_content = "content" in get_registration(index_type).searchable_attributes
+        items: list[dict[str, str | int | float]] = []
+        seen_labels: set[str] = set()
+        result = results.get(index_type)
+        for hit in result.hits if result is not None else []:
+            if not isinstance(hit, dict):
+                continue
+            raw_label = next((hit.get(attribute) for attribute in LABEL_ATTRIBUTES if hit.get(attribute)), None)
+            label = str(raw_label or "").strip()
+            if not label or label in seen_labels:
+                continue
+            item: dict[str, str | int | float] = {
+                "id": str(hit.get("id", label)),
+                "label": label,
+            }
+            # Only attach a snippet when the term actually matched inside the
+            # text (the cropped value carries highlight markers) — otherwise
+            # a label-only match would show an arbitrary opening line.
+            if has_content:
+                formatted = hit.get("_formatted")
+                snippet = formatted.get("content") if isinstance(formatted, dict) else None
+                if isinstance(snippet, str) and HIGHLIGHT_START_TOKEN in snippet:
+                    item["snippet"] = snippet
+            if index_type in dictionaries and "snippet" not in item:
+                continue
+            seen_labels.add(label)
+            items.append(item)
+            if len(items) >= per_type_limit:
+                break
+        dictionary = dictionaries.get(index_type)
+        if dictionary is not None and len(items) < per_type_limit:
+            for entry in dictionary.lookup(normalized_q, per_type_limit + len(items)):
+                if entry["label"] in seen_labels:
                     continue
-                seen_labels.add(label)
-                item: dict[str, str | int | float] = {
-                    "id": str(hit.get("id", label)),
-                    "label": label,
-                }
-                # Only attach a snippet when the term actually matched inside the
-                # text (the cropped value carries highlight markers) — otherwise
-                # a label-only match would show an arbitrary opening line.
-                if has_content:
-                    formatted = hit.get("_formatted")
-                    snippet = formatted.get("content") if isinstance(formatted, dict) else None
-                    if isinstance(snippet, str) and HIGHLIGHT_START_TOKEN in snippet:
-                        item["snippet"] = snippet
-                items.append(item)
+                seen_labels.add(entry["label"])
+                items.append(entry)
                 if len(items) >= per_type_limit:
                     break
-            suggestions[index_type.to_url_segment()] = items
-        return suggestions
+        suggestions[index_type.to_url_segment()] = items
+    return suggestions
+
+
+class AsyncSearchService:
+    """``SearchService``'s request paths as coroutines, for the async search views.
+
+    Meilisearch is awaited through an ``AsyncSearchBackend``, so a worker
+    holds many searches in flight on one event loop. The result cache,
+    facet snapshots and suggestion dictionaries are the same process-wide
+    objects the sync service uses. Their shared-cache and database reads run
+    in worker threads.
+    """
+
+    def __init__(
+        self,
+        reader: AsyncSearchBackend | None = None,
+        cache: SearchResultCache | None = None,
+        suggestions: SuggestionStore | None = None,
+        snapshots: LandingSnapshotStore | None = None,
+    ):
+        self._reader = reader or AsyncMeilisearchIndexReader()
+        self._cache = cache
+        self._suggestions = suggestions or get_suggestion_store()
+        self._snapshots = snapshots or get_landing_snapshots()
+
+    async def _cached(self, scope: Any, index_types: list[IndexType], compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self._cache is None:
+            return await compute()
+        return await self._cache.aget_or_compute(scope, index_types, compute)
+
+    async def search(self, index_type: IndexType, query: SearchQuery) -> SearchResult:
+        async def compute() -> SearchResult:
+            result, _ = await self._reader.search(index_type, query, facet_attributes=None)
+            return _with_cursors(index_type, query, result)
+
+        return await self._cached(("search", normalise_query(query)), [index_type], compute)
+
+    async def get_document(self, index_type: IndexType, doc_id: int | str) -> dict | None:
+        return await self._reader.get_document_by_id(index_type, doc_id)
+
+    async def search_with_facets(
+        self,
+        index_type: IndexType,
+        query: SearchQuery,
+        facet_attributes: list[str],
+    ) -> tuple[SearchResult, FacetResult]:
+        """As ``SearchService.search_with_facets``; the cache key is shared with it."""
+        if is_landing_query(query):
+            snapshot = await sync_to_async(self._snapshots.get)(index_type)
+            answer = snapshot.answer(query, facet_attributes) if snapshot is not None else None
+            if answer is not None:
+                result, facets = answer
+                return _with_cursors(index_type, query, result), facets
+
+        async def compute() -> tuple[SearchResult, FacetResult]:
+            result, facets = await self._reader.search(index_type, query, facet_attributes=facet_attributes)
+            if facets is None:
+                facets = FacetResult(facet_distribution={}, facet_stats={})
+            return _with_cursors(index_type, query, result), facets
+
+        scope = ("search_with_facets", normalise_query(query), sorted(facet_attributes))
+        return await self._cached(scope, [index_type], compute)
+
+    async def suggest(
+        self,
+        index_types: list[IndexType],
+        query_text: str,
+        *,
+        per_type_limit: int = 5,
+    ) -> dict[str, list[dict[str, str | int | float]]]:
+        """As ``SearchService.suggest``; the cache key is shared with it."""
+        normalized_q = query_text.strip()
+        if not normalized_q:
+            return {}
+        dictionaries = await sync_to_async(self._suggestions.current)(index_types)
+        versions = [dictionaries[t].version if t in dictionaries else 0 for t in index_types]
+        scope = ("suggest", " ".join(normalized_q.split()), per_type_limit, versions)
+
+        async def compute() -> dict[str, list[dict[str, str | int | float]]]:
+            specs = _suggest_specs(index_types, normalized_q, per_type_limit, dictionaries)
+            results = dict(await self._reader.multi_search(specs)) if specs else {}
+            return _merge_suggestions(index_types, normalized_q, per_type_limit, dictionaries, results)
+
+        return await self._cached(scope, list(index_types), compute)
 
 
 class IndexingService:
     """Meilisearch indexing operations."""
 
-    def __init__(self, writer: MeilisearchIndexWriter | None = None):
+    def __init__(self, writer: MeilisearchIndexWriter | None = None, reader: SearchBackend | None = None):
         self._writer = writer or MeilisearchIndexWriter()
+        self._reader = reader or MeilisearchIndexReader()
 
     REINDEX_BATCH_SIZE = 500
 
@@ -194,13 +588,13 @@ class IndexingService:
         Builds documents into a staging index (`<uid>__build`), then swaps it with the
         live index in one Meilisearch operation. If reindex crashes mid-stream, the live
         index keeps serving stale-but-consistent data — never a half-empty index. The
-        next reindex drops the orphaned build index and starts fresh (P1.3).
+        next reindex drops the orphaned build index and starts fresh (P1.3). Settings
+        are applied to the empty build index only; the swap takes them live.
 
         Reports per-batch progress via `reporter.report_batch(done, total)`. Defaults
         to a no-op reporter when callers don't care about progress.
         """
         reporter = reporter or NoopReporter()
-        builder = get_registration(index_type).builder
 
         qs = get_queryset_for_index(index_type)
         total = qs.count()
@@ -208,31 +602,353 @@ class IndexingService:
         # Single-flight: serialize the build→swap so concurrent runs can't
         # clobber each other's shared `__build` staging index.
         with reindex_lock(index_type):
-            self._writer.ensure_index_and_settings(index_type)
+            self._writer.ensure_index(index_type)
             self._writer.prepare_build_index(index_type)
 
             processed = 0
+            tally = IndexTally()
+            suggestions = SuggestionCollector()
+
+            def on_batch(size: int) -> None:
+                nonlocal processed
+                processed += size
+                reporter.report_batch(processed, total)
+
+            self._write_to_build(index_type, qs, on_batch, tally, suggestions)
+
+            self._writer.swap_with_build(index_type)
+            record_rebuilt(index_type, tally)
+            store_suggestions(index_type, suggestions)
+            capture_landing_snapshot(index_type, self._reader)
+            self._writer.drop_build_index(index_type)
+
+        return processed
+
+    def reindex_group(
+        self,
+        index_types: list[IndexType],
+        *,
+        reporter: ProgressReporter | None = None,
+    ) -> int:
+        """Atomically rebuild several indexes that share one source queryset.
+
+        Streams the rows once, runs the batch preloaders once, and lets every
+        index's builder read the same instances — the text-derived builders
+        parse each ImageText's markup once between them (``extract_markup``)
+        instead of once per index. Each index gets its own build index and
+        ingest pipeline; all of them are swapped live in one Meilisearch swap,
+        only after every pipeline has been fully ingested. Returns the number
+        of source rows processed.
+        """
+        reporter = reporter or NoopReporter()
+        registrations = [get_registration(index_type) for index_type in index_types]
+        if len({registration.model_label for registration in registrations}) != 1:
+            raise ValueError("reindex_group needs indexes built from the same model.")
+
+        qs = get_queryset_for_index(index_types[0])
+        total = qs.count()
+
+        with ExitStack() as locks:
+            for index_type in index_types:
+                locks.enter_context(reindex_lock(index_type))
+            for index_type in index_types:
+                self._writer.ensure_index(index_type)
+                self._writer.prepare_build_index(index_type)
+
+            processed = 0
+            tallies = {index_type: IndexTally() for index_type in index_types}
+            collectors = {index_type: SuggestionCollector() for index_type in index_types}
             it = qs.iterator(chunk_size=self.REINDEX_BATCH_SIZE)
+            with ExitStack() as pipelines:
+                ingest = [
+                    (registration, pipelines.enter_context(BuildIngestPipeline(self._writer, registration.index_type)))
+                    for registration in registrations
+                ]
+                while True:
+                    batch = list(islice(it, self.REINDEX_BATCH_SIZE))
+                    if not batch:
+                        break
+                    close_old_connections()
+                    preload_batch(registrations, batch)
+                    for registration, pipeline in ingest:
+                        tally = tallies[registration.index_type]
+                        documents = build_batch_documents(registration, batch, preload=False, tally=tally)
+                        collectors[registration.index_type].add_documents(documents)
+                        pipeline.add(documents)
+                    processed += len(batch)
+                    reporter.report_batch(processed, total)
+
+            self._writer.swap_many_with_build(index_types)
+            for index_type in index_types:
+                record_rebuilt(index_type, tallies[index_type])
+                store_suggestions(index_type, collectors[index_type])
+                capture_landing_snapshot(index_type, self._reader)
+                self._writer.drop_build_index(index_type)
+
+        return processed
+
+    def _write_to_build(
+        self,
+        index_type: IndexType,
+        qs,
+        on_batch: Callable[[int], None],
+        tally: IndexTally | None = None,
+        suggestions: SuggestionCollector | None = None,
+    ) -> int:
+        """Stream *qs* through the index builder into the build index.
+
+        Rows are fetched and built here while a ``BuildIngestPipeline`` writer
+        thread uploads the previous payloads; returns only once Meilisearch
+        has applied every one of them. Built rows are counted into *tally*
+        and their labels and terms into *suggestions*.
+        """
+        registration = get_registration(index_type)
+        written = 0
+        it = qs.iterator(chunk_size=self.REINDEX_BATCH_SIZE)
+        with BuildIngestPipeline(self._writer, index_type) as pipeline:
             while True:
                 batch = list(islice(it, self.REINDEX_BATCH_SIZE))
                 if not batch:
                     break
                 close_old_connections()
-                documents: list[SearchDocument] = []
-                for obj in batch:
-                    documents.extend(builder(obj))
-                self._writer.add_documents_to_build(index_type, documents)
-                processed += len(batch)
-                reporter.report_batch(processed, total)
+                documents = build_batch_documents(registration, batch, tally=tally)
+                if suggestions is not None:
+                    suggestions.add_documents(documents)
+                pipeline.add(documents)
+                written += len(batch)
+                on_batch(len(batch))
+        return written
+
+    def load_prebuilt(
+        self,
+        index_type: IndexType,
+        payloads: Iterable[bytes],
+        *,
+        tally: IndexTally,
+        suggestions: SuggestionCollector,
+    ) -> int:
+        """Atomically replace the live index with prebuilt, gzip-compressed NDJSON payloads.
 
+        The artifact counterpart of ``reindex`` (see ``apps.search.artifacts``):
+        no rows are read or built. Each payload is posted to the build index as
+        it is, and the build index is swapped live once Meilisearch has applied
+        all of them. *tally* and *suggestions*, recorded when the artifact was
+        built, become the index's sync state and autocomplete dictionary.
+        Returns the number of payloads posted.
+        """
+        with reindex_lock(index_type):
+            self._writer.ensure_index(index_type)
+            self._writer.prepare_build_index(index_type)
+            task_uids = [self._writer.add_compressed_ndjson_to_build(index_type, payload) for payload in payloads]
+            self._writer.wait_for_tasks(task_uids)
             self._writer.swap_with_build(index_type)
+            record_rebuilt(index_type, tally)
+            store_suggestions(index_type, suggestions)
+            capture_landing_snapshot(index_type, self._reader)
             self._writer.drop_build_index(index_type)
+        return len(task_uids)
 
-        return processed
+    def plan_shards(self, index_type: IndexType, shards: int) -> tuple[int, list[tuple[int | None, int | None]]]:
+        """Split the index queryset into up to *shards* contiguous primary-key ranges.
+
+        Returns ``(total_rows, [(lower, upper), ...])`` where each range is
+        ``lower <= pk < upper`` and ``None`` leaves that end open, so rows
+        created while the plan is being made still land in the first or last
+        shard. Shards never hold less than one build batch.
+        """
+        qs = get_queryset_for_index(index_type)
+        total = qs.count()
+        shards = max(1, min(shards, -(-total // self.REINDEX_BATCH_SIZE)))
+        pks = qs.order_by("pk").values_list("pk", flat=True)
+        boundaries = [pks[total * position // shards] for position in range(1, shards)]
+        lowers: list[int | None] = [None, *boundaries]
+        uppers: list[int | None] = [*boundaries, None]
+        return total, list(zip(lowers, uppers, strict=True))
+
+    def begin_sharded_reindex(
+        self, index_type: IndexType, shards: int, *, token: str
+    ) -> tuple[int, list[tuple[int | None, int | None]]]:
+        """Take the reindex lock, prepare the build index and plan the shards.
+
+        The lock stays held (under *token*) after this returns; the caller hands
+        it to ``finish_sharded_reindex`` or ``abort_sharded_reindex``.
+        """
+        acquire_reindex_lock(index_type, token)
+        try:
+            self._writer.ensure_index(index_type)
+            self._writer.prepare_build_index(index_type)
+            total, ranges = self.plan_shards(index_type, shards)
+            self._reset_shard_progress(index_type)
+        except Exception:
+            release_reindex_lock(index_type, token)
+            raise
+        return total, ranges
+
+    def build_shard(
+        self,
+        index_type: IndexType,
+        lower: int | None,
+        upper: int | None,
+        *,
+        total: int,
+        reporter: ProgressReporter | None = None,
+        tally: IndexTally | None = None,
+        suggestions: SuggestionCollector | None = None,
+    ) -> int:
+        """Build the rows with ``lower <= pk < upper`` into the shared build index.
+
+        Progress is reported as the sum over all shards of the same run (a
+        counter in the ``locks`` cache), so any shard's report reads as the
+        progress of the whole rebuild. Returns the number of rows written;
+        the shard's documents and checksum are counted into *tally*, its
+        labels and terms into *suggestions*.
+        """
+        reporter = reporter or NoopReporter()
+        qs = get_queryset_for_index(index_type)
+        if lower is not None:
+            qs = qs.filter(pk__gte=lower)
+        if upper is not None:
+            qs = qs.filter(pk__lt=upper)
+
+        processed = 0
+
+        def on_batch(size: int) -> None:
+            nonlocal processed
+            processed += size
+            reporter.report_batch(self._advance_shard_progress(index_type, size, fallback=processed), total)
+
+        return self._write_to_build(index_type, qs.order_by("pk"), on_batch, tally, suggestions)
+
+    def finish_sharded_reindex(
+        self,
+        index_type: IndexType,
+        *,
+        token: str,
+        tally: IndexTally | None = None,
+        suggestions: SuggestionCollector | None = None,
+    ) -> None:
+        """Swap the fully built index live and release the run's lock.
+
+        *tally* is the merged tally of every shard, recorded as the index's
+        sync state once the swap is done; *suggestions* the merged collector
+        stored as its autocomplete dictionary.
+        """
+        try:
+            self._writer.swap_with_build(index_type)
+            if tally is not None:
+                record_rebuilt(index_type, tally)
+            if suggestions is not None:
+                store_suggestions(index_type, suggestions)
+            capture_landing_snapshot(index_type, self._reader)
+            self._writer.drop_build_index(index_type)
+        finally:
+            self._clear_shard_progress(index_type)
+            release_reindex_lock(index_type, token)
+
+    def abort_sharded_reindex(self, index_type: IndexType, *, token: str) -> None:
+        """Discard a failed sharded run: drop the partial build, keep the live index."""
+        try:
+            self._writer.drop_build_index(index_type)
+        except Exception:
+            logger.exception("Failed to drop build index for %s after a failed sharded reindex.", index_type.uid)
+        finally:
+            self._clear_shard_progress(index_type)
+            release_reindex_lock(index_type, token)
+
+    def _reset_shard_progress(self, index_type: IndexType) -> None:
+        try:
+            caches["locks"].set(_reindex_progress_key(index_type), 0, REINDEX_LOCK_TIMEOUT_SECONDS)
+        except Exception:
+            logger.warning("Shard progress backend unavailable; %s will report per-shard progress.", index_type.uid)
+
+    def _advance_shard_progress(self, index_type: IndexType, size: int, *, fallback: int) -> int:
+        try:
+            return int(caches["locks"].incr(_reindex_progress_key(index_type), size))
+        except Exception:
+            return fallback
+
+    def _clear_shard_progress(self, index_type: IndexType) -> None:
+        try:
+            caches["locks"].delete(_reindex_progress_key(index_type))
+        except Exception:
+            logger.warning("Failed to clear shard progress for %s.", index_type.uid)
+
+    def sync_documents(self, index_type: IndexType, object_ids: Iterable[int]) -> tuple[int, int]:
+        """Bring the live documents of *object_ids* in line with the DB, in place.
+
+        Rows still in the index queryset are rebuilt and upserted; rows that
+        were deleted (or fell out of the queryset filter) have their documents
+        removed. Fan-out indexes first drop every document of the affected rows
+        by ``source_attribute`` so a row that lost fragments leaves none behind.
+        Returns ``(upserted_rows, deleted_rows)``.
+        """
+        registration = get_registration(index_type)
+        ids = sorted(set(object_ids))
+        if not ids:
+            return 0, 0
+
+        objs = list(get_queryset_for_index(index_type).filter(pk__in=ids))
+        found = {obj.pk for obj in objs}
+        documents = build_batch_documents(registration, objs)
+        missing = [object_id for object_id in ids if object_id not in found]
+
+        if registration.source_attribute == "id":
+            self._writer.delete_documents(index_type, list(missing))
+        else:
+            id_list = ", ".join(str(object_id) for object_id in ids)
+            self._writer.delete_documents_by_filter(index_type, f"{registration.source_attribute} IN [{id_list}]")
+        self._writer.upsert_documents(index_type, documents)
+        return len(found), len(missing)
+
+    def sync_pending(self, index_type: IndexType) -> dict[str, int]:
+        """Drain the recorded ``PendingIndexUpdate`` rows for *index_type*.
+
+        Runs under ``reindex_lock`` so an incremental write can't land in the
+        live index while a full rebuild is about to swap it away; callers retry
+        on ``ReindexInProgressError``. Entries are deleted only after their
+        documents are applied, so a failed sync leaves them for the next run.
+
+        Once the queue is drained, the index's expected document count and
+        checksum (``apps.search.sync_state``) are recorded as its indexed
+        pair. The expected pair is read *before* the queue is found empty:
+        every write that changes it records its pending row in the same
+        transaction, so an empty queue after that read means the live index
+        reflects it. A sync that changed documents re-captures the index's
+        landing facet snapshot.
+        """
+        upserted = deleted = 0
+        with reindex_lock(index_type):
+            # Refreshing the expected pair costs an aggregate query, so it's
+            # re-read only when the queue looks drained.
+            refresh = True
+            while True:
+                if refresh:
+                    state = current_state(index_type)
+                pending = list(
+                    PendingIndexUpdate.objects.filter(index_type=index_type.value)
+                    .order_by("id")
+                    .values_list("id", "object_id")[: self.REINDEX_BATCH_SIZE]
+                )
+                if not pending:
+                    if refresh:
+                        record_indexed(index_type, state)
+                        break
+                    refresh = True
+                    continue
+                batch_upserted, batch_deleted = self.sync_documents(index_type, [object_id for _, object_id in pending])
+                PendingIndexUpdate.objects.filter(id__in=[entry_id for entry_id, _ in pending]).delete()
+                upserted += batch_upserted
+                deleted += batch_deleted
+                refresh = len(pending) < self.REINDEX_BATCH_SIZE
+        if upserted or deleted:
+            capture_landing_snapshot(index_type, self._reader)
+        return {"upserted": upserted, "deleted": deleted}
 
     def clear(self, index_type: IndexType) -> None:
         """Delete all documents in the index."""
         self._writer.delete_all(index_type)
+        record_cleared(index_type)
+        store_suggestions(index_type, SuggestionCollector())
 
     def setup_index(self, index_type: IndexType) -> None:
         """Ensure index and Meilisearch settings exist."""
@@ -277,17 +993,38 @@ class SearchOrchestrationService:
 
     def reindex_all(self) -> dict[str, int]:
         indexed_per_segment: dict[str, int] = {}
-        for index_type in IndexType:
-            segment = index_type.to_url_segment()
+        for group in shared_source_groups():
+            segments = [index_type.to_url_segment() for index_type in group]
             # Isolate failures: one index erroring (or already locked) must not
             # abort the rest of the batch. Failed segments are logged and
             # omitted from the result rather than aborting the whole run.
             try:
-                indexed_per_segment[segment] = self._indexing_service.reindex(index_type)
+                indexed_per_segment.update(self._reindex_group(group))
             except Exception:
-                logger.exception("Reindex failed for %s; continuing with remaining indexes.", segment)
+                logger.exception("Reindex failed for %s; continuing with remaining indexes.", ", ".join(segments))
         return indexed_per_segment
 
+    def _reindex_group(
+        self,
+        group: tuple[IndexType, ...],
+        *,
+        reporter: ProgressReporter | None = None,
+    ) -> dict[str, int]:
+        """Rebuild *group* — one pass over the shared rows when it has several members."""
+        if len(group) == 1:
+            return {group[0].to_url_segment(): self._indexing_service.reindex(group[0], reporter=reporter)}
+        count = self._indexing_service.reindex_group(list(group), reporter=reporter)
+        return {index_type.to_url_segment(): count for index_type in group}
+
+    def reindex_group(
+        self,
+        index_type_segments: list[str],
+        *,
+        reporter: ProgressReporter | None = None,
+    ) -> dict[str, int]:
+        group = tuple(resolve_index_type_segment(segment) for segment in index_type_segments)
+        return self._reindex_group(group, reporter=reporter)
+
     def setup_all_indexes(self) -> list[str]:
         segments: list[str] = []
         for index_type in IndexType:
@@ -302,16 +1039,18 @@ class SearchOrchestrationService:
     ) -> dict[str, int]:
         reporter = reporter or NoopReporter()
         indexed_per_segment: dict[str, int] = {}
-        total_indexes = len(IndexType)
-        for index_position, index_type in enumerate(IndexType, start=1):
-            segment = index_type.to_url_segment()
+        groups = shared_source_groups()
+        total_indexes = len(groups)
+        for index_position, group in enumerate(groups, start=1):
+            segment = ", ".join(index_type.to_url_segment() for index_type in group)
             # Tell the reporter where we are in the outer loop; the reporter
             # decorates subsequent `report_batch` calls with this context.
+            # Indexes rebuilt from one shared pass count as one step.
             reporter.advance_to(index_position, total_indexes, segment)
             # No pre-clear (atomic swap handles replacement) and per-index error
             # isolation so one failure doesn't abort the remaining indexes.
             try:
-                indexed_per_segment[segment] = self._indexing_service.reindex(index_type, reporter=reporter)
+                indexed_per_segment.update(self._reindex_group(group, reporter=reporter))
             except Exception:
                 logger.exception("Reindex failed for %s; continuing with remaining indexes.", segment)
         return indexed_per_segment
@@ -1,37 +1,233 @@
-"""Index propagation for msDesc areas (TEI-descriptions roadmap 7.1).
-
-The platform has no automatic index sync — reindexing is admin/CLI-only, and
-the admin "in sync" check is count-based, so a `MsDescArea` content edit would
-be invisible to it. These receivers make item-parts reindexing an INVARIANT of
-MsDescArea mutation: any create/update/delete enqueues a full item-parts
-rebuild once the surrounding transaction commits. Cheap at corpus size (~713
-docs, atomic staging-index swap); the existing `reindex_lock` serialises
-concurrent runs — a colliding run no-ops and self-heals on the next save.
-
-The receivers live in `apps.search` (not `apps.manuscripts`) because the
-architecture boundary allows search → manuscripts but not the reverse; wiring
-happens in `SearchConfig.ready()`, mirroring how the audit handlers are
-attached in `apps.manuscripts.apps`.
+"""Change-driven incremental search indexing.
+
+Every model that feeds ``INDEX_REGISTRY`` — each index's own model plus the
+upstream tables declared as ``IndexDependency`` paths (repositories, dates,
+catalogue numbers, taxonomy names, msDesc areas, …) — gets receivers that
+resolve the change to the affected index source rows via
+``affected_object_ids``, record them as ``PendingIndexUpdate`` rows and, once
+the surrounding transaction commits, schedule one debounced
+``sync_pending_search_documents`` run per index. That task upserts or deletes
+only the affected documents in the live index; the atomic build-and-swap
+``reindex`` stays the tool for schema/settings changes and disaster recovery.
+
+Changed rows are resolved on ``pre_save`` (old relations) as well as
+``post_save`` (new ones), and on ``pre_delete`` while the joins still exist.
+Many-to-many edits on relations a builder reads (graph positions, component
+features, image tags) are covered through ``m2m_changed``.
+
+Recording is skipped entirely when ``SEARCH_AUTO_REINDEX`` is off. Independently
+of that, ImageText saves fill the persistent markup extraction cache
+(``apps.search.extraction``) once the transaction commits, and ImageText
+saves and deletes adjust the text-derived indexes' expected document counts
+and checksums (``apps.search.sync_state``) in the writing transaction, and
+writes of the other index models adjust theirs the same way. The
+receivers live in `apps.search` (not the owning apps) because the architecture
+boundary allows search → manuscripts but not the reverse; wiring happens in
+`SearchConfig.ready()`, mirroring how the audit handlers are attached in
+`apps.manuscripts.apps`.
 """
 
+from collections.abc import Iterable
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.db import transaction
-from django.db.models.signals import post_delete, post_save
-from django.dispatch import receiver
+from django.db.models import ManyToManyField, Model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 
-from apps.manuscripts.models import MsDescArea
-from apps.search.tasks import reindex_search_index
+from apps.search.extraction import extractions_for
+from apps.search.registry import INDEX_REGISTRY, indexed_model_labels
+from apps.search.services import affected_object_ids, record_pending_updates
+from apps.search.sync_state import (
+    apply_image_text_change,
+    apply_row_change,
+    forget_image_text_states,
+    forget_states,
+    row_memberships,
+    tracks_image_text,
+)
+from apps.search.tasks import schedule_pending_sync
 from apps.search.types import IndexType
 
+logger = logging.getLogger(__name__)
+
+
+def mark_pending(index_type: IndexType, object_ids: Iterable[int]) -> None:
+    """Record *object_ids* as stale in *index_type* and schedule a sync on commit."""
+    if not settings.SEARCH_AUTO_REINDEX:
+        return
+    object_ids = [object_id for object_id in object_ids if object_id is not None]
+    if not object_ids:
+        return
+    record_pending_updates(index_type, object_ids)
+    transaction.on_commit(lambda: schedule_pending_sync(index_type))
+
+
+def mark_changed(model: type[Model], object_ids: Iterable[int]) -> None:
+    """Mark every index document fed by the given rows of *model* as pending."""
+    if not settings.SEARCH_AUTO_REINDEX:
+        return
+    label = (model._meta.app_label, model._meta.object_name)
+    for index_type, ids in affected_object_ids(label, object_ids).items():
+        mark_pending(index_type, sorted(ids))
+
+
+def _denormalised_m2m_fields() -> set[ManyToManyField]:
+    """Forward M2M fields reached by some dependency or prefetch path."""
+    fields: set[ManyToManyField] = set()
+    for registration in INDEX_REGISTRY.values():
+        paths = [dep.path for dep in registration.dependencies] + list(registration.prefetch_related)
+        for path in paths:
+            model = apps.get_model(*registration.model_label)
+            for segment in path.split("__"):
+                try:
+                    field = model._meta.get_field(segment)
+                except FieldDoesNotExist:
+                    break
+                if isinstance(field, ManyToManyField) and field.remote_field.through._meta.auto_created:
+                    fields.add(field)
+                if field.related_model is None:
+                    break
+                model = field.related_model
+    return fields
+
+
+def _on_pre_save(sender: type[Model], instance: Model, **kwargs) -> None:
+    # Resolve against the stored row so documents the instance is being moved
+    # away from (e.g. a graph reassigned to another image) are refreshed too.
+    if instance._state.adding or instance.pk is None or kwargs.get("raw"):
+        return
+    mark_changed(sender, [instance.pk])
+
+
+def _on_post_save(sender: type[Model], instance: Model, **kwargs) -> None:
+    mark_changed(sender, [instance.pk])
+
+
+def _on_pre_delete(sender: type[Model], instance: Model, **kwargs) -> None:
+    mark_changed(sender, [instance.pk])
+
+
+def _on_m2m_changed(sender, instance: Model, action: str, reverse: bool, model: type[Model], pk_set, **kwargs) -> None:
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # e.g. ``position.graphs.add(graph)`` — the owning rows are in pk_set.
+        mark_changed(model, pk_set or [])
+    else:
+        mark_changed(type(instance), [instance.pk])
+
+
+for _label in sorted(indexed_model_labels()):
+    _model = apps.get_model(*_label)
+    _uid = _model._meta.label_lower
+    # Every model, index models included: a Graph, ItemImage or ItemPart is
+    # also upstream of other indexes and can be moved to another parent.
+    pre_save.connect(_on_pre_save, sender=_model, dispatch_uid=f"search_pending:{_uid}:pre_save")
+    post_save.connect(_on_post_save, sender=_model, dispatch_uid=f"search_pending:{_uid}:save")
+    pre_delete.connect(_on_pre_delete, sender=_model, dispatch_uid=f"search_pending:{_uid}:delete")
+
+for _field in _denormalised_m2m_fields():
+    m2m_changed.connect(
+        _on_m2m_changed,
+        sender=_field.remote_field.through,
+        dispatch_uid=f"search_pending:{_field.model._meta.label_lower}.{_field.name}:m2m",
+    )
+
+
+def _on_image_text_saved(sender: type[Model], instance: Model, **kwargs) -> None:
+    # Parse at write time so dashboards and the next sync read the cached
+    # extraction; robust, because a parse failure must never fail a save.
+    content = instance.content
+    if kwargs.get("raw") or not content:
+        return
+    transaction.on_commit(lambda: extractions_for([content]), robust=True)
+
+
+post_save.connect(
+    _on_image_text_saved,
+    sender=apps.get_model("manuscripts", "ImageText"),
+    dispatch_uid="search_markup_extraction:imagetext",
+)
+
+
+_STORED_CONTENT_ATTR = "_search_stored_content"
+
+
+def _on_image_text_pre_save(sender: type[Model], instance: Model, **kwargs) -> None:
+    stored = None
+    if not instance._state.adding and instance.pk is not None:
+        stored = sender._default_manager.filter(pk=instance.pk).values_list("content", flat=True).first()
+    setattr(instance, _STORED_CONTENT_ATTR, stored)
+
+
+def _adjust_sync_state(pk: int, old_content: str | None, new_content: str | None) -> None:
+    try:
+        apply_image_text_change(pk, old_content, new_content)
+    except Exception:
+        # Never fail the write over bookkeeping: drop the state rows instead,
+        # so the dashboard recomputes them from scratch on its next read.
+        logger.exception("Failed to adjust search sync state for ImageText %s.", pk)
+        forget_image_text_states()
+
+
+def _on_image_text_post_save(sender: type[Model], instance: Model, **kwargs) -> None:
+    old_content = getattr(instance, _STORED_CONTENT_ATTR, None)
+    _adjust_sync_state(instance.pk, old_content, instance.content)
+    setattr(instance, _STORED_CONTENT_ATTR, instance.content)
+
+
+def _on_image_text_post_delete(sender: type[Model], instance: Model, **kwargs) -> None:
+    _adjust_sync_state(instance.pk, instance.content, None)
+
+
+_image_text = apps.get_model("manuscripts", "ImageText")
+pre_save.connect(_on_image_text_pre_save, sender=_image_text, dispatch_uid="search_sync_state:imagetext:pre_save")
+post_save.connect(_on_image_text_post_save, sender=_image_text, dispatch_uid="search_sync_state:imagetext:save")
+post_delete.connect(_on_image_text_post_delete, sender=_image_text, dispatch_uid="search_sync_state:imagetext:delete")
+
+
+_STORED_MEMBERSHIPS_ATTR = "_search_stored_memberships"
+
+
+def _on_index_row_pre_write(sender: type[Model], instance: Model, **kwargs) -> None:
+    stored = {}
+    if not instance._state.adding and instance.pk is not None:
+        stored = row_memberships((sender._meta.app_label, sender._meta.object_name), instance.pk)
+    setattr(instance, _STORED_MEMBERSHIPS_ATTR, stored)
+
+
+def _adjust_row_state(sender: type[Model], pk: int, before: dict, after: dict) -> None:
+    try:
+        apply_row_change(pk, before, after)
+    except Exception:
+        # As for ImageText: drop the state rows rather than fail the write.
+        logger.exception("Failed to adjust search sync state for %s %s.", sender._meta.label, pk)
+        forget_states([*before, *after])
+
 
-def _enqueue_item_parts_reindex() -> None:
-    reindex_search_index.delay(IndexType.ITEM_PARTS.to_url_segment())
+def _on_index_row_post_save(sender: type[Model], instance: Model, **kwargs) -> None:
+    after = row_memberships((sender._meta.app_label, sender._meta.object_name), instance.pk)
+    _adjust_row_state(sender, instance.pk, getattr(instance, _STORED_MEMBERSHIPS_ATTR, {}), after)
+    setattr(instance, _STORED_MEMBERSHIPS_ATTR, after)
 
 
-@receiver(post_save, sender=MsDescArea, dispatch_uid="msdescarea_reindex_item_parts:save")
-def reindex_item_parts_on_msdesc_area_save(sender, instance: MsDescArea, **kwargs) -> None:
-    transaction.on_commit(_enqueue_item_parts_reindex)
+def _on_index_row_post_delete(sender: type[Model], instance: Model, **kwargs) -> None:
+    _adjust_row_state(sender, instance.pk, getattr(instance, _STORED_MEMBERSHIPS_ATTR, {}), {})
 
 
-@receiver(post_delete, sender=MsDescArea, dispatch_uid="msdescarea_reindex_item_parts:delete")
-def reindex_item_parts_on_msdesc_area_delete(sender, instance: MsDescArea, **kwargs) -> None:
-    transaction.on_commit(_enqueue_item_parts_reindex)
+for _label in sorted(
+    {
+        registration.model_label
+        for registration in INDEX_REGISTRY.values()
+        if not tracks_image_text(registration.index_type)
+    }
+):
+    _model = apps.get_model(*_label)
+    _uid = _model._meta.label_lower
+    pre_save.connect(_on_index_row_pre_write, sender=_model, dispatch_uid=f"search_sync_state:{_uid}:pre_save")
+    post_save.connect(_on_index_row_post_save, sender=_model, dispatch_uid=f"search_sync_state:{_uid}:save")
+    pre_delete.connect(_on_index_row_pre_write, sender=_model, dispatch_uid=f"search_sync_state:{_uid}:pre_delete")
+    post_delete.connect(_on_index_row_post_delete, sender=_model, dispatch_uid=f"search_sync_state:{_uid}:delete")
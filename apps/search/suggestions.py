@@ -0,0 +1,275 @@
+"""Precomputed autocomplete dictionaries for the suggest endpoint.
+
+Suggest used to send one query per index to Meilisearch on every keystroke,
+so its latency grew with the number of indexes. Now each rebuild also
+collects the index's label values (``LABEL_ATTRIBUTES``) and its most
+frequent content terms (``SuggestionCollector``). When the rebuild swaps in,
+those entries are stored as a ``SuggestionDictionary`` row under a new
+``version``.
+
+Web workers hold one ``PrefixDictionary`` per index. It is a sorted array of
+normalised keys searched with ``bisect``, with one key per word start of
+each label, so "cathedral" finds "Durham Cathedral Library". The
+dictionaries are loaded in the background when the web process starts
+(``warm_suggestions``). They are reloaded when the stored version moves on.
+Versions are read from the shared ``locks`` cache and fall back to the
+database. Meilisearch is then queried only for KWIC snippets from the
+text-bearing indexes.
+
+Incremental syncs don't touch the dictionaries. New labels show up after the
+index's next rebuild. An index with no dictionary yet is answered by its
+Meilisearch query, as before.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+import heapq
+import logging
+import re
+import threading
+import time
+from typing import Any
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from apps.search.contracts import SearchDocument
+from apps.search.models import SuggestionDictionary
+from apps.search.types import IndexType
+
+logger = logging.getLogger(__name__)
+
+LABEL_ATTRIBUTES = ("display_label", "shelfmark", "name", "allograph", "locus")
+# Word starts of a label that get their own key.
+MAX_KEY_WORDS = 6
+# Stored versions are re-read from the database this often, so a worker
+# picks up a rebuild whose cache write failed.
+VERSION_TTL_SECONDS = 5 * 60
+# Singleton content terms are dropped while collecting once this many are held.
+MAX_PENDING_TERMS = 200_000
+
+_TERM_RE = re.compile(r"[^\W\d_]{4,}")
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+
+def normalise(text: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of *text* used for keys and queries."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_SEPARATOR_RE.sub(" ", stripped.casefold()).split())
+
+
+def _top(counts: dict[str, list[Any]], limit: int) -> list[list[Any]]:
+    best = heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1][1], item[0]))
+    return [[label, document_id, weight] for label, (document_id, weight) in best]
+
+
+class SuggestionCollector:
+    """Label values and content-term frequencies of the documents written to one index.
+
+    Each label or term keeps the id of the first document seen with it and
+    the number of documents that carry it. Like ``IndexTally``, shards of a
+    rebuild collect separately and are merged by the chord callback.
+    Partial results are trimmed to the stored size, so merged weights near
+    the cut-off are approximate.
+    """
+
+    def __init__(self) -> None:
+        self.labels: dict[str, list[Any]] = {}
+        self.terms: dict[str, list[Any]] = {}
+
+    def add_documents(self, documents: Iterable[SearchDocument]) -> None:
+        for document in documents:
+            document_id = str(document.get("id", ""))
+            labels = {
+                " ".join(str(document[attribute]).split())
+                for attribute in LABEL_ATTRIBUTES
+                if isinstance(document.get(attribute), str | int)
+            }
+            for label in labels:
+                if label:
+                    self._count(self.labels, label, document_id, 1)
+            content = document.get("content")
+            if isinstance(content, str):
+                for term in {match.casefold() for match in _TERM_RE.findall(content)}:
+                    self._count(self.terms, term, document_id, 1)
+        if len(self.terms) > MAX_PENDING_TERMS:
+            self.terms = {term: entry for term, entry in self.terms.items() if entry[1] > 1}
+
+    @staticmethod
+    def _count(counts: dict[str, list[Any]], label: str, document_id: str, weight: int) -> None:
+        entry = counts.get(label)
+        if entry is None:
+            counts[label] = [document_id, weight]
+        else:
+            entry[1] += weight
+
+    def merge(self, other: SuggestionCollector) -> None:
+        for target, source in ((self.labels, other.labels), (self.terms, other.terms)):
+            for label, (document_id, weight) in source.items():
+                self._count(target, label, document_id, weight)
+
+    def entries(self) -> list[list[Any]]:
+        """The ``[label, document_id, weight]`` entries to store, highest weight first."""
+        terms = [
+            entry for entry in _top(self.terms, settings.SEARCH_SUGGEST_CONTENT_TERMS) if entry[0] not in self.labels
+        ]
+        labels = _top(self.labels, max(0, settings.SEARCH_SUGGEST_MAX_ENTRIES - len(terms)))
+        return sorted(labels + terms, key=lambda entry: (-entry[2], entry[0]))
+
+    def as_dict(self) -> dict[str, list[list[Any]]]:
+        return {
+            "labels": _top(self.labels, settings.SEARCH_SUGGEST_MAX_ENTRIES),
+            "terms": _top(self.terms, settings.SEARCH_SUGGEST_CONTENT_TERMS),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, list[list[Any]]]) -> SuggestionCollector:
+        collector = cls()
+        collector.labels = {label: [document_id, int(weight)] for label, document_id, weight in data["labels"]}
+        collector.terms = {term: [document_id, int(weight)] for term, document_id, weight in data["terms"]}
+        return collector
+
+
+@dataclass(frozen=True)
+class PrefixDictionary:
+    """Sorted prefix keys over one index's suggestion entries.
+
+    ``keys[i]`` is a normalised label starting at one of its words and
+    ``refs[i]`` the entry it belongs to, negated (``~position``) for keys that
+    start mid-label so whole-label matches can rank first.
+    """
+
+    version: int
+    entries: list[tuple[str, str, int]]
+    keys: list[str]
+    refs: list[int]
+
+    @classmethod
+    def build(cls, entries: Iterable[list[Any] | tuple[str, str, int]], version: int) -> PrefixDictionary:
+        built = [(str(label), str(document_id), int(weight)) for label, document_id, weight in entries]
+        pairs: list[tuple[str, int]] = []
+        for position, (label, _, _) in enumerate(built):
+            words = normalise(label).split()
+            for start in range(min(len(words), MAX_KEY_WORDS)):
+                pairs.append((" ".join(words[start:]), position if start == 0 else ~position))
+        pairs.sort()
+        return cls(version=version, entries=built, keys=[key for key, _ in pairs], refs=[ref for _, ref in pairs])
+
+    def lookup(self, text: str, limit: int) -> list[dict[str, str]]:
+        """Up to *limit* entries with a word starting with *text*, best first."""
+        prefix = normalise(text)
+        if not prefix:
+            return []
+        ranked: dict[int, tuple[bool, int, str]] = {}
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            ref = self.refs[index]
+            position, mid_label = (ref, False) if ref >= 0 else (~ref, True)
+            label, _, weight = self.entries[position]
+            rank = (mid_label, -weight, label)
+            if position not in ranked or rank < ranked[position]:
+                ranked[position] = rank
+            index += 1
+        best = heapq.nsmallest(limit, ranked, key=ranked.__getitem__)
+        return [{"id": self.entries[position][1], "label": self.entries[position][0]} for position in best]
+
+
+def _version_key(index_type: IndexType) -> str:
+    return f"search:suggest:version:{index_type.value}"
+
+
+def store_suggestions(index_type: IndexType, collector: SuggestionCollector) -> None:
+    """Save *collector*'s entries as the dictionary of *index_type* and announce the new version."""
+    version = time.time_ns() // 1000
+    SuggestionDictionary.objects.update_or_create(
+        index_type=index_type.value, defaults={"entries": collector.entries(), "version": version}
+    )
+    try:
+        caches["locks"].set(_version_key(index_type), version, timeout=VERSION_TTL_SECONDS)
+    except Exception:
+        logger.warning("Failed to announce the suggestion dictionary of %s.", index_type.value, exc_info=True)
+
+
+def stored_versions(index_types: Iterable[IndexType]) -> dict[IndexType, int]:
+    """Current dictionary version per index; ``0`` where none has been built."""
+    keys = {_version_key(index_type): index_type for index_type in index_types}
+    store = caches["locks"]
+    try:
+        found = store.get_many(list(keys))
+    except Exception:
+        found = None
+    if found is not None and len(found) == len(keys):
+        return {index_type: int(found[key]) for key, index_type in keys.items()}
+
+    in_db = dict(
+        SuggestionDictionary.objects.filter(
+            index_type__in=[index_type.value for index_type in keys.values()]
+        ).values_list("index_type", "version")
+    )
+    versions = {index_type: int(in_db.get(index_type.value, 0)) for index_type in keys.values()}
+    if found is not None:
+        try:
+            store.set_many(
+                {key: versions[index_type] for key, index_type in keys.items() if key not in found},
+                timeout=VERSION_TTL_SECONDS,
+            )
+        except Exception:
+            logger.debug("Suggestion dictionary versions not cached.", exc_info=True)
+    return versions
+
+
+class SuggestionStore:
+    """This process's prefix dictionaries, reloaded when a rebuild stores a newer version."""
+
+    def __init__(self) -> None:
+        self._dictionaries: dict[IndexType, PrefixDictionary] = {}
+        self._lock = threading.Lock()
+
+    def current(self, index_types: Iterable[IndexType]) -> dict[IndexType, PrefixDictionary]:
+        """The up-to-date dictionaries of those *index_types* that have one."""
+        versions = stored_versions(index_types)
+        with self._lock:
+            loaded = dict(self._dictionaries)
+        stale = [
+            index_type
+            for index_type, version in versions.items()
+            if version and (index_type not in loaded or loaded[index_type].version != version)
+        ]
+        if stale:
+            rows = SuggestionDictionary.objects.filter(index_type__in=[index_type.value for index_type in stale])
+            for index_type_value, version, entries in rows.values_list("index_type", "version", "entries"):
+                loaded[IndexType(index_type_value)] = PrefixDictionary.build(entries, version)
+            with self._lock:
+                self._dictionaries.update(
+                    {index_type: loaded[index_type] for index_type in stale if index_type in loaded}
+                )
+        return {
+            index_type: loaded[index_type]
+            for index_type, version in versions.items()
+            if version and index_type in loaded
+        }
+
+
+@cache
+def get_suggestion_store() -> SuggestionStore:
+    """The process-wide suggestion store."""
+    return SuggestionStore()
+
+
+def warm_suggestions() -> None:
+    """Load every built dictionary in a background thread, so the first keystrokes don't pay for it."""
+
+    def load() -> None:
+        try:
+            get_suggestion_store().current(list(IndexType))
+        except Exception:
+            logger.warning("Suggestion dictionaries not preloaded; they load on first use.", exc_info=True)
+        finally:
+            connection.close()
+
+    threading.Thread(target=load, name="search-suggest-warmup", daemon=True).start()
@@ -0,0 +1,279 @@
+"""Materialised per-index document counts and content checksums.
+
+The admin in-sync dashboard used to recount every index queryset and stream
+all ImageText content through the clause/person/place extractors on each
+poll. `IndexSyncState` keeps the answer instead, one row per ``IndexType``:
+
+  * ``expected_*`` — documents the database says the index should hold, and
+    an order-independent checksum over its source rows: the sum, modulo
+    2**63, of a per-row digest of the primary key plus ``content_hash`` of
+    the row's ``content`` (rows of models without a content field contribute
+    their key itself). Summing makes the checksum adjustable one row at a
+    time and mergeable across rebuild shards.
+  * ``indexed_*`` — the same pair for what the live index was last brought
+    to, recorded when a rebuild swaps in (from the rows it actually built)
+    and when an incremental sync drains every pending update.
+
+ImageText saves and deletes adjust the expected pair of the text-derived
+indexes in the saving transaction, so edited markup shows up as content
+drift before the sync runs. Content drift is detected for those indexes
+only: the documents of the others are built from related rows too (a
+repository name, a date), so their checksum covers which rows the index
+should hold, not what the documents say. Writes of those index models
+adjust their pair the same way (``apply_row_change``), whether or not
+``SEARCH_AUTO_REINDEX`` records the change, and a drained incremental sync
+re-totals it with one COUNT and SUM of the primary keys to catch bulk
+writes that send no signals.
+"""
+
+from dataclasses import dataclass
+import hashlib
+from itertools import islice
+from typing import Any
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from apps.search.extraction import content_hash, extractions_for
+from apps.search.models import IndexSyncState
+from apps.search.registry import INDEX_REGISTRY, IndexRegistration, get_queryset_for_index, get_registration
+from apps.search.types import IndexType
+
+CHECKSUM_MODULUS = 2**63
+_SCAN_BATCH_SIZE = 500
+_IMAGE_TEXT_LABEL = ("manuscripts", "ImageText")
+
+
+def row_digest(pk: int, content: str | None = None) -> int:
+    """Checksum contribution of one source row; *content* is ``None`` for models without one.
+
+    A key on its own contributes itself, so ``live_expected`` can leave the
+    sum to the database.
+    """
+    if content is None:
+        return pk % CHECKSUM_MODULUS
+    key = content_hash(content) if content else ""
+    digest = hashlib.sha256(f"{pk}\0{key}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % CHECKSUM_MODULUS
+
+
+def _has_content(registration: IndexRegistration) -> bool:
+    try:
+        get_queryset_for_index(registration.index_type).model._meta.get_field("content")
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _documents_per_row(registration: IndexRegistration, extraction: Any) -> int:
+    if registration.count_extractor is None:
+        return 1
+    return registration.count_extractor(extraction) if extraction is not None else 0
+
+
+@dataclass
+class IndexTally:
+    """Running document count and checksum of the rows written to one index."""
+
+    documents: int = 0
+    checksum: int = 0
+
+    def add_row(self, obj: Any, documents: int) -> None:
+        self.documents += documents
+        self.checksum = (self.checksum + row_digest(obj.pk, getattr(obj, "content", None))) % CHECKSUM_MODULUS
+
+    def merge(self, other: IndexTally) -> None:
+        self.documents += other.documents
+        self.checksum = (self.checksum + other.checksum) % CHECKSUM_MODULUS
+
+    def as_dict(self) -> dict[str, int]:
+        return {"documents": self.documents, "checksum": self.checksum}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, int]) -> IndexTally:
+        return cls(documents=int(data["documents"]), checksum=int(data["checksum"]))
+
+
+def live_expected(index_type: IndexType) -> IndexTally:
+    """The expected pair of an index over a model without content, totalled by the database."""
+    totals = get_queryset_for_index(index_type).order_by().aggregate(documents=Count("pk"), keys=Sum("pk"))
+    return IndexTally(documents=totals["documents"], checksum=(totals["keys"] or 0) % CHECKSUM_MODULUS)
+
+
+def compute_expected(index_type: IndexType) -> IndexTally:
+    """Recompute the expected pair of *index_type* from the database.
+
+    For text-derived indexes this is the slow path, used only when an index
+    has no state row yet.
+    """
+    registration = get_registration(index_type)
+    if not _has_content(registration):
+        return live_expected(index_type)
+    queryset = get_queryset_for_index(index_type).order_by()
+    tally = IndexTally()
+    rows = queryset.values_list("pk", "content").iterator(chunk_size=_SCAN_BATCH_SIZE)
+    while batch := list(islice(rows, _SCAN_BATCH_SIZE)):
+        extractions = extractions_for(content for _, content in batch) if registration.count_extractor else {}
+        for pk, content in batch:
+            extraction = extractions.get(content_hash(content)) if content else None
+            tally.documents += _documents_per_row(registration, extraction)
+            tally.checksum = (tally.checksum + row_digest(pk, content)) % CHECKSUM_MODULUS
+    return tally
+
+
+def load_states() -> dict[IndexType, IndexSyncState]:
+    """Every stored state row, keyed by index type, in one query."""
+    return {IndexType(state.index_type): state for state in IndexSyncState.objects.all()}
+
+
+def ensure_state(index_type: IndexType) -> IndexSyncState:
+    """Return the state row of *index_type*, computing the expected pair if it's missing."""
+    state = IndexSyncState.objects.filter(index_type=index_type.value).first()
+    if state is not None:
+        return state
+    tally = compute_expected(index_type)
+    state, _ = IndexSyncState.objects.get_or_create(
+        index_type=index_type.value,
+        defaults={"expected_documents": tally.documents, "expected_checksum": tally.checksum},
+    )
+    return state
+
+
+def current_state(index_type: IndexType) -> IndexSyncState:
+    """The state row of *index_type*, re-totalling the expected pair of an index without content."""
+    state = ensure_state(index_type)
+    if not tracks_image_text(index_type):
+        tally = live_expected(index_type)
+        if (state.expected_documents, state.expected_checksum) != (tally.documents, tally.checksum):
+            state.expected_documents, state.expected_checksum = tally.documents, tally.checksum
+            state.save(update_fields=["expected_documents", "expected_checksum", "updated"])
+    return state
+
+
+def record_expected(index_type: IndexType, tally: IndexTally) -> None:
+    """Store *tally* as the expected pair of *index_type*."""
+    IndexSyncState.objects.update_or_create(
+        index_type=index_type.value,
+        defaults={"expected_documents": tally.documents, "expected_checksum": tally.checksum},
+    )
+
+
+def record_rebuilt(index_type: IndexType, tally: IndexTally) -> None:
+    """Record a swapped-in rebuild: the live index now holds exactly the rows it built."""
+    IndexSyncState.objects.update_or_create(
+        index_type=index_type.value,
+        defaults={
+            "expected_documents": tally.documents,
+            "expected_checksum": tally.checksum,
+            "indexed_documents": tally.documents,
+            "indexed_checksum": tally.checksum,
+        },
+    )
+
+
+def record_cleared(index_type: IndexType) -> None:
+    """Record that the live index of *index_type* was emptied."""
+    IndexSyncState.objects.filter(index_type=index_type.value).update(indexed_documents=0, indexed_checksum=0)
+
+
+def forget_states(index_types: list[IndexType]) -> None:
+    """Drop the state rows of *index_types* so the next read recomputes them."""
+    IndexSyncState.objects.filter(index_type__in=[index_type.value for index_type in index_types]).delete()
+
+
+def forget_image_text_states() -> None:
+    """Drop the text-derived state rows so the next read recomputes them."""
+    forget_states([index_type for index_type in IndexType if tracks_image_text(index_type)])
+
+
+def record_indexed(index_type: IndexType, state: IndexSyncState) -> None:
+    """Mark the expected pair read into *state* as the live index's pair."""
+    IndexSyncState.objects.filter(index_type=index_type.value).update(
+        indexed_documents=state.expected_documents, indexed_checksum=state.expected_checksum
+    )
+
+
+def tracks_image_text(index_type: IndexType) -> bool:
+    """True when ImageText writes keep *index_type*'s expected pair current."""
+    return get_registration(index_type).model_label == _IMAGE_TEXT_LABEL
+
+
+def apply_image_text_change(pk: int, old_content: str | None, new_content: str | None) -> None:
+    """Adjust the expected pair of every text-derived index for one ImageText write.
+
+    *old_content* is ``None`` for a created row and *new_content* ``None``
+    for a deleted one. Indexes without a state row are left alone: their
+    first rebuild or dashboard read computes the pair from scratch.
+    """
+    registrations = [
+        registration for registration in INDEX_REGISTRY.values() if tracks_image_text(registration.index_type)
+    ]
+
+    def contribution(registration: IndexRegistration, content: str | None) -> tuple[int, int]:
+        extraction = extractions.get(content_hash(content)) if content else None
+        return _documents_per_row(registration, extraction), row_digest(pk, content)
+
+    with transaction.atomic():
+        states = IndexSyncState.objects.select_for_update().filter(
+            index_type__in=[registration.index_type.value for registration in registrations]
+        )
+        by_type = {state.index_type: state for state in states}
+        if not by_type:
+            return
+        extractions = extractions_for(content for content in (old_content, new_content) if content)
+        for registration in registrations:
+            state = by_type.get(registration.index_type.value)
+            if state is None:
+                continue
+            if old_content is not None:
+                documents, digest = contribution(registration, old_content)
+                state.expected_documents -= documents
+                state.expected_checksum -= digest
+            if new_content is not None:
+                documents, digest = contribution(registration, new_content)
+                state.expected_documents += documents
+                state.expected_checksum += digest
+            state.expected_checksum %= CHECKSUM_MODULUS
+            state.save(update_fields=["expected_documents", "expected_checksum", "updated"])
+
+
+def row_memberships(model_label: tuple[str, str], pk: int) -> dict[IndexType, bool]:
+    """Which indexes over *model_label* (text-derived ones aside) hold its stored row *pk*.
+
+    Only indexes with a ``queryset_filter`` cost a query.
+    """
+    memberships: dict[IndexType, bool] = {}
+    for registration in INDEX_REGISTRY.values():
+        if registration.model_label != model_label or tracks_image_text(registration.index_type):
+            continue
+        member = True
+        if registration.queryset_filter:
+            member = get_queryset_for_index(registration.index_type).filter(pk=pk).exists()
+        memberships[registration.index_type] = member
+    return memberships
+
+
+def apply_row_change(pk: int, before: dict[IndexType, bool], after: dict[IndexType, bool]) -> None:
+    """Adjust the expected pair of the indexes a row write moved *pk* into or out of.
+
+    *before* and *after* are ``row_memberships`` of the stored row around
+    the write (empty for a created or deleted row). Indexes without a state
+    row are left alone, as in ``apply_image_text_change``.
+    """
+    moved = {
+        index_type: int(after.get(index_type, False)) - int(before.get(index_type, False))
+        for index_type in {*before, *after}
+    }
+    moved = {index_type: delta for index_type, delta in moved.items() if delta}
+    if not moved:
+        return
+    with transaction.atomic():
+        states = IndexSyncState.objects.select_for_update().filter(
+            index_type__in=[index_type.value for index_type in moved]
+        )
+        for state in states:
+            delta = moved[IndexType(state.index_type)]
+            state.expected_documents += delta
+            state.expected_checksum = (state.expected_checksum + delta * row_digest(pk)) % CHECKSUM_MODULUS
+            state.save(update_fields=["expected_documents", "expected_checksum", "updated"])
@@ -1,13 +1,40 @@
 """Celery tasks for search index management (Meilisearch)."""
 
+from dataclasses import replace
 import logging
 from typing import Any
+from uuid import uuid4
 
-from celery import shared_task
+from celery import chord, group, shared_task
 from celery.app.task import Task
+from celery.exceptions import Ignore
+from django.conf import settings
+from django.core.cache import caches
+from django.http import QueryDict
 
+from apps.search.export import export_storage_name, prune_export_files, release_export_slot, write_export_file
+from apps.search.parsers import parse_search_query
 from apps.search.progress import CeleryTaskReporter
-from apps.search.services import SearchOrchestrationService, resolve_index_type_segment
+from apps.search.scheduler import (
+    BULK,
+    CELERY_PRIORITIES,
+    INTERACTIVE,
+    begin_rebuild,
+    claim_rebuild,
+    dispatch_countdown,
+    record_deferred,
+    retry_countdown,
+)
+from apps.search.services import (
+    IndexingService,
+    ReindexInProgressError,
+    SearchOrchestrationService,
+    SearchService,
+    resolve_index_type_segment,
+)
+from apps.search.suggestions import SuggestionCollector
+from apps.search.sync_state import IndexTally
+from apps.search.types import IndexType
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +53,8 @@ def _run_single_index_task(
     orchestration service calls into it (no closures threaded down the
     stack)."""
     resolve_index_type_segment(segment)
+    if settings.SEARCH_REINDEX_SHARDS > 1:
+        return _replace_with_shards(task, action=action, segment=segment, started_message=started_message)
     reporter = CeleryTaskReporter(task)
     reporter.start(started_message)
     # Single-index runs have a degenerate outer loop (1 of 1); priming the
@@ -35,18 +64,187 @@ def _run_single_index_task(
     return {"action": action, "index_type": segment, "indexed": count}
 
 
+def _replace_with_shards(task: Task, *, action: str, segment: str, started_message: str) -> dict[str, Any]:
+    """Fan a full rebuild out as a chord of primary-key range shards.
+
+    Every shard writes into the shared ``__build`` index; the chord callback
+    swaps it live only once all shards have succeeded, and a failing shard
+    triggers ``abort_sharded_reindex`` instead, leaving the live index as it
+    was. The dispatching task is replaced by the chord, so its id (the one the
+    management UI polls) reports aggregated shard progress and resolves to
+    the callback's payload. The reindex lock is held under that id for the
+    whole run, across workers.
+    """
+    index_type = resolve_index_type_segment(segment)
+    task_id = task.request.id
+    reporter = CeleryTaskReporter(task)
+    reporter.start(started_message)
+    service = IndexingService()
+    total, ranges = service.begin_sharded_reindex(index_type, settings.SEARCH_REINDEX_SHARDS, token=task_id)
+    callback = finish_sharded_reindex.s(segment, action=action, token=task_id)
+    callback.link_error(abort_sharded_reindex.si(segment, token=task_id))
+    shards = group(
+        build_search_index_shard.s(segment, lower, upper, total=total, progress_task_id=task_id)
+        for lower, upper in ranges
+    )
+    logger.info("Reindexing %s in %d shards (%d rows).", segment, len(ranges), total)
+    try:
+        return task.replace(chord(shards, callback))
+    except Ignore:
+        raise
+    except Exception:
+        service.abort_sharded_reindex(index_type, token=task_id)
+        raise
+
+
+@shared_task(bind=True)
+def build_search_index_shard(
+    self: Task,
+    index_type_segment: str,
+    lower: int | None,
+    upper: int | None,
+    *,
+    total: int,
+    progress_task_id: str,
+) -> dict[str, int]:
+    """Build one primary-key range of a sharded reindex into the build index.
+
+    Returns the shard's row count plus its ``IndexTally`` (documents and
+    checksum) and ``SuggestionCollector`` for the chord callback to merge.
+    """
+    index_type = resolve_index_type_segment(index_type_segment)
+    reporter = CeleryTaskReporter(self, task_id=progress_task_id)
+    reporter.advance_to(1, 1, index_type_segment)
+    tally = IndexTally()
+    suggestions = SuggestionCollector()
+    rows = IndexingService().build_shard(
+        index_type, lower, upper, total=total, reporter=reporter, tally=tally, suggestions=suggestions
+    )
+    return {"rows": rows, **tally.as_dict(), "suggestions": suggestions.as_dict()}
+
+
+@shared_task
+def finish_sharded_reindex(
+    shard_results: list[dict[str, int]], index_type_segment: str, *, action: str, token: str
+) -> dict[str, Any]:
+    """Chord callback: every shard succeeded, so swap the build index live."""
+    index_type = resolve_index_type_segment(index_type_segment)
+    tally = IndexTally()
+    suggestions = SuggestionCollector()
+    for shard in shard_results:
+        tally.merge(IndexTally.from_dict(shard))
+        suggestions.merge(SuggestionCollector.from_dict(shard["suggestions"]))
+    IndexingService().finish_sharded_reindex(index_type, token=token, tally=tally, suggestions=suggestions)
+    count = sum(shard["rows"] for shard in shard_results)
+    logger.info(
+        "Reindexed search index %s from %d shards: %d documents.", index_type_segment, len(shard_results), count
+    )
+    return {"action": action, "index_type": index_type_segment, "indexed": count, "shards": len(shard_results)}
+
+
+@shared_task
+def abort_sharded_reindex(index_type_segment: str, *, token: str) -> None:
+    """Chord error handler: drop the partial build index and release the lock."""
+    index_type = resolve_index_type_segment(index_type_segment)
+    logger.warning("A shard of the %s reindex failed; discarding the build index.", index_type_segment)
+    IndexingService().abort_sharded_reindex(index_type, token=token)
+
+
+def schedule_reindex(
+    index_types: list[IndexType],
+    *,
+    action: str = "reindex",
+    priority: str = INTERACTIVE,
+    countdown: int | None = None,
+) -> dict[str, Any]:
+    """Queue a rebuild of *index_types*, coalescing it with rebuilds already queued.
+
+    Indexes without a queued rebuild go out as one task (the group task for
+    several), at once when interactive and ``SEARCH_REINDEX_DEBOUNCE_SECONDS``
+    out when bulk, unless *countdown* says otherwise; the rest fold into the
+    task already queued for them (see ``apps.search.scheduler``). Returns the id of the task to poll, whether
+    the request was coalesced entirely and the ids of the queued tasks it
+    joined.
+    """
+    task_id = str(uuid4())
+    claim = claim_rebuild(index_types, priority=priority, task_id=task_id, action=action)
+    joined = list(dict.fromkeys(claim.coalesced.values()))
+    if not claim.claimed:
+        return {"task_id": joined[0], "coalesced": True, "joined": joined}
+    segments = [index_type.to_url_segment() for index_type in claim.claimed]
+    if len(segments) == 1:
+        task, args = REBUILD_TASKS[action], [segments[0]]
+    else:
+        task, args = reindex_search_index_group, [segments]
+    task.apply_async(
+        args=args,
+        kwargs={"priority": priority},
+        task_id=task_id,
+        countdown=dispatch_countdown(priority) if countdown is None else countdown,
+        priority=CELERY_PRIORITIES[priority],
+    )
+    return {"task_id": task_id, "coalesced": False, "joined": joined}
+
+
+def _defer_rebuild(action: str, index_types: list[IndexType], priority: str) -> dict[str, Any]:
+    """Re-queue a rebuild that found the reindex lock held."""
+    segments = [index_type.to_url_segment() for index_type in index_types]
+    logger.info("A reindex of %s is still running; deferring this run.", ", ".join(segments))
+    record_deferred(index_types)
+    follow_up = schedule_reindex(index_types, action=action, priority=priority, countdown=retry_countdown())
+    return {"action": action, "index_types": segments, "deferred": True, "follow_up": follow_up["task_id"]}
+
+
+def _rebuild_single_index(
+    task: Task, *, action: str, segment: str, priority: str, started_message: str, done_message: str, operation
+) -> dict[str, Any]:
+    """Run a scheduled single-index rebuild, unless it was taken over or the index is busy."""
+    index_type = resolve_index_type_segment(segment)
+    if not begin_rebuild([index_type], task.request.id):
+        logger.info("Skipping %s %s: another request took it over.", action, segment)
+        return {"action": action, "index_type": segment, "superseded": True}
+    try:
+        payload = _run_single_index_task(
+            task, action=action, segment=segment, started_message=started_message, operation=operation
+        )
+    except ReindexInProgressError:
+        return _defer_rebuild(action, [index_type], priority)
+    logger.info("%s search index %s: %d documents.", done_message, segment, payload["indexed"])
+    return payload
+
+
 @shared_task(bind=True)
-def reindex_search_index(self: Task, index_type_segment: str) -> dict[str, Any]:
+def reindex_search_index(self: Task, index_type_segment: str, priority: str = INTERACTIVE) -> dict[str, Any]:
     """Reindex a single search index (add/update from DB)."""
-    payload = _run_single_index_task(
+    return _rebuild_single_index(
         self,
         action="reindex",
         segment=index_type_segment,
+        priority=priority,
         started_message=f"Reindexing {index_type_segment}…",
+        done_message="Reindexed",
         operation=SearchOrchestrationService().reindex_index,
     )
-    logger.info("Reindexed search index %s: %d documents.", index_type_segment, payload["indexed"])
-    return payload
+
+
+@shared_task(bind=True)
+def reindex_search_index_group(self: Task, index_type_segments: list[str], priority: str = BULK) -> dict[str, Any]:
+    """Rebuild indexes that share one source queryset from a single pass over it."""
+    index_types = [resolve_index_type_segment(segment) for segment in index_type_segments]
+    owned = [index_type.to_url_segment() for index_type in begin_rebuild(index_types, self.request.id)]
+    if not owned:
+        return {"action": "reindex_group", "index_types": index_type_segments, "superseded": True}
+    label = ", ".join(owned)
+    reporter = CeleryTaskReporter(self)
+    reporter.start(f"Reindexing {label}…")
+    reporter.advance_to(1, 1, label)
+    try:
+        indexed_per_segment = SearchOrchestrationService().reindex_group(owned, reporter=reporter)
+    except ReindexInProgressError:
+        return _defer_rebuild("reindex", [resolve_index_type_segment(segment) for segment in owned], priority)
+    for segment, count in indexed_per_segment.items():
+        logger.info("Reindexed search index %s: %d source rows.", segment, count)
+    return {"action": "reindex_group", "index_types": owned, "indexed": indexed_per_segment}
 
 
 @shared_task
@@ -60,17 +258,20 @@ def clear_search_index(index_type_segment: str) -> dict[str, Any]:
 
 
 @shared_task(bind=True)
-def clean_and_reindex_search_index(self: Task, index_type_segment: str) -> dict[str, Any]:
+def clean_and_reindex_search_index(self: Task, index_type_segment: str, priority: str = INTERACTIVE) -> dict[str, Any]:
     """Clear then reindex a single search index."""
-    payload = _run_single_index_task(
+    return _rebuild_single_index(
         self,
         action="clean_and_reindex",
         segment=index_type_segment,
+        priority=priority,
         started_message=f"Clearing and reindexing {index_type_segment}…",
+        done_message="Cleaned and reindexed",
         operation=SearchOrchestrationService().clear_and_reindex_index,
     )
-    logger.info("Cleaned and reindexed search index %s: %d documents.", index_type_segment, payload["indexed"])
-    return payload
+
+
+REBUILD_TASKS = {"reindex": reindex_search_index, "clean_and_reindex": clean_and_reindex_search_index}
 
 
 @shared_task(bind=True)
@@ -83,3 +284,99 @@ def clear_and_reindex_all_search_indexes(self: Task) -> dict[str, Any]:
         logger.info("Cleared and reindexed %s: %d documents.", segment, count)
 
     return {"action": "clear_and_reindex_all", "indexed": sum(indexed_per_segment.values())}
+
+
+@shared_task(bind=True)
+def export_search_results(
+    self: Task, index_type_segment: str, query_string: str, export_format: str, user_id: int | None = None
+) -> dict[str, Any]:
+    """Export every hit of a search to a file in default storage.
+
+    *query_string* is the export request's query string, parsed here exactly
+    as the search endpoints parse it. Progress is reported per keyset page
+    through the same task-state protocol the reindex tasks use. The run gives
+    back *user_id*'s export slot when it ends and deletes expired export files.
+    """
+    try:
+        return _export_search_results(self, index_type_segment, query_string, export_format)
+    finally:
+        if user_id is not None:
+            release_export_slot(user_id)
+
+
+def _export_search_results(
+    task: Task, index_type_segment: str, query_string: str, export_format: str
+) -> dict[str, Any]:
+    index_type = resolve_index_type_segment(index_type_segment)
+    query = parse_search_query(QueryDict(query_string), index_type)
+    service = SearchService()
+    reporter = CeleryTaskReporter(task, activity="Exporting", unit="rows")
+    reporter.start(f"Exporting {index_type_segment}…")
+    reporter.advance_to(1, 1, index_type_segment)
+    total = service.search(index_type, replace(query, limit=0, offset=0)).total
+
+    name, rows = write_export_file(
+        (page.hits for page in service.iter_export_pages(index_type, query)),
+        index_type,
+        export_format,
+        export_storage_name(task.request.id or uuid4().hex, export_format),
+        on_rows=lambda done: reporter.report_batch(done, max(total, done)),
+    )
+    logger.info("Exported %d %s rows to %s.", rows, index_type_segment, name)
+    if pruned := prune_export_files():
+        logger.info("Deleted %d expired export files.", pruned)
+    return {"action": "export", "index_type": index_type_segment, "format": export_format, "rows": rows, "file": name}
+
+
+def _pending_sync_key(index_type: IndexType) -> str:
+    return f"search:pending-sync:{index_type.uid}"
+
+
+def schedule_pending_sync(index_type: IndexType) -> None:
+    """Enqueue one debounced incremental sync for *index_type*.
+
+    The first change in a window claims a marker in the ``locks`` cache and
+    schedules the task ``SEARCH_REINDEX_DEBOUNCE_SECONDS`` out; later changes
+    in the same window only add pending rows, which that one run drains. If
+    the cache is unavailable every change schedules its own (idempotent) run.
+    """
+    debounce = max(int(settings.SEARCH_REINDEX_DEBOUNCE_SECONDS), 0)
+    try:
+        # The marker outlives the countdown so a slow queue can't double-book,
+        # but expires on its own if the worker dies before clearing it.
+        claimed = caches["locks"].add(_pending_sync_key(index_type), "1", debounce * 2 + 60)
+    except Exception as exc:  # lock backend down — degrade to undebounced
+        logger.warning("Pending-sync debounce backend unavailable (%s); scheduling %s anyway.", exc, index_type.uid)
+        claimed = True
+    if claimed:
+        sync_pending_search_documents.apply_async(args=[index_type.to_url_segment()], countdown=debounce)
+
+
+def _release_pending_sync(index_type: IndexType) -> None:
+    try:
+        caches["locks"].delete(_pending_sync_key(index_type))
+    except Exception:
+        logger.warning("Failed to release pending-sync marker for %s.", index_type.uid)
+
+
+@shared_task
+def sync_pending_search_documents(index_type_segment: str) -> dict[str, Any]:
+    """Upsert/delete the documents of rows changed since the last sync."""
+    index_type = resolve_index_type_segment(index_type_segment)
+    # Release the debounce marker before draining: a change committed while
+    # this run works must schedule a follow-up rather than be left behind.
+    _release_pending_sync(index_type)
+    try:
+        counts = IndexingService().sync_pending(index_type)
+    except ReindexInProgressError:
+        logger.info("Full reindex of %s in progress; deferring incremental sync.", index_type_segment)
+        schedule_pending_sync(index_type)
+        return {"action": "sync_pending", "index_type": index_type_segment, "deferred": True}
+
+    logger.info(
+        "Synced pending changes for %s: %d upserted, %d deleted.",
+        index_type_segment,
+        counts["upserted"],
+        counts["deleted"],
+    )
+    return {"action": "sync_pending", "index_type": index_type_segment, **counts}
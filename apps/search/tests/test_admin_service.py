@@ -1,31 +1,12 @@
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from apps.search.admin_service import SearchAdminService
+from apps.search.models import IndexSyncState, PendingIndexUpdate
 from apps.search.types import IndexType
 
 
-class _FakeValuesList:
-    def __init__(self, values):
-        self._values = values
-
-    def iterator(self, chunk_size=500):
-        return iter(self._values)
-
-
-class _FakeQuerySet:
-    def __init__(self, *, count_value=0, contents=None):
-        self._count_value = count_value
-        self._contents = contents or []
-
-    def count(self):
-        return self._count_value
-
-    def values_list(self, field, flat=False):
-        assert field == "content"
-        assert flat is True
-        return _FakeValuesList(self._contents)
-
-
 def _build_writer_mock(counts: dict[IndexType, int]) -> MagicMock:
     writer = MagicMock()
     writer.get_stats.side_effect = lambda index_type: {
@@ -34,59 +15,94 @@ def _build_writer_mock(counts: dict[IndexType, int]) -> MagicMock:
     return writer
 
 
-@patch("apps.search.admin_service.get_queryset_for_index")
-@patch("apps.search.admin_service.MeilisearchIndexWriter")
-def test_get_index_stats_list_counts_dpt_fragments_for_one_to_many_indexes(
-    writer_cls_mock: MagicMock, queryset_mock: MagicMock
-):
-    writer_cls_mock.return_value = _build_writer_mock(
-        {
-            IndexType.CLAUSES: 3,
-            IndexType.PEOPLE: 2,
-            IndexType.PLACES: 1,
-        }
+def _state(index_type: IndexType, documents: int, checksum: int, *, indexed: tuple[int, int] | None = None):
+    indexed_documents, indexed_checksum = indexed if indexed is not None else (documents, checksum)
+    return IndexSyncState.objects.create(
+        index_type=index_type.value,
+        expected_documents=documents,
+        expected_checksum=checksum,
+        indexed_documents=indexed_documents,
+        indexed_checksum=indexed_checksum,
     )
 
-    by_type = {
-        IndexType.CLAUSES: _FakeQuerySet(
-            contents=[
-                '<span data-dpt="clause">A</span><span data-dpt="clause">B</span>',
-                '<span data-dpt="clause">C</span>',
-            ]
-        ),
-        IndexType.PEOPLE: _FakeQuerySet(
-            contents=[
-                '<span data-dpt="person">Alice</span><span data-dpt="person">Bob</span>',
-            ]
-        ),
-        IndexType.PLACES: _FakeQuerySet(contents=['<span data-dpt="place">Paris</span>']),
-    }
 
-    queryset_mock.side_effect = lambda index_type: by_type.get(index_type, _FakeQuerySet(count_value=0))
+@pytest.mark.django_db
+@patch("apps.search.admin_service.MeilisearchIndexWriter")
+def test_get_index_stats_list_reads_materialised_counts(writer_cls_mock: MagicMock):
+    writer_cls_mock.return_value = _build_writer_mock({IndexType.CLAUSES: 3, IndexType.TEXTS: 10})
+    for index_type in IndexType:
+        _state(index_type, 0, 0)
+    IndexSyncState.objects.filter(index_type=IndexType.CLAUSES.value).update(
+        expected_documents=3, expected_checksum=42, indexed_documents=3, indexed_checksum=42
+    )
+    IndexSyncState.objects.filter(index_type=IndexType.TEXTS.value).update(expected_documents=8)
 
-    stats = SearchAdminService().get_index_stats_list()
-    stats_by_segment = {entry["index_type"]: entry for entry in stats}
+    with patch("apps.search.sync_state.compute_expected") as compute:
+        stats = SearchAdminService().get_index_stats_list()
 
+    compute.assert_not_called()
+    stats_by_segment = {entry["index_type"]: entry for entry in stats}
     assert stats_by_segment["clauses"]["db_count"] == 3
-    assert stats_by_segment["people"]["db_count"] == 2
-    assert stats_by_segment["places"]["db_count"] == 1
+    assert stats_by_segment["clauses"]["checksum"] == f"{42:016x}"
     assert stats_by_segment["clauses"]["in_sync"] is True
-    assert stats_by_segment["people"]["in_sync"] is True
-    assert stats_by_segment["places"]["in_sync"] is True
+    assert stats_by_segment["texts"]["db_count"] == 8
+    assert stats_by_segment["texts"]["in_sync"] is False
 
 
-@patch("apps.search.admin_service.get_queryset_for_index")
+@pytest.mark.django_db
 @patch("apps.search.admin_service.MeilisearchIndexWriter")
-def test_get_index_stats_list_uses_queryset_count_for_one_to_one_indexes(
-    writer_cls_mock: MagicMock, queryset_mock: MagicMock
-):
-    writer_cls_mock.return_value = _build_writer_mock({IndexType.ITEM_PARTS: 10})
-    queryset_mock.side_effect = lambda index_type: (
-        _FakeQuerySet(count_value=8) if index_type == IndexType.ITEM_PARTS else _FakeQuerySet(count_value=0)
+def test_get_index_stats_list_follows_non_text_row_writes(writer_cls_mock: MagicMock, settings):
+    from apps.scribes.tests.factories import ScribeFactory
+
+    settings.SEARCH_AUTO_REINDEX = False
+    writer_cls_mock.return_value = _build_writer_mock({IndexType.SCRIBES: 1})
+    scribe = ScribeFactory()
+    for index_type in IndexType:
+        _state(index_type, 0, 0)
+    IndexSyncState.objects.filter(index_type=IndexType.SCRIBES.value).update(
+        expected_documents=1, expected_checksum=scribe.pk, indexed_documents=1, indexed_checksum=scribe.pk
     )
+    ScribeFactory()
+
+    with patch("apps.search.sync_state.live_expected") as live:
+        stats_by_segment = {entry["index_type"]: entry for entry in SearchAdminService().get_index_stats_list()}
+
+    live.assert_not_called()
+
+    assert stats_by_segment["scribes"]["db_count"] == 2
+    assert stats_by_segment["scribes"]["pending_updates"] is False
+    assert stats_by_segment["scribes"]["in_sync"] is False
+
+
+@pytest.mark.django_db
+@patch("apps.search.admin_service.MeilisearchIndexWriter")
+def test_get_index_stats_list_flags_content_drift_and_pending_updates(writer_cls_mock: MagicMock):
+    writer_cls_mock.return_value = _build_writer_mock({IndexType.TEXTS: 5, IndexType.SCRIBES: 2})
+    _state(IndexType.TEXTS, 5, 100, indexed=(5, 99))
+    _state(IndexType.SCRIBES, 2, 7)
+    PendingIndexUpdate.objects.create(index_type=IndexType.SCRIBES.value, object_id=1)
 
     stats = SearchAdminService().get_index_stats_list()
     stats_by_segment = {entry["index_type"]: entry for entry in stats}
 
-    assert stats_by_segment["item-parts"]["db_count"] == 8
-    assert stats_by_segment["item-parts"]["in_sync"] is False
+    assert stats_by_segment["texts"]["meilisearch_count"] == stats_by_segment["texts"]["db_count"] == 5
+    assert stats_by_segment["texts"]["in_sync"] is False
+    assert stats_by_segment["scribes"]["pending_updates"] is True
+    assert stats_by_segment["scribes"]["in_sync"] is False
+
+
+@pytest.mark.django_db
+@patch("apps.search.admin_service.MeilisearchIndexWriter")
+def test_get_index_stats_list_computes_missing_state_once(writer_cls_mock: MagicMock):
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    writer_cls_mock.return_value = _build_writer_mock({IndexType.CLAUSES: 2})
+    with patch("apps.search.signals.schedule_pending_sync"):
+        ImageTextFactory(content='<span data-dpt="clause">A</span><span data-dpt="clause">B</span>')
+    PendingIndexUpdate.objects.all().delete()
+
+    stats_by_segment = {entry["index_type"]: entry for entry in SearchAdminService().get_index_stats_list()}
+
+    assert stats_by_segment["clauses"]["db_count"] == 2
+    assert stats_by_segment["clauses"]["in_sync"] is True
+    assert IndexSyncState.objects.filter(index_type=IndexType.CLAUSES.value).exists()
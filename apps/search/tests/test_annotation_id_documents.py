@@ -1,5 +1,7 @@
 from types import SimpleNamespace
 
+import pytest
+
 import apps.search.documents.clauses as clauses_docs
 from apps.search.documents.dpt_parser import extract_all
 import apps.search.documents.people as people_docs
@@ -83,18 +85,24 @@ def test_clause_people_place_builders_emit_annotation_id_or_null():
     assert "annotation_coordinates" in people[0]
     assert place_docs[0]["annotation_id"] == 77
     assert "annotation_coordinates" in place_docs[0]
+    # Fan-out fragments carry their position for keyset pagination.
+    assert [doc["fragment"] for doc in clause_docs] == list(range(len(clause_docs)))
 
 
-def test_text_builder_sets_annotation_id_when_any_dpt_annotation_exists():
+def test_text_builder_sets_annotation_id_when_any_dpt_annotation_exists(monkeypatch):
     obj = _fake_image_text(
         '<span data-dpt="clause" data-dpt-type="address" data-graph-id="42">Alpha</span>'
         '<span data-dpt="person" data-dpt-type="name">John</span>'
     )
 
-    texts_docs.Graph.objects = SimpleNamespace(
-        only=lambda *_: SimpleNamespace(
-            get=lambda **__: SimpleNamespace(annotation={"type": "Feature", "geometry": {"type": "Polygon"}})
-        )
+    monkeypatch.setattr(
+        utils_docs.Graph,
+        "objects",
+        SimpleNamespace(
+            filter=lambda **__: [
+                SimpleNamespace(id=42, annotation={"type": "Feature", "geometry": {"type": "Polygon"}})
+            ]
+        ),
     )
 
     doc = texts_docs.build_text_document(obj)
@@ -113,3 +121,51 @@ def test_text_builder_sets_annotation_id_to_null_when_missing():
     assert doc["annotation_id"] is None
     assert "annotation_coordinates" in doc
     assert doc["annotation_coordinates"] is None
+
+
+@pytest.mark.django_db
+def test_batch_preloader_resolves_all_coordinates_in_one_query(django_assert_num_queries):
+    from apps.annotations.tests.factories import GraphFactory
+    from apps.manuscripts.tests.factories import ImageTextFactory
+    from apps.search.registry import get_queryset_for_index
+    from apps.search.types import IndexType
+
+    first, second = GraphFactory.create_batch(2, annotation={"type": "Feature"})
+    created = [
+        ImageTextFactory(
+            content=f'<span data-dpt="clause" data-dpt-type="address" data-graph-id="{graph.id}">Alpha</span>'
+            f'<span data-dpt="place" data-dpt-type="region" data-graph-id="{second.id}">Paris</span>'
+        )
+        for graph in (first, second)
+    ]
+    queryset = get_queryset_for_index(IndexType.TEXTS).filter(pk__in=[text.pk for text in created])
+    texts = list(queryset.order_by("pk"))
+    with django_assert_num_queries(1):
+        utils_docs.preload_annotation_coordinates(texts)
+
+    # Builders of every text-derived index are served from the batch cache.
+    with django_assert_num_queries(0):
+        clause_docs = clauses_docs.build_clause_documents(texts[0])
+        place_docs = places_docs.build_place_documents(texts[0])
+        text_doc = texts_docs.build_text_document(texts[1])
+
+    assert clause_docs[0]["annotation_coordinates"] == '{"type": "Feature"}'
+    assert place_docs[0]["annotation_id"] == second.id
+    assert text_doc["annotation_coordinates"] == '{"type": "Feature"}'
+
+
+def test_text_derived_builders_share_one_parse_per_row(monkeypatch):
+    obj = _fake_image_text(
+        '<span data-dpt="clause" data-dpt-type="address">Alpha</span>'
+        '<span data-dpt="person" data-dpt-type="name">John</span>'
+        '<span data-dpt="place" data-dpt-type="region">Paris</span>'
+    )
+    calls: list[str] = []
+    monkeypatch.setattr(utils_docs, "extract_all", lambda content: calls.append(content) or extract_all(content))
+
+    texts_docs.build_text_document(obj)
+    clauses_docs.build_clause_documents(obj)
+    people_docs.build_person_documents(obj)
+    places_docs.build_place_documents(obj)
+
+    assert len(calls) == 1
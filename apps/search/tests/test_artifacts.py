@@ -0,0 +1,106 @@
+"""Offline search artifacts: build to NDJSON parts, load by build-and-swap."""
+
+import gzip
+import json
+from unittest import mock
+
+import pytest
+
+from apps.search.artifacts import MANIFEST_NAME, InvalidArtifactError, build_artifact, load_artifact, read_manifest
+from apps.search.registry import get_queryset_for_index, get_registration
+from apps.search.services import IndexingService, build_batch_documents
+from apps.search.sync_state import IndexTally
+from apps.search.types import IndexType
+
+TEXT_DERIVED = [IndexType.TEXTS, IndexType.CLAUSES]
+
+
+@pytest.fixture(autouse=True)
+def _no_pending_sync():
+    with mock.patch("apps.search.signals.schedule_pending_sync"):
+        yield
+
+
+@pytest.fixture
+def texts(db):
+    del db
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    for number in range(5):
+        ImageTextFactory(content=f'<span data-dpt="clause">Clause {number}</span> text {number}')
+
+
+def _documents(directory, entry) -> list[dict]:
+    return [
+        json.loads(line)
+        for part in entry["parts"]
+        for line in gzip.decompress((directory / part["name"]).read_bytes()).splitlines()
+    ]
+
+
+def test_build_writes_every_document_in_size_capped_parts(texts, tmp_path):
+    del texts
+    manifest = build_artifact(tmp_path, TEXT_DERIVED, part_bytes=200)
+
+    assert set(manifest["indexes"]) == {"texts", "clauses"}
+    for index_type in TEXT_DERIVED:
+        entry = manifest["indexes"][index_type.to_url_segment()]
+        tally = IndexTally()
+        expected = build_batch_documents(
+            get_registration(index_type), list(get_queryset_for_index(index_type)), tally=tally
+        )
+        assert sorted(_documents(tmp_path, entry), key=lambda d: d["id"]) == sorted(expected, key=lambda d: d["id"])
+        assert (entry["documents"], entry["checksum"], entry["rows"]) == (tally.documents, tally.checksum, 5)
+        assert len(entry["parts"]) > 1
+    assert read_manifest(tmp_path) == json.loads((tmp_path / MANIFEST_NAME).read_text())
+
+
+def test_load_swaps_each_index_in_from_its_parts(texts, tmp_path):
+    del texts
+    manifest = build_artifact(tmp_path, TEXT_DERIVED, part_bytes=200)
+    service = mock.MagicMock(spec=IndexingService)
+    posted: dict[IndexType, list[bytes]] = {}
+    service.load_prebuilt.side_effect = lambda index_type, payloads, **kwargs: posted.setdefault(
+        index_type, list(payloads)
+    )
+
+    loaded = load_artifact(tmp_path, [IndexType.CLAUSES], service=service)
+
+    entry = manifest["indexes"]["clauses"]
+    assert loaded == {"clauses": entry["documents"]}
+    assert posted[IndexType.CLAUSES] == [(tmp_path / part["name"]).read_bytes() for part in entry["parts"]]
+    assert service.load_prebuilt.call_args.kwargs["tally"] == IndexTally.from_dict(entry)
+
+
+def test_load_refuses_artifacts_built_for_other_settings(texts, tmp_path):
+    del texts
+    build_artifact(tmp_path, [IndexType.TEXTS])
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    manifest["indexes"]["texts"]["settings_fingerprint"] = "0" * 64
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest))
+    service = mock.MagicMock(spec=IndexingService)
+
+    with pytest.raises(InvalidArtifactError, match="different index settings"):
+        load_artifact(tmp_path, service=service)
+
+    service.load_prebuilt.assert_not_called()
+
+
+def test_a_corrupt_part_aborts_before_the_swap(texts, tmp_path):
+    del texts
+    manifest = build_artifact(tmp_path, [IndexType.TEXTS])
+    (tmp_path / manifest["indexes"]["texts"]["parts"][0]["name"]).write_bytes(gzip.compress(b'{"id":1}\n'))
+    writer = mock.MagicMock()
+
+    with pytest.raises(InvalidArtifactError, match="digest"):
+        load_artifact(tmp_path, service=IndexingService(writer=writer, reader=mock.MagicMock()))
+
+    writer.prepare_build_index.assert_called_once_with(IndexType.TEXTS)
+    writer.swap_with_build.assert_not_called()
+
+
+def test_an_unfinished_build_is_not_loadable(tmp_path):
+    (tmp_path / "texts").mkdir()
+
+    with pytest.raises(InvalidArtifactError, match="missing or incomplete"):
+        read_manifest(tmp_path)
@@ -0,0 +1,149 @@
+"""Async search path: the httpx-backed reader, AsyncSearchService and the async views."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+from meilisearch.errors import MeilisearchCommunicationError
+import pytest
+from rest_framework import status
+
+from apps.search.meilisearch.reader import AsyncMeilisearchIndexReader
+from apps.search.meilisearch.transport import AsyncMeilisearchClient, MeilisearchTransport
+from apps.search.services import AsyncSearchService, SearchService
+from apps.search.suggestions import PrefixDictionary, SuggestionStore
+from apps.search.types import IndexType, SearchCursor, SearchQuery, SearchResult
+
+
+def _reader(handler, monkeypatch) -> tuple[AsyncMeilisearchIndexReader, MeilisearchTransport]:
+    monkeypatch.setattr("apps.search.meilisearch.transport.asyncio.sleep", AsyncMock())
+    transport = MeilisearchTransport(
+        pool_size=4,
+        connect_timeout=1.0,
+        read_timeout=2.0,
+        write_timeout=30.0,
+        read_retries=2,
+        breaker_threshold=5,
+        breaker_cooldown=60.0,
+    )
+    monkeypatch.setattr(transport, "async_session", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    reader = AsyncMeilisearchIndexReader()
+    reader._client = AsyncMeilisearchClient(url="http://meili:7700", api_key="key", transport=transport)
+    return reader, transport
+
+
+def test_reader_posts_the_same_search_as_the_sync_reader(monkeypatch):
+    requests_seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(200, json={"hits": [{"id": 3}], "estimatedTotalHits": 1, "facetDistribution": {}})
+
+    reader, _ = _reader(handler, monkeypatch)
+    query = SearchQuery(q="ely", limit=5)
+
+    result, facets = asyncio.run(reader.search(IndexType.SCRIBES, query, facet_attributes=["scriptorium"]))
+
+    assert (result.hits, result.total, facets.facet_distribution) == ([{"id": 3}], 1, {})
+    (request,) = requests_seen
+    assert str(request.url).endswith("/indexes/scribes/search")
+    assert request.headers["Authorization"] == "Bearer key"
+    uid, q_text, opt_params = reader._build_search_params(IndexType.SCRIBES, query, ["scriptorium"])
+    assert json.loads(request.content) == {"q": q_text, **opt_params}
+
+
+def test_cursor_pages_share_one_multi_search(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/multi-search"
+        assert len(json.loads(request.content)["queries"]) == 2
+        return httpx.Response(200, json={"results": [{"hits": [], "totalHits": 50}, {"hits": [{"id": 31}]}]})
+
+    reader, _ = _reader(handler, monkeypatch)
+    query = SearchQuery(limit=1, cursor=SearchCursor(values=(30,)))
+
+    result, _ = asyncio.run(reader.search(IndexType.GRAPHS, query))
+
+    assert (result.hits, result.total) == ([{"id": 31}], 50)
+
+
+def test_reads_are_retried_and_missing_documents_are_none(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(404, json={"message": "Document `9` not found.", "code": "document_not_found"})
+
+    reader, transport = _reader(handler, monkeypatch)
+
+    assert asyncio.run(reader.get_document_by_id(IndexType.HANDS, 9)) is None
+    assert len(calls) == 2
+    assert transport.stats()["operations"]["GET indexes/{uid}/documents/{id}"]["count"] == 2
+
+
+def test_unreachable_meilisearch_raises_the_sdk_error(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused")
+
+    reader, _ = _reader(handler, monkeypatch)
+
+    with pytest.raises(MeilisearchCommunicationError):
+        asyncio.run(reader.search(IndexType.HANDS, SearchQuery(q="x")))
+
+
+@pytest.mark.parametrize("error", [httpx.DecodingError("bad gzip"), asyncio.CancelledError()])
+def test_a_probe_that_ends_without_a_response_reopens_the_breaker(monkeypatch, error):
+    failing = True
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if failing:
+            raise error
+        return httpx.Response(200, json={"hits": [], "estimatedTotalHits": 0, "facetDistribution": {}})
+
+    reader, transport = _reader(handler, monkeypatch)
+    for _ in range(5):
+        transport.breaker.record_failure()
+    transport.breaker.cooldown = 0
+
+    with pytest.raises((MeilisearchCommunicationError, asyncio.CancelledError)):
+        asyncio.run(reader.search(IndexType.HANDS, SearchQuery(q="x")))
+    assert transport.stats()["circuit"] == "half-open"
+
+    failing = False
+    asyncio.run(reader.search(IndexType.HANDS, SearchQuery(q="x")))
+    assert transport.stats()["circuit"] == "closed"
+
+
+def test_async_suggest_matches_the_sync_service():
+    dictionary = PrefixDictionary.build([["William, scribe", "7", 3]], version=1)
+    store = MagicMock(spec=SuggestionStore)
+    store.current.return_value = {IndexType.SCRIBES: dictionary}
+    hit = {"id": 12, "shelfmark": "DCD Misc. Ch. 608", "_formatted": {"content": "__hl_start__Willelmus__hl_end__"}}
+    results = [(IndexType.TEXTS, SearchResult(hits=[hit], total=1, limit=5, offset=0))]
+    sync_reader = MagicMock()
+    sync_reader.multi_search.return_value = results
+    async_reader = MagicMock()
+    async_reader.multi_search = AsyncMock(return_value=results)
+    index_types = [IndexType.SCRIBES, IndexType.TEXTS]
+
+    expected = SearchService(reader=sync_reader, suggestions=store).suggest(index_types, "wil")
+    actual = asyncio.run(AsyncSearchService(reader=async_reader, suggestions=store).suggest(index_types, "wil"))
+
+    assert actual == expected
+    assert actual["scribes"] == [{"id": "7", "label": "William, scribe"}]
+    assert async_reader.multi_search.call_args.args == sync_reader.multi_search.call_args.args
+
+
+@pytest.mark.django_db
+def test_list_endpoint_awaits_the_async_reader(api_client, monkeypatch):
+    reader = MagicMock()
+    reader.search = AsyncMock(return_value=(SearchResult(hits=[{"id": 4}], total=1, limit=20, offset=0), None))
+    monkeypatch.setattr("apps.search.services.AsyncMeilisearchIndexReader", lambda: reader)
+
+    response = api_client.get("/api/v1/search/hands/", {"q": "main"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.data["results"], response.data["total"]) == ([{"id": 4}], 1)
+    reader.search.assert_awaited_once()
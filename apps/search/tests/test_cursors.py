@@ -0,0 +1,188 @@
+"""Cursor (keyset) pagination: tokens, keyset filters, reader and links."""
+
+import re
+from unittest.mock import MagicMock, patch
+
+from django.http import QueryDict
+import pytest
+from rest_framework import status
+
+from apps.search.cursors import decode_cursor, encode_cursor, order_keys, page_cursors
+from apps.search.meilisearch.filters import build_keyset_filter
+from apps.search.meilisearch.reader import MeilisearchIndexReader
+from apps.search.parsers import parse_search_query
+from apps.search.types import FacetResult, IndexType, SearchCursor, SearchQuery, SearchResult, SortSpec
+
+DATE_DESC = SortSpec(attribute="date_min", ascending=False)
+
+
+def test_order_ends_with_the_keyset_attributes():
+    assert [str(key) for key in order_keys(IndexType.ITEM_PARTS, DATE_DESC)] == ["date_min:desc", "id:asc"]
+    assert [str(key) for key in order_keys(IndexType.CLAUSES, None)] == ["image_text:asc", "fragment:asc"]
+    assert [str(key) for key in order_keys(IndexType.GRAPHS, SortSpec("id", ascending=False))] == ["id:desc"]
+
+
+def test_cursor_round_trips_only_for_its_own_ordering():
+    keys = order_keys(IndexType.ITEM_PARTS, DATE_DESC)
+    token = encode_cursor(keys, SearchCursor(values=(1150, 42), backward=True))
+
+    assert decode_cursor(token, IndexType.ITEM_PARTS, DATE_DESC) == SearchCursor(values=(1150, 42), backward=True)
+    assert decode_cursor(token, IndexType.ITEM_PARTS, None) is None
+    assert decode_cursor("not-a-cursor", IndexType.ITEM_PARTS, DATE_DESC) is None
+    # Keyset attributes are never missing, so a null there is rejected.
+    assert (
+        decode_cursor(encode_cursor(keys, SearchCursor(values=(1150, None))), IndexType.ITEM_PARTS, DATE_DESC) is None
+    )
+
+
+def test_keyset_filter_expands_lexicographically():
+    keys = order_keys(IndexType.CLAUSES, None)
+
+    forward = build_keyset_filter(keys, SearchCursor(values=(7, 2)), nullable_leading=False)
+    backward = build_keyset_filter(keys, SearchCursor(values=(7, 2), backward=True), nullable_leading=False)
+
+    assert forward == "(image_text > 7) OR (image_text = 7 AND fragment > 2)"
+    assert backward == "(image_text < 7) OR (image_text = 7 AND fragment < 2)"
+
+
+def test_keyset_filter_keeps_documents_missing_the_sort_attribute_last():
+    keys = order_keys(IndexType.ITEM_PARTS, DATE_DESC)
+
+    valued = build_keyset_filter(keys, SearchCursor(values=(1150, 9)), nullable_leading=True)
+    in_tail = build_keyset_filter(keys, SearchCursor(values=(None, 9), backward=True), nullable_leading=True)
+
+    assert valued == (
+        "(date_min < 1150) OR (date_min = 1150 AND id > 9) OR ((date_min NOT EXISTS OR date_min IS NULL))"
+    )
+    assert in_tail == "((date_min NOT EXISTS OR date_min IS NULL) AND id < 9)"
+
+
+def test_parser_opts_in_only_for_filter_only_queries():
+    browse = parse_search_query(QueryDict("pagination=cursor&offset=40&type=charter"), IndexType.ITEM_PARTS)
+    full_text = parse_search_query(QueryDict("pagination=cursor&q=ely"), IndexType.ITEM_PARTS)
+    stale = parse_search_query(QueryDict("cursor=garbage&offset=40"), IndexType.ITEM_PARTS)
+
+    assert browse.cursor == SearchCursor() and browse.offset == 40
+    assert browse.filter_spec.equal == {"type": "charter"}
+    assert full_text.cursor is None
+    assert stale.cursor == SearchCursor() and stale.offset == 0
+
+
+def test_page_cursors_point_at_the_boundary_hits():
+    query = SearchQuery(sort_spec=DATE_DESC, cursor=SearchCursor())
+    result = SearchResult(hits=[{"id": 3, "date_min": 1200}, {"id": 5}], total=10, limit=2, offset=2)
+
+    next_token, previous_token = page_cursors(IndexType.ITEM_PARTS, query, result)
+
+    assert decode_cursor(next_token, IndexType.ITEM_PARTS, DATE_DESC) == SearchCursor(values=(None, 5))
+    assert decode_cursor(previous_token, IndexType.ITEM_PARTS, DATE_DESC) == SearchCursor(
+        values=(1200, 3), backward=True
+    )
+
+
+def test_page_cursors_skip_string_sort_values():
+    query = SearchQuery(sort_spec=SortSpec("repository_name"), cursor=SearchCursor())
+    result = SearchResult(hits=[{"id": 3, "repository_name": "BL"}], total=10, limit=1, offset=0)
+
+    assert page_cursors(IndexType.ITEM_PARTS, query, result) == (None, None)
+
+
+class TestReaderAfterCursor:
+    def _reader(self, count_body: dict, page_body: dict) -> MeilisearchIndexReader:
+        reader = MeilisearchIndexReader()
+        reader._client = MagicMock()
+        reader._client.multi_search.return_value = {"results": [count_body, page_body]}
+        return reader
+
+    def test_forward_page_seeks_and_derives_its_offset(self):
+        reader = self._reader(
+            {"hits": [], "totalHits": 50, "facetDistribution": {"type": {"charter": 50}}},
+            {"hits": [{"id": 31}, {"id": 32}], "totalHits": 20},
+        )
+        query = SearchQuery(limit=2, offset=99, cursor=SearchCursor(values=(30,)))
+
+        result, facets = reader.search(IndexType.GRAPHS, query, facet_attributes=["type"])
+
+        count_query, page_query = reader._client.multi_search.call_args.args[0]
+        assert "filter" not in count_query and count_query["facets"] == ["type"]
+        assert page_query["filter"] == "(id > 30)"
+        assert page_query["sort"] == ["id:asc"] and page_query["offset"] == 0
+        assert (result.total, result.offset, result.hits) == (50, 30, [{"id": 31}, {"id": 32}])
+        assert facets == FacetResult(facet_distribution={"type": {"charter": 50}}, facet_stats={})
+
+    def test_backward_page_is_fetched_reversed_and_flipped_back(self):
+        reader = self._reader({"hits": [], "totalHits": 50}, {"hits": [{"id": 29}, {"id": 28}], "totalHits": 29})
+        query = SearchQuery(limit=2, cursor=SearchCursor(values=(30,), backward=True))
+
+        result, _ = reader.search(IndexType.GRAPHS, query)
+
+        page_query = reader._client.multi_search.call_args.args[0][1]
+        assert page_query["filter"] == "(id < 30)" and page_query["sort"] == ["id:desc"]
+        assert result.hits == [{"id": 28}, {"id": 29}]
+        assert result.offset == 27
+
+
+class _InMemoryMeilisearch:
+    """Just enough of Meilisearch's multi-search to page through *docs*: numeric
+    keyset filters, and sorts that put documents missing an attribute last."""
+
+    def __init__(self, docs: list[dict]):
+        self.docs = docs
+
+    def multi_search(self, queries: list[dict]) -> dict:
+        return {"results": [self._search(query) for query in queries]}
+
+    def _search(self, query: dict) -> dict:
+        hits = [doc for doc in self.docs if self._matches(doc, query.get("filter"))]
+        for spec in reversed(query.get("sort", [])):
+            attribute, direction = spec.split(":")
+            valued = [doc for doc in hits if doc.get(attribute) is not None]
+            valued.sort(key=lambda doc: doc[attribute], reverse=direction == "desc")
+            hits = valued + [doc for doc in hits if doc.get(attribute) is None]
+        start = query.get("offset", 0)
+        return {"hits": hits[start : start + query["limit"]], "totalHits": len(hits)}
+
+    @staticmethod
+    def _matches(doc: dict, expression: str | None) -> bool:
+        if not expression:
+            return True
+        python = re.sub(r"\((\w+) NOT EXISTS OR \1 IS NULL\)", r"(doc.get('\1') is None)", expression)
+        python = re.sub(r"(\w+) EXISTS AND \1 IS NOT NULL", r"doc.get('\1') is not None", python)
+        python = re.sub(
+            r"(\w+) ([<>=]) (-?\d+)",
+            lambda m: f"(doc.get('{m[1]}') is not None and doc['{m[1]}'] {'==' if m[2] == '=' else m[2]} {m[3]})",
+            python,
+        )
+        return eval(python.replace(" AND ", " and ").replace(" OR ", " or "), {}, {"doc": doc})
+
+
+def test_backward_pages_leave_the_null_tail_for_the_valued_hits():
+    dates = {1: 1200, 2: 1100, 3: None, 4: 1300, 5: None, 6: None, 7: 1150}
+    reader = MeilisearchIndexReader()
+    reader._client = _InMemoryMeilisearch([{"id": pk, "date_min": date} for pk, date in dates.items()])
+    # date_min:desc, then id, with the undated parts last: 4 1 7 2 | 3 5 6.
+    pages = []
+    cursor = SearchCursor(values=(None, 5), backward=True)
+    while True:
+        query = SearchQuery(limit=2, sort_spec=DATE_DESC, cursor=cursor)
+        result, _ = reader.search(IndexType.ITEM_PARTS, query)
+        pages.append(([hit["id"] for hit in result.hits], result.offset))
+        if not result.offset:
+            break
+        first = result.hits[0]
+        cursor = SearchCursor(values=(first.get("date_min"), first["id"]), backward=True)
+
+    assert pages == [([2, 3], 3), ([1, 7], 1), ([4], 0)]
+
+
+@pytest.mark.django_db
+def test_facets_links_switch_to_cursors(api_client):
+    page = SearchResult(hits=[{"id": 21}, {"id": 22}], total=50, limit=2, offset=20, next_cursor="NEXT")
+    facets = FacetResult(facet_distribution={}, facet_stats={})
+    with patch("apps.search.views_search.AsyncSearchService.search_with_facets", return_value=(page, facets)):
+        response = api_client.get("/api/v1/search/graphs/facets/", {"pagination": "cursor", "offset": "20"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "cursor=NEXT" in response.data["next"] and "offset=" not in response.data["next"]
+    # No previous cursor could be cut: the link falls back to an offset.
+    assert "offset=18" in response.data["previous"] and "cursor=" not in response.data["previous"]
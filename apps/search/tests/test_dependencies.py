@@ -0,0 +1,72 @@
+"""Reverse dependency map: upstream ORM rows → affected index source rows."""
+
+import pytest
+
+from apps.search.registry import INDEX_REGISTRY, get_queryset_for_index
+from apps.search.services import affected_object_ids
+from apps.search.types import IndexType
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("index_type", list(IndexType))
+def test_every_dependency_path_is_a_valid_lookup(index_type):
+    for dependency in INDEX_REGISTRY[index_type].dependencies:
+        # Evaluating the filter fails loudly on a typo in the lookup path.
+        list(get_queryset_for_index(index_type).filter(**{f"{dependency.path}__in": [0]}).values_list("pk"))
+
+
+@pytest.mark.django_db
+def test_repository_change_resolves_every_manuscript_bearing_index():
+    from apps.annotations.tests.factories import GraphFactory
+    from apps.manuscripts.tests.factories import (
+        CurrentItemFactory,
+        ImageTextFactory,
+        ItemImageFactory,
+        ItemPartFactory,
+    )
+    from apps.scribes.tests.factories import HandFactory
+
+    current_item = CurrentItemFactory()
+    part = ItemPartFactory(current_item=current_item)
+    image = ItemImageFactory(item_part=part)
+    text = ImageTextFactory(item_image=image)
+    hand = HandFactory(item_part=part)
+    graph = GraphFactory(item_image=image, hand=hand)
+    # An unrelated manuscript must not be swept up.
+    ItemImageFactory()
+
+    affected = affected_object_ids(("manuscripts", "Repository"), [current_item.repository_id])
+
+    assert affected[IndexType.ITEM_PARTS] == {part.pk}
+    assert affected[IndexType.ITEM_IMAGES] == {image.pk}
+    assert affected[IndexType.HANDS] == {hand.pk}
+    assert affected[IndexType.GRAPHS] == {graph.pk}
+    for index_type in (IndexType.TEXTS, IndexType.CLAUSES, IndexType.PEOPLE, IndexType.PLACES):
+        assert affected[index_type] == {text.pk}
+    assert IndexType.SCRIBES not in affected
+
+
+@pytest.mark.django_db
+def test_feature_change_resolves_graphs_and_their_images():
+    from apps.annotations.tests.factories import GraphComponentFactory
+    from apps.symbols_structure.tests.factories import FeatureFactory
+
+    graph_component = GraphComponentFactory()
+    feature = FeatureFactory()
+    graph_component.features.add(feature)
+
+    affected = affected_object_ids(("symbols_structure", "Feature"), [feature.pk])
+
+    assert affected == {
+        IndexType.GRAPHS: {graph_component.graph_id},
+        IndexType.ITEM_IMAGES: {graph_component.graph.item_image_id},
+    }
+
+
+def test_index_model_rows_map_to_themselves_without_queries(db, django_assert_num_queries):
+    del db
+    # ImageText is nobody's upstream dependency, so no join query is needed.
+    with django_assert_num_queries(0):
+        affected = affected_object_ids(("manuscripts", "ImageText"), [3, 3, None])
+    assert set(affected) == {IndexType.TEXTS, IndexType.CLAUSES, IndexType.PEOPLE, IndexType.PLACES}
+    assert affected[IndexType.TEXTS] == {3}
@@ -0,0 +1,222 @@
+"""Keyset-paged export walk, export files and the export endpoints."""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+from django.core import signing
+from django.core.cache import caches
+import pytest
+from rest_framework import status
+
+from apps.search.export import (
+    EXPORT_MAX_AGE_SECONDS,
+    claim_export_slot,
+    prune_export_files,
+    release_export_slot,
+    stream_export,
+    write_export_file,
+)
+from apps.search.services import SearchService
+from apps.search.types import FilterSpec, IndexType, SearchQuery, SearchResult
+from apps.search.views_search import EXPORT_TOKEN_SALT
+from apps.users.tests.factories import UserFactory
+
+
+@pytest.fixture
+def media_storage(settings, tmp_path):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": tmp_path}},
+    }
+    return tmp_path
+
+
+@pytest.fixture
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "export-tests"},
+    }
+    caches["locks"].clear()
+
+
+def _keyset_reader(hits: list[dict], key: str) -> MagicMock:
+    """A reader answering range-filtered, key-sorted searches over *hits*."""
+
+    def search(index_type, query, facet_attributes=None):
+        lower, upper = query.filter_spec.range_.get(key, (None, None))
+        matching = sorted(
+            (hit for hit in hits if (lower is None or hit[key] >= lower) and (upper is None or hit[key] <= upper)),
+            key=lambda hit: (hit[key], hit["id"]),
+        )
+        page = matching[query.offset : query.offset + query.limit]
+        return SearchResult(hits=page, total=len(matching), limit=query.limit, offset=query.offset), None
+
+    reader = MagicMock()
+    reader.search.side_effect = search
+    return reader
+
+
+def test_export_pages_walk_every_hit_by_id():
+    hits = [{"id": pk} for pk in range(1, 8)]
+    service = SearchService(reader=_keyset_reader(hits, "id"))
+
+    pages = list(service.iter_export_pages(IndexType.SCRIBES, SearchQuery(offset=40), page_size=3))
+
+    assert [[hit["id"] for hit in page.hits] for page in pages] == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+def test_export_pages_respect_the_callers_range():
+    hits = [{"id": pk} for pk in range(1, 8)]
+    service = SearchService(reader=_keyset_reader(hits, "id"))
+    query = SearchQuery(filter_spec=FilterSpec(range_={"id": (3, 5)}))
+
+    exported = [
+        hit["id"] for page in service.iter_export_pages(IndexType.SCRIBES, query, page_size=2) for hit in page.hits
+    ]
+
+    assert exported == [3, 4, 5]
+
+
+def test_fan_out_pages_never_split_a_source_row():
+    hits = [{"id": f"{text}_{n}", "image_text": text} for text, count in ((1, 2), (2, 5), (3, 1)) for n in range(count)]
+    service = SearchService(reader=_keyset_reader(hits, "image_text"))
+
+    pages = list(service.iter_export_pages(IndexType.CLAUSES, SearchQuery(), page_size=3))
+
+    exported = [hit["id"] for page in pages for hit in page.hits]
+    assert sorted(exported) == sorted(hit["id"] for hit in hits)
+    assert len(exported) == len(set(exported))
+    # The first page stops before image_text 2 instead of cutting it short.
+    assert [hit["image_text"] for hit in pages[0].hits] == [1, 1]
+
+
+def test_export_file_is_written_to_storage(media_storage):
+    tmp_path = media_storage
+    pages = [[{"id": 1, "name": "Ely"}], [{"id": 2, "period": "s. xii", "_formatted": {"id": "2"}}]]
+    progress = []
+
+    name, rows = write_export_file(pages, IndexType.SCRIBES, "csv", "search-exports/job.csv", on_rows=progress.append)
+
+    assert rows == 2
+    assert progress == [1, 2]
+    assert (tmp_path / name).read_bytes() == b"id,name,period\r\n1,Ely,\r\n2,,s. xii\r\n"
+
+
+def test_streamed_bibtex_separates_entries():
+    body = b"".join(stream_export("bibtex", IndexType.SCRIBES, [[{"name": "A"}], [{"name": "B"}]])).decode()
+
+    assert body.count("@misc{") == 2
+    assert "}\n\n@misc{" in body
+
+
+def test_streamed_csv_collects_its_header_from_every_page():
+    pages = [[{"id": 1}], [{"id": 2, "name": "Ely"}]]
+
+    assert b"".join(stream_export("csv", IndexType.SCRIBES, iter(pages))) == b"id,name\r\n1,\r\n2,Ely\r\n"
+
+
+def test_expired_export_files_are_pruned(media_storage):
+    (media_storage / "search-exports").mkdir()
+    old, fresh = media_storage / "search-exports/old.csv", media_storage / "search-exports/fresh.csv"
+    old.write_text("id\r\n")
+    fresh.write_text("id\r\n")
+    expired = time.time() - EXPORT_MAX_AGE_SECONDS - 60
+    os.utime(old, (expired, expired))
+
+    assert prune_export_files() == 1
+    assert not old.exists() and fresh.exists()
+
+
+def test_export_slots_cap_concurrent_jobs_per_user(locmem_locks, settings):
+    del locmem_locks
+    settings.SEARCH_EXPORT_MAX_JOBS_PER_USER = 2
+
+    assert [claim_export_slot(7) for _ in range(3)] == [True, True, False]
+    assert claim_export_slot(8) is True
+    release_export_slot(7)
+    assert claim_export_slot(7) is True
+
+
+@pytest.mark.django_db
+class TestExportEndpoints:
+    def test_large_export_starts_a_background_job(self, api_client, settings, locmem_locks):
+        del locmem_locks
+        settings.SEARCH_EXPORT_INLINE_MAX_ROWS = 10
+        user = UserFactory()
+        api_client.force_authenticate(user)
+        total = SearchResult(hits=[], total=11, limit=0, offset=0)
+        with (
+            patch("apps.search.views_search.SearchService.search", return_value=total),
+            patch("apps.search.tasks.export_search_results.delay", return_value=MagicMock(id="job-1")) as delay,
+        ):
+            response = api_client.get("/api/v1/search/scribes/export/", {"scope": "all", "export_format": "json"})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert delay.call_args.args[0] == "scribes"
+        assert delay.call_args.args[2] == "ndjson"
+        assert delay.call_args.kwargs == {"user_id": user.pk}
+        token = response.data["status_url"].rstrip("/").rsplit("/", 1)[-1]
+        assert signing.loads(token, salt=EXPORT_TOKEN_SALT) == "job-1"
+
+    def test_large_exports_need_a_signed_in_user_with_a_free_slot(self, api_client, settings, locmem_locks):
+        del locmem_locks
+        settings.SEARCH_EXPORT_INLINE_MAX_ROWS = 10
+        settings.SEARCH_EXPORT_MAX_JOBS_PER_USER = 1
+        total = SearchResult(hits=[], total=11, limit=0, offset=0)
+        params = {"scope": "all", "export_format": "csv"}
+        with (
+            patch("apps.search.views_search.SearchService.search", return_value=total),
+            patch("apps.search.tasks.export_search_results.delay", return_value=MagicMock(id="job-1")) as delay,
+        ):
+            anonymous = api_client.get("/api/v1/search/scribes/export/", params)
+            api_client.force_authenticate(UserFactory())
+            first = api_client.get("/api/v1/search/scribes/export/", params)
+            second = api_client.get("/api/v1/search/scribes/export/", params)
+
+        assert anonymous.status_code == status.HTTP_403_FORBIDDEN
+        assert (first.status_code, second.status_code) == (status.HTTP_202_ACCEPTED, status.HTTP_429_TOO_MANY_REQUESTS)
+        assert delay.call_count == 1
+
+    def test_full_inline_export_fetches_pages_while_streaming(self, api_client):
+        fetched = []
+
+        def pages(index_type, query):
+            for page in ([{"id": 1}], [{"id": 2}]):
+                fetched.append(page)
+                yield SearchResult(hits=page, total=2, limit=1, offset=0)
+
+        total = SearchResult(hits=[], total=2, limit=0, offset=0)
+        with (
+            patch("apps.search.views_search.SearchService.search", return_value=total),
+            patch("apps.search.views_search.SearchService.iter_export_pages", side_effect=pages),
+        ):
+            response = api_client.get("/api/v1/search/scribes/export/", {"scope": "all", "export_format": "ndjson"})
+            assert fetched == []
+            body = b"".join(response.streaming_content)
+
+        assert body == b'{"id": 1}\n{"id": 2}\n'
+
+    def test_small_export_streams_inline(self, api_client):
+        page = SearchResult(hits=[{"id": 1, "name": "Ely"}], total=1, limit=20, offset=0)
+        with patch("apps.search.views_search.SearchService.search", return_value=page):
+            response = api_client.get("/api/v1/search/scribes/export/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Disposition"] == 'attachment; filename="scribes.csv"'
+        assert b"".join(response.streaming_content) == b"id,name\r\n1,Ely\r\n"
+
+    def test_status_links_the_finished_file(self, api_client):
+        token = signing.dumps("job-1", salt=EXPORT_TOKEN_SALT)
+        info = {"task_id": "job-1", "state": "SUCCESS", "result": {"file": "search-exports/job-1.csv"}}
+        with patch("apps.search.views_search.SearchAdminService.task_status", return_value=info):
+            response = api_client.get(f"/api/v1/search/exports/{token}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["download_url"].endswith("search-exports/job-1.csv")
+
+    def test_status_rejects_unsigned_ids(self, api_client):
+        response = api_client.get("/api/v1/search/exports/job-1/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,77 @@
+"""Persistent markup extraction cache."""
+
+from unittest import mock
+
+import pytest
+
+from apps.search import extraction
+from apps.search.documents.utils import extract_markup
+from apps.search.models import MarkupExtraction
+
+CONTENT = (
+    '<span data-dpt="clause" data-dpt-type="address">Alpha</span>'
+    '<span data-dpt="clause">Beta</span>'
+    '<span data-dpt="person" data-dpt-type="name">John</span>'
+)
+
+
+def test_content_hash_depends_on_parser_version(monkeypatch):
+    before = extraction.content_hash(CONTENT)
+    monkeypatch.setattr(extraction, "PARSER_VERSION", extraction.PARSER_VERSION + 1)
+
+    assert extraction.content_hash(CONTENT) != before
+
+
+@pytest.mark.django_db
+def test_extractions_are_parsed_once_and_then_served_from_the_table():
+    with mock.patch.object(extraction, "extract_all", wraps=extraction.extract_all) as parse:
+        first = extraction.extractions_for([CONTENT, CONTENT, ""])
+        second = extraction.extractions_for([CONTENT])
+
+    assert parse.call_count == 1
+    (stored,) = MarkupExtraction.objects.all()
+    assert set(first) == set(second) == {stored.content_hash}
+    assert (stored.clause_count, stored.person_count, stored.place_count) == (2, 1, 0)
+    assert stored.untyped_clause_count == 1
+    assert second[stored.content_hash].as_extracted()["people"][0]["name"] == "John"
+
+
+@pytest.mark.django_db
+def test_preloader_hands_cached_markup_to_builders():
+    from apps.search.tests.test_annotation_id_documents import _fake_image_text
+
+    extraction.extractions_for([CONTENT])
+    obj = _fake_image_text(CONTENT)
+
+    with mock.patch.object(extraction, "extract_all") as parse:
+        extraction.preload_markup_extractions([obj])
+        extracted = extract_markup(obj)
+
+    parse.assert_not_called()
+    assert [clause["content"] for clause in extracted["clauses"]] == ["Alpha", "Beta"]
+
+
+@pytest.mark.django_db
+def test_image_text_save_fills_the_cache(django_capture_on_commit_callbacks):
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    with mock.patch("apps.search.signals.schedule_pending_sync"):
+        with django_capture_on_commit_callbacks(execute=True):
+            ImageTextFactory(content=CONTENT)
+
+    assert MarkupExtraction.objects.filter(content_hash=extraction.content_hash(CONTENT)).exists()
+
+
+@pytest.mark.django_db
+def test_prune_keeps_only_extractions_current_texts_use():
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    with mock.patch("apps.search.signals.schedule_pending_sync"):
+        ImageTextFactory(content=CONTENT)
+    extraction.extractions_for([CONTENT, "<p>Gone</p>"])
+    MarkupExtraction.objects.create(
+        content_hash="old", parser_version=extraction.PARSER_VERSION - 1, clauses=[], people=[], places=[]
+    )
+
+    assert extraction.prune_extractions(batch_size=1) == 2
+    assert list(MarkupExtraction.objects.values_list("content_hash", flat=True)) == [extraction.content_hash(CONTENT)]
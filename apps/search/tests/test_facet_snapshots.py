@@ -0,0 +1,110 @@
+"""Landing-page facet snapshots: capture after writes, serve while current."""
+
+from unittest.mock import MagicMock
+
+from django.core.cache import caches
+import pytest
+from rest_framework import status
+
+from apps.search.facet_snapshots import LandingSnapshotStore, capture_landing_snapshot, is_landing_query
+from apps.search.models import FacetSnapshot
+from apps.search.result_cache import bump_generation, current_generations
+from apps.search.services import IndexingService, SearchService
+from apps.search.types import FacetResult, FilterSpec, IndexType, SearchCursor, SearchQuery, SearchResult, SortSpec
+
+
+@pytest.fixture
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "facet-snapshot-tests"},
+    }
+    caches["locks"].clear()
+
+
+def _landing_reader() -> MagicMock:
+    reader = MagicMock()
+    reader.search.return_value = (
+        SearchResult(hits=[{"id": pk} for pk in range(1, 21)], total=340, limit=20, offset=0),
+        FacetResult(
+            facet_distribution={"type": {"charter": 300, "brieve": 40}, "format": {"sheet": 340}},
+            facet_stats={"date_min": {"min": 1093.0, "max": 1286.0}},
+        ),
+    )
+    return reader
+
+
+def test_only_unfiltered_first_pages_are_landing_queries():
+    assert is_landing_query(SearchQuery())
+    assert is_landing_query(SearchQuery(limit=0, cursor=SearchCursor()))
+    assert not is_landing_query(SearchQuery(q="ely"))
+    assert not is_landing_query(SearchQuery(filter_spec=FilterSpec(equal={"type": "charter"})))
+    assert not is_landing_query(SearchQuery(sort_spec=SortSpec("date_min")))
+    assert not is_landing_query(SearchQuery(offset=20))
+    assert not is_landing_query(SearchQuery(limit=50))
+
+
+@pytest.mark.django_db
+class TestLandingSnapshots:
+    def test_landing_facets_are_served_without_meilisearch(self, locmem_locks):
+        del locmem_locks
+        capture_landing_snapshot(IndexType.ITEM_PARTS, _landing_reader())
+        reader = MagicMock()
+        service = SearchService(reader=reader, snapshots=LandingSnapshotStore())
+
+        result, facets = service.search_with_facets(IndexType.ITEM_PARTS, SearchQuery(limit=5), ["type"])
+
+        reader.search.assert_not_called()
+        assert (result.total, [hit["id"] for hit in result.hits]) == (340, [1, 2, 3, 4, 5])
+        assert facets == FacetResult(facet_distribution={"type": {"charter": 300, "brieve": 40}}, facet_stats={})
+
+    def test_a_later_write_retires_the_snapshot(self, locmem_locks):
+        del locmem_locks
+        capture_landing_snapshot(IndexType.ITEM_PARTS, _landing_reader())
+        store = LandingSnapshotStore()
+        assert store.get(IndexType.ITEM_PARTS) is not None
+
+        bump_generation(IndexType.ITEM_PARTS)
+        reader = _landing_reader()
+        SearchService(reader=reader, snapshots=store).search_with_facets(IndexType.ITEM_PARTS, SearchQuery(), ["type"])
+
+        reader.search.assert_called_once()
+
+    def test_unknown_facets_fall_through_to_meilisearch(self, locmem_locks):
+        del locmem_locks
+        capture_landing_snapshot(IndexType.ITEM_PARTS, _landing_reader())
+        reader = _landing_reader()
+        service = SearchService(reader=reader, snapshots=LandingSnapshotStore())
+
+        service.search_with_facets(IndexType.ITEM_PARTS, SearchQuery(), ["repository_name", "not_snapshotted"])
+
+        reader.search.assert_called_once()
+
+    def test_rebuild_captures_the_swapped_in_index(self, locmem_locks):
+        del locmem_locks
+        reader = _landing_reader()
+        service = IndexingService(writer=MagicMock(), reader=reader)
+        service.begin_sharded_reindex(IndexType.SCRIBES, 1, token="run-1")
+
+        service.finish_sharded_reindex(IndexType.SCRIBES, token="run-1")
+
+        snapshot = FacetSnapshot.objects.get(index_type=IndexType.SCRIBES.value)
+        assert snapshot.generation == current_generations([IndexType.SCRIBES])[0]
+        assert snapshot.total == 340
+        query = reader.search.call_args.args[1]
+        assert reader.search.call_args.kwargs == {"facet_attributes": ["scriptorium"]}
+        assert is_landing_query(query)
+
+    def test_facets_endpoint_answers_an_empty_request_from_the_snapshot(self, api_client, locmem_locks, monkeypatch):
+        del locmem_locks
+        capture_landing_snapshot(IndexType.ITEM_PARTS, _landing_reader())
+        reader = MagicMock()
+        monkeypatch.setattr("apps.search.services.AsyncMeilisearchIndexReader", lambda: reader)
+        monkeypatch.setattr("apps.search.services.get_landing_snapshots", LandingSnapshotStore)
+
+        response = api_client.get("/api/v1/search/item-parts/facets/", {"limit": "0"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 340
+        assert response.data["facetDistribution"]["type"] == {"charter": 300, "brieve": 40}
+        reader.search.assert_not_called()
@@ -0,0 +1,47 @@
+"""Canonical filter trees and their Meilisearch rendering."""
+
+from apps.search.filter_ast import And, Bound, In, Or, canonicalize, filter_spec_to_node
+from apps.search.meilisearch.filters import build_meilisearch_filter
+from apps.search.result_cache import normalise_query
+from apps.search.types import FilterSpec, IndexType, SearchQuery
+
+
+def test_list_filters_render_as_in_and_not_in():
+    spec = FilterSpec(
+        equal={"type": ["charter", "brieve", "charter"]},
+        not_equal={"repository_city": ["Durham", "Ely"]},
+    )
+
+    assert build_meilisearch_filter(spec, IndexType.ITEM_PARTS) == (
+        'repository_city NOT IN ["Durham", "Ely"] AND type IN ["brieve", "charter"]'
+    )
+
+
+def test_overlapping_ranges_merge_to_the_tightest_bounds():
+    spec = FilterSpec(range_={"date_min": (1100, 1300)}, min_date=1150)
+
+    assert build_meilisearch_filter(spec, IndexType.ITEM_PARTS) == "date_min <= 1300 AND date_min >= 1150"
+
+
+def test_nested_groups_flatten_and_duplicates_drop():
+    node = And((In("a", (1,)), And((In("a", (1.0,)), Bound("b", 2, lower=True))), Or((In("c", ("x",)),))))
+
+    assert canonicalize(node) == And((Bound("b", 2, lower=True), In("a", (1,)), In("c", ("x",))))
+
+
+def test_or_keeps_the_loosest_bound():
+    node = Or((Bound("date_min", 1200, lower=True), Bound("date_min", 1100, lower=True)))
+
+    assert canonicalize(node) == Bound("date_min", 1100, lower=True)
+
+
+def test_empty_spec_has_no_filter():
+    assert filter_spec_to_node(FilterSpec(equal={"type": []})) is None
+    assert build_meilisearch_filter(FilterSpec(), IndexType.ITEM_PARTS) is None
+
+
+def test_equivalent_filters_share_a_cache_key():
+    split = SearchQuery(filter_spec=FilterSpec(equal={"type": "charter"}, in_={"format": ["b", "a"]}))
+    merged = SearchQuery(filter_spec=FilterSpec(in_={"type": ["charter"], "format": ["a", "b", "a"]}))
+
+    assert normalise_query(split) == normalise_query(merged)
@@ -1,7 +1,12 @@
+import json
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
-from apps.search.services import IndexingService
+from django.core.cache import caches
+import pytest
+
+from apps.search.models import IndexSyncState
+from apps.search.services import IndexingService, ReindexInProgressError, reindex_lock
 from apps.search.types import IndexType
 
 
@@ -17,6 +22,23 @@ class _FakeQuerySet:
         yield from self._items
 
 
+class _Row(dict):
+    """A fake source row: builders read ``obj["id"]``, the sync tally reads ``obj.pk``."""
+
+    @property
+    def pk(self):
+        return self["id"]
+
+
+def _ingested(fake_writer) -> list[dict]:
+    """Decode the NDJSON payloads a fake writer was asked to ingest."""
+    return [
+        json.loads(line)
+        for call in fake_writer.add_ndjson_to_build.call_args_list
+        for line in call.args[1].splitlines()
+    ]
+
+
 def test_reindex_uses_builder_iterable_contract(monkeypatch, db):
     del db
     fake_writer = MagicMock()
@@ -24,6 +46,7 @@ def test_reindex_uses_builder_iterable_contract(monkeypatch, db):
 
     fake_registration = SimpleNamespace(
         builder=lambda obj: ({"id": obj["id"]}, {"id": obj["id"] + 100}),
+        preloaders=(),
     )
     monkeypatch.setattr(
         "apps.search.services.get_registration",
@@ -31,19 +54,18 @@ def test_reindex_uses_builder_iterable_contract(monkeypatch, db):
     )
     monkeypatch.setattr(
         "apps.search.services.get_queryset_for_index",
-        lambda index_type: _FakeQuerySet([{"id": 1}, {"id": 2}]),
+        lambda index_type: _FakeQuerySet([_Row(id=1), _Row(id=2)]),
     )
 
     processed = service.reindex(IndexType.ITEM_PARTS)
 
     assert processed == 2
-    fake_writer.ensure_index_and_settings.assert_called_once_with(IndexType.ITEM_PARTS)
+    fake_writer.ensure_index.assert_called_once_with(IndexType.ITEM_PARTS)
+    fake_writer.ensure_index_and_settings.assert_not_called()
     # Atomic reindex pattern (P1.3): build into staging index, swap, drop old.
     fake_writer.prepare_build_index.assert_called_once_with(IndexType.ITEM_PARTS)
-    fake_writer.add_documents_to_build.assert_called_once_with(
-        IndexType.ITEM_PARTS,
-        [{"id": 1}, {"id": 101}, {"id": 2}, {"id": 102}],
-    )
+    assert _ingested(fake_writer) == [{"id": 1}, {"id": 101}, {"id": 2}, {"id": 102}]
+    fake_writer.wait_for_tasks.assert_called_once()
     fake_writer.swap_with_build.assert_called_once_with(IndexType.ITEM_PARTS)
     fake_writer.drop_build_index.assert_called_once_with(IndexType.ITEM_PARTS)
     # delete_all must NOT be called — that's the old non-atomic pattern.
@@ -56,18 +78,21 @@ def test_reindex_swap_happens_after_all_batches(monkeypatch, db):
     del db
     call_order: list[str] = []
     fake_writer = MagicMock()
-    fake_writer.add_documents_to_build.side_effect = lambda *_args, **_kw: call_order.append("write")
+    fake_writer.add_ndjson_to_build.side_effect = lambda *_args, **_kw: call_order.append("write")
+    fake_writer.wait_for_tasks.side_effect = lambda *_args, **_kw: call_order.append("wait")
     fake_writer.swap_with_build.side_effect = lambda *_args, **_kw: call_order.append("swap")
 
     monkeypatch.setattr(
         "apps.search.services.get_registration",
         lambda index_type: (
-            SimpleNamespace(builder=lambda obj: ({"id": obj["id"]},)) if index_type == IndexType.ITEM_PARTS else None
+            SimpleNamespace(builder=lambda obj: ({"id": obj["id"]},), preloaders=())
+            if index_type == IndexType.ITEM_PARTS
+            else None
         ),
     )
     monkeypatch.setattr(
         "apps.search.services.get_queryset_for_index",
-        lambda index_type: _FakeQuerySet([{"id": 1}, {"id": 2}, {"id": 3}]),
+        lambda index_type: _FakeQuerySet([_Row(id=1), _Row(id=2), _Row(id=3)]),
     )
 
     IndexingService(writer=fake_writer).reindex(IndexType.ITEM_PARTS)
@@ -75,4 +100,240 @@ def test_reindex_swap_happens_after_all_batches(monkeypatch, db):
     # Single batch in this fake, but the ordering invariant is: every "write" comes
     # before "swap" — never interleaved.
     assert "swap" in call_order
+    assert call_order.index("wait") == call_order.index("swap") - 1, "ingestion tasks must be awaited before swap"
     assert call_order.index("swap") == len(call_order) - 1, f"swap must be last; got order: {call_order}"
+
+
+class _FilterableQuerySet(_FakeQuerySet):
+    def filter(self, pk__in):
+        return [item for item in self._items if item.pk in pk__in]
+
+
+def test_sync_documents_upserts_existing_and_deletes_missing_rows(monkeypatch):
+    fake_writer = MagicMock()
+    monkeypatch.setattr(
+        "apps.search.services.get_registration",
+        lambda index_type: SimpleNamespace(builder=lambda obj: [{"id": obj.pk}], source_attribute="id", preloaders=()),
+    )
+    monkeypatch.setattr(
+        "apps.search.services.get_queryset_for_index",
+        lambda index_type: _FilterableQuerySet([SimpleNamespace(pk=1), SimpleNamespace(pk=3)]),
+    )
+
+    result = IndexingService(writer=fake_writer).sync_documents(IndexType.SCRIBES, [3, 1, 2, 3])
+
+    assert result == (2, 1)
+    fake_writer.delete_documents.assert_called_once_with(IndexType.SCRIBES, [2])
+    fake_writer.upsert_documents.assert_called_once_with(IndexType.SCRIBES, [{"id": 1}, {"id": 3}])
+    fake_writer.prepare_build_index.assert_not_called()
+
+
+def test_sync_documents_drops_fan_out_fragments_by_source_before_upsert(monkeypatch):
+    call_order: list[str] = []
+    fake_writer = MagicMock()
+    fake_writer.delete_documents_by_filter.side_effect = lambda *_a: call_order.append("delete")
+    fake_writer.upsert_documents.side_effect = lambda *_a: call_order.append("upsert")
+    monkeypatch.setattr(
+        "apps.search.services.get_registration",
+        lambda index_type: SimpleNamespace(
+            builder=lambda obj: [{"id": f"{obj.pk}_0", "image_text": obj.pk}],
+            source_attribute="image_text",
+            preloaders=(),
+        ),
+    )
+    monkeypatch.setattr(
+        "apps.search.services.get_queryset_for_index",
+        lambda index_type: _FilterableQuerySet([SimpleNamespace(pk=7)]),
+    )
+
+    IndexingService(writer=fake_writer).sync_documents(IndexType.CLAUSES, [7, 8])
+
+    fake_writer.delete_documents_by_filter.assert_called_once_with(IndexType.CLAUSES, "image_text IN [7, 8]")
+    fake_writer.upsert_documents.assert_called_once_with(IndexType.CLAUSES, [{"id": "7_0", "image_text": 7}])
+    assert call_order == ["delete", "upsert"]
+
+
+def test_sync_pending_drains_and_acknowledges_recorded_rows(monkeypatch, db):
+    del db
+    from apps.search.models import PendingIndexUpdate
+    from apps.search.services import record_pending_updates
+
+    record_pending_updates(IndexType.SCRIBES, [4, 5, 4])
+    record_pending_updates(IndexType.HANDS, [9])
+    service = IndexingService(writer=MagicMock())
+    synced: list[list[int]] = []
+    monkeypatch.setattr(service, "sync_documents", lambda index_type, ids: synced.append(list(ids)) or (2, 0))
+
+    result = service.sync_pending(IndexType.SCRIBES)
+
+    assert result == {"upserted": 2, "deleted": 0}
+    assert synced == [[4, 5, 4]]
+    assert list(PendingIndexUpdate.objects.values_list("index_type", "object_id")) == [("hands", 9)]
+    state = IndexSyncState.objects.get(index_type=IndexType.SCRIBES.value)
+    assert state.in_sync
+
+
+def test_sync_pending_does_not_mark_synced_while_updates_remain(monkeypatch, db):
+    del db
+    from apps.search.services import record_pending_updates
+
+    record_pending_updates(IndexType.SCRIBES, [4])
+    service = IndexingService(writer=MagicMock())
+    monkeypatch.setattr(service, "sync_documents", MagicMock(side_effect=RuntimeError("meili down")))
+
+    with pytest.raises(RuntimeError):
+        service.sync_pending(IndexType.SCRIBES)
+
+    assert not IndexSyncState.objects.get(index_type=IndexType.SCRIBES.value).in_sync
+
+
+def test_sync_pending_keeps_rows_when_sync_fails(monkeypatch, db):
+    del db
+    from apps.search.models import PendingIndexUpdate
+    from apps.search.services import record_pending_updates
+
+    record_pending_updates(IndexType.SCRIBES, [4])
+    service = IndexingService(writer=MagicMock())
+    monkeypatch.setattr(service, "sync_documents", MagicMock(side_effect=RuntimeError("meili down")))
+
+    with pytest.raises(RuntimeError):
+        service.sync_pending(IndexType.SCRIBES)
+
+    assert PendingIndexUpdate.objects.count() == 1
+
+
+@pytest.fixture
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sharded-reindex-tests"},
+    }
+    caches["locks"].clear()
+
+
+def test_plan_shards_splits_rows_into_contiguous_pk_ranges(monkeypatch, db):
+    del db
+    from apps.scribes.tests.factories import ScribeFactory
+
+    scribes = ScribeFactory.create_batch(5)
+    monkeypatch.setattr(IndexingService, "REINDEX_BATCH_SIZE", 2)
+
+    total, ranges = IndexingService(writer=MagicMock()).plan_shards(IndexType.SCRIBES, 8)
+
+    # Never more shards than build batches (ceil(5 / 2) == 3).
+    assert total == 5
+    assert ranges == [(None, scribes[1].pk), (scribes[1].pk, scribes[3].pk), (scribes[3].pk, None)]
+
+
+def test_shards_together_build_every_row_once_and_aggregate_progress(monkeypatch, db, locmem_locks):
+    del db, locmem_locks
+    from apps.scribes.tests.factories import ScribeFactory
+
+    scribes = ScribeFactory.create_batch(4)
+    monkeypatch.setattr(IndexingService, "REINDEX_BATCH_SIZE", 1)
+    writer = MagicMock()
+    service = IndexingService(writer=writer)
+    reporter = MagicMock()
+
+    total, ranges = service.begin_sharded_reindex(IndexType.SCRIBES, 2, token="run-1")
+    counts = [service.build_shard(IndexType.SCRIBES, lo, hi, total=total, reporter=reporter) for lo, hi in ranges]
+
+    assert counts == [2, 2]
+    written = [doc["id"] for doc in _ingested(writer)]
+    assert sorted(written) == sorted(scribe.pk for scribe in scribes)
+    # Progress is the running total across shards, not per shard.
+    assert [call.args for call in reporter.report_batch.call_args_list] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    writer.prepare_build_index.assert_called_once_with(IndexType.SCRIBES)
+    writer.swap_with_build.assert_not_called()
+
+
+def test_sharded_reindex_holds_lock_until_finished(db, locmem_locks):
+    del db, locmem_locks
+    writer = MagicMock()
+    service = IndexingService(writer=writer)
+    service.begin_sharded_reindex(IndexType.SCRIBES, 4, token="run-1")
+
+    with pytest.raises(ReindexInProgressError):
+        with reindex_lock(IndexType.SCRIBES):
+            pass
+
+    service.finish_sharded_reindex(IndexType.SCRIBES, token="run-1")
+
+    writer.swap_with_build.assert_called_once_with(IndexType.SCRIBES)
+    writer.drop_build_index.assert_called_once_with(IndexType.SCRIBES)
+    with reindex_lock(IndexType.SCRIBES):
+        pass
+
+
+def test_abort_sharded_reindex_keeps_live_index_and_releases_lock(db, locmem_locks):
+    del db, locmem_locks
+    writer = MagicMock()
+    service = IndexingService(writer=writer)
+    service.begin_sharded_reindex(IndexType.SCRIBES, 4, token="run-1")
+    # A late handler from some other run must not free this run's lock.
+    service.abort_sharded_reindex(IndexType.SCRIBES, token="stale-run")
+
+    with pytest.raises(ReindexInProgressError):
+        with reindex_lock(IndexType.SCRIBES):
+            pass
+
+    service.abort_sharded_reindex(IndexType.SCRIBES, token="run-1")
+
+    writer.swap_with_build.assert_not_called()
+    writer.drop_build_index.assert_called_with(IndexType.SCRIBES)
+    with reindex_lock(IndexType.SCRIBES):
+        pass
+
+
+def test_reindex_group_streams_rows_once_and_swaps_together(monkeypatch, db):
+    del db
+    call_order: list[str] = []
+    preloaded: list[list[int]] = []
+
+    def preload(objs):
+        preloaded.append([obj["id"] for obj in objs])
+
+    registrations = {
+        IndexType.TEXTS: SimpleNamespace(
+            index_type=IndexType.TEXTS,
+            model_label=("manuscripts", "ImageText"),
+            builder=lambda obj: [{"id": obj["id"]}],
+            preloaders=(preload,),
+        ),
+        IndexType.CLAUSES: SimpleNamespace(
+            index_type=IndexType.CLAUSES,
+            model_label=("manuscripts", "ImageText"),
+            builder=lambda obj: [{"id": f"{obj['id']}_0"}],
+            preloaders=(preload,),
+        ),
+    }
+    fetched: list[IndexType] = []
+
+    def queryset(index_type):
+        fetched.append(index_type)
+        return _FakeQuerySet([_Row(id=1), _Row(id=2)])
+
+    monkeypatch.setattr("apps.search.services.get_registration", registrations.__getitem__)
+    monkeypatch.setattr("apps.search.services.get_queryset_for_index", queryset)
+    writer = MagicMock()
+    writer.wait_for_tasks.side_effect = lambda *_a: call_order.append("wait")
+    writer.swap_many_with_build.side_effect = lambda *_a: call_order.append("swap")
+
+    processed = IndexingService(writer=writer).reindex_group([IndexType.TEXTS, IndexType.CLAUSES])
+
+    assert processed == 2
+    assert fetched == [IndexType.TEXTS]
+    # A preloader shared by both registrations runs once per batch.
+    assert preloaded == [[1, 2]]
+    built = {
+        (call.args[0], line) for call in writer.add_ndjson_to_build.call_args_list for line in call.args[1].splitlines()
+    }
+    assert built == {
+        (IndexType.TEXTS, b'{"id":1}'),
+        (IndexType.TEXTS, b'{"id":2}'),
+        (IndexType.CLAUSES, b'{"id":"1_0"}'),
+        (IndexType.CLAUSES, b'{"id":"2_0"}'),
+    }
+    assert call_order == ["wait", "wait", "swap"]
+    writer.swap_many_with_build.assert_called_once_with([IndexType.TEXTS, IndexType.CLAUSES])
+    writer.swap_with_build.assert_not_called()
@@ -0,0 +1,73 @@
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from apps.search.ingest import BuildIngestPipeline
+from apps.search.types import IndexType
+
+
+def _payload_ids(writer) -> list[list[int]]:
+    return [
+        [json.loads(line)["id"] for line in call.args[1].splitlines()]
+        for call in writer.add_ndjson_to_build.call_args_list
+    ]
+
+
+def test_payloads_are_cut_by_byte_size_and_awaited_on_exit():
+    writer = MagicMock()
+    writer.add_ndjson_to_build.side_effect = [11, 12, 13]
+    documents = [{"id": i, "text": "x" * 20} for i in range(5)]
+
+    with BuildIngestPipeline(writer, IndexType.SCRIBES, payload_bytes=60, queue_depth=1) as pipeline:
+        pipeline.add(documents)
+
+    # Each line is ~32 bytes, so every payload closes after its second document.
+    assert _payload_ids(writer) == [[0, 1], [2, 3], [4]]
+    writer.wait_for_tasks.assert_called_once_with([11, 12, 13])
+
+
+def test_writer_failure_surfaces_and_skips_waiting():
+    writer = MagicMock()
+    writer.add_ndjson_to_build.side_effect = RuntimeError("meili down")
+
+    with pytest.raises(RuntimeError, match="meili down"):
+        with BuildIngestPipeline(writer, IndexType.SCRIBES, payload_bytes=1, queue_depth=1) as pipeline:
+            pipeline.add([{"id": 1}])
+
+    writer.wait_for_tasks.assert_not_called()
+
+
+def test_build_error_stops_writer_without_waiting():
+    writer = MagicMock()
+
+    with pytest.raises(ValueError):
+        with BuildIngestPipeline(writer, IndexType.SCRIBES, payload_bytes=1, queue_depth=1) as pipeline:
+            pipeline.add([{"id": 1}])
+            raise ValueError("builder crashed")
+
+    writer.wait_for_tasks.assert_not_called()
+
+
+def test_build_error_drops_queued_payloads():
+    writer = MagicMock()
+    in_flight, release = threading.Event(), threading.Event()
+
+    def post(index_type, payload):
+        in_flight.set()
+        release.wait(timeout=5)
+        return 1
+
+    writer.add_ndjson_to_build.side_effect = post
+    timer = threading.Timer(0.2, release.set)
+
+    with pytest.raises(ValueError):
+        with BuildIngestPipeline(writer, IndexType.SCRIBES, payload_bytes=1, queue_depth=3) as pipeline:
+            pipeline.add([{"id": i} for i in range(4)])
+            assert in_flight.wait(timeout=5)
+            timer.start()
+            raise ValueError("builder crashed")
+
+    assert _payload_ids(writer) == [[0]]
+    writer.wait_for_tasks.assert_not_called()
@@ -15,9 +15,14 @@ def test_resolve_index_type_segment_raises_for_unknown():
         resolve_index_type_segment("unknown")
 
 
+TEXT_DERIVED = [IndexType.TEXTS, IndexType.CLAUSES, IndexType.PEOPLE, IndexType.PLACES]
+SINGLE_SOURCE = [index_type for index_type in IndexType if index_type not in TEXT_DERIVED]
+
+
 def test_reindex_all_uses_single_orchestration_path():
     indexing_service = MagicMock()
     indexing_service.reindex.return_value = 3
+    indexing_service.reindex_group.return_value = 3
     service = SearchOrchestrationService(indexing_service=indexing_service)
 
     result = service.reindex_all()
@@ -25,11 +30,13 @@ def test_reindex_all_uses_single_orchestration_path():
     expected_segments = {index_type.to_url_segment() for index_type in IndexType}
     assert set(result.keys()) == expected_segments
     assert all(count == 3 for count in result.values())
-    assert indexing_service.reindex.call_count == len(IndexType)
+    assert indexing_service.reindex.call_count == len(SINGLE_SOURCE)
+    # The ImageText-derived indexes are rebuilt together from one pass.
+    indexing_service.reindex_group.assert_called_once_with(TEXT_DERIVED, reporter=None)
 
 
 def test_clear_and_reindex_all_advances_reporter_per_index():
-    """The reporter is informed once per index segment (advance_to) AND for
+    """The reporter is informed once per rebuild step (advance_to) AND for
     each batch the underlying reindex emits (report_batch). The orchestrator
     is responsible only for the outer advance_to; IndexingService owns batch
     reports — verified here by having the mocked reindex echo a batch back."""
@@ -37,27 +44,36 @@ def test_clear_and_reindex_all_advances_reporter_per_index():
     indexing_service.reindex.side_effect = lambda _idx, *, reporter=None: (
         (reporter.report_batch(2, 2) if reporter else None) or 2
     )
+    indexing_service.reindex_group.side_effect = lambda _group, *, reporter=None: (
+        (reporter.report_batch(2, 2) if reporter else None) or 2
+    )
     service = SearchOrchestrationService(indexing_service=indexing_service)
     reporter = MagicMock()
 
-    service.clear_and_reindex_all(reporter=reporter)
+    result = service.clear_and_reindex_all(reporter=reporter)
 
     # No destructive pre-clear: reindex() builds into a staging index and swaps
     # atomically, so emptying the live index first would only create a
     # zero-results window (and a permanently empty index on a mid-rebuild crash).
     assert indexing_service.clear.call_count == 0
-    assert indexing_service.reindex.call_count == len(IndexType)
-    # One advance_to per index segment, in source order.
-    assert reporter.advance_to.call_count == len(IndexType)
+    assert indexing_service.reindex.call_count == len(SINGLE_SOURCE)
+    assert set(result) == {index_type.to_url_segment() for index_type in IndexType}
+    # One advance_to per rebuild step, in source order; the shared-source
+    # group counts as one step.
+    steps = len(SINGLE_SOURCE) + 1
     reporter.advance_to.assert_has_calls(
         [
-            call(position, len(IndexType), index_type.to_url_segment())
-            for position, index_type in enumerate(IndexType, start=1)
+            *(
+                call(position, steps, index_type.to_url_segment())
+                for position, index_type in enumerate(SINGLE_SOURCE, start=1)
+            ),
+            call(steps, steps, "texts, clauses, people, places"),
         ],
         any_order=False,
     )
-    # Each reindex emitted one batch through the same reporter instance.
-    assert reporter.report_batch.call_count == len(IndexType)
+    # Each rebuild emitted one batch through the same reporter instance.
+    assert reporter.report_batch.call_count == steps
     indexing_service.reindex.assert_has_calls(
-        [call(index_type, reporter=reporter) for index_type in IndexType], any_order=False
+        [call(index_type, reporter=reporter) for index_type in SINGLE_SOURCE], any_order=False
     )
+    indexing_service.reindex_group.assert_called_once_with(TEXT_DERIVED, reporter=reporter)
@@ -1,17 +1,18 @@
 """Unit tests for the query-builder (`qb`) parser.
 
 `parse_qb_param` decodes a user-supplied base64url JSON tree into a `FilterSpec`
-whose `qb_expr` is interpolated *raw* into the Meilisearch filter string
+whose `qb_filter` tree is rendered into the Meilisearch filter string
 (`apps/search/meilisearch/filters.py`). These tests pin the two security-
 relevant guards on that path — the `_filterable` field allowlist and the
-`_escape_meili` value escaping — plus the AND/OR group precedence and the
-malformed-input handling. Pure unit tests: no DB or Meilisearch required.
+value escaping — plus the canonical AND/OR rendering, the compile cache and
+the malformed-input handling. Pure unit tests: no DB or Meilisearch required.
 """
 
 import base64
 import json
 
-from apps.search.qb_parser import parse_qb_param
+from apps.search.meilisearch.filters import render_filter
+from apps.search.qb_parser import _compile_qb, parse_qb_param
 from apps.search.types import IndexType
 
 # SCRIBES filterable_attributes = ["id", "name", "period", "scriptorium"].
@@ -24,6 +25,12 @@ def _qb(node: dict) -> str:
     return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
 
+def _expr(node: dict) -> str | None:
+    spec = parse_qb_param(_qb(node), INDEX)
+    assert spec is not None
+    return render_filter(spec.qb_filter) if spec.qb_filter is not None else None
+
+
 def _cond(field, op, value=None, value_to=None) -> dict:
     node = {"t": "cond", "field": field, "op": op}
     if value is not None:
@@ -48,16 +55,12 @@ def test_unknown_field_is_dropped_and_yields_no_spec():
 
 
 def test_unknown_field_inside_group_is_dropped():
-    spec = parse_qb_param(_qb(_group("AND", _cond("evil", "is", "x"), _cond("scriptorium", "is", "Y"))), INDEX)
     # Only the allowlisted condition survives.
-    assert spec is not None
-    assert spec.qb_expr == 'scriptorium = "Y"'
+    assert _expr(_group("AND", _cond("evil", "is", "x"), _cond("scriptorium", "is", "Y"))) == 'scriptorium = "Y"'
 
 
 def test_exact_suffixed_field_normalizes_to_base_attribute():
-    spec = parse_qb_param(_qb(_cond("scriptorium_exact", "is", "Y")), INDEX)
-    assert spec is not None
-    assert spec.qb_expr == 'scriptorium = "Y"'
+    assert _expr(_cond("scriptorium_exact", "is", "Y")) == 'scriptorium = "Y"'
 
 
 # --------------------------------------------------------------------------
@@ -66,22 +69,18 @@ def test_exact_suffixed_field_normalizes_to_base_attribute():
 
 
 def test_embedded_double_quotes_are_escaped():
-    spec = parse_qb_param(_qb(_cond("scriptorium", "is", 'va"lue')), INDEX)
-    assert spec is not None
     # The embedded quote must be backslash-escaped so it cannot break out of
     # the quoted Meilisearch literal.
-    assert spec.qb_expr == 'scriptorium = "va\\"lue"'
+    assert _expr(_cond("scriptorium", "is", 'va"lue')) == 'scriptorium = "va\\"lue"'
 
 
 def test_is_not_uses_inequality():
-    spec = parse_qb_param(_qb(_cond("scriptorium", "is_not", "Y")), INDEX)
-    assert spec is not None
-    assert spec.qb_expr == 'scriptorium != "Y"'
+    assert _expr(_cond("scriptorium", "is_not", "Y")) == 'scriptorium != "Y"'
 
 
 def test_is_empty_and_is_not_empty():
-    assert parse_qb_param(_qb(_cond("scriptorium", "is_empty")), INDEX).qb_expr == "scriptorium IS NULL"
-    assert parse_qb_param(_qb(_cond("scriptorium", "is_not_empty")), INDEX).qb_expr == "scriptorium IS NOT NULL"
+    assert _expr(_cond("scriptorium", "is_empty")) == "scriptorium IS NULL"
+    assert _expr(_cond("scriptorium", "is_not_empty")) == "scriptorium IS NOT NULL"
 
 
 # --------------------------------------------------------------------------
@@ -90,14 +89,17 @@ def test_is_empty_and_is_not_empty():
 
 
 def test_gt_and_lt_coerce_numbers():
-    assert parse_qb_param(_qb(_cond("id", "gt", "5")), INDEX).qb_expr == "id >= 5.0"
-    assert parse_qb_param(_qb(_cond("id", "lt", "9")), INDEX).qb_expr == "id <= 9.0"
+    assert _expr(_cond("id", "gt", "5")) == "id >= 5"
+    assert _expr(_cond("id", "lt", "9.5")) == "id <= 9.5"
 
 
 def test_between_emits_bounded_range():
-    spec = parse_qb_param(_qb(_cond("id", "between", "1", "10")), INDEX)
-    assert spec is not None
-    assert spec.qb_expr == "(id >= 1.0 AND id <= 10.0)"
+    assert _expr(_cond("id", "between", "1", "10")) == "id <= 10 AND id >= 1"
+
+
+def test_overlapping_bounds_keep_the_tightest():
+    tree = _group("AND", _cond("id", "gt", "5"), _cond("id", "between", "1", "10"), _cond("id", "gt", "5"))
+    assert _expr(tree) == "id <= 10 AND id >= 5"
 
 
 def test_non_numeric_value_for_numeric_op_is_dropped():
@@ -119,7 +121,7 @@ def test_between_with_missing_bound_is_dropped():
 def test_contains_populates_contains_not_qb_expr():
     spec = parse_qb_param(_qb(_cond("scriptorium", "contains", "foo")), INDEX)
     assert spec is not None
-    assert spec.qb_expr is None
+    assert spec.qb_filter is None
     assert spec.contains == {"scriptorium": "foo"}
 
 
@@ -135,15 +137,15 @@ def test_starts_with_populates_starts_with():
 
 
 def test_and_group_joins_with_and():
-    spec = parse_qb_param(_qb(_group("AND", _cond("scriptorium", "is", "A"), _cond("name", "is", "B"))), INDEX)
-    assert spec is not None
-    assert spec.qb_expr == 'scriptorium = "A" AND name = "B"'
+    tree = _group("AND", _cond("scriptorium", "is", "A"), _cond("name", "is", "B"))
+    # Terms come out in canonical order, whatever order the builder sent them in.
+    assert _expr(tree) == 'name = "B" AND scriptorium = "A"'
 
 
 def test_or_group_is_parenthesized():
-    spec = parse_qb_param(_qb(_group("OR", _cond("scriptorium", "is", "A"), _cond("name", "is", "B"))), INDEX)
-    assert spec is not None
-    assert spec.qb_expr == '(scriptorium = "A" OR name = "B")'
+    assert _expr(_group("OR", _cond("scriptorium", "is", "A"), _cond("name", "is", "B"))) == (
+        'name = "B" OR scriptorium = "A"'
+    )
 
 
 def test_or_nested_in_and_is_wrapped_to_preserve_precedence():
@@ -152,10 +154,38 @@ def test_or_nested_in_and_is_wrapped_to_preserve_precedence():
         _cond("scriptorium", "is", "A"),
         _group("OR", _cond("name", "is", "B"), _cond("name", "is", "C")),
     )
-    spec = parse_qb_param(_qb(tree), INDEX)
-    assert spec is not None
+    # Equalities on one attribute under OR fold into one IN term.
+    assert _expr(tree) == 'name IN ["B", "C"] AND scriptorium = "A"'
+
+
+def test_mixed_or_nested_in_and_is_parenthesized():
+    tree = _group(
+        "AND",
+        _cond("scriptorium", "is", "A"),
+        _group("OR", _cond("name", "is", "B"), _cond("period", "is", "C")),
+    )
     # The OR branch must stay parenthesized inside the AND so precedence holds.
-    assert spec.qb_expr == 'scriptorium = "A" AND ((name = "B" OR name = "C"))'
+    assert _expr(tree) == 'scriptorium = "A" AND (name = "B" OR period = "C")'
+
+
+def test_equivalent_trees_compile_to_the_same_filter():
+    first = _group(
+        "AND", _cond("name", "is", "B"), _cond("scriptorium", "is_not", "X"), _cond("scriptorium", "is_not", "Y")
+    )
+    second = _group(
+        "AND", _cond("scriptorium", "is_not", "Y"), _cond("name", "is", "B"), _cond("scriptorium", "is_not", "X")
+    )
+    assert parse_qb_param(_qb(first), INDEX) == parse_qb_param(_qb(second), INDEX)
+    assert _expr(first) == 'name = "B" AND scriptorium NOT IN ["X", "Y"]'
+
+
+def test_compiled_blobs_are_memoised():
+    raw = _qb(_cond("scriptorium", "is", "memo"))
+    _compile_qb.cache_clear()
+    parse_qb_param(raw, INDEX)
+    parse_qb_param(raw, INDEX).contains["scriptorium"] = "mutated"
+    assert _compile_qb.cache_info().hits == 1
+    assert parse_qb_param(raw, INDEX).contains == {}
 
 
 def test_empty_group_yields_no_spec():
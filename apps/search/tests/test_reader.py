@@ -39,3 +39,38 @@ class TestMultiSearch:
 
         assert reader.multi_search([]) == []
         reader._client.multi_search.assert_not_called()
+
+
+class TestSearch:
+    def test_search_returns_hits_and_facets_from_one_request(self):
+        reader = MeilisearchIndexReader()
+        reader._client = MagicMock()
+        index = reader._client.index.return_value
+        index.search.return_value = {
+            "hits": [{"id": 1}],
+            "estimatedTotalHits": 1,
+            "limit": 20,
+            "offset": 0,
+            "facetDistribution": {"type": {"charter": 1}},
+            "facetStats": {"date_min": {"min": 1100, "max": 1100}},
+        }
+
+        result, facets = reader.search(IndexType.ITEM_PARTS, SearchQuery(q="ely"), facet_attributes=["type"])
+
+        index.search.assert_called_once()
+        assert index.search.call_args.args[1]["facets"] == ["type"]
+        assert result.hits == [{"id": 1}]
+        assert facets.facet_distribution == {"type": {"charter": 1}}
+        assert facets.facet_stats == {"date_min": {"min": 1100, "max": 1100}}
+
+    def test_zero_limit_skips_highlighting(self):
+        reader = MeilisearchIndexReader()
+        reader._client = MagicMock()
+        reader._client.index.return_value.search.return_value = {"hits": [], "estimatedTotalHits": 7, "limit": 0}
+
+        result, _ = reader.search(IndexType.ITEM_PARTS, SearchQuery(limit=0), facet_attributes=["type"])
+
+        params = reader._client.index.return_value.search.call_args.args[1]
+        assert params["limit"] == 0
+        assert "attributesToHighlight" not in params
+        assert result.total == 7
@@ -12,6 +12,7 @@ def test_lock_acquires_and_releases_on_clean_exit():
     with patch("apps.search.services.caches") as caches_mock:
         cache = caches_mock.__getitem__.return_value
         cache.add.return_value = True
+        cache.get.side_effect = lambda key: cache.add.call_args.args[1]
         with reindex_lock(IndexType.SCRIBES):
             pass
         cache.add.assert_called_once()
@@ -22,6 +23,7 @@ def test_lock_releases_even_when_body_raises():
     with patch("apps.search.services.caches") as caches_mock:
         cache = caches_mock.__getitem__.return_value
         cache.add.return_value = True
+        cache.get.side_effect = lambda key: cache.add.call_args.args[1]
         with pytest.raises(RuntimeError):
             with reindex_lock(IndexType.SCRIBES):
                 raise RuntimeError("boom")
@@ -0,0 +1,107 @@
+"""Generation-keyed search response cache."""
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import caches
+import pytest
+
+from apps.search.meilisearch.writer import MeilisearchIndexWriter
+from apps.search.result_cache import SearchResultCache, bump_generation, current_generations, normalise_query
+from apps.search.services import SearchService
+from apps.search.types import FilterSpec, IndexType, SearchQuery, SearchResult
+
+
+@pytest.fixture(autouse=True)
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "result-cache-tests"},
+    }
+    caches["locks"].clear()
+
+
+def _cache(**kwargs) -> SearchResultCache:
+    return SearchResultCache(**{"max_entries": 16, "max_bytes": 1024 * 1024, **kwargs})
+
+
+def test_hit_returns_a_private_copy_of_the_stored_result():
+    cache = _cache()
+    compute = MagicMock(return_value={"hits": [{"id": 1}]})
+
+    first = cache.get_or_compute("q", [IndexType.TEXTS], compute)
+    first["hits"].append({"id": 2})
+    second = cache.get_or_compute("q", [IndexType.TEXTS], compute)
+
+    compute.assert_called_once()
+    assert second == {"hits": [{"id": 1}]}
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 1
+
+
+def test_generation_bump_makes_entries_unreachable():
+    cache = _cache()
+    compute = MagicMock(side_effect=["old", "new"])
+
+    assert cache.get_or_compute("q", [IndexType.TEXTS, IndexType.CLAUSES], compute) == "old"
+    bump_generation(IndexType.CLAUSES)
+
+    assert cache.get_or_compute("q", [IndexType.TEXTS, IndexType.CLAUSES], compute) == "new"
+    # Other indexes keep their generation, and so their entries.
+    assert current_generations([IndexType.TEXTS]) is not None
+
+
+def test_lru_eviction_respects_entry_and_byte_bounds():
+    cache = _cache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get_or_compute(key, [IndexType.TEXTS], lambda key=key: key)
+    cache.get_or_compute("a", [IndexType.TEXTS], lambda: "unused")  # refresh "a"
+    cache.get_or_compute("c", [IndexType.TEXTS], lambda: "c")
+
+    recompute = MagicMock(return_value="b again")
+    cache.get_or_compute("b", [IndexType.TEXTS], recompute)
+    recompute.assert_called_once()
+
+    small = _cache(max_bytes=200)
+    small.get_or_compute("big", [IndexType.TEXTS], lambda: "x" * 500)
+    assert small.stats()["entries"] == 0
+
+
+def test_bypasses_cache_when_generations_are_unavailable():
+    cache = _cache()
+    compute = MagicMock(return_value="fresh")
+
+    with patch("apps.search.result_cache.current_generations", return_value=None):
+        cache.get_or_compute("q", [IndexType.TEXTS], compute)
+        cache.get_or_compute("q", [IndexType.TEXTS], compute)
+
+    assert compute.call_count == 2
+
+
+def test_normalised_query_ignores_list_order_and_whitespace():
+    a = SearchQuery(q="  william  king ", filter_spec=FilterSpec(in_={"type": ["charter", "brieve"]}))
+    b = SearchQuery(q="william king", filter_spec=FilterSpec(in_={"type": ["brieve", "charter"]}))
+    c = SearchQuery(q="william king", filter_spec=FilterSpec(range_={"date": (1100, 1200)}))
+
+    assert normalise_query(a) == normalise_query(b)
+    assert normalise_query(a) != normalise_query(c)
+
+
+def test_service_serves_repeated_searches_from_the_cache():
+    reader = MagicMock()
+    reader.search.return_value = (SearchResult(hits=[{"id": 1}], total=1, limit=20, offset=0), None)
+    service = SearchService(reader=reader, cache=_cache())
+
+    service.search(IndexType.SCRIBES, SearchQuery(q="ely"))
+    service.search(IndexType.SCRIBES, SearchQuery(q=" ely"))
+    service.search(IndexType.HANDS, SearchQuery(q="ely"))
+
+    assert reader.search.call_count == 2
+
+
+def test_writer_upserts_bump_the_generation():
+    writer = MeilisearchIndexWriter()
+    writer._client = MagicMock()
+    before = current_generations([IndexType.SCRIBES])
+
+    writer.upsert_documents(IndexType.SCRIBES, [{"id": 1}])
+
+    assert current_generations([IndexType.SCRIBES]) == (before[0] + 1,)
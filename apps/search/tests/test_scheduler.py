@@ -0,0 +1,153 @@
+"""Coalescing reindex scheduler: one queued rebuild per index, interactive before bulk."""
+
+from unittest.mock import MagicMock
+
+from django.core.cache import caches
+import pytest
+
+from apps.search import tasks
+from apps.search.admin_service import SearchAdminService
+from apps.search.scheduler import BULK, INTERACTIVE, begin_rebuild, claim_rebuild, scheduler_stats
+from apps.search.services import ReindexInProgressError
+from apps.search.types import IndexType
+
+
+@pytest.fixture
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "scheduler-tests"},
+    }
+    caches["locks"].clear()
+
+
+@pytest.fixture
+def dispatched(monkeypatch) -> list[tuple[str, dict]]:
+    calls: list[tuple[str, dict]] = []
+    for task in (tasks.reindex_search_index, tasks.clean_and_reindex_search_index, tasks.reindex_search_index_group):
+        monkeypatch.setattr(task, "apply_async", lambda name=task.name, **options: calls.append((name, options)))
+    return calls
+
+
+def test_a_burst_of_requests_queues_one_rebuild(locmem_locks, dispatched):
+    del locmem_locks
+
+    first = tasks.schedule_reindex([IndexType.SCRIBES])
+    later = [tasks.schedule_reindex([IndexType.SCRIBES]) for _ in range(4)]
+
+    ((name, options),) = dispatched
+    assert name.endswith("reindex_search_index")
+    assert options["args"] == ["scribes"]
+    # No countdown: a message held back for one would be served after due bulk work.
+    assert (options["countdown"], options["priority"], options["task_id"]) == (None, 0, first["task_id"])
+    assert later == [{"task_id": first["task_id"], "coalesced": True, "joined": [first["task_id"]]}] * 4
+    stats = scheduler_stats()
+    assert (stats["depth"], stats["coalesced"]) == (1, {"scribes": 4})
+    assert stats["queued"]["scribes"]["task_id"] == first["task_id"]
+
+
+def test_requests_during_a_run_collapse_into_one_follow_up(locmem_locks, dispatched):
+    del locmem_locks
+    running = tasks.schedule_reindex([IndexType.SCRIBES])["task_id"]
+    assert begin_rebuild([IndexType.SCRIBES], running) == [IndexType.SCRIBES]
+
+    follow_ups = {tasks.schedule_reindex([IndexType.SCRIBES])["task_id"] for _ in range(3)}
+
+    assert len(dispatched) == 2
+    assert follow_ups == {dispatched[1][1]["task_id"]}
+    assert follow_ups != {running}
+
+
+def test_interactive_requests_take_over_queued_bulk_work(locmem_locks, dispatched):
+    del locmem_locks
+    bulk = tasks.schedule_reindex([IndexType.TEXTS, IndexType.CLAUSES], priority=BULK)["task_id"]
+    interactive = tasks.schedule_reindex([IndexType.TEXTS], priority=INTERACTIVE)["task_id"]
+
+    assert [options["priority"] for _, options in dispatched] == [9, 0]
+    assert begin_rebuild([IndexType.TEXTS, IndexType.CLAUSES], bulk) == [IndexType.CLAUSES]
+    assert begin_rebuild([IndexType.TEXTS], interactive) == [IndexType.TEXTS]
+    assert scheduler_stats()["superseded"] == {"texts": 1}
+
+
+def test_a_stronger_action_takes_over_and_a_weaker_one_joins(locmem_locks, dispatched):
+    del locmem_locks
+    reindex = tasks.schedule_reindex([IndexType.SCRIBES])["task_id"]
+    clean = tasks.schedule_reindex([IndexType.SCRIBES], action="clean_and_reindex")
+    again = tasks.schedule_reindex([IndexType.SCRIBES])
+
+    assert clean["coalesced"] is False
+    assert [name.rsplit(".", 1)[-1] for name, _ in dispatched] == [
+        "reindex_search_index",
+        "clean_and_reindex_search_index",
+    ]
+    assert again == {"task_id": clean["task_id"], "coalesced": True, "joined": [clean["task_id"]]}
+    assert begin_rebuild([IndexType.SCRIBES], reindex) == []
+    assert begin_rebuild([IndexType.SCRIBES], clean["task_id"]) == [IndexType.SCRIBES]
+    assert scheduler_stats()["superseded"] == {"scribes": 1}
+
+
+def test_bulk_work_waits_out_the_debounce(locmem_locks, dispatched, settings):
+    del locmem_locks
+    settings.SEARCH_REINDEX_DEBOUNCE_SECONDS = 20
+
+    tasks.schedule_reindex([IndexType.TEXTS, IndexType.CLAUSES], priority=BULK)
+
+    ((_name, options),) = dispatched
+    assert (options["countdown"], options["priority"]) == (20, 9)
+
+
+def test_bulk_requests_join_a_queued_interactive_rebuild(locmem_locks):
+    del locmem_locks
+    claim_rebuild([IndexType.TEXTS], priority=INTERACTIVE, task_id="interactive")
+
+    claim = claim_rebuild([IndexType.TEXTS, IndexType.CLAUSES], priority=BULK, task_id="bulk")
+
+    assert claim.claimed == [IndexType.CLAUSES]
+    assert claim.coalesced == {IndexType.TEXTS: "interactive"}
+
+
+def test_a_run_that_finds_the_lock_held_requeues_itself(locmem_locks, dispatched, monkeypatch, settings):
+    del locmem_locks
+    settings.SEARCH_REINDEX_DEBOUNCE_SECONDS = 0
+    orchestration = MagicMock()
+    orchestration.reindex_index.side_effect = ReindexInProgressError("busy")
+    monkeypatch.setattr(tasks, "SearchOrchestrationService", lambda: orchestration)
+    monkeypatch.setattr(tasks.reindex_search_index, "update_state", lambda *args, **kwargs: None)
+    task_id = tasks.schedule_reindex([IndexType.SCRIBES])["task_id"]
+
+    tasks.reindex_search_index.push_request(id=task_id)
+    try:
+        result = tasks.reindex_search_index.run("scribes")
+    finally:
+        tasks.reindex_search_index.pop_request()
+
+    assert result["deferred"] is True
+    assert result["follow_up"] == dispatched[1][1]["task_id"]
+    assert dispatched[1][1]["countdown"] == 10
+    assert scheduler_stats()["deferred"] == {"scribes": 1}
+
+
+def test_scheduler_degrades_to_one_run_per_request_without_a_backend(monkeypatch):
+    monkeypatch.setattr("apps.search.scheduler.caches", {})
+
+    claim = claim_rebuild([IndexType.SCRIBES], priority=INTERACTIVE, task_id="t")
+
+    assert claim.claimed == [IndexType.SCRIBES]
+    assert begin_rebuild([IndexType.SCRIBES], "t") == [IndexType.SCRIBES]
+    assert scheduler_stats()["available"] is False
+
+
+@pytest.mark.django_db
+def test_reindex_all_queues_groups_behind_interactive_work(locmem_locks, dispatched):
+    del locmem_locks
+    service = SearchAdminService()
+    single = service.start_action("reindex", "texts")
+
+    payload = service.start_action("reindex_all", None)
+
+    assert single["coalesced"] is False
+    assert single["task_id"] in payload["task_ids"]
+    groups = [options for name, options in dispatched if name.endswith("reindex_search_index_group")]
+    (group,) = groups
+    assert "texts" not in group["args"][0]
+    assert group["priority"] == 9
@@ -111,6 +111,16 @@ class TestSearchFacetsAPI:
         assert response.data["limit"] == 10
         assert response.data["offset"] == 0
 
+    def test_facets_zero_limit_returns_counts_without_hits(self, api_client, meilisearch_indexes):
+        response = api_client.get("/api/v1/search/item-parts/facets/", {"limit": 0, "offset": 20})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == []
+        assert response.data["limit"] == 0
+        assert response.data["offset"] == 0
+        assert response.data["next"] is None
+        assert response.data["previous"] is None
+        assert isinstance(response.data["facetDistribution"], dict)
+
 
 @pytest.mark.django_db
 class TestSearchRetrieveAPI:
@@ -151,8 +161,9 @@ class TestSearchExportAPI:
         # api_client is unauthenticated; default format is CSV
         response = api_client.get("/api/v1/search/item-parts/export/")
         assert response.status_code == status.HTTP_200_OK
-        assert "content" in response.data
-        assert isinstance(response.data["content"], str)
+        assert response.streaming
+        assert response["Content-Type"].startswith("text/csv")
+        assert b"".join(response.streaming_content).startswith(b"id,")
 
     def test_export_json_fields_are_subset_of_list_fields(self, api_client, meilisearch_indexes):
         list_response = api_client.get("/api/v1/search/item-parts/", {"limit": 1})
@@ -176,6 +187,6 @@ class TestSearchExportAPI:
     def test_export_bibtex_gated_to_supported_indexes(self, api_client, meilisearch_indexes):
         ok = api_client.get("/api/v1/search/item-parts/export/", {"export_format": "bibtex"})
         assert ok.status_code == status.HTTP_200_OK
-        assert "content" in ok.data
+        assert b"@misc{" in b"".join(ok.streaming_content)
         denied = api_client.get("/api/v1/search/graphs/export/", {"export_format": "bibtex"})
         assert denied.status_code == status.HTTP_400_BAD_REQUEST
@@ -4,9 +4,16 @@ import pytest
 
 from apps.search.registry import get_queryset_for_index
 from apps.search.services import SearchService
+from apps.search.suggestions import PrefixDictionary, SuggestionStore
 from apps.search.types import FacetResult, IndexType, SearchQuery, SearchResult
 
 
+def _suggestions(dictionaries: dict[IndexType, PrefixDictionary] | None = None) -> MagicMock:
+    store = MagicMock(spec=SuggestionStore)
+    store.current.side_effect = lambda index_types: {t: d for t, d in (dictionaries or {}).items() if t in index_types}
+    return store
+
+
 class TestSearchService:
     def test_search_returns_reader_result(self):
         mock_reader = MagicMock()
@@ -41,9 +48,25 @@ class TestSearchService:
             facets,
         )
         service = SearchService(reader=mock_reader)
-        query = SearchQuery()
+        query = SearchQuery(q="ely", offset=40)
         result = service.get_facets(IndexType.ITEM_PARTS, query, ["type"])
         assert result.facet_distribution == {"type": {"charter": 2}}
+        # Facet-only: no hits are requested.
+        mock_reader.search.assert_called_once_with(
+            IndexType.ITEM_PARTS, SearchQuery(q="ely", limit=0, offset=0), facet_attributes=["type"]
+        )
+
+    def test_search_with_facets_uses_one_reader_call(self):
+        mock_reader = MagicMock()
+        hits = SearchResult(hits=[{"id": 1}], total=1, limit=20, offset=0)
+        facets = FacetResult(facet_distribution={"type": {"charter": 1}}, facet_stats={})
+        mock_reader.search.return_value = (hits, facets)
+        service = SearchService(reader=mock_reader)
+        query = SearchQuery(q="ely")
+
+        result = service.search_with_facets(IndexType.ITEM_PARTS, query, ["type"])
+
+        assert result == (hits, facets)
         mock_reader.search.assert_called_once_with(IndexType.ITEM_PARTS, query, facet_attributes=["type"])
 
     def test_get_facets_returns_empty_when_reader_returns_none_facets(self):
@@ -67,7 +90,7 @@ class TestSearchService:
         mock_reader.multi_search.return_value = [
             (IndexType.TEXTS, SearchResult(hits=[hit], total=1, limit=5, offset=0))
         ]
-        service = SearchService(reader=mock_reader)
+        service = SearchService(reader=mock_reader, suggestions=_suggestions())
 
         result = service.suggest([IndexType.TEXTS], "william", per_type_limit=5)
 
@@ -88,7 +111,7 @@ class TestSearchService:
         mock_reader.multi_search.return_value = [
             (IndexType.TEXTS, SearchResult(hits=[hit], total=1, limit=5, offset=0))
         ]
-        service = SearchService(reader=mock_reader)
+        service = SearchService(reader=mock_reader, suggestions=_suggestions())
 
         result = service.suggest([IndexType.TEXTS], "dcd", per_type_limit=5)
 
@@ -99,7 +122,7 @@ class TestSearchService:
         mock_reader.multi_search.return_value = [
             (IndexType.SCRIBES, SearchResult(hits=[{"id": 7, "name": "William, scribe"}], total=1, limit=5, offset=0))
         ]
-        service = SearchService(reader=mock_reader)
+        service = SearchService(reader=mock_reader, suggestions=_suggestions())
 
         result = service.suggest([IndexType.SCRIBES], "william", per_type_limit=5)
 
@@ -107,6 +130,36 @@ class TestSearchService:
         specs = mock_reader.multi_search.call_args.args[0]
         assert specs[0][1].attributes_to_crop == []
 
+    def test_suggest_answers_label_indexes_from_the_dictionary(self):
+        mock_reader = MagicMock()
+        dictionary = PrefixDictionary.build([["William, scribe", "7", 3], ["Walter", "8", 9]], version=1)
+        service = SearchService(reader=mock_reader, suggestions=_suggestions({IndexType.SCRIBES: dictionary}))
+
+        result = service.suggest([IndexType.SCRIBES], "wil", per_type_limit=5)
+
+        assert result == {"scribes": [{"id": "7", "label": "William, scribe"}]}
+        mock_reader.multi_search.assert_not_called()
+
+    def test_suggest_asks_meilisearch_only_for_kwic_once_texts_have_a_dictionary(self):
+        mock_reader = MagicMock()
+        hit = {"id": 12, "shelfmark": "DCD Misc. Ch. 608", "_formatted": {"content": "__hl_start__Will__hl_end__elm"}}
+        mock_reader.multi_search.return_value = [
+            (IndexType.TEXTS, SearchResult(hits=[hit], total=1, limit=5, offset=0))
+        ]
+        dictionaries = {
+            IndexType.TEXTS: PrefixDictionary.build([["willelmus", "3", 40], ["DCD Misc. Ch. 608", "12", 1]], 1),
+            IndexType.SCRIBES: PrefixDictionary.build([["William, scribe", "7", 3]], 1),
+        }
+        service = SearchService(reader=mock_reader, suggestions=_suggestions(dictionaries))
+
+        result = service.suggest([IndexType.TEXTS, IndexType.SCRIBES], "will", per_type_limit=5)
+
+        assert [item["label"] for item in result["texts"]] == ["DCD Misc. Ch. 608", "willelmus"]
+        assert result["texts"][0]["snippet"] == "__hl_start__Will__hl_end__elm"
+        ((index_type, query),) = mock_reader.multi_search.call_args.args[0]
+        assert index_type is IndexType.TEXTS
+        assert query.attributes_to_search_on == ["content"]
+
 
 @pytest.mark.django_db
 class TestGetQuerysetForIndex:
@@ -0,0 +1,63 @@
+"""Change receivers feeding incremental indexing."""
+
+from unittest import mock
+
+import pytest
+
+from apps.search.models import PendingIndexUpdate
+
+
+def _pending() -> set[tuple[str, int]]:
+    return set(PendingIndexUpdate.objects.values_list("index_type", "object_id"))
+
+
+@pytest.mark.django_db
+def test_image_text_save_marks_every_text_derived_index(django_capture_on_commit_callbacks):
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    with mock.patch("apps.search.signals.schedule_pending_sync") as schedule:
+        with django_capture_on_commit_callbacks(execute=True):
+            text = ImageTextFactory()
+
+    for index_type in ("texts", "clauses", "people", "places"):
+        assert (index_type, text.pk) in _pending()
+    scheduled = {call.args[0].value for call in schedule.call_args_list}
+    assert {"texts", "clauses", "people", "places"} <= scheduled
+
+
+@pytest.mark.django_db
+def test_delete_marks_the_removed_row():
+    from apps.scribes.tests.factories import ScribeFactory
+
+    scribe = ScribeFactory()
+    scribe_id = scribe.pk
+    PendingIndexUpdate.objects.all().delete()
+
+    scribe.delete()
+
+    assert _pending() == {("scribes", scribe_id)}
+
+
+@pytest.mark.django_db
+def test_nothing_recorded_when_auto_reindex_disabled(settings):
+    from apps.scribes.tests.factories import ScribeFactory
+
+    settings.SEARCH_AUTO_REINDEX = False
+    ScribeFactory()
+
+    assert _pending() == set()
+
+
+@pytest.mark.django_db
+def test_moving_a_graph_refreshes_the_image_it_left():
+    from apps.annotations.tests.factories import GraphFactory
+    from apps.manuscripts.tests.factories import ItemImageFactory
+
+    graph = GraphFactory()
+    old_image, new_image = graph.item_image, ItemImageFactory()
+    PendingIndexUpdate.objects.all().delete()
+
+    graph.item_image = new_image
+    graph.save()
+
+    assert {("item_images", old_image.pk), ("item_images", new_image.pk)} <= _pending()
@@ -0,0 +1,103 @@
+"""Autocomplete dictionaries: collection at rebuild, prefix lookup and reloading."""
+
+from unittest.mock import MagicMock
+
+from django.core.cache import caches
+import pytest
+
+from apps.search.models import SuggestionDictionary
+from apps.search.suggestions import PrefixDictionary, SuggestionCollector, SuggestionStore, store_suggestions
+from apps.search.types import IndexType
+
+
+@pytest.fixture
+def locmem_locks(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "locks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "suggestion-tests"},
+    }
+    caches["locks"].clear()
+
+
+def test_lookup_matches_word_starts_ignoring_case_and_accents():
+    dictionary = PrefixDictionary.build(
+        [["Durham Cathedral Library", "1", 2], ["Cathédrale de Rouen", "2", 1], ["Carlisle", "3", 5]], version=1
+    )
+
+    assert [item["label"] for item in dictionary.lookup("cathe", 5)] == [
+        "Cathédrale de Rouen",
+        "Durham Cathedral Library",
+    ]
+    assert dictionary.lookup("CATHEDRAL lib", 5) == [{"id": "1", "label": "Durham Cathedral Library"}]
+    assert dictionary.lookup("rouen", 5)[0]["id"] == "2"
+    assert dictionary.lookup("york", 5) == []
+
+
+def test_lookup_ranks_heavier_entries_first_and_respects_the_limit():
+    dictionary = PrefixDictionary.build([["Ely", "1", 2], ["Elgin", "2", 30], ["Elmham", "3", 7]], version=1)
+
+    assert [item["label"] for item in dictionary.lookup("el", 2)] == ["Elgin", "Elmham"]
+
+
+def test_collector_counts_labels_and_content_terms(settings):
+    settings.SEARCH_SUGGEST_CONTENT_TERMS = 2
+    collector = SuggestionCollector()
+    collector.add_documents(
+        [
+            {"id": 1, "shelfmark": "DCD Misc. Ch. 608", "locus": "recto", "content": "Willelmus rex Willelmus comes"},
+            {"id": 2, "shelfmark": "DCD Misc. Ch. 608", "content": "Willelmus episcopus"},
+        ]
+    )
+
+    assert collector.entries() == [
+        ["DCD Misc. Ch. 608", "1", 2],
+        ["willelmus", "1", 2],
+        ["comes", "1", 1],
+        ["recto", "1", 1],
+    ]
+
+
+def test_shard_collectors_merge_through_their_task_payload():
+    first, second = SuggestionCollector(), SuggestionCollector()
+    first.add_documents([{"id": 1, "name": "Ely"}])
+    second.add_documents([{"id": 9, "name": "Ely"}, {"id": 10, "name": "York"}])
+
+    first.merge(SuggestionCollector.from_dict(second.as_dict()))
+
+    assert first.entries() == [["Ely", "1", 2], ["York", "10", 1]]
+
+
+@pytest.mark.django_db
+def test_store_reloads_a_dictionary_once_a_rebuild_stores_a_new_version(locmem_locks):
+    del locmem_locks
+    store = SuggestionStore()
+    assert store.current([IndexType.SCRIBES]) == {}
+
+    collector = SuggestionCollector()
+    collector.add_documents([{"id": 4, "name": "Adam of Ely"}])
+    store_suggestions(IndexType.SCRIBES, collector)
+    first = store.current([IndexType.SCRIBES])[IndexType.SCRIBES]
+
+    assert first.lookup("ely", 5) == [{"id": "4", "label": "Adam of Ely"}]
+    assert store.current([IndexType.SCRIBES])[IndexType.SCRIBES] is first
+
+    collector.add_documents([{"id": 5, "name": "Elias"}])
+    store_suggestions(IndexType.SCRIBES, collector)
+
+    assert [item["label"] for item in store.current([IndexType.SCRIBES])[IndexType.SCRIBES].lookup("el", 5)] == [
+        "Elias",
+        "Adam of Ely",
+    ]
+
+
+@pytest.mark.django_db
+def test_store_falls_back_to_the_database_for_versions(monkeypatch):
+    SuggestionDictionary.objects.create(index_type=IndexType.HANDS.value, entries=[["Main hand", "3", 1]], version=7)
+    unreachable = MagicMock()
+    unreachable.get_many.side_effect = ConnectionError
+    monkeypatch.setattr("apps.search.suggestions.caches", {"locks": unreachable})
+
+    dictionaries = SuggestionStore().current([IndexType.HANDS, IndexType.SCRIBES])
+
+    assert list(dictionaries) == [IndexType.HANDS]
+    assert dictionaries[IndexType.HANDS].version == 7
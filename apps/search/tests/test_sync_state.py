@@ -0,0 +1,143 @@
+"""Materialised expected document counts and checksums."""
+
+from unittest import mock
+
+import pytest
+
+from apps.search import sync_state
+from apps.search.models import IndexSyncState
+from apps.search.registry import get_queryset_for_index, get_registration
+from apps.search.services import build_batch_documents
+from apps.search.types import IndexType
+
+TWO_CLAUSES = '<span data-dpt="clause">A</span><span data-dpt="clause">B</span>'
+ONE_CLAUSE_ONE_PERSON = '<span data-dpt="clause">C</span><span data-dpt="person">John</span>'
+TEXT_DERIVED = (IndexType.TEXTS, IndexType.CLAUSES, IndexType.PEOPLE, IndexType.PLACES)
+
+
+@pytest.fixture(autouse=True)
+def _no_pending_sync():
+    with mock.patch("apps.search.signals.schedule_pending_sync"):
+        yield
+
+
+def _expected(index_type: IndexType) -> tuple[int, int]:
+    state = IndexSyncState.objects.get(index_type=index_type.value)
+    return state.expected_documents, state.expected_checksum
+
+
+def test_checksum_is_order_independent_and_mergeable():
+    rows = [mock.Mock(pk=pk, content=f"text {pk}") for pk in range(6)]
+    forward, backward, left, right = (sync_state.IndexTally() for _ in range(4))
+    for row in rows:
+        forward.add_row(row, 1)
+    for row in reversed(rows):
+        backward.add_row(row, 1)
+    for row in rows[:2]:
+        left.add_row(row, 1)
+    for row in rows[2:]:
+        right.add_row(row, 1)
+    left.merge(right)
+
+    assert forward == backward == left
+    assert sync_state.row_digest(1, "a") != sync_state.row_digest(1, "b")
+
+
+@pytest.mark.django_db
+def test_build_tally_matches_database_recount():
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    ImageTextFactory(content=TWO_CLAUSES)
+    ImageTextFactory(content=ONE_CLAUSE_ONE_PERSON)
+    ImageTextFactory(content="")
+
+    for index_type in TEXT_DERIVED:
+        tally = sync_state.IndexTally()
+        build_batch_documents(get_registration(index_type), list(get_queryset_for_index(index_type)), tally=tally)
+        assert tally == sync_state.compute_expected(index_type), index_type
+
+    assert sync_state.compute_expected(IndexType.CLAUSES).documents == 3
+    assert sync_state.compute_expected(IndexType.TEXTS).documents == 3
+
+
+@pytest.mark.django_db
+def test_build_tally_of_a_model_without_content_matches_the_live_totals():
+    from apps.scribes.tests.factories import HandFactory
+
+    HandFactory.create_batch(3)
+
+    for index_type in (IndexType.SCRIBES, IndexType.HANDS):
+        tally = sync_state.IndexTally()
+        build_batch_documents(get_registration(index_type), list(get_queryset_for_index(index_type)), tally=tally)
+        assert tally == sync_state.live_expected(index_type), index_type
+    assert sync_state.live_expected(IndexType.HANDS).documents == 3
+
+
+@pytest.mark.django_db
+def test_image_text_writes_keep_expected_pair_current():
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    for index_type in TEXT_DERIVED:
+        sync_state.record_rebuilt(index_type, sync_state.compute_expected(index_type))
+
+    image_text = ImageTextFactory(content=TWO_CLAUSES)
+    other = ImageTextFactory(content=ONE_CLAUSE_ONE_PERSON)
+    image_text.content = ONE_CLAUSE_ONE_PERSON
+    image_text.save()
+    other.delete()
+
+    for index_type in TEXT_DERIVED:
+        recount = sync_state.compute_expected(index_type)
+        assert _expected(index_type) == (recount.documents, recount.checksum), index_type
+    assert _expected(IndexType.PEOPLE)[0] == 1
+    # The live index still holds the empty rebuild: the edits show up as drift.
+    assert not IndexSyncState.objects.get(index_type=IndexType.CLAUSES.value).in_sync
+
+
+@pytest.mark.django_db
+def test_index_row_writes_keep_expected_pair_current():
+    from apps.manuscripts.tests.factories import ItemImageFactory
+    from apps.scribes.tests.factories import HandFactory
+
+    for index_type in (IndexType.HANDS, IndexType.SCRIBES, IndexType.ITEM_IMAGES, IndexType.ITEM_PARTS):
+        sync_state.record_rebuilt(index_type, sync_state.live_expected(index_type))
+
+    hands = HandFactory.create_batch(2)
+    hands[0].delete()
+    image = ItemImageFactory()
+    other = ItemImageFactory()
+    image.item_part = other.item_part
+    image.save()
+    other.item_part.delete()
+
+    for index_type in (IndexType.HANDS, IndexType.SCRIBES, IndexType.ITEM_IMAGES, IndexType.ITEM_PARTS):
+        live = sync_state.live_expected(index_type)
+        assert _expected(index_type) == (live.documents, live.checksum), index_type
+    assert _expected(IndexType.HANDS)[0] == 1
+
+
+@pytest.mark.django_db
+def test_failed_adjustment_forgets_state_without_failing_the_save():
+    from apps.manuscripts.tests.factories import ImageTextFactory
+
+    sync_state.record_rebuilt(IndexType.CLAUSES, sync_state.IndexTally())
+    sync_state.record_rebuilt(IndexType.SCRIBES, sync_state.IndexTally())
+
+    with mock.patch.object(sync_state, "extractions_for", side_effect=RuntimeError("parser blew up")):
+        ImageTextFactory(content=TWO_CLAUSES)
+
+    assert list(IndexSyncState.objects.values_list("index_type", flat=True)) == [IndexType.SCRIBES.value]
+
+
+@pytest.mark.django_db
+def test_migration_forgets_the_state_of_indexes_without_content():
+    from importlib import import_module
+
+    from django.apps import apps
+
+    for index_type in (IndexType.TEXTS, IndexType.SCRIBES, IndexType.ITEM_PARTS):
+        sync_state.record_rebuilt(index_type, sync_state.IndexTally())
+
+    import_module("apps.search.migrations.0006_forget_key_checksums")._forget_key_checksums(apps, None)
+
+    assert list(IndexSyncState.objects.values_list("index_type", flat=True)) == [IndexType.TEXTS.value]
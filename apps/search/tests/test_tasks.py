@@ -1,11 +1,16 @@
 from unittest.mock import MagicMock
 
+import pytest
+
+from apps.search.sync_state import IndexTally
 from apps.search.tasks import (
     clean_and_reindex_search_index,
     clear_and_reindex_all_search_indexes,
     clear_search_index,
+    export_search_results,
     reindex_search_index,
 )
+from apps.search.types import IndexType, SearchResult
 
 
 def test_reindex_search_index_returns_consistent_payload(monkeypatch):
@@ -52,3 +57,150 @@ def test_clear_and_reindex_all_search_indexes_aggregates_counts(monkeypatch):
 
     assert result == {"action": "clear_and_reindex_all", "indexed": 5}
     orchestration.clear_and_reindex_all.assert_called_once()
+
+
+def test_schedule_pending_sync_debounces_within_window(monkeypatch, settings):
+    from apps.search import tasks
+    from apps.search.types import IndexType
+
+    settings.SEARCH_REINDEX_DEBOUNCE_SECONDS = 15
+    claimed: set[str] = set()
+    cache = MagicMock()
+    cache.add.side_effect = lambda key, *_args: key not in claimed and not claimed.add(key)
+    monkeypatch.setattr(tasks, "caches", {"locks": cache})
+    apply_async = MagicMock()
+    monkeypatch.setattr(tasks.sync_pending_search_documents, "apply_async", apply_async)
+
+    tasks.schedule_pending_sync(IndexType.GRAPHS)
+    tasks.schedule_pending_sync(IndexType.GRAPHS)
+
+    apply_async.assert_called_once_with(args=["graphs"], countdown=15)
+
+
+def test_sync_pending_search_documents_defers_while_full_reindex_runs(monkeypatch):
+    from apps.search import tasks
+    from apps.search.services import ReindexInProgressError
+
+    indexing = MagicMock()
+    indexing.sync_pending.side_effect = ReindexInProgressError("busy")
+    monkeypatch.setattr(tasks, "IndexingService", lambda: indexing)
+    monkeypatch.setattr(tasks, "_release_pending_sync", lambda index_type: None)
+    schedule = MagicMock()
+    monkeypatch.setattr(tasks, "schedule_pending_sync", schedule)
+
+    result = tasks.sync_pending_search_documents.run("graphs")
+
+    assert result == {"action": "sync_pending", "index_type": "graphs", "deferred": True}
+    schedule.assert_called_once()
+
+
+def test_sharded_reindex_replaces_task_with_shard_chord(monkeypatch, settings):
+    from celery.canvas import _chord
+    from celery.exceptions import Ignore
+
+    settings.SEARCH_REINDEX_SHARDS = 3
+    service = MagicMock()
+    service.begin_sharded_reindex.return_value = (1200, [(None, 400), (400, 800), (800, None)])
+    monkeypatch.setattr("apps.search.tasks.IndexingService", lambda: service)
+    monkeypatch.setattr(reindex_search_index, "update_state", lambda *args, **kwargs: None)
+    replaced: list = []
+
+    def replace(sig):
+        # Task.replace always raises Ignore when called from a worker.
+        replaced.append(sig)
+        raise Ignore()
+
+    monkeypatch.setattr(reindex_search_index, "replace", replace)
+    reindex_search_index.push_request(id="parent-task")
+    try:
+        with pytest.raises(Ignore):
+            reindex_search_index.run("item-parts")
+    finally:
+        reindex_search_index.pop_request()
+
+    service.abort_sharded_reindex.assert_not_called()
+    assert service.begin_sharded_reindex.call_args.kwargs == {"token": "parent-task"}
+    (canvas,) = replaced
+    assert isinstance(canvas, _chord)
+    shards = list(canvas.tasks)
+    assert [tuple(task.args) for task in shards] == [
+        ("item-parts", None, 400),
+        ("item-parts", 400, 800),
+        ("item-parts", 800, None),
+    ]
+    assert all(task.kwargs == {"total": 1200, "progress_task_id": "parent-task"} for task in shards)
+    assert canvas.body.kwargs == {"action": "reindex", "token": "parent-task"}
+    assert canvas.body.options["link_error"][0]["task"].endswith("abort_sharded_reindex")
+
+
+def test_finish_sharded_reindex_sums_shard_counts(monkeypatch):
+    from apps.search.tasks import finish_sharded_reindex
+
+    service = MagicMock()
+    monkeypatch.setattr("apps.search.tasks.IndexingService", lambda: service)
+
+    labels = {"labels": [["MS 1", "4", 2]], "terms": []}
+    shard_results = [
+        {"rows": 400, "documents": 400, "checksum": 5, "suggestions": labels},
+        {"rows": 400, "documents": 400, "checksum": 2**63 - 2, "suggestions": labels},
+        {"rows": 150, "documents": 150, "checksum": 7, "suggestions": {"labels": [], "terms": []}},
+    ]
+    result = finish_sharded_reindex.run(shard_results, "item-parts", action="reindex", token="parent-task")
+
+    assert result == {"action": "reindex", "index_type": "item-parts", "indexed": 950, "shards": 3}
+    service.finish_sharded_reindex.assert_called_once()
+    call = service.finish_sharded_reindex.call_args
+    assert call.args == (IndexType.ITEM_PARTS,)
+    assert call.kwargs["token"] == "parent-task"
+    assert call.kwargs["tally"] == IndexTally(documents=950, checksum=10)
+    assert call.kwargs["suggestions"].entries() == [["MS 1", "4", 4]]
+
+
+def test_reindex_search_index_group_reports_per_index_counts(monkeypatch):
+    from apps.search.tasks import reindex_search_index_group
+
+    orchestration = MagicMock()
+    orchestration.reindex_group.return_value = {"texts": 7, "clauses": 7}
+    monkeypatch.setattr("apps.search.tasks.SearchOrchestrationService", lambda: orchestration)
+    monkeypatch.setattr(reindex_search_index_group, "update_state", lambda *args, **kwargs: None)
+
+    result = reindex_search_index_group.run(["texts", "clauses"])
+
+    assert result == {
+        "action": "reindex_group",
+        "index_types": ["texts", "clauses"],
+        "indexed": {"texts": 7, "clauses": 7},
+    }
+    assert orchestration.reindex_group.call_args.args == (["texts", "clauses"],)
+
+
+def test_export_search_results_writes_every_page(monkeypatch):
+    service = MagicMock()
+    service.search.return_value = SearchResult(hits=[], total=3, limit=0, offset=0)
+    service.iter_export_pages.return_value = iter(
+        [
+            SearchResult(hits=[{"id": 1}, {"id": 2}], total=3, limit=2, offset=0),
+            SearchResult(hits=[{"id": 3}], total=3, limit=2, offset=0),
+        ]
+    )
+    written = {}
+
+    def write(pages, index_type, export_format, name, *, on_rows):
+        written["rows"] = [hit["id"] for page in pages for hit in page]
+        written["name"] = name
+        return name, 3
+
+    monkeypatch.setattr("apps.search.tasks.SearchService", lambda: service)
+    monkeypatch.setattr("apps.search.tasks.write_export_file", write)
+    monkeypatch.setattr(export_search_results, "update_state", lambda *args, **kwargs: None)
+    monkeypatch.setattr("apps.search.tasks.prune_export_files", lambda: 0)
+    released = []
+    monkeypatch.setattr("apps.search.tasks.release_export_slot", released.append)
+
+    result = export_search_results.run("scribes", "q=ely&scope=all", "csv", user_id=5)
+
+    assert released == [5]
+    assert written["rows"] == [1, 2, 3]
+    assert written["name"].startswith("search-exports/") and written["name"].endswith(".csv")
+    assert result == {"action": "export", "index_type": "scribes", "format": "csv", "rows": 3, "file": written["name"]}
+    assert service.iter_export_pages.call_args.args[1].q == "ely"
@@ -0,0 +1,185 @@
+"""Pooled Meilisearch transport: timeouts, read retries, circuit breaker and histograms."""
+
+import json
+from unittest.mock import MagicMock
+
+from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
+import pytest
+import requests
+
+from apps.search.meilisearch.transport import CircuitOpenError, MeilisearchTransport, PooledClient, operation_name
+
+
+def _response(status_code: int, body: bytes = b"{}") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    return response
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr("apps.search.meilisearch.transport.time.sleep", lambda seconds: None)
+    transport = MeilisearchTransport(
+        pool_size=4,
+        connect_timeout=1.0,
+        read_timeout=2.0,
+        write_timeout=30.0,
+        read_retries=2,
+        breaker_threshold=3,
+        breaker_cooldown=60.0,
+    )
+    transport.session = MagicMock()
+    return transport
+
+
+def test_searches_use_the_read_timeout_and_are_retried(transport):
+    transport.session.request.side_effect = [requests.ConnectionError("refused"), _response(200, b'{"hits": []}')]
+    client = PooledClient(url="http://meili:7700", api_key="key", transport=transport)
+
+    assert client.index("scribes").search("ely") == {"hits": []}
+
+    assert transport.session.request.call_count == 2
+    method, url = transport.session.request.call_args.args
+    assert (method, url) == ("POST", "http://meili:7700/indexes/scribes/search")
+    assert transport.session.request.call_args.kwargs["timeout"] == (1.0, 2.0)
+    assert transport.session.request.call_args.kwargs["headers"]["Authorization"] == "Bearer key"
+    assert transport.stats()["retries"] == 1
+
+
+def test_writes_use_the_write_timeout_and_are_not_retried(transport):
+    transport.session.request.side_effect = requests.ConnectionError("refused")
+    client = PooledClient(url="http://meili:7700", api_key=None, transport=transport)
+
+    with pytest.raises(MeilisearchCommunicationError):
+        client.index("scribes").add_documents([{"id": 1}])
+
+    transport.session.request.assert_called_once()
+    assert transport.session.request.call_args.kwargs["timeout"] == (1.0, 30.0)
+
+
+def test_gateway_errors_are_retried_and_then_surface_as_api_errors(transport):
+    transport.session.request.return_value = _response(503, b'{"message": "down"}')
+    client = PooledClient(url="http://meili:7700", api_key=None, transport=transport)
+
+    with pytest.raises(MeilisearchApiError):
+        client.index("scribes").get_document("4")
+
+    assert transport.session.request.call_count == 3
+
+
+def test_breaker_fails_fast_while_open_then_lets_one_probe_through(transport):
+    transport.session.request.side_effect = requests.ConnectionError("refused")
+    client = PooledClient(url="http://meili:7700", api_key=None, transport=transport)
+    with pytest.raises(MeilisearchCommunicationError):
+        client.health()
+    assert transport.session.request.call_count == 3
+
+    with pytest.raises(CircuitOpenError):
+        client.health()
+    assert transport.session.request.call_count == 3
+    assert transport.stats()["circuit"] == "open"
+
+    transport.breaker.cooldown = 0
+    transport.session.request.side_effect = None
+    transport.session.request.return_value = _response(200, b'{"status": "available"}')
+    assert client.health() == {"status": "available"}
+    assert transport.stats()["circuit"] == "closed"
+
+
+def test_latency_is_recorded_per_operation(transport):
+    transport.session.request.return_value = _response(200, b'{"results": []}')
+    client = PooledClient(url="http://meili:7700", api_key=None, transport=transport)
+
+    client.index("graphs").get_document("7")
+    client.index("hands").get_document("8")
+
+    operations = transport.stats()["operations"]
+    assert list(operations) == ["GET indexes/{uid}/documents/{id}"]
+    assert operations["GET indexes/{uid}/documents/{id}"]["count"] == 2
+
+
+def test_operation_names_drop_uids_and_ids():
+    assert operation_name("GET", "tasks/42") == "GET tasks/{id}"
+    assert operation_name("POST", "indexes/x__build/documents/fetch") == "POST indexes/{uid}/documents/fetch"
+    assert operation_name("POST", "multi-search") == "POST multi-search"
+
+
+@pytest.mark.parametrize(
+    "error",
+    [requests.exceptions.ChunkedEncodingError("cut"), requests.exceptions.TooManyRedirects("loop"), KeyboardInterrupt],
+)
+def test_a_probe_that_ends_without_a_response_reopens_the_breaker(transport, error):
+    client = PooledClient(url="http://meili:7700", api_key=None, transport=transport)
+    for _ in range(3):
+        transport.breaker.record_failure()
+    transport.breaker.cooldown = 0
+    transport.session.request.side_effect = error
+
+    with pytest.raises((MeilisearchCommunicationError, KeyboardInterrupt)):
+        client.index("scribes").add_documents([{"id": 1}])
+
+    transport.session.request.side_effect = None
+    transport.session.request.return_value = _response(200, b'{"status": "available"}')
+    assert client.health() == {"status": "available"}
+    assert transport.stats()["circuit"] == "closed"
+
+
+def _meilisearch_reply(method: str, url: str, **kwargs) -> requests.Response:
+    path = url.split("://", 1)[1].split("/", 1)[1].split("?", 1)[0]
+    index = {"uid": "scribes", "primaryKey": "id", "createdAt": "2026-01-01T00:00:00.000000Z", "updatedAt": None}
+    task = {
+        "taskUid": 1,
+        "indexUid": "scribes",
+        "status": "enqueued",
+        "type": "x",
+        "enqueuedAt": "2026-01-01T00:00:00.000000Z",
+    }
+    if method == "GET" and path == "indexes":
+        body = {"results": [index], "offset": 0, "limit": 20, "total": 1}
+    elif method == "GET" and path == "indexes/scribes":
+        body = index
+    elif path.endswith("/stats"):
+        body = {"numberOfDocuments": 1, "isIndexing": False, "fieldDistribution": {}}
+    elif path.startswith("tasks/"):
+        body = {"uid": 1, "status": "succeeded", "type": "x", "enqueuedAt": "2026-01-01T00:00:00.000000Z"}
+    elif path == "health":
+        body = {"status": "available"}
+    elif path.endswith("/search") or path == "multi-search":
+        body = {"hits": [], "results": []}
+    elif method == "GET":
+        body = {"id": 1}
+    else:
+        body = task
+    return _response(200, json.dumps(body).encode())
+
+
+def test_every_sdk_entry_point_in_use_goes_through_the_transport(transport, monkeypatch):
+    bypass = MagicMock(side_effect=AssertionError("request sent around the transport"))
+    # Anything the SDK sends itself goes through a fresh requests.Session.
+    monkeypatch.setattr(requests.Session, "request", bypass)
+    transport.session.request.side_effect = _meilisearch_reply
+    client = PooledClient(url="http://meili:7700", api_key="key", transport=transport)
+
+    client.health()
+    client.multi_search([{"indexUid": "scribes", "q": "ely"}])
+    client.create_index("scribes", {"primaryKey": "id"})
+    client.wait_for_task(1)
+    client.swap_indexes([{"indexes": ["scribes", "scribes__build"]}])
+    client.delete_index("scribes__build")
+    indexes = [client.index("scribes"), client.get_index("scribes"), *client.get_indexes()["results"]]
+    for index in indexes:
+        index.search("ely")
+        index.get_document(1)
+        index.get_settings()
+        index.update_settings({"searchableAttributes": ["name"]})
+        index.add_documents([{"id": 1}])
+        index.add_documents_ndjson(b'{"id": 1}\n')
+        index.update_documents([{"id": 1}])
+        index.delete_documents([1])
+        index.delete_all_documents()
+        index.get_stats()
+        index.wait_for_task(1)
+
+    bypass.assert_not_called()
+    assert transport.session.request.call_count == 6 + 2 + 11 * len(indexes)
@@ -1,5 +1,8 @@
+import gzip
 from unittest.mock import MagicMock
 
+import pytest
+
 from apps.search.meilisearch.writer import MeilisearchIndexWriter
 from apps.search.types import IndexType
 
@@ -13,8 +16,101 @@ class TestApplyIndexSettings:
         writer._apply_index_settings("texts", IndexType.TEXTS)
 
         # Dates/shelfmark numbers must match exactly, not fuzzily.
-        index.update_typo_tolerance.assert_called_once_with({"disableOnNumbers": True})
-        # The other settings are still applied alongside it.
-        index.update_searchable_attributes.assert_called_once()
-        index.update_filterable_attributes.assert_called_once()
-        index.update_pagination_settings.assert_called_once()
+        (body,) = index.update_settings.call_args.args
+        assert body["typoTolerance"] == {"disableOnNumbers": True}
+        # The other settings go out in the same single task.
+        assert {"searchableAttributes", "filterableAttributes", "pagination"} <= set(body)
+        writer._client.wait_for_task.assert_called_once()
+
+    def test_unchanged_settings_are_not_resent(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        index = writer._client.index.return_value
+        desired = writer.index_settings(IndexType.TEXTS)
+        index.get_settings.return_value = {
+            **desired,
+            # Meilisearch reports set-like settings sorted, and every typo key.
+            "filterableAttributes": sorted(desired["filterableAttributes"], reverse=True),
+            "typoTolerance": {"enabled": True, "disableOnNumbers": True, "disableOnWords": []},
+            "rankingRules": ["words", "typo"],
+        }
+
+        writer.ensure_index_and_settings(IndexType.TEXTS)
+
+        index.update_settings.assert_not_called()
+        writer._client.wait_for_task.assert_not_called()
+
+    def test_only_changed_settings_are_sent(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        index = writer._client.index.return_value
+        desired = writer.index_settings(IndexType.TEXTS)
+        index.get_settings.return_value = {**desired, "searchableAttributes": ["*"]}
+
+        writer.ensure_index_and_settings(IndexType.TEXTS)
+
+        index.update_settings.assert_called_once_with({"searchableAttributes": desired["searchableAttributes"]})
+
+    def test_build_index_gets_its_settings_before_any_documents(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+
+        writer.prepare_build_index(IndexType.SCRIBES)
+
+        writer._client.delete_index.assert_called_once_with("scribes__build")
+        writer._client.create_index.assert_called_once_with("scribes__build", {"primaryKey": "id"})
+        writer._client.index.assert_called_once_with("scribes__build")
+        writer._client.index.return_value.update_settings.assert_called_once()
+        writer._client.index.return_value.get_settings.assert_not_called()
+
+
+class TestIncrementalWrites:
+    def test_upsert_replaces_documents_in_live_index_and_waits(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        writer._client.wait_for_task.return_value.status = "succeeded"
+        index = writer._client.index.return_value
+
+        writer.upsert_documents(IndexType.SCRIBES, [{"id": 1}])
+
+        writer._client.index.assert_called_once_with("scribes")
+        # Full replacement, not a partial merge that would keep dropped fields.
+        index.add_documents.assert_called_once_with([{"id": 1}], primary_key="id")
+        index.update_documents.assert_not_called()
+        writer._client.wait_for_task.assert_called_once()
+
+    def test_failed_delete_task_raises(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        writer._client.wait_for_task.return_value.status = "failed"
+
+        with pytest.raises(RuntimeError):
+            writer.delete_documents_by_filter(IndexType.CLAUSES, "image_text IN [1]")
+
+
+class TestBuildIngestion:
+    def test_ndjson_payload_is_gzipped_into_build_index_without_waiting(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        writer._ingest_client = MagicMock()
+        index = writer._ingest_client.index.return_value
+        index.add_documents_ndjson.return_value.task_uid = 42
+
+        task_uid = writer.add_ndjson_to_build(IndexType.SCRIBES, b'{"id":1}\n')
+
+        assert task_uid == 42
+        writer._ingest_client.index.assert_called_once_with("scribes__build")
+        body = index.add_documents_ndjson.call_args.args[0]
+        assert gzip.decompress(body) == b'{"id":1}\n'
+        writer._client.wait_for_task.assert_not_called()
+
+    def test_wait_for_tasks_raises_on_any_failed_ingestion(self):
+        writer = MeilisearchIndexWriter()
+        writer._client = MagicMock()
+        writer._client.wait_for_task.side_effect = [
+            MagicMock(status="succeeded"),
+            MagicMock(status="failed", error={"code": "invalid_document_id"}),
+        ]
+
+        with pytest.raises(RuntimeError, match="task 8 failed"):
+            writer.wait_for_tasks([7, 8])
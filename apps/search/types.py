@@ -2,7 +2,10 @@
 
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from apps.search.filter_ast import FilterNode
 
 
 class IndexType(StrEnum):
@@ -60,7 +63,7 @@ class FilterSpec:
     - manuscript_date: optional min_date, max_date, at_most_or_least, date_diff
     - contains / starts_with: merged into full-text q + attributesToSearchOn in reader
     - empty / not_empty: Meilisearch IS NULL / IS NOT NULL
-    - qb_expr: raw Meilisearch filter fragment from query builder (AND with other parts)
+    - qb_filter: compiled query-builder tree (`filter_ast` node, AND with other parts)
     """
 
     equal: dict[str, str | int | float | list[str | int | float]] = field(default_factory=dict)
@@ -76,7 +79,19 @@ class FilterSpec:
     starts_with: dict[str, str] = field(default_factory=dict)
     empty: list[str] = field(default_factory=list)
     not_empty: list[str] = field(default_factory=list)
-    qb_expr: str | None = None
+    qb_filter: FilterNode | None = None
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    """Keyset position for cursor pagination.
+
+    ``values`` are the order-key values of the hit the page continues from
+    (empty for the first page); ``backward`` pages towards the start.
+    """
+
+    values: tuple[int | float | None, ...] = ()
+    backward: bool = False
 
 
 @dataclass
@@ -96,6 +111,9 @@ class SearchQuery:
     # in each hit's `_formatted` object.
     attributes_to_crop: list[str] = field(default_factory=list)
     crop_length: int | None = None
+    # Cursor pagination (opt-in): pages seek with range filters on the order
+    # keys instead of skipping `offset` hits. None means offset pagination.
+    cursor: SearchCursor | None = None
 
 
 @dataclass
@@ -106,6 +124,9 @@ class SearchResult:
     total: int
     limit: int
     offset: int
+    # Opaque tokens for the neighbouring pages, set under cursor pagination.
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
 
 
 @dataclass
@@ -5,7 +5,7 @@ from django.urls import path
 from apps.search.quality_endpoints import quality_dashboard
 from apps.search.text_monitoring_endpoints import text_monitoring_overview
 from apps.search.views_management import search_action, search_stats, search_task_status
-from apps.search.views_search import SearchSuggestViewSet, SearchViewSet
+from apps.search.views_search import SearchSuggestViewSet, SearchViewSet, search_export_status
 
 urlpatterns = [
     path("management/stats/", search_stats, name="management-search-stats"),
@@ -17,6 +17,7 @@ urlpatterns = [
         text_monitoring_overview,
         name="management-image-texts-overview",
     ),
+    path("exports/<str:token>/", search_export_status, name="search-export-status"),
     path("suggest/", SearchSuggestViewSet.as_view({"get": "list"}), name="search-suggest"),
     path("<index_type>/export/", SearchViewSet.as_view({"get": "export"}), name="search-export"),
     path("<index_type>/facets/", SearchViewSet.as_view({"get": "facets"}), name="search-facets"),
@@ -9,6 +9,9 @@ from rest_framework.response import Response
 
 from apps.common.permissions import IsSuperuser
 from apps.search.admin_service import SearchAdminService
+from apps.search.meilisearch.transport import get_transport
+from apps.search.result_cache import get_result_cache
+from apps.search.scheduler import scheduler_stats
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +22,16 @@ def search_stats(request: Request) -> Response:
     service: SearchAdminService = SearchAdminService()
     healthy: bool = service.check_meilisearch_health()
     if not healthy:
-        return Response({"healthy": False, "total_meilisearch": 0, "total_database": 0, "indexes": []})
+        return Response(
+            {
+                "healthy": False,
+                "total_meilisearch": 0,
+                "total_database": 0,
+                "indexes": [],
+                "transport": get_transport().stats(),
+                "reindex_scheduler": scheduler_stats(),
+            }
+        )
     try:
         indexes = service.get_index_stats_list()
     except Exception:
@@ -42,6 +54,9 @@ def search_stats(request: Request) -> Response:
             "total_meilisearch": sum(idx["meilisearch_count"] for idx in indexes),
             "total_database": sum(idx["db_count"] for idx in indexes),
             "indexes": indexes,
+            "result_cache": get_result_cache().stats(),
+            "transport": get_transport().stats(),
+            "reindex_scheduler": scheduler_stats(),
         }
     )
 
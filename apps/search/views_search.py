@@ -1,22 +1,49 @@
-"""Transport-only DRF viewset for public search endpoints."""
+"""Transport-only DRF viewsets for public search endpoints.
 
-import csv
-import io
+List, retrieve, facets and suggest are coroutines (``adrf`` viewsets over
+``AsyncSearchService``), so under ASGI a worker keeps many Meilisearch
+round-trips in flight instead of blocking a thread on each. Export stays
+synchronous; ``adrf`` runs it in a worker thread.
+"""
+
+from collections.abc import Iterable
+from dataclasses import replace
 from typing import Any
 from urllib.parse import urlencode
 
+from adrf.viewsets import ViewSet
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
 
+from apps.search.admin_service import SearchAdminService
+from apps.search.export import (
+    BIBTEX_INDEX_TYPES,
+    EXPORT_FORMATS,
+    EXPORT_MAX_AGE_SECONDS,
+    claim_export_slot,
+    export_row,
+    release_export_slot,
+    stream_export,
+)
 from apps.search.parsers import parse_facet_attributes, parse_search_query
 from apps.search.registry import URL_SEGMENT_TO_INDEX_TYPE, get_registration
+from apps.search.result_cache import get_result_cache
 from apps.search.serializers import FacetResultSerializer, SearchResultSerializer
-from apps.search.services import SearchService, resolve_index_type_segment
+from apps.search.services import AsyncSearchService, SearchService, resolve_index_type_segment
 from apps.search.types import IndexType, SearchQuery
 
+EXPORT_TOKEN_SALT = "search-export"
+# Finished exports stay pollable as long as their files are kept.
+EXPORT_TOKEN_MAX_AGE_SECONDS = EXPORT_MAX_AGE_SECONDS
+
 
 class SearchViewSet(ViewSet):
     """Search API: list, retrieve, facets."""
@@ -30,30 +57,31 @@ class SearchViewSet(ViewSet):
         except ValueError:
             return None
 
-    def list(self, request: Request, index_type: str | None = None) -> Response:
+    async def list(self, request: Request, index_type: str | None = None) -> Response:
         index: IndexType | None = self._get_index_type()
         if index is None:
             return Response({"detail": "Invalid index type."}, status=status.HTTP_404_NOT_FOUND)
 
         search_query: SearchQuery = parse_search_query(request.query_params, index)
-        service: SearchService = SearchService()
-        result = service.search(index, search_query)
-        serializer = SearchResultSerializer(
-            {
-                "results": result.hits,
-                "total": result.total,
-                "limit": result.limit,
-                "offset": result.offset,
-            }
-        )
-        return Response(serializer.data)
+        service: AsyncSearchService = AsyncSearchService(cache=get_result_cache())
+        result = await service.search(index, search_query)
+        data: dict[str, Any] = {
+            "results": result.hits,
+            "total": result.total,
+            "limit": result.limit,
+            "offset": result.offset,
+        }
+        if search_query.cursor is not None:
+            data["next_cursor"] = result.next_cursor
+            data["previous_cursor"] = result.previous_cursor
+        return Response(SearchResultSerializer(data).data)
 
-    def retrieve(self, request: Request, pk: str | None = None, index_type: str | None = None) -> Response:
+    async def retrieve(self, request: Request, pk: str | None = None, index_type: str | None = None) -> Response:
         index: IndexType | None = self._get_index_type()
         if index is None or pk is None:
             return Response({"detail": "Invalid index type or id."}, status=status.HTTP_404_NOT_FOUND)
-        service: SearchService = SearchService()
-        doc: dict[str, Any] | None = service.get_document(index, pk)
+        service: AsyncSearchService = AsyncSearchService()
+        doc: dict[str, Any] | None = await service.get_document(index, pk)
         if doc is None:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
         return Response(doc)
@@ -72,6 +100,8 @@ class SearchViewSet(ViewSet):
                 params: dict[str, Any] = dict(request.query_params)
                 params["ordering"] = order_val
                 params["offset"] = "0"
+                # A cursor is only valid for the ordering it was cut from.
+                params.pop("cursor", None)
                 url: str = f"{base_path}?{urlencode(params, doseq=True)}"
                 text: str = f"{attr} ({'asc' if asc else 'desc'})"
                 options.append({"name": order_val, "text": text, "url": url})
@@ -81,16 +111,19 @@ class SearchViewSet(ViewSet):
         }
 
     @action(detail=False, methods=["get"], url_path="facets")
-    def facets(self, request: Request, index_type: str | None = None) -> Response:
+    async def facets(self, request: Request, index_type: str | None = None) -> Response:
         index: IndexType | None = self._get_index_type()
         if index is None:
             return Response({"detail": "Invalid index type."}, status=status.HTTP_404_NOT_FOUND)
 
         search_query: SearchQuery = parse_search_query(request.query_params, index)
         facet_attributes: list[str] = parse_facet_attributes(request.query_params, index)
-        service: SearchService = SearchService()
-        search_result = service.search(index, search_query)
-        facet_result = service.get_facets(index, search_query, facet_attributes)
+        # `limit=0`: the client only wants refreshed counts, so skip the hits.
+        facets_only: bool = request.query_params.get("limit") == "0"
+        if facets_only:
+            search_query = replace(search_query, limit=0, offset=0)
+        service: AsyncSearchService = AsyncSearchService(cache=get_result_cache())
+        search_result, facet_result = await service.search_with_facets(index, search_query, facet_attributes)
 
         total: int = search_result.total
         limit: int = search_result.limit
@@ -98,15 +131,23 @@ class SearchViewSet(ViewSet):
         base_url: str = request.build_absolute_uri(request.path)
         params: dict[str, Any] = dict(request.query_params)
 
+        def page_url(token: str | None, page_offset: int) -> str:
+            # Cursor links seek from a boundary hit; offset links remain the
+            # fallback where no cursor could be cut (e.g. a string sort key).
+            if token:
+                page_params = {**params, "cursor": token, "pagination": "cursor"}
+                page_params.pop("offset", None)
+            else:
+                page_params = {**params, "offset": str(page_offset)}
+                page_params.pop("cursor", None)
+            return f"{base_url}?{urlencode(page_params, doseq=True)}"
+
         next_url: str | None = None
-        if offset + limit < total:
-            params["offset"] = str(offset + limit)
-            next_url = f"{base_url}?{urlencode(params, doseq=True)}"
+        if limit and offset + limit < total:
+            next_url = page_url(search_result.next_cursor, offset + limit)
         prev_url: str | None = None
-        if offset > 0:
-            new_offset: int = max(0, offset - limit)
-            params["offset"] = str(new_offset)
-            prev_url = f"{base_url}?{urlencode(params, doseq=True)}"
+        if limit and offset > 0:
+            prev_url = page_url(search_result.previous_cursor, max(0, offset - limit))
 
         current_ordering: str | None = (
             f"{'' if search_query.sort_spec.ascending else '-'}{search_query.sort_spec.attribute}"
@@ -128,7 +169,7 @@ class SearchViewSet(ViewSet):
         return Response(payload)
 
     @action(detail=False, methods=["get"], url_path="export")
-    def export(self, request: Request, index_type: str | None = None) -> Response:
+    def export(self, request: Request, index_type: str | None = None) -> Response | StreamingHttpResponse:
         index: IndexType | None = self._get_index_type()
         if index is None:
             return Response({"detail": "Invalid index type."}, status=status.HTTP_404_NOT_FOUND)
@@ -136,36 +177,90 @@ class SearchViewSet(ViewSet):
         raw_format = request.query_params.get("export_format") or request.query_params.get("format")
         format_name: str = (raw_format or "csv").strip().lower()
         scope: str = (request.query_params.get("scope") or "page").strip().lower()
+        if format_name != "json" and format_name not in EXPORT_FORMATS:
+            return Response({"detail": "Unsupported export format."}, status=status.HTTP_400_BAD_REQUEST)
+        if format_name == "bibtex" and index not in BIBTEX_INDEX_TYPES:
+            return Response(
+                {"detail": "BibTeX export is supported for manuscripts, scribes, and hands."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         search_query: SearchQuery = parse_search_query(request.query_params, index, max_limit=200)
         service: SearchService = SearchService()
-        rows: list[dict[str, Any]] = _collect_export_rows(service, index, search_query, scope=scope)
+        if scope != "all":
+            pages: Iterable[list[dict[str, Any]]] = [service.search(index, search_query).hits]
+        else:
+            total: int = service.search(index, replace(search_query, limit=0, offset=0)).total
+            if total > settings.SEARCH_EXPORT_INLINE_MAX_ROWS:
+                return _start_export_job(request, index, "ndjson" if format_name == "json" else format_name)
+            # Fetched page by page while the response is sent.
+            pages = (page.hits for page in service.iter_export_pages(index, search_query))
 
         if format_name == "json":
+            rows = [export_row(hit) for page in pages for hit in page]
             return Response({"results": rows, "count": len(rows)})
-        if format_name == "bibtex":
-            if index not in (IndexType.ITEM_PARTS, IndexType.SCRIBES, IndexType.HANDS):
-                return Response(
-                    {"detail": "BibTeX export is supported for manuscripts, scribes, and hands."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            bibtex: str = _to_bibtex(rows, index)
-            return Response({"content": bibtex})
-        if format_name != "csv":
-            return Response({"detail": "Unsupported export format."}, status=status.HTTP_400_BAD_REQUEST)
-
-        output: io.StringIO = io.StringIO()
-        fieldnames: list[str] = _csv_fieldnames(rows)
-        writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({key: _csv_cell(row.get(key)) for key in fieldnames})
-        return Response({"content": output.getvalue()})
+        content_type, extension = EXPORT_FORMATS[format_name]
+        response = StreamingHttpResponse(stream_export(format_name, index, pages), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{index.to_url_segment()}.{extension}"'
+        return response
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def search_export_status(request: Request, token: str) -> Response:
+    """Progress of a background export; links the file once it's written.
+
+    *token* is the signed job id handed out when the export started, so
+    only the requester can poll it (and not arbitrary Celery tasks).
+    """
+    try:
+        task_id: str = signing.loads(token, salt=EXPORT_TOKEN_SALT, max_age=EXPORT_TOKEN_MAX_AGE_SECONDS)
+    except signing.BadSignature:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    info: dict[str, Any] = SearchAdminService().task_status(task_id)
+    result = info.get("result")
+    if isinstance(result, dict) and result.get("file"):
+        info["download_url"] = request.build_absolute_uri(default_storage.url(result["file"]))
+    return Response(info)
+
+
+def _start_export_job(request: Request, index: IndexType, export_format: str) -> Response:
+    """Queue a background export for a signed-in user with a free export slot."""
+    from apps.search.tasks import export_search_results
+
+    if not request.user.is_authenticated:
+        return Response(
+            {"detail": f"Sign in to export more than {settings.SEARCH_EXPORT_INLINE_MAX_ROWS} rows."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    if not claim_export_slot(request.user.pk):
+        return Response(
+            {"detail": "Too many exports are running; wait for one to finish."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+    try:
+        task = export_search_results.delay(
+            index.to_url_segment(), request.query_params.urlencode(), export_format, user_id=request.user.pk
+        )
+    except Exception:
+        release_export_slot(request.user.pk)
+        raise
+    token: str = signing.dumps(task.id, salt=EXPORT_TOKEN_SALT)
+    return Response(
+        {
+            "task_id": task.id,
+            "format": export_format,
+            "status_url": request.build_absolute_uri(reverse("search-export-status", args=[token])),
+            "message": "Export started.",
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
 
 
 class SearchSuggestViewSet(ViewSet):
     """Global search suggestions grouped by index type."""
 
-    def list(self, request: Request) -> Response:
+    async def list(self, request: Request) -> Response:
         query_text: str = (request.query_params.get("q") or "").strip()
         if len(query_text) < 2:
             return Response({"query": query_text, "suggestions": {}})
@@ -184,126 +279,6 @@ class SearchSuggestViewSet(ViewSet):
         except (TypeError, ValueError):  # fmt: skip
             requested_limit = 5
         per_type_limit: int = min(max(requested_limit, 1), 10)
-        service: SearchService = SearchService()
-        suggestions = service.suggest(index_types, query_text, per_type_limit=per_type_limit)
+        service: AsyncSearchService = AsyncSearchService(cache=get_result_cache())
+        suggestions = await service.suggest(index_types, query_text, per_type_limit=per_type_limit)
         return Response({"query": query_text, "suggestions": suggestions})
-
-
-def _collect_export_rows(
-    service: SearchService,
-    index: IndexType,
-    search_query: SearchQuery,
-    *,
-    scope: str,
-    max_rows: int = 2000,
-) -> list[dict[str, Any]]:
-    if scope != "all":
-        return service.search(index, search_query).hits
-
-    # Page at the Meilisearch max regardless of the request's display limit
-    # (often 20) — otherwise a full-corpus export does ~100 round-trips.
-    export_page_size = 200
-    all_rows: list[dict[str, Any]] = []
-    offset: int = 0
-    while offset < max_rows:
-        page_query = SearchQuery(
-            q=search_query.q,
-            filter_spec=search_query.filter_spec,
-            sort_spec=search_query.sort_spec,
-            limit=export_page_size,
-            offset=offset,
-            matching_strategy=search_query.matching_strategy,
-            attributes_to_search_on=search_query.attributes_to_search_on,
-            attributes_to_retrieve=search_query.attributes_to_retrieve,
-        )
-        page = service.search(index, page_query)
-        if not page.hits:
-            break
-        all_rows.extend(page.hits)
-        offset += page.limit
-        if len(all_rows) >= page.total:
-            break
-    return all_rows[:max_rows]
-
-
-def _csv_fieldnames(rows: list[dict[str, Any]]) -> list[str]:
-    ordered: list[str] = []
-    seen: set[str] = set()
-    for row in rows:
-        if not isinstance(row, dict):
-            continue
-        for key in row:
-            if key in seen or key == "_formatted":
-                continue
-            seen.add(key)
-            ordered.append(key)
-    return ordered
-
-
-def _csv_cell(value: object) -> str:
-    if value is None:
-        return ""
-    if isinstance(value, list):
-        return "; ".join(str(v) for v in value)
-    if isinstance(value, dict):
-        return str(value)
-    return str(value)
-
-
-def _to_bibtex(rows: list[dict[str, Any]], index: IndexType = IndexType.ITEM_PARTS) -> str:
-    entries: list[str] = []
-    for row in rows:
-        if not isinstance(row, dict):
-            continue
-        if index == IndexType.SCRIBES:
-            name: str = str(row.get("name") or "unknown").strip().replace(" ", "_")
-            period: str = str(row.get("period") or "n.d.").strip()
-            key = f"scribe_{name}_{period}".replace("/", "_")
-            entries.append(
-                "\n".join(
-                    [
-                        f"@misc{{{key},",
-                        f"  author = {{{row.get('name') or ''}}},",
-                        f"  title = {{Scribe: {row.get('name') or ''}}},",
-                        f"  note = {{Scriptorium: {row.get('scriptorium') or 'unknown'}}},",
-                        f"  year = {{{period}}},",
-                        "}",
-                    ]
-                )
-            )
-        elif index == IndexType.HANDS:
-            hand_name: str = str(row.get("name") or "unknown").strip().replace(" ", "_")
-            repo: str = str(row.get("repository_name") or "repo").strip().replace(" ", "_")
-            date: str = str(row.get("date") or "n.d.").strip()
-            key = f"hand_{repo}_{hand_name}_{date}".replace("/", "_")
-            entries.append(
-                "\n".join(
-                    [
-                        f"@misc{{{key},",
-                        f"  title = {{{row.get('name') or hand_name}}},",
-                        f"  institution = {{{row.get('repository_name') or ''}}},",
-                        f"  note = {{Shelfmark: {row.get('shelfmark') or ''}, Place: {row.get('place') or ''}}},",
-                        f"  year = {{{date}}},",
-                        "}",
-                    ]
-                )
-            )
-        else:
-            repo = str(row.get("repository_name") or "repo").strip().replace(" ", "_")
-            raw_mark = row.get("shelfmark") or row.get("display_label") or "unknown"
-            shelfmark: str = str(raw_mark).strip().replace(" ", "_")
-            date = str(row.get("date") or row.get("date_min") or "n.d.").strip()
-            key = f"{repo}_{shelfmark}_{date}".replace("/", "_")
-            entries.append(
-                "\n".join(
-                    [
-                        f"@misc{{{key},",
-                        f"  title = {{{row.get('display_label') or shelfmark}}},",
-                        f"  institution = {{{row.get('repository_name') or ''}}},",
-                        f"  note = {{Shelfmark: {row.get('shelfmark') or ''}}},",
-                        f"  year = {{{date}}},",
-                        "}",
-                    ]
-                )
-            )
-    return "\n\n".join(entries)
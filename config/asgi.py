@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+from apps.search.suggestions import warm_suggestions  # noqa: E402  (needs the app registry)
+
+warm_suggestions()
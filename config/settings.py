@@ -24,11 +24,46 @@ env = environ.Env(
     DRF_THROTTLE_USER_RATE=(str, "1000/hour"),
     SEARCH_AUTO_REINDEX=(bool, True),
     SEARCH_REINDEX_DEBOUNCE_SECONDS=(int, 30),
+    # Full reindex tasks split an index into this many primary-key range shards
+    # run in parallel across Celery workers; 1 keeps the serial rebuild.
+    SEARCH_REINDEX_SHARDS=(int, 1),
+    # Rebuild ingestion: uncompressed NDJSON bytes per upload, and how many
+    # built payloads may wait for the writer thread before builders block.
+    SEARCH_REINDEX_PAYLOAD_BYTES=(int, 8 * 1024 * 1024),
+    SEARCH_REINDEX_QUEUE_DEPTH=(int, 4),
+    # Per-process LRU of public search/facet/suggest responses; 0 disables it.
+    SEARCH_RESULT_CACHE_MAX_ENTRIES=(int, 2048),
+    SEARCH_RESULT_CACHE_MAX_BYTES=(int, 64 * 1024 * 1024),
+    # Search exports up to this many rows stream inline; larger ones run as a
+    # background job that writes the file to storage.
+    SEARCH_EXPORT_INLINE_MAX_ROWS=(int, 2000),
+    # Background exports a signed-in user may have queued or running at once.
+    SEARCH_EXPORT_MAX_JOBS_PER_USER=(int, 2),
+    # Autocomplete dictionary built per index at rebuild: at most this many
+    # entries, of which up to SEARCH_SUGGEST_CONTENT_TERMS are content terms.
+    SEARCH_SUGGEST_MAX_ENTRIES=(int, 50000),
+    SEARCH_SUGGEST_CONTENT_TERMS=(int, 2000),
+    # Static IIIF/W3C publication: JSON-LD files rendered under this root with
+    # ids on this public URL; optionally re-rendered this long after a change.
+    IIIF_STATIC_ROOT=(str, "storage/iiif-static"),
+    IIIF_STATIC_BASE_URL=(str, "http://localhost:8000"),
+    IIIF_STATIC_PUBLISH_ON_CHANGE=(bool, False),
+    IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS=(int, 60),
     # services
     IIIF_HOST=(str, "http://localhost:8182/"),
     MEILISEARCH_URL=(str, "http://localhost:7700"),
     MEILISEARCH_API_KEY=(str, ""),
     MEILISEARCH_INDEX_PREFIX=(str, ""),
+    # Meilisearch transport: keep-alive connections per process, timeouts in
+    # seconds, retries of idempotent reads, and the circuit breaker that fails
+    # fast after that many consecutive failures for the cool-down.
+    MEILISEARCH_POOL_SIZE=(int, 32),
+    MEILISEARCH_CONNECT_TIMEOUT=(float, 2.0),
+    MEILISEARCH_READ_TIMEOUT=(float, 5.0),
+    MEILISEARCH_WRITE_TIMEOUT=(float, 60.0),
+    MEILISEARCH_READ_RETRIES=(int, 2),
+    MEILISEARCH_BREAKER_THRESHOLD=(int, 5),
+    MEILISEARCH_BREAKER_COOLDOWN_SECONDS=(float, 10.0),
     # App/project identity
     SITE_NAME=(str, "Archetype"),
     # Choices
@@ -62,6 +97,15 @@ REPOSITORY_TYPES = env("REPOSITORY_TYPES")
 CHARACTER_ITEM_TYPES = env("CHARACTER_ITEM_TYPES")
 SEARCH_AUTO_REINDEX = env("SEARCH_AUTO_REINDEX")
 SEARCH_REINDEX_DEBOUNCE_SECONDS = env("SEARCH_REINDEX_DEBOUNCE_SECONDS")
+SEARCH_REINDEX_SHARDS = env("SEARCH_REINDEX_SHARDS")
+SEARCH_REINDEX_PAYLOAD_BYTES = env("SEARCH_REINDEX_PAYLOAD_BYTES")
+SEARCH_REINDEX_QUEUE_DEPTH = env("SEARCH_REINDEX_QUEUE_DEPTH")
+SEARCH_RESULT_CACHE_MAX_ENTRIES = env("SEARCH_RESULT_CACHE_MAX_ENTRIES")
+SEARCH_RESULT_CACHE_MAX_BYTES = env("SEARCH_RESULT_CACHE_MAX_BYTES")
+SEARCH_EXPORT_INLINE_MAX_ROWS = env("SEARCH_EXPORT_INLINE_MAX_ROWS")
+SEARCH_EXPORT_MAX_JOBS_PER_USER = env("SEARCH_EXPORT_MAX_JOBS_PER_USER")
+SEARCH_SUGGEST_MAX_ENTRIES = env("SEARCH_SUGGEST_MAX_ENTRIES")
+SEARCH_SUGGEST_CONTENT_TERMS = env("SEARCH_SUGGEST_CONTENT_TERMS")
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env("SECRET_KEY")
@@ -108,6 +152,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework.authtoken",
+    "adrf",
     "djoser",
     "django_extensions",
     "tinymce",
@@ -214,6 +259,9 @@ CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# Honour per-message priorities on the Redis broker (0 is served first), so
+# interactive search rebuilds overtake queued bulk ones.
+CELERY_BROKER_TRANSPORT_OPTIONS = {"queue_order_strategy": "priority"}
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
@@ -311,7 +359,18 @@ SERIALIZATION_MODULES = {
 MEILISEARCH_URL = env("MEILISEARCH_URL")
 MEILISEARCH_API_KEY = env("MEILISEARCH_API_KEY")
 MEILISEARCH_INDEX_PREFIX = env("MEILISEARCH_INDEX_PREFIX")
+MEILISEARCH_POOL_SIZE = env("MEILISEARCH_POOL_SIZE")
+MEILISEARCH_CONNECT_TIMEOUT = env("MEILISEARCH_CONNECT_TIMEOUT")
+MEILISEARCH_READ_TIMEOUT = env("MEILISEARCH_READ_TIMEOUT")
+MEILISEARCH_WRITE_TIMEOUT = env("MEILISEARCH_WRITE_TIMEOUT")
+MEILISEARCH_READ_RETRIES = env("MEILISEARCH_READ_RETRIES")
+MEILISEARCH_BREAKER_THRESHOLD = env("MEILISEARCH_BREAKER_THRESHOLD")
+MEILISEARCH_BREAKER_COOLDOWN_SECONDS = env("MEILISEARCH_BREAKER_COOLDOWN_SECONDS")
 IIIF_HOST = env("IIIF_HOST")
+IIIF_STATIC_ROOT = env("IIIF_STATIC_ROOT")
+IIIF_STATIC_BASE_URL = env("IIIF_STATIC_BASE_URL")
+IIIF_STATIC_PUBLISH_ON_CHANGE = env("IIIF_STATIC_PUBLISH_ON_CHANGE")
+IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS = env("IIIF_STATIC_PUBLISH_DEBOUNCE_SECONDS")
 
 IIIF_PROFILES = {
     "thumbnail": {
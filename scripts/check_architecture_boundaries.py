@@ -8,7 +8,7 @@ Allowed dependency graph (non-test code):
   scribes           → common, manuscripts, symbols_structure
   annotations       → common, symbols_structure
   annotations_w3c   → common, annotations, manuscripts
-  iiif_presentation → common, annotations, manuscripts
+  iiif_presentation → common, annotations, manuscripts, annotations_w3c
   publications      → common, users
   worksets          → common, users
   users             → common
@@ -34,7 +34,7 @@ ALLOWED_DEPS: dict[str, set[str]] = {
     "scribes": {"common", "manuscripts", "symbols_structure"},
     "annotations": {"common", "symbols_structure"},
     "annotations_w3c": {"common", "annotations", "manuscripts"},
-    "iiif_presentation": {"common", "annotations", "manuscripts"},
+    "iiif_presentation": {"common", "annotations", "manuscripts", "annotations_w3c"},
     "publications": {"common", "users"},
     "worksets": {"common", "users"},
     "users": {"common"},
@@ -65,6 +65,9 @@ manage migrate --noinput
 echo "==> converting content data-dpt -> TEI (round-trip-verified)"
 manage migrate_imagetext_to_tei --apply
 
+echo "==> storing text<->region links"
+manage backfill_text_links
+
 echo "==> re-encoding TEXT-graph reverse links"
 manage reencode_graph_elementid --apply
 